@@ -27,6 +27,7 @@ def read(fname):
 
 console_scripts = [
     "slurm_resume = slurm_plugin.resume:main",
+    "slurm_resume_server = slurm_plugin.resume_server:main",
     "slurm_suspend = slurm_plugin.suspend:main",
     "slurm_fleet_status_manager = slurm_plugin.fleet_status_manager:main",
     "clustermgtd = slurm_plugin.clustermgtd:main",
@@ -9,14 +9,18 @@
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import functools
 import logging
+import threading
 import time
 from enum import Enum
 
 import boto3
 from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError, ParamValidationError
+from common import rate_limiter
+from common.metrics import AWS_API_CALLS, increment_counter
 
 LOGGER = logging.getLogger(__name__)
 
@@ -119,6 +123,18 @@ def _log_boto3_calls(params, **kwargs):
     )
 
 
+def _count_boto3_calls(event_name, **kwargs):
+    """Count the API calls of the current iteration, retries of a call are not counted."""
+    _, service, operation = event_name.split(".")[-3:]
+    increment_counter(AWS_API_CALLS, f"{service}.{operation}")
+
+
+def _rate_limit_boto3_calls(event_name, **kwargs):
+    """Wait for the rate limiter of the process, if any, before sending every attempt of an API call."""
+    _, service, operation = event_name.split(".")[-3:]
+    rate_limiter.acquire(f"{service}.{operation}")
+
+
 class Boto3Client:
     """Boto3 client Class."""
 
@@ -126,6 +142,8 @@ class Boto3Client:
         region = region if region else get_region()
         self._client = boto3.client(client_name, region_name=region, config=config if config else None)
         self._client.meta.events.register("provide-client-params.*.*", _log_boto3_calls)
+        self._client.meta.events.register("before-call.*.*", _count_boto3_calls)
+        self._client.meta.events.register("before-send.*.*", _rate_limit_boto3_calls)
 
     def _paginate_results(self, method, **kwargs):
         """
@@ -141,12 +159,56 @@ class Boto3Client:
                 yield result
 
 
+class Boto3ClientRegistry:
+    """
+    Process-wide registry of boto3 clients.
+
+    Creating a boto3 client loads the service model and creates a new connection pool, so creating a client for every
+    call wastes CPU time and TLS handshakes. Boto3 clients are thread safe, so a single client is created for every
+    service, region and config, and kept for the lifetime of the process.
+    """
+
+    _clients = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, service_name: str, region_name: str = None, config: Config = None):
+        """Return the client for the given service, region and config, creating it at the first call."""
+        # Config objects are created again at every config reload, so clients are keyed by the config options
+        config_options = getattr(config, "_user_provided_options", None)
+        key = (
+            service_name,
+            region_name,
+            repr(sorted(config_options.items()) if config_options is not None else config),
+        )
+        client = cls._clients.get(key)
+        if client is None:
+            with cls._lock:
+                client = cls._clients.get(key)
+                if client is None:
+                    LOGGER.debug("Creating boto3 client for service %s in region %s", service_name, region_name)
+                    # Client creation updates the retries options of the config in place, which would change its key
+                    client = boto3.client(service_name, region_name=region_name, config=copy.deepcopy(config))
+                    client.meta.events.register("before-call.*.*", _count_boto3_calls)
+                    client.meta.events.register("before-send.*.*", _rate_limit_boto3_calls)
+                    cls._clients[key] = client
+        return client
+
+    @classmethod
+    def clear(cls):
+        """Remove all the clients from the registry."""
+        with cls._lock:
+            cls._clients.clear()
+
+
 class Boto3Resource:
     """Boto3 resource Class."""
 
     def __init__(self, resource_name: str):
         self._resource = boto3.resource(resource_name)
         self._resource.meta.client.meta.events.register("provide-client-params.*.*", _log_boto3_calls)
+        self._resource.meta.client.meta.events.register("before-call.*.*", _count_boto3_calls)
+        self._resource.meta.client.meta.events.register("before-send.*.*", _rate_limit_boto3_calls)
 
 
 def get_region():
@@ -0,0 +1,286 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file.
+# This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Utilities to handle Slurm hostlist expressions, e.g. queue1-dy-cr1-[1-3,5]."""
+
+import re
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+_HOSTNAME_NUMERIC_SUFFIX = re.compile(r"^(.*?)(\d+)$")
+_BRACKET_GROUP = re.compile(r"\[([^\[\]]*)\]")
+
+
+def _parse_range(range_expression: str) -> Tuple[int, int, int]:
+    """
+    Parse a range, e.g. 1-3 or 5, into (first, last, width).
+
+    The width is the length of the first number if it is zero-padded, 0 otherwise.
+    Raise ValueError if the range is malformed.
+    """
+    first, _, last = range_expression.strip().partition("-")
+    first_number = int(first)
+    last_number = int(last) if last else first_number
+    first = first.strip()
+    width = len(first) if len(first) > 1 and first.startswith("0") else 0
+    return first_number, last_number, width
+
+
+def iter_ranges(ranges: str) -> Iterator[str]:
+    """
+    Lazily expand comma separated ranges, e.g. "1-3,5" -> "1", "2", "3", "5".
+
+    Zero-padded ranges keep their width, e.g. "08-10" -> "08", "09", "10".
+    Raise ValueError if a range is malformed.
+    """
+    for range_expression in ranges.split(","):
+        first, last, width = _parse_range(range_expression)
+        if width:
+            yield from (f"{number:0{width}d}" for number in range(first, last + 1))
+        else:
+            yield from map(str, range(first, last + 1))
+
+
+def count_ranges(ranges: str) -> int:
+    """Return the number of elements of comma separated ranges without expanding them."""
+    count = 0
+    for range_expression in ranges.split(","):
+        first, last, _ = _parse_range(range_expression)
+        count += max(last - first + 1, 0)
+    return count
+
+
+def _split_hostlist(hostlist: str) -> Iterator[str]:
+    """Split a hostlist on the commas that are not enclosed in brackets."""
+    depth = 0
+    start = 0
+    for index, char in enumerate(hostlist):
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            yield hostlist[start:index]
+            start = index + 1
+        if depth not in (0, 1):
+            raise ValueError(f"Invalid hostlist {hostlist}")
+    if depth:
+        raise ValueError(f"Invalid hostlist {hostlist}")
+    yield hostlist[start:]
+
+
+def _split_expression(expression: str) -> Tuple[List[str], List[str]]:
+    """Split a hostlist expression into the literal parts and the ranges enclosed in brackets."""
+    parts = _BRACKET_GROUP.split(expression)
+    literals, ranges = parts[0::2], parts[1::2]
+    if any("[" in literal or "]" in literal for literal in literals):
+        raise ValueError(f"Invalid hostlist expression {expression}")
+    return literals, ranges
+
+
+def iter_hostlist(hostlist: str) -> Iterator[str]:
+    """
+    Lazily expand a hostlist, i.e. comma separated hostlist expressions, into hostnames.
+
+    Example: "queue1-st-cr1-[1,3-4],queue1-dy-cr1-[08-10],head-node" -> queue1-st-cr1-1, queue1-st-cr1-3,
+    queue1-st-cr1-4, queue1-dy-cr1-08, queue1-dy-cr1-09, queue1-dy-cr1-10, head-node
+    Expressions with multiple bracket groups are expanded to their cartesian product, e.g. "rack[1-2]-node[1-2]".
+    Empty expressions are skipped. Raise ValueError if the hostlist is malformed.
+    """
+    for expression in _split_hostlist(hostlist):
+        expression = expression.strip()
+        if not expression:
+            continue
+        literals, ranges = _split_expression(expression)
+        if not ranges:
+            yield expression
+            continue
+        if len(ranges) == 1:
+            prefix, suffix = literals
+            yield from (prefix + number + suffix for number in iter_ranges(ranges[0]))
+            continue
+        for numbers in product(*(iter_ranges(range_list) for range_list in ranges)):
+            yield "".join(literal + number for literal, number in zip(literals, numbers)) + literals[-1]
+
+
+def expand_hostlist(hostlist: str) -> List[str]:
+    """Expand a hostlist into the list of hostnames, see iter_hostlist."""
+    return list(iter_hostlist(hostlist))
+
+
+def count_hostlist(hostlist: str) -> int:
+    """Return the number of hostnames of a hostlist without expanding it."""
+    count = 0
+    for expression in _split_hostlist(hostlist):
+        expression = expression.strip()
+        if not expression:
+            continue
+        _, ranges = _split_expression(expression)
+        expression_count = 1
+        for range_list in ranges:
+            expression_count *= count_ranges(range_list)
+        count += expression_count
+    return count
+
+
+def _split_hostname(hostname: str) -> Tuple[str, int, int]:
+    """
+    Split a hostname into prefix, numeric suffix and width of the suffix.
+
+    The width is 0 if the suffix is not zero-padded, e.g. queue1-dy-cr1-10 -> ("queue1-dy-cr1-", 10, 0),
+    queue1-dy-cr1-010 -> ("queue1-dy-cr1-", 10, 3).
+    """
+    match = _HOSTNAME_NUMERIC_SUFFIX.match(hostname)
+    if not match:
+        return hostname, -1, 0
+    prefix, suffix = match.groups()
+    width = len(suffix) if len(suffix) > 1 and suffix.startswith("0") else 0
+    return prefix, int(suffix), width
+
+
+def _get_ranges(numbers: List[int]) -> List[Tuple[int, int]]:
+    """Fold sorted and unique numbers into (first, last) ranges."""
+    ranges = []
+    for number in numbers:
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], number)
+        else:
+            ranges.append((number, number))
+    return ranges
+
+
+def _format_range(first: int, last: int, width: int) -> str:
+    if first == last:
+        return f"{first:0{width}d}"
+    return f"{first:0{width}d}-{last:0{width}d}"
+
+
+def _format_expression(prefix: str, ranges: List[str]) -> str:
+    if len(ranges) == 1 and "-" not in ranges[0]:
+        return f"{prefix}{ranges[0]}"
+    return f"{prefix}[{','.join(ranges)}]"
+
+
+def _group_hostnames(hostnames: Iterable[str]) -> Tuple[Dict[Tuple[str, int], List[Tuple[int, int]]], List[str]]:
+    """
+    Group hostnames by prefix and suffix width, folding the numeric suffixes of each group into ranges.
+
+    Hostnames without numeric suffix and hostlist expressions are returned separately and unchanged.
+    """
+    groups = {}
+    others = []
+    for hostname in dict.fromkeys(hostnames):
+        prefix, number, width = _split_hostname(hostname)
+        if number < 0 or "[" in hostname:
+            others.append(hostname)
+        else:
+            groups.setdefault((prefix, width), []).append(number)
+    return {key: _get_ranges(sorted(numbers)) for key, numbers in groups.items()}, others
+
+
+def compress_hostlist(hostnames: Iterable[str]) -> List[str]:
+    """
+    Compress hostnames into hostlist expressions, one for every hostname prefix.
+
+    Duplicated hostnames are removed and suffixes are sorted, e.g.
+    ["queue1-dy-cr1-3", "queue1-dy-cr1-1", "queue1-dy-cr1-2", "queue1-dy-cr1-5", "queue2-st-cr1-1"] ->
+    ["queue1-dy-cr1-[1-3,5]", "queue2-st-cr1-1"]
+    Zero-padded suffixes keep their width, hostnames without numeric suffix and hostlist expressions are returned
+    unchanged.
+    """
+    groups, others = _group_hostnames(hostnames)
+    expressions = [
+        _format_expression(prefix, [_format_range(first, last, width) for first, last in ranges])
+        for (prefix, width), ranges in groups.items()
+    ]
+    return expressions + others
+
+
+def _count_hosts(expression: str) -> int:
+    """Return the number of hosts of an expression, malformed expressions are counted as a single host."""
+    try:
+        return count_hostlist(expression)
+    except ValueError:
+        return 1
+
+
+class _HostlistBatcher:
+    """Pack hostlist expressions into hostlists of limited length and number of hosts."""
+
+    def __init__(self, max_length: int, max_hosts: int):
+        self._max_length = max_length
+        self._max_hosts = max_hosts
+        self.batches = []
+        self._expressions = []
+        self._length = 0
+        self._hosts = 0
+
+    def _separator_length(self):
+        return 1 if self._expressions else 0
+
+    def close_batch(self):
+        if self._expressions:
+            self.batches.append(",".join(self._expressions))
+        self._expressions, self._length, self._hosts = [], 0, 0
+
+    def add_expression(self, expression: str, hosts: int):
+        if self._hosts + hosts > self._max_hosts or (
+            self._expressions and self._length + 1 + len(expression) > self._max_length
+        ):
+            self.close_batch()
+        self._length += len(expression) + self._separator_length()
+        self._hosts += hosts
+        self._expressions.append(expression)
+
+    def add_ranges(self, prefix: str, width: int, ranges: List[Tuple[int, int]]):
+        """Add the ranges of a prefix, splitting them across batches when needed."""
+        formatted_ranges = []
+        ranges_hosts = 0
+        for first, last in ranges:
+            while first <= last:
+                hosts_available = self._max_hosts - self._hosts - ranges_hosts
+                range_last = min(last, first + hosts_available - 1)
+                formatted_range = _format_range(first, range_last, width)
+                # Length of the expression including the new range, i.e. prefix[range1,...,rangeN]
+                expression_length = len(prefix) + 2 + sum(len(r) + 1 for r in formatted_ranges) + len(formatted_range)
+                if hosts_available <= 0 or (
+                    formatted_ranges and self._length + self._separator_length() + expression_length > self._max_length
+                ):
+                    # Close the batch, the range is split if it does not fit the number of hosts available
+                    if formatted_ranges:
+                        self.add_expression(_format_expression(prefix, formatted_ranges), ranges_hosts)
+                        formatted_ranges, ranges_hosts = [], 0
+                    self.close_batch()
+                    continue
+                formatted_ranges.append(formatted_range)
+                ranges_hosts += range_last - first + 1
+                first = range_last + 1
+        if formatted_ranges:
+            self.add_expression(_format_expression(prefix, formatted_ranges), ranges_hosts)
+
+
+def batch_hostlist(hostnames: Iterable[str], max_length: int, max_hosts: int) -> List[str]:
+    """
+    Compress hostnames into hostlists, i.e. comma separated hostlist expressions, of limited size.
+
+    Every hostlist is at most max_length characters long, unless a single hostname is longer than that,
+    and contains at most max_hosts hosts, unless a hostlist expression received as input contains more hosts than
+    that. Hostlist expressions received as input are kept as they are.
+    """
+    groups, others = _group_hostnames(hostnames)
+    batcher = _HostlistBatcher(max_length, max_hosts)
+    for (prefix, width), ranges in groups.items():
+        batcher.add_ranges(prefix, width, ranges)
+    for hostname in others:
+        batcher.add_expression(hostname, _count_hosts(hostname))
+    batcher.close_batch()
+    return batcher.batches
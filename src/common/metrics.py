@@ -0,0 +1,140 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+COMMAND_CALLS = "command_calls"
+AWS_API_CALLS = "aws_api_calls"
+
+
+class IterationMetrics:
+    """
+    Duration of the phases and counters of an iteration of a daemon.
+
+    Phases are timed with the span context manager and counters are incremented with increment. Both can be used from
+    multiple threads; the duration of a phase executed more than once in the iteration is the sum of its spans.
+    """
+
+    def __init__(self):
+        self.timestamp = datetime.now(tz=timezone.utc)
+        self.phases = {}
+        self.counters = collections.defaultdict(collections.Counter)
+        self.duration = None
+        self._start_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, phase: str):
+        """Time the enclosed block as the given phase."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self._lock:
+                self.phases[phase] = self.phases.get(phase, 0) + elapsed
+
+    def increment(self, counter: str, name: str, value: int = 1):
+        """Increment the given counter for the given name, e.g. the command_calls counter of scontrol."""
+        with self._lock:
+            self.counters[counter][name] += value
+
+    def stop(self):
+        """Record the duration of the iteration."""
+        self.duration = time.perf_counter() - self._start_time
+
+    def get_phases_breakdown(self):
+        """Return the phases sorted by decreasing duration as a human readable string."""
+        return ", ".join(
+            f"{phase}: {duration:.3f}s"
+            for phase, duration in sorted(self.phases.items(), key=lambda item: item[1], reverse=True)
+        )
+
+    def to_dict(self):
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "duration": self.duration,
+            "phases": dict(self.phases),
+            "counters": {counter: dict(values) for counter, values in self.counters.items()},
+        }
+
+    def to_prometheus(self, prefix: str):
+        """Return the metrics in the Prometheus text format, as read by the textfile collector of node_exporter."""
+        lines = [
+            f"# TYPE {prefix}_iteration_timestamp_seconds gauge",
+            f"{prefix}_iteration_timestamp_seconds {self.timestamp.timestamp():.3f}",
+            f"# TYPE {prefix}_iteration_duration_seconds gauge",
+            f"{prefix}_iteration_duration_seconds {self.duration or 0:.6f}",
+            f"# TYPE {prefix}_phase_duration_seconds gauge",
+        ]
+        lines += [
+            f'{prefix}_phase_duration_seconds{{phase="{phase}"}} {duration:.6f}'
+            for phase, duration in self.phases.items()
+        ]
+        for counter, values in sorted(self.counters.items()):
+            lines.append(f"# TYPE {prefix}_{counter} gauge")
+            lines += [f'{prefix}_{counter}{{name="{name}"}} {value}' for name, value in sorted(values.items())]
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_path: str, prefix: str):
+        """
+        Write the metrics to the given file, in the Prometheus text format for .prom files and in JSON otherwise.
+
+        The file is replaced atomically so that readers never see a partially written file.
+        """
+        if file_path.endswith(".prom"):
+            content = self.to_prometheus(prefix)
+        else:
+            content = json.dumps(self.to_dict())
+        directory = os.path.dirname(os.path.abspath(file_path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, prefix=".metrics-", delete=False) as metrics_file:
+            metrics_file.write(content)
+        os.chmod(metrics_file.name, 0o644)
+        os.replace(metrics_file.name, file_path)
+
+
+_current_iteration = None
+
+
+def start_iteration() -> IterationMetrics:
+    """Start collecting the metrics of a new iteration, spans and counters of any thread are recorded in it."""
+    global _current_iteration
+    _current_iteration = IterationMetrics()
+    return _current_iteration
+
+
+def stop_iteration() -> IterationMetrics:
+    """Stop collecting the metrics of the current iteration and return them."""
+    global _current_iteration
+    metrics, _current_iteration = _current_iteration, None
+    if metrics:
+        metrics.stop()
+    return metrics
+
+
+def span(phase: str):
+    """Time the enclosed block as a phase of the current iteration, if any."""
+    metrics = _current_iteration
+    return metrics.span(phase) if metrics else contextlib.nullcontext()
+
+
+def increment_counter(counter: str, name: str, value: int = 1):
+    """Increment a counter of the current iteration, if any."""
+    metrics = _current_iteration
+    if metrics:
+        metrics.increment(counter, name, value)
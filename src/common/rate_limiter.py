@@ -0,0 +1,117 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+# Request token buckets of the EC2 API actions called by the daemons, as (bucket capacity, refill rate per second).
+# They are half of the account level buckets of the non-mutating and mutating actions documented by EC2, so that the
+# other clients of the account are left some capacity.
+DEFAULT_EC2_API_RATE_LIMITS = {
+    "ec2.DescribeCapacityReservations": (50, 10),
+    "ec2.DescribeInstances": (50, 10),
+    "ec2.DescribeInstanceStatus": (50, 10),
+    "ec2.GetConsoleOutput": (50, 10),
+    "ec2.CreateFleet": (100, 2.5),
+    "ec2.RunInstances": (100, 2.5),
+    "ec2.TerminateInstances": (100, 2.5),
+}
+
+
+def parse_rate_limits(value: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse rate limits given as comma separated <service>.<action>:<capacity>:<refill rate> entries.
+
+    The given rate limits override the default ones of the same actions.
+    """
+    rate_limits = dict(DEFAULT_EC2_API_RATE_LIMITS)
+    for entry in filter(None, (entry.strip() for entry in value.split(","))):
+        try:
+            action, capacity, refill_rate = entry.split(":")
+            rate_limits[action] = (float(capacity), float(refill_rate))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit '{entry}', expected <service>.<action>:<capacity>:<refill rate>")
+        if rate_limits[action][1] <= 0:
+            raise ValueError(f"Invalid rate limit '{entry}', the refill rate must be positive")
+    return rate_limits
+
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket rate limiter of API actions, shared by all the processes using the same state file.
+
+    Every call takes a token from the bucket of its action, refilled at a constant rate up to the bucket capacity. When
+    the bucket is empty the call waits for its token, rather than being throttled by the service and backing off.
+    Tokens are taken in advance under an exclusive lock of the state file, so concurrent callers wait in turn.
+    The state file must be writable by all the processes sharing it.
+    """
+
+    def __init__(self, state_file_path: str, rate_limits: Dict[str, Tuple[float, float]]):
+        self._state_file_path = state_file_path
+        self._rate_limits = rate_limits
+        self._lock = threading.Lock()
+
+    def _take_token(self, action: str) -> float:
+        """Take a token from the bucket of the action and return the time to wait for it."""
+        capacity, refill_rate = self._rate_limits[action]
+        file_descriptor = os.open(self._state_file_path, os.O_RDWR | os.O_CREAT, 0o666)
+        # flock does not exclude the threads sharing the process, hence the thread lock
+        with self._lock, open(file_descriptor, "r+", encoding="utf-8") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state = json.loads(state_file.read() or "{}")
+            except ValueError:
+                logger.warning("Resetting invalid rate limiter state in %s", self._state_file_path)
+                state = {}
+            current_time = time.time()
+            tokens, update_time = state.get(action, (capacity, current_time))
+            tokens = min(capacity, tokens + max(current_time - update_time, 0) * refill_rate) - 1
+            state[action] = (tokens, current_time)
+            state_file.seek(0)
+            state_file.truncate()
+            json.dump(state, state_file)
+        return -tokens / refill_rate if tokens < 0 else 0
+
+    def acquire(self, action: str) -> float:
+        """Wait until the action can be called without exceeding its rate limit and return the time waited."""
+        if action not in self._rate_limits:
+            return 0
+        wait_time = self._take_token(action)
+        if wait_time > 0:
+            logger.debug("Waiting %.3f seconds before calling %s to respect its rate limit", wait_time, action)
+            with metrics.span("api_rate_limiter_wait"):
+                time.sleep(wait_time)
+        return wait_time
+
+
+_rate_limiter = None
+
+
+def set_rate_limiter(rate_limiter: TokenBucketRateLimiter = None):
+    """Set the rate limiter of the API calls of the process, None to disable rate limiting."""
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def acquire(action: str):
+    """Wait until the action can be called without exceeding its rate limit, if a rate limiter is set."""
+    rate_limiter = _rate_limiter
+    if rate_limiter:
+        rate_limiter.acquire(action)
@@ -16,6 +16,7 @@ import functools
 import itertools
 import json
 import logging
+import marshal
 import os
 import pwd
 import shlex
@@ -28,6 +29,9 @@ import time
 from datetime import datetime, timezone
 from enum import Enum
 
+from common.hostlist import iter_ranges
+from common.metrics import COMMAND_CALLS, increment_counter
+
 log = logging.getLogger(__name__)
 
 
@@ -178,7 +182,15 @@ def _demote(user_uid, user_gid):
     return set_ids
 
 
+def _get_program_name(command):
+    """Return the name of the program executed by the command, e.g. scontrol for sudo /opt/slurm/bin/scontrol."""
+    arguments = command.split() if isinstance(command, str) else command
+    arguments = [argument for argument in arguments if argument != "sudo"]
+    return os.path.basename(arguments[0]) if arguments else ""
+
+
 def _run_command(command_function, command, env=None, raise_on_error=True, execute_as_user=None, log_error=True):
+    increment_counter(COMMAND_CALLS, _get_program_name(command))
     try:
         if env is None:
             env = {}
@@ -269,13 +281,7 @@ def convert_range_to_list(node_range):
     Example input: Input can be like one of the format: "1-3", "1-2,6", "2, 8"
     Example output: [1, 2, 3]
     """
-    return sum(
-        (
-            (list(range(*[int(j) + k for k, j in enumerate(i.split("-"))])) if "-" in i else [int(i)])
-            for i in node_range.split(",")
-        ),
-        [],
-    )
+    return [int(number) for number in iter_ranges(node_range)]
 
 
 def time_is_up(initial_time: datetime, current_time: datetime, grace_time: float):
@@ -314,6 +320,53 @@ def read_json(file_path, default=None):
             return default
 
 
+def get_files_signature(file_paths):
+    """
+    Return the signature of the given files, made of path, inode, modification time and size of every file.
+
+    The signature changes when a file is modified, replaced, created or removed, so comparing signatures detects changes
+    to the files without reading them.
+    """
+    signature = []
+    for file_path in file_paths:
+        try:
+            file_stat = os.stat(file_path)
+            signature.append((file_path, file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size))
+        except OSError:
+            signature.append((file_path, None, None, None))
+    return tuple(signature)
+
+
+def read_cached_json(file_path, cache_file_path, default=None):
+    """
+    Read json file into a dict through a marshal cache file, which is faster to load than the json file.
+
+    The cache is keyed by the signature of the json file, so it is used until the json file changes. The cache file is
+    written when missing or stale; errors reading or writing it are ignored and the json file is read instead.
+    """
+    signature = get_files_signature([os.fspath(file_path)])
+    try:
+        with open(cache_file_path, "rb") as cache_file:
+            cached_signature, content = marshal.loads(cache_file.read())  # nosec B302 written by this function
+        if cached_signature == signature:
+            return content
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    content = read_json(file_path, default)
+    if signature[0][1] is not None:
+        temporary_file_path = f"{cache_file_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_file_path, "wb") as cache_file:
+                marshal.dump((signature, content), cache_file)
+            os.replace(temporary_file_path, cache_file_path)
+        except (OSError, ValueError) as e:
+            log.debug("Unable to write cache of '%s' to '%s': %s", file_path, cache_file_path, e)
+            with contextlib.suppress(OSError):
+                os.remove(temporary_file_path)
+    return content
+
+
 def validate_subprocess_argument(argument):
     """
     Validate an argument used to build a subprocess command.
@@ -0,0 +1,105 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from array import array
+from typing import Callable, List, Tuple
+
+from slurm_plugin.slurm_resources import SlurmNode, StaticNode
+
+logger = logging.getLogger(__name__)
+
+
+class ClusterSnapshot:
+    """
+    Columnar view of the Slurm nodes of the cluster, used to classify nodes in bulk.
+
+    Every node is mapped to a signature, i.e. node type, state string, whether nodeaddr is set and whether the node
+    has a backing instance. The state predicates only depend on the signature, so they are evaluated once per
+    signature, on a representative node, rather than once per node. A cluster has a handful of distinct signatures,
+    so classifying nodes costs a lookup per node.
+    Classification is conservative: nodes whose outcome also depends on per-node data, e.g. the count of iterations
+    without backing instance or the replacement status, are returned as candidates to be checked with the per-node
+    methods, which remain the source of truth.
+    """
+
+    def __init__(self, nodes: List[SlurmNode]):
+        self.nodes = nodes
+        self._representatives: List[SlurmNode] = []
+        self._signature_ids = array("I")
+        signature_ids = {}
+        for node in nodes:
+            signature = (type(node), node.state_string, node.is_nodeaddr_set(), bool(node.instance))
+            signature_id = signature_ids.get(signature)
+            if signature_id is None:
+                signature_id = signature_ids[signature] = len(self._representatives)
+                self._representatives.append(node)
+            self._signature_ids.append(signature_id)
+        logger.debug("Built cluster snapshot of %s nodes with %s signatures", len(nodes), len(self._representatives))
+
+    def _partition(self, predicate: Callable[[SlurmNode], bool]) -> Tuple[List[SlurmNode], List[SlurmNode]]:
+        """Split the nodes into the ones whose signature satisfies the predicate and the other ones."""
+        selected_signatures = [bool(predicate(node)) for node in self._representatives]
+        selected, others = [], []
+        for node, signature_id in zip(self.nodes, self._signature_ids):
+            (selected if selected_signatures[signature_id] else others).append(node)
+        return selected, others
+
+    def find_nodes_to_check_health(
+        self, consider_drain_as_unhealthy, consider_down_as_unhealthy
+    ) -> Tuple[List[SlurmNode], List[SlurmNode]]:
+        """
+        Split the nodes into the nodes that may be unhealthy and the healthy nodes.
+
+        Nodes that may be unhealthy must be checked with is_healthy. Healthy nodes have a valid backing instance and a
+        healthy scheduler state regardless of their replacement status.
+        """
+
+        def _may_be_unhealthy(node: SlurmNode):
+            if node.is_nodeaddr_set() and not node.instance:
+                # The backing instance may be missing, depending on the count of iterations without it
+                return True
+            if isinstance(node, StaticNode) and not node.is_nodeaddr_set():
+                return True
+            if node.is_reboot_issued() or node.is_reboot_requested():
+                return False
+            return (node.is_drained() and not node.is_power_down() and consider_drain_as_unhealthy) or (
+                node.is_down() and consider_down_as_unhealthy
+            )
+
+        return self._partition(_may_be_unhealthy)
+
+    def find_bootstrap_failure_candidates(self) -> List[SlurmNode]:
+        """
+        Return the nodes that may have a bootstrap failure and must be checked with is_bootstrap_failure.
+
+        Static nodes are candidates when they are in replacement or their replacement timed out.
+        Dynamic nodes are candidates when they are powering up, resume timed out or failed to register.
+        """
+
+        def _may_be_bootstrap_failure(node: SlurmNode):
+            if isinstance(node, StaticNode):
+                # Depends on the replacement status of each node
+                return True
+            return (
+                node.is_configuring_job()
+                or node.is_powering_up_idle()
+                or node.is_powering_up()
+                or node.is_bootstrap_timeout()
+                or (node.is_invalid_slurm_registration() and not (node.is_power_down() or node.is_powering_down()))
+            )
+
+        candidates, _ = self._partition(_may_be_bootstrap_failure)
+        return [
+            node
+            for node in candidates
+            if not isinstance(node, StaticNode) or node.is_static_nodes_in_replacement or node.is_bootstrap_timeout()
+        ]
@@ -14,6 +14,8 @@ import json
 import logging
 import os
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from datetime import datetime, timezone
 from enum import Enum
@@ -26,7 +28,10 @@ from subprocess import CalledProcessError  # nosec B404
 from typing import Dict, List
 
 from botocore.config import Config
+from common import metrics, rate_limiter
+from common.rate_limiter import TokenBucketRateLimiter, parse_rate_limits
 from common.schedulers.slurm_commands import (
+    NodesInfoBackend,
     PartitionNodelistMapping,
     get_nodes_info,
     get_partitions_info,
@@ -38,13 +43,22 @@ from common.schedulers.slurm_commands import (
     update_partitions,
 )
 from common.time_utils import seconds
-from common.utils import check_command_output, read_json, sleep_remaining_loop_time, time_is_up, wait_remaining_time
+from common.utils import (
+    check_command_output,
+    get_files_signature,
+    read_json,
+    sleep_remaining_loop_time,
+    time_is_up,
+    wait_remaining_time,
+)
 from retrying import retry
 from slurm_plugin.capacity_block_manager import CapacityBlockManager
 from slurm_plugin.cluster_event_publisher import ClusterEventPublisher
+from slurm_plugin.cluster_snapshot import ClusterSnapshot
 from slurm_plugin.common import TIMESTAMP_FORMAT, ScalingStrategy, log_exception, print_with_count
 from slurm_plugin.console_logger import ConsoleLogger
 from slurm_plugin.instance_manager import InstanceManager
+from slurm_plugin.node_state_tracker import NodeStateTracker
 from slurm_plugin.slurm_resources import (
     CONFIG_FILE_DIR,
     ComputeResourceFailureEvent,
@@ -56,10 +70,13 @@ from slurm_plugin.slurm_resources import (
     StaticNode,
 )
 from slurm_plugin.task_executor import TaskExecutor
+from slurm_plugin.warm_pool import WarmPool
 
 LOOP_TIME = 60
 CONSOLE_OUTPUT_WAIT_TIME = 5 * 60
 MAXIMUM_TASK_BACKLOG = 100
+# Time to wait after reading the nodes from the scheduler for their instances to be visible in EC2
+EC2_CONSISTENCY_WAIT_TIME = 5
 log = logging.getLogger(__name__)
 compute_logger = log.getChild("console_output")
 event_logger = log.getChild("events")
@@ -136,6 +153,18 @@ class ClustermgtdConfig:
         "logging_config": os.path.join(
             os.path.dirname(__file__), "logging", "parallelcluster_clustermgtd_logging.conf"
         ),
+        "nodes_info_backend": "text",
+        "partitions_info_single_call": False,
+        "update_nodes_max_concurrency": 1,
+        "concurrent_cluster_state_retrieval": False,
+        "ec2_instance_inventory": False,
+        "ec2_instance_inventory_full_sync_interval": 600,
+        "metrics_file_path": None,
+        "slow_iteration_warning_threshold": 0,
+        "reload_config_on_change": False,
+        "ec2_api_rate_limiter_file": None,
+        "ec2_api_rate_limits": "",
+        "hostname_table_max_concurrency": 1,
         # Launch configs
         "launch_max_batch_size": 500,
         "assign_node_max_batch_size": 500,
@@ -143,6 +172,10 @@ class ClustermgtdConfig:
         "run_instances_overrides": "/opt/slurm/etc/pcluster/run_instances_overrides.json",
         "create_fleet_overrides": "/opt/slurm/etc/pcluster/create_fleet_overrides.json",
         "fleet_config_file": "/etc/parallelcluster/slurm_plugin/fleet-config.json",
+        "warm_pool_file": None,
+        "warm_pool_size": 0,
+        "warm_pool_refill_max_count": 10,
+        "warm_pool_idle_timeout": 300,
         # Terminate configs
         "terminate_max_batch_size": 1000,
         # Timeout to wait for node initialization, should be the same as ResumeTimeout
@@ -151,6 +184,9 @@ class ClustermgtdConfig:
         "terminate_down_nodes": True,
         "orphaned_instance_timeout": 300,
         "ec2_instance_missing_max_count": 0,
+        "incremental_node_maintenance": False,
+        "node_state_full_resync_interval": 600,
+        "cluster_snapshot_classification": False,
         # Health check configs
         "disable_ec2_health_check": False,
         "disable_scheduled_event_health_check": False,
@@ -158,6 +194,8 @@ class ClustermgtdConfig:
         "health_check_timeout": 180,
         "health_check_timeout_after_slurmdstarttime": 180,
         "disable_capacity_blocks_management": False,
+        "concurrent_instance_status_retrieval": False,
+        "scheduled_events_cache_ttl": 0,
         # DNS domain configs
         "hosted_zone": None,
         "dns_domain": None,
@@ -198,6 +236,11 @@ class ClustermgtdConfig:
         self.region = config.get("clustermgtd", "region")
         self.cluster_name = config.get("clustermgtd", "cluster_name")
         self.dynamodb_table = config.get("clustermgtd", "dynamodb_table")
+        self.hostname_table_max_concurrency = config.getint(
+            "clustermgtd",
+            "hostname_table_max_concurrency",
+            fallback=self.DEFAULTS.get("hostname_table_max_concurrency"),
+        )
         self.head_node_private_ip = config.get("clustermgtd", "head_node_private_ip")
         self.head_node_hostname = config.get("clustermgtd", "head_node_hostname")
         self.head_node_instance_id = config.get("clustermgtd", "instance_id", fallback="unknown")
@@ -217,7 +260,51 @@ class ClustermgtdConfig:
         if proxy != "NONE":
             self._boto3_config["proxies"] = {"https": proxy}
         self.boto3_config = Config(**self._boto3_config)
+        # State of the rate limiter of the EC2 API calls shared with the resume program, disabled when not set
+        self.ec2_api_rate_limiter_file = config.get(
+            "clustermgtd", "ec2_api_rate_limiter_file", fallback=self.DEFAULTS.get("ec2_api_rate_limiter_file")
+        )
+        self.ec2_api_rate_limits = parse_rate_limits(
+            config.get("clustermgtd", "ec2_api_rate_limits", fallback=self.DEFAULTS.get("ec2_api_rate_limits"))
+        )
         self.logging_config = config.get("clustermgtd", "logging_config", fallback=self.DEFAULTS.get("logging_config"))
+        self.nodes_info_backend = NodesInfoBackend(
+            config.get("clustermgtd", "nodes_info_backend", fallback=self.DEFAULTS.get("nodes_info_backend"))
+        )
+        self.partitions_info_single_call = config.getboolean(
+            "clustermgtd",
+            "partitions_info_single_call",
+            fallback=self.DEFAULTS.get("partitions_info_single_call"),
+        )
+        self.update_nodes_max_concurrency = config.getint(
+            "clustermgtd",
+            "update_nodes_max_concurrency",
+            fallback=self.DEFAULTS.get("update_nodes_max_concurrency"),
+        )
+        self.concurrent_cluster_state_retrieval = config.getboolean(
+            "clustermgtd",
+            "concurrent_cluster_state_retrieval",
+            fallback=self.DEFAULTS.get("concurrent_cluster_state_retrieval"),
+        )
+        self.ec2_instance_inventory = config.getboolean(
+            "clustermgtd", "ec2_instance_inventory", fallback=self.DEFAULTS.get("ec2_instance_inventory")
+        )
+        self.ec2_instance_inventory_full_sync_interval = config.getint(
+            "clustermgtd",
+            "ec2_instance_inventory_full_sync_interval",
+            fallback=self.DEFAULTS.get("ec2_instance_inventory_full_sync_interval"),
+        )
+        self.metrics_file_path = config.get(
+            "clustermgtd", "metrics_file_path", fallback=self.DEFAULTS.get("metrics_file_path")
+        )
+        self.slow_iteration_warning_threshold = config.getfloat(
+            "clustermgtd",
+            "slow_iteration_warning_threshold",
+            fallback=self.DEFAULTS.get("slow_iteration_warning_threshold"),
+        )
+        self.reload_config_on_change = config.getboolean(
+            "clustermgtd", "reload_config_on_change", fallback=self.DEFAULTS.get("reload_config_on_change")
+        )
 
     def _get_launch_config(self, config):
         """Get config options related to launching instances."""
@@ -234,6 +321,7 @@ class ClustermgtdConfig:
             "clustermgtd", "fleet_config_file", fallback=self.DEFAULTS.get("fleet_config_file")
         )
         self.fleet_config = read_json(fleet_config_file)
+        self.config_files.append(fleet_config_file)
 
         # run_instances_overrides_file and create_fleet_overrides_file contain a json with the following format:
         # {
@@ -249,10 +337,23 @@ class ClustermgtdConfig:
             "clustermgtd", "run_instances_overrides", fallback=self.DEFAULTS.get("run_instances_overrides")
         )
         self.run_instances_overrides = read_json(run_instances_overrides_file, default={})
+        self.config_files.append(run_instances_overrides_file)
         create_fleet_overrides_file = config.get(
             "clustermgtd", "create_fleet_overrides", fallback=self.DEFAULTS.get("create_fleet_overrides")
         )
         self.create_fleet_overrides = read_json(create_fleet_overrides_file, default={})
+        self.config_files.append(create_fleet_overrides_file)
+        # Pool of instances launched ahead of time for every compute resource, taken by the resume program
+        self.warm_pool_file = config.get("clustermgtd", "warm_pool_file", fallback=self.DEFAULTS.get("warm_pool_file"))
+        self.warm_pool_size = config.getint(
+            "clustermgtd", "warm_pool_size", fallback=self.DEFAULTS.get("warm_pool_size")
+        )
+        self.warm_pool_refill_max_count = config.getint(
+            "clustermgtd", "warm_pool_refill_max_count", fallback=self.DEFAULTS.get("warm_pool_refill_max_count")
+        )
+        self.warm_pool_idle_timeout = config.getint(
+            "clustermgtd", "warm_pool_idle_timeout", fallback=self.DEFAULTS.get("warm_pool_idle_timeout")
+        )
 
     def _get_health_check_config(self, config):
         self.disable_ec2_health_check = config.getboolean(
@@ -281,6 +382,14 @@ class ClustermgtdConfig:
             "disable_capacity_blocks_management",
             fallback=self.DEFAULTS.get("disable_capacity_block_management"),
         )
+        self.concurrent_instance_status_retrieval = config.getboolean(
+            "clustermgtd",
+            "concurrent_instance_status_retrieval",
+            fallback=self.DEFAULTS.get("concurrent_instance_status_retrieval"),
+        )
+        self.scheduled_events_cache_ttl = config.getint(
+            "clustermgtd", "scheduled_events_cache_ttl", fallback=self.DEFAULTS.get("scheduled_events_cache_ttl")
+        )
 
     def _get_terminate_config(self, config):
         """Get config option related to instance termination and node replacement."""
@@ -311,6 +420,21 @@ class ClustermgtdConfig:
             fallback=self.DEFAULTS.get("ec2_instance_missing_max_count"),
         )
         self.disable_nodes_on_insufficient_capacity = self.insufficient_capacity_timeout > 0
+        self.incremental_node_maintenance = config.getboolean(
+            "clustermgtd",
+            "incremental_node_maintenance",
+            fallback=self.DEFAULTS.get("incremental_node_maintenance"),
+        )
+        self.node_state_full_resync_interval = config.getint(
+            "clustermgtd",
+            "node_state_full_resync_interval",
+            fallback=self.DEFAULTS.get("node_state_full_resync_interval"),
+        )
+        self.cluster_snapshot_classification = config.getboolean(
+            "clustermgtd",
+            "cluster_snapshot_classification",
+            fallback=self.DEFAULTS.get("cluster_snapshot_classification"),
+        )
 
     def _get_dns_config(self, config):
         """Get config option related to Route53 DNS domain."""
@@ -350,6 +474,8 @@ class ClustermgtdConfig:
         log.info("Reading %s", config_file_path)
         self._config = ConfigParser()
         self._config.read_file(open(config_file_path, "r"))
+        # Files the config is read from, used to detect changes to the config
+        self.config_files = [config_file_path]
 
         # Get config settings
         self._get_basic_config(self._config)
@@ -401,6 +527,8 @@ class ClusterManager:
         self._event_publisher = None
         self._partition_nodelist_mapping_instance = None
         self._capacity_block_manager = None
+        self._node_state_tracker = None
+        self._warm_pool = None
         self.set_config(config)
 
     def set_config(self, config: ClustermgtdConfig):
@@ -426,6 +554,10 @@ class ClusterManager:
             self._instance_manager = self._initialize_instance_manager(config)
             self._console_logger = self._initialize_console_logger(config)
             self._capacity_block_manager = self._initialize_capacity_block_manager(config)
+            # Health evaluation depends on the config, so all the nodes are evaluated again after a config change
+            self._node_state_tracker = self._initialize_node_state_tracker(config)
+            self._warm_pool = WarmPool(config.warm_pool_file) if config.warm_pool_file else None
+            rate_limiter.set_rate_limiter(self._initialize_rate_limiter(config))
 
     def shutdown(self):
         if self._task_executor:
@@ -448,6 +580,7 @@ class ClusterManager:
             run_instances_overrides=config.run_instances_overrides,
             create_fleet_overrides=config.create_fleet_overrides,
             fleet_config=config.fleet_config,
+            hostname_table_max_concurrency=config.hostname_table_max_concurrency,
         )
 
     def _initialize_executor(self, config):
@@ -480,6 +613,18 @@ class ClusterManager:
             region=config.region, fleet_config=config.fleet_config, boto3_config=config.boto3_config
         )
 
+    @staticmethod
+    def _initialize_rate_limiter(config):
+        if not config.ec2_api_rate_limiter_file:
+            return None
+        return TokenBucketRateLimiter(config.ec2_api_rate_limiter_file, config.ec2_api_rate_limits)
+
+    @staticmethod
+    def _initialize_node_state_tracker(config):
+        if not config.incremental_node_maintenance:
+            return None
+        return NodeStateTracker(full_resync_interval=config.node_state_full_resync_interval)
+
     def _update_compute_fleet_status(self, status):
         log.info("Updating compute fleet status from %s to %s", self._compute_fleet_status, status)
         self._compute_fleet_status_manager.update_status(status)
@@ -515,7 +660,10 @@ class ClusterManager:
         log.info("Managing cluster...")
         self._current_time = datetime.now(tz=timezone.utc)
 
-        self._compute_fleet_status = self._compute_fleet_status_manager.get_status(fallback=self._compute_fleet_status)
+        with metrics.span("compute_fleet_status"):
+            self._compute_fleet_status = self._compute_fleet_status_manager.get_status(
+                fallback=self._compute_fleet_status
+            )
         log.info("Current compute fleet status: %s", self._compute_fleet_status)
 
         if not self._config.disable_all_cluster_management:
@@ -528,40 +676,38 @@ class ClusterManager:
                 # Initialize PartitionNodelistMapping singleton
                 self._partition_nodelist_mapping_instance = PartitionNodelistMapping.instance()
 
-                # Get node states for nodes in inactive and active partitions
-                # Initialize nodes
-                try:
-                    log.info("Retrieving nodes info from the scheduler")
-                    nodes = self._get_node_info_with_retry()
-                    log.debug("Nodes: %s", nodes)
-                    partitions_name_map, compute_resource_nodes_map = self._parse_scheduler_nodes_data(nodes)
-                except Exception as e:
-                    log.error(
-                        "Unable to get partition/node info from slurm, no other action can be performed. Sleeping... "
-                        "Exception: %s",
-                        e,
-                    )
-                    return
-
-                # Get all non-terminating instances in EC2
-                try:
-                    cluster_instances = self._get_ec2_instances()
-                except ClusterManager.EC2InstancesInfoUnavailable:
-                    log.error("Unable to get instances info from EC2, no other action can be performed. Sleeping...")
+                # Get node states for nodes in inactive and active partitions and all non-terminating instances in EC2
+                if self._config.concurrent_cluster_state_retrieval:
+                    scheduler_state, cluster_instances = self._get_cluster_state_concurrently()
+                else:
+                    scheduler_state = self._get_scheduler_state()
+                    cluster_instances = self._get_ec2_state() if scheduler_state is not None else None
+                if scheduler_state is None or cluster_instances is None:
                     return
+                nodes, nodes_info_time, partitions_name_map, compute_resource_nodes_map = scheduler_state
+                with metrics.span("update_nodes_with_ec2_info"):
+                    self._update_slurm_nodes_with_ec2_info(nodes, cluster_instances)
+                    self._recheck_nodes_without_instance(nodes, cluster_instances, nodes_info_time)
                 log.debug("Current cluster instances in EC2: %s", cluster_instances)
                 partitions = list(partitions_name_map.values())
-                self._update_slurm_nodes_with_ec2_info(nodes, cluster_instances)
-                self._event_publisher.publish_compute_node_events(nodes, cluster_instances)
+                with metrics.span("publish_compute_node_events"):
+                    self._event_publisher.publish_compute_node_events(nodes, cluster_instances)
                 # Handle inactive partition and terminate backing instances
-                self._clean_up_inactive_partition(partitions)
+                with metrics.span("clean_up_inactive_partitions"):
+                    self._clean_up_inactive_partition(partitions)
                 # Perform health check actions
                 if not self._config.disable_all_health_checks:
-                    self._perform_health_check_actions(partitions)
+                    with metrics.span("health_check_actions"):
+                        self._perform_health_check_actions(partitions)
                 # Maintain slurm nodes
-                self._maintain_nodes(partitions_name_map, compute_resource_nodes_map)
+                with metrics.span("maintain_nodes"):
+                    self._maintain_nodes(partitions_name_map, compute_resource_nodes_map)
                 # Clean up orphaned instances
-                self._terminate_orphaned_instances(cluster_instances)
+                with metrics.span("terminate_orphaned_instances"):
+                    self._terminate_orphaned_instances(cluster_instances)
+                if self._warm_pool:
+                    with metrics.span("maintain_warm_pool"):
+                        self._maintain_warm_pool(cluster_instances, partitions)
             elif self._compute_fleet_status in {
                 ComputeFleetStatus.STOPPED,
             }:
@@ -569,10 +715,61 @@ class ClusterManager:
                 # partitions and EC2 instances to take into account changes that can be manually
                 # applied by the user by re-activating Slurm partitions.
                 # When partition are INACTIVE, always try to reset nodeaddr/nodehostname to avoid issue.
-                self._maintain_nodes_down()
+                with metrics.span("maintain_nodes_down"):
+                    self._maintain_nodes_down()
 
         # Write clustermgtd heartbeat to file
-        self._write_timestamp_to_file()
+        with metrics.span("write_heartbeat"):
+            self._write_timestamp_to_file()
+
+    def _get_scheduler_state(self):
+        """Get nodes and partitions from the scheduler, return None if they cannot be retrieved."""
+        start_time = time.perf_counter()
+        try:
+            log.info("Retrieving nodes info from the scheduler")
+            with metrics.span("get_scheduler_state"):
+                nodes = self._get_node_info_with_retry(backend=self._config.nodes_info_backend)
+                nodes_info_time = datetime.now(tz=timezone.utc)
+                log.debug("Nodes: %s", nodes)
+                partitions_name_map, compute_resource_nodes_map = self._parse_scheduler_nodes_data(
+                    nodes, single_call=self._config.partitions_info_single_call
+                )
+        except Exception as e:
+            log.error(
+                "Unable to get partition/node info from slurm, no other action can be performed. Sleeping... "
+                "Exception: %s",
+                e,
+            )
+            return None
+        log.info("Retrieved nodes info from the scheduler in %.3f seconds", time.perf_counter() - start_time)
+        return nodes, nodes_info_time, partitions_name_map, compute_resource_nodes_map
+
+    def _get_ec2_state(self):
+        """Get all non-terminating instances in EC2, return None if they cannot be retrieved."""
+        start_time = time.perf_counter()
+        try:
+            with metrics.span("get_ec2_state"):
+                cluster_instances = self._get_ec2_instances()
+        except ClusterManager.EC2InstancesInfoUnavailable:
+            log.error("Unable to get instances info from EC2, no other action can be performed. Sleeping...")
+            return None
+        log.info("Retrieved instances info from EC2 in %.3f seconds", time.perf_counter() - start_time)
+        return cluster_instances
+
+    def _get_cluster_state_concurrently(self):
+        """
+        Get the scheduler state and the EC2 state in parallel.
+
+        Instances launched after the EC2 instances are retrieved may already be assigned to nodes when the nodes are
+        read from the scheduler, their instances are retrieved again by _recheck_nodes_without_instance.
+        """
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            ec2_state = executor.submit(self._get_ec2_state)
+            scheduler_state = self._get_scheduler_state()
+            cluster_instances = ec2_state.result()
+        log.info("Retrieved cluster state from the scheduler and EC2 in %.3f seconds", time.perf_counter() - start_time)
+        return scheduler_state, cluster_instances
 
     def _write_timestamp_to_file(self):
         """Write timestamp into shared file so compute nodes can determine if head node is online."""
@@ -584,13 +781,13 @@ class ClusterManager:
 
     @staticmethod
     @retry(stop_max_attempt_number=2, wait_fixed=1000)
-    def _get_node_info_with_retry(nodes=""):
-        return get_nodes_info(nodes)
+    def _get_node_info_with_retry(nodes="", backend=NodesInfoBackend.TEXT):
+        return get_nodes_info(nodes, backend=backend)
 
     @staticmethod
     @retry(stop_max_attempt_number=2, wait_fixed=1000)
-    def _get_partitions_info_with_retry() -> Dict[str, SlurmPartition]:
-        return {part.name: part for part in get_partitions_info()}
+    def _get_partitions_info_with_retry(single_call=False) -> Dict[str, SlurmPartition]:
+        return {part.name: part for part in get_partitions_info(single_call=single_call)}
 
     def _clean_up_inactive_partition(self, partitions):
         """Terminate all other instances associated with nodes in INACTIVE partition directly through EC2."""
@@ -644,19 +841,58 @@ class ClusterManager:
 
         Call is made by filtering on tags and includes non-terminating instances only
         Instances returned will not contain instances previously terminated in _clean_up_inactive_partition
+        When the EC2 instance inventory is enabled, only the instances changed since the previous call are described
         """
-        # After reading Slurm nodes wait for 5 seconds to let instances appear in EC2 describe_instances call
-        time.sleep(5)
         log.info("Retrieving list of EC2 instances associated with the cluster")
         try:
+            if self._config.ec2_instance_inventory:
+                return self._instance_manager.get_cluster_instances_from_inventory(
+                    full_sync_interval=self._config.ec2_instance_inventory_full_sync_interval
+                )
             return self._instance_manager.get_cluster_instances(include_head_node=False, alive_states_only=True)
         except Exception as e:
             log.error("Failed when getting instance info from EC2 with exception %s", e)
             raise ClusterManager.EC2InstancesInfoUnavailable
 
+    @log_exception(
+        log, "checking again nodes without backing instance", catch_exception=Exception, raise_on_error=False
+    )
+    def _recheck_nodes_without_instance(self, nodes, cluster_instances, nodes_info_time):
+        """
+        Describe again the instances of the nodes with nodeaddr set but without backing instance.
+
+        Instances launched right before reading the nodes from the scheduler may not be visible in EC2 yet.
+        Rather than waiting before every describe_instances call, wait only when some nodes have no backing instance,
+        until EC2_CONSISTENCY_WAIT_TIME seconds passed since the nodes were read, then describe only their instances.
+        Instances found are added to cluster_instances and assigned to the nodes.
+        """
+        nodeaddrs = [node.nodeaddr for node in nodes if node.is_nodeaddr_set() and not node.instance]
+        if not nodeaddrs:
+            return
+        wait_remaining_time(time.sleep, total_wait_time=EC2_CONSISTENCY_WAIT_TIME, wait_start_time=nodes_info_time)
+        log.info("Retrieving EC2 instances for nodes without backing instance: %s", print_with_count(nodeaddrs))
+        cluster_instance_ids = {instance.id for instance in cluster_instances}
+        new_instances = [
+            instance
+            for instance in self._instance_manager.get_cluster_instances_by_private_ips(nodeaddrs)
+            if instance.id not in cluster_instance_ids
+        ]
+        if new_instances:
+            log.info("Found EC2 instances for nodes without backing instance: %s", print_with_count(new_instances))
+            self._update_slurm_nodes_with_ec2_info(nodes, new_instances)
+            cluster_instances.extend(new_instances)
+
     @log_exception(log, "maintaining slurm nodes down", catch_exception=Exception, raise_on_error=False)
     def _maintain_nodes_down(self):
-        update_all_partitions(PartitionStatus.INACTIVE, reset_node_addrs_hostname=True)
+        if self._node_state_tracker:
+            # All the compute nodes are powered down, so all the nodes are evaluated again when the fleet restarts
+            self._node_state_tracker.reset()
+        update_all_partitions(
+            PartitionStatus.INACTIVE,
+            reset_node_addrs_hostname=True,
+            single_call=self._config.partitions_info_single_call,
+            max_concurrency=self._config.update_nodes_max_concurrency,
+        )
         self._instance_manager.terminate_all_compute_nodes(self._config.terminate_max_batch_size)
 
     @log_exception(log, "performing health check action", catch_exception=Exception, raise_on_error=False)
@@ -668,7 +904,9 @@ class ClusterManager:
             return
         # Get health states for instances that might be considered unhealthy
         unhealthy_instances_status = self._instance_manager.get_unhealthy_cluster_instance_status(
-            list(instance_id_to_active_node_map.keys())
+            list(instance_id_to_active_node_map.keys()),
+            concurrent_retrieval=self._config.concurrent_instance_status_retrieval,
+            scheduled_events_cache_ttl=self._config.scheduled_events_cache_ttl,
         )
         log.debug("Cluster instances that might be considered unhealthy: %s", unhealthy_instances_status)
         if unhealthy_instances_status:
@@ -743,12 +981,13 @@ class ClusterManager:
             node.is_being_replaced = self._is_node_being_replaced(node)
             node._is_replacement_timeout = self._is_node_replacement_timeout(node)
 
-    def _find_unhealthy_slurm_nodes(self, slurm_nodes):
+    def _find_unhealthy_slurm_nodes(self, slurm_nodes, nodes_to_evaluate=None):
         """
         Find unhealthy static slurm nodes and dynamic slurm nodes.
 
         Check and return slurm nodes with unhealthy and healthy scheduler state, grouping unhealthy nodes
         by node type (static/dynamic).
+        Only nodes_to_evaluate are checked if provided, all the slurm_nodes are still used to manage Capacity Blocks.
         """
         unhealthy_static_nodes = []
         unhealthy_dynamic_nodes = []
@@ -768,7 +1007,7 @@ class ClusterManager:
             else:
                 log.debug("No nodes found associated with inactive Capacity Blocks.")
 
-        for node in slurm_nodes:
+        for node in self._get_nodes_to_check_health(slurm_nodes if nodes_to_evaluate is None else nodes_to_evaluate):
             if not node.is_healthy(
                 consider_drain_as_unhealthy=self._config.terminate_drain_nodes,
                 consider_down_as_unhealthy=self._config.terminate_down_nodes,
@@ -801,6 +1040,19 @@ class ClusterManager:
             ice_compute_resources_and_nodes_map,
         )
 
+    def _get_nodes_to_check_health(self, slurm_nodes):
+        """Return the nodes to check with is_healthy, skipping the healthy ones when snapshot classification is on."""
+        if not self._config.cluster_snapshot_classification:
+            return slurm_nodes
+        nodes_to_check, healthy_nodes = ClusterSnapshot(slurm_nodes).find_nodes_to_check_health(
+            self._config.terminate_drain_nodes, self._config.terminate_down_nodes
+        )
+        # Healthy nodes have a valid backing instance, set it and forget them as done by is_backing_instance_valid
+        for node in healthy_nodes:
+            node.ec2_backing_instance_valid = True
+            self._nodes_without_backing_instance_count_map.pop(node.name, None)
+        return nodes_to_check
+
     def _increase_partitions_protected_failure_count(self, bootstrap_failure_nodes):
         """Keep count of boostrap failures."""
         for node in bootstrap_failure_nodes:
@@ -830,7 +1082,11 @@ class ClusterManager:
                 instances_to_terminate, terminate_batch_size=self._config.terminate_max_batch_size
             )
         log.info("Setting unhealthy dynamic nodes to down and power_down.")
-        set_nodes_power_down([node.name for node in unhealthy_dynamic_nodes], reason="Scheduler health check failed")
+        set_nodes_power_down(
+            [node.name for node in unhealthy_dynamic_nodes],
+            reason="Scheduler health check failed",
+            max_concurrency=self._config.update_nodes_max_concurrency,
+        )
 
     @log_exception(log, "maintaining powering down nodes", raise_on_error=False)
     def _handle_powering_down_nodes(self, slurm_nodes):
@@ -845,7 +1101,10 @@ class ClusterManager:
         ]
         if powering_down_nodes:
             log.info("Resetting powering down nodes: %s", print_with_count(powering_down_nodes))
-            reset_nodes(nodes=[node.name for node in powering_down_nodes])
+            reset_nodes(
+                nodes=[node.name for node in powering_down_nodes],
+                max_concurrency=self._config.update_nodes_max_concurrency,
+            )
             instances_to_terminate = [node.instance.id for node in powering_down_nodes if node.instance]
             log.info("Terminating instances that are backing powering down nodes")
             self._instance_manager.delete_instances(
@@ -881,7 +1140,12 @@ class ClusterManager:
         # Set nodes into down state so jobs can be requeued immediately
         try:
             log.info("Setting unhealthy static nodes to DOWN")
-            reset_nodes(node_list, state="down", reason="Static node maintenance: unhealthy node is being replaced")
+            reset_nodes(
+                node_list,
+                state="down",
+                reason="Static node maintenance: unhealthy node is being replaced",
+                max_concurrency=self._config.update_nodes_max_concurrency,
+            )
         except Exception as e:
             log.error("Encountered exception when setting unhealthy static nodes into down state: %s", e)
 
@@ -927,21 +1191,27 @@ class ClusterManager:
         log.info("Performing node maintenance actions")
         # Retrieve nodes from Slurm partitions in ACTIVE state
         active_nodes = self._find_active_nodes(partitions_name_map)
+        # When incremental node maintenance is enabled, skip stable nodes not changed since the previous iteration
+        nodes_to_evaluate = (
+            self._node_state_tracker.get_nodes_to_evaluate(active_nodes, self._current_time)
+            if self._node_state_tracker
+            else active_nodes
+        )
 
         # Update self.static_nodes_in_replacement by removing from the set any node that is up or in maintenance
-        self._update_static_nodes_in_replacement(active_nodes)
+        self._update_static_nodes_in_replacement(nodes_to_evaluate)
         log.info(
             "Following nodes are currently in replacement: %s", print_with_count(self._static_nodes_in_replacement)
         )
         # terminate powering down instances
-        self._handle_powering_down_nodes(active_nodes)
+        self._handle_powering_down_nodes(nodes_to_evaluate)
 
         # retrieve and manage unhealthy nodes
         (
             unhealthy_dynamic_nodes,
             unhealthy_static_nodes,
             ice_compute_resources_and_nodes_map,
-        ) = self._find_unhealthy_slurm_nodes(active_nodes)
+        ) = self._find_unhealthy_slurm_nodes(active_nodes, nodes_to_evaluate=nodes_to_evaluate)
         if unhealthy_dynamic_nodes:
             log.info("Found the following unhealthy dynamic nodes: %s", print_with_count(unhealthy_dynamic_nodes))
             self._handle_unhealthy_dynamic_nodes(unhealthy_dynamic_nodes)
@@ -951,19 +1221,50 @@ class ClusterManager:
 
         # evaluate partitions to put in protected mode and ICEs nodes to terminate
         if self._is_protected_mode_enabled():
-            self._handle_protected_mode_process(active_nodes, partitions_name_map)
+            self._handle_protected_mode_process(nodes_to_evaluate, partitions_name_map)
         if self._config.disable_nodes_on_insufficient_capacity:
             self._handle_ice_nodes(ice_compute_resources_and_nodes_map, compute_resource_nodes_map)
-        self._handle_failed_health_check_nodes_in_replacement(active_nodes)
+        self._handle_failed_health_check_nodes_in_replacement(nodes_to_evaluate)
+
+        if self._node_state_tracker:
+            unhealthy_nodes = set(unhealthy_dynamic_nodes) | set(unhealthy_static_nodes)
+            self._node_state_tracker.update_stable_nodes(
+                node.name for node in nodes_to_evaluate if node not in unhealthy_nodes and self._is_node_stable(node)
+            )
+
+    def _is_node_stable(self, node: SlurmNode):
+        """
+        Check if an evaluated healthy node can be skipped by the next iterations until it changes.
+
+        A node is stable if it has a valid backing instance, it is up and it has no pending transition: nodes powering
+        up or down, rebooting, in replacement, failing health checks or waiting for the backing instance to appear in
+        EC2 are evaluated at every iteration, so that their time-based timeouts are checked.
+        """
+        return (
+            node.ec2_backing_instance_valid is True
+            and node.is_up()
+            and not node.is_powering_up()
+            and not node.is_powering_down_with_nodeaddr()
+            and not node.is_reboot_requested()
+            and not node.is_reboot_issued()
+            and not node.is_invalid_slurm_registration()
+            and not node.is_failing_health_check
+            and node.name not in self._static_nodes_in_replacement
+            and node.name not in self._nodes_without_backing_instance_count_map
+        )
 
     @log_exception(log, "terminating orphaned instances", catch_exception=Exception, raise_on_error=False)
     def _terminate_orphaned_instances(self, cluster_instances):
         """Terminate instance not associated with any node and running longer than orphaned_instance_timeout."""
         log.info("Checking for orphaned instance")
+        # Instances in the warm pool, or just taken from it, are not associated with any node yet
+        warm_pool_instance_ids = self._warm_pool.get_instance_ids() if self._warm_pool else set()
         instances_to_terminate = []
         for instance in cluster_instances:
-            if not instance.slurm_node and time_is_up(
-                instance.launch_time, self._current_time, self._config.orphaned_instance_timeout
+            if (
+                not instance.slurm_node
+                and instance.id not in warm_pool_instance_ids
+                and time_is_up(instance.launch_time, self._current_time, self._config.orphaned_instance_timeout)
             ):
                 instances_to_terminate.append(instance.id)
 
@@ -973,6 +1274,56 @@ class ClusterManager:
                 instances_to_terminate, terminate_batch_size=self._config.terminate_max_batch_size
             )
 
+    @log_exception(log, "maintaining warm pool", catch_exception=Exception, raise_on_error=False)
+    def _maintain_warm_pool(self, cluster_instances, partitions):
+        """
+        Terminate the instances idle in the warm pool for too long and refill the pool of every compute resource.
+
+        Pooled instances are only taken to resume powered down dynamic nodes, so the pool of a compute resource never
+        exceeds its powered down dynamic nodes, keeping its instances within its MaxCount. Static-only compute resources
+        and the compute resources of inactive partitions have no pool. At most warm_pool_refill_max_count instances
+        are launched per iteration, and none for the compute resources with insufficient capacity.
+        Instances taken from the pool stay protected from the orphaned instances termination for
+        orphaned_instance_timeout seconds.
+        """
+        powered_down_dynamic_nodes = {
+            node.name: node
+            for partition in partitions
+            if not partition.is_inactive()
+            for node in partition.slurm_nodes
+            if isinstance(node, DynamicNode) and node.is_powered_down()
+        }
+        target_sizes = defaultdict(int)
+        for node in powered_down_dynamic_nodes.values():
+            key = (node.queue_name, node.compute_resource_name)
+            target_sizes[key] = min(target_sizes[key] + 1, self._config.warm_pool_size)
+        instances_to_terminate, missing_sizes = self._warm_pool.maintain(
+            target_sizes,
+            alive_instance_ids={instance.id for instance in cluster_instances},
+            idle_timeout=self._config.warm_pool_idle_timeout,
+            claim_timeout=self._config.orphaned_instance_timeout,
+            current_time=self._current_time,
+        )
+        if instances_to_terminate:
+            self._instance_manager.delete_instances(
+                instances_to_terminate, terminate_batch_size=self._config.terminate_max_batch_size
+            )
+        remaining_count = self._config.warm_pool_refill_max_count
+        for (queue, compute_resource), missing_size in missing_sizes.items():
+            if remaining_count <= 0:
+                break
+            if missing_size <= 0 or compute_resource in self._insufficient_capacity_compute_resources.get(queue, {}):
+                continue
+            count = min(missing_size, remaining_count)
+            remaining_count -= count
+            try:
+                instances = self._instance_manager.launch_warm_pool_instances(queue, compute_resource, count)
+            except Exception as e:
+                log.error("Failed to launch %s warm pool instances for %s/%s: %s", count, queue, compute_resource, e)
+                continue
+            log.info("Adding %s instances to the warm pool of %s/%s", len(instances), queue, compute_resource)
+            self._warm_pool.add(queue, compute_resource, instances, self._current_time)
+
     def _enter_protected_mode(self, partitions_to_disable):
         """Entering protected mode if no active running job in queue."""
         # Place partitions into inactive
@@ -1084,7 +1435,11 @@ class ClusterManager:
                     health_check_type,
                     nodes_name_failing_health_check,
                 )
-                set_nodes_drain(nodes_name_failing_health_check, reason=f"Node failing {health_check_type}")
+                set_nodes_drain(
+                    nodes_name_failing_health_check,
+                    reason=f"Node failing {health_check_type}",
+                    max_concurrency=self._config.update_nodes_max_concurrency,
+                )
             if len(nodes_name_recently_rebooted) > 0:
                 log.info(
                     "Ignoring health check failure due to reboot for nodes: %s",
@@ -1125,10 +1480,10 @@ class ClusterManager:
         self._handle_nodes_failing_health_check(nodes_failing_health_check, health_check_type)
 
     @staticmethod
-    def _parse_scheduler_nodes_data(nodes):
+    def _parse_scheduler_nodes_data(nodes, single_call=False):
         try:
             compute_resource_nodes_map = {}
-            partitions_name_map = ClusterManager._get_partitions_info_with_retry()
+            partitions_name_map = ClusterManager._get_partitions_info_with_retry(single_call=single_call)
             log.debug("Partitions: %s", partitions_name_map)
             for node in nodes:
                 partitions_name_map[node.queue_name].slurm_nodes.append(node)
@@ -1185,6 +1540,8 @@ class ClusterManager:
 
     def _find_bootstrap_failure_nodes(self, slurm_nodes):
         bootstrap_failure_nodes = []
+        if self._config.cluster_snapshot_classification:
+            slurm_nodes = ClusterSnapshot(slurm_nodes).find_bootstrap_failure_candidates()
         for node in slurm_nodes:
             if node.is_bootstrap_failure(
                 self._config.ec2_instance_missing_max_count, self._nodes_without_backing_instance_count_map
@@ -1291,6 +1648,7 @@ class ClusterManager:
                 set_nodes_down(
                     node_list,
                     reason=f"(Code:{error_code})Temporarily disabling node due to insufficient capacity",
+                    max_concurrency=self._config.update_nodes_max_concurrency,
                 )
 
     def _find_insufficient_capacity_timeout_expired_compute_resources(
@@ -1328,38 +1686,87 @@ class ClusterManager:
             set_nodes_power_down(
                 node_names,
                 reason="Enabling node since insufficient capacity timeout expired",
+                max_concurrency=self._config.update_nodes_max_concurrency,
             )
 
 
+def _report_iteration_metrics(config, iteration_metrics: metrics.IterationMetrics):
+    """Write the metrics of the iteration to the metrics file and warn if the iteration took most of the loop time."""
+    if config.metrics_file_path:
+        try:
+            iteration_metrics.write(config.metrics_file_path, prefix="clustermgtd")
+        except Exception as e:
+            log.warning("Unable to write iteration metrics to %s.\nException: %s", config.metrics_file_path, e)
+    if 0 < config.slow_iteration_warning_threshold * config.loop_time < iteration_metrics.duration:
+        log.warning(
+            "Iteration took %.3f seconds, more than %.0f%% of the loop time of %s seconds. Phases: %s. Counters: %s",
+            iteration_metrics.duration,
+            config.slow_iteration_warning_threshold * 100,
+            config.loop_time,
+            iteration_metrics.get_phases_breakdown(),
+            iteration_metrics.to_dict()["counters"],
+        )
+
+
+def _reload_config(config_file, config, cluster_manager, config_signature):
+    """
+    Read again the daemon config and return it with the signature of its files.
+
+    When reload_config_on_change is set, the config is read again only if its files changed since the previous reload.
+    """
+    signature = get_files_signature(config.config_files) if config.reload_config_on_change else None
+    if signature is not None and signature == config_signature:
+        return config, config_signature
+    try:
+        with metrics.span("reload_config"):
+            config = ClustermgtdConfig(config_file)
+        cluster_manager.set_config(config)
+        return config, signature
+    except Exception as e:
+        log.warning("Unable to reload daemon config from %s, using previous one.\nException: %s", config_file, e)
+        return config, config_signature
+
+
+def _configure_logging(config, logging_signature):
+    """
+    Configure the root logger from the logging config and return the signature of the logging config file.
+
+    When reload_config_on_change is set, logging is configured again only if the logging config file changed, so
+    that the log handlers are not recreated at every iteration.
+    """
+    signature = get_files_signature([config.logging_config]) if config.reload_config_on_change else None
+    if signature is not None and signature == logging_signature:
+        return logging_signature
+    try:
+        fileConfig(config.logging_config, disable_existing_loggers=False)
+        return signature
+    except Exception as e:
+        log.warning(
+            "Unable to configure logging from %s, using default logging settings.\nException: %s",
+            config.logging_config,
+            e,
+        )
+        return logging_signature
+
+
 def _run_clustermgtd(config_file):
     """Run clustermgtd actions."""
     config = ClustermgtdConfig(config_file)
     cluster_manager = ClusterManager(config=config)
+    config_signature = logging_signature = None
     try:
         while True:
             # Get loop start time
             start_time = datetime.now(tz=timezone.utc)
+            iteration_metrics = metrics.start_iteration()
             # Get program config
-            try:
-                config = ClustermgtdConfig(config_file)
-                cluster_manager.set_config(config)
-            except Exception as e:
-                log.warning(
-                    "Unable to reload daemon config from %s, using previous one.\nException: %s",
-                    config_file,
-                    e,
-                )
+            config, config_signature = _reload_config(config_file, config, cluster_manager, config_signature)
             # Configure root logger
-            try:
-                fileConfig(config.logging_config, disable_existing_loggers=False)
-            except Exception as e:
-                log.warning(
-                    "Unable to configure logging from %s, using default logging settings.\nException: %s",
-                    config.logging_config,
-                    e,
-                )
+            logging_signature = _configure_logging(config, logging_signature)
             # Manage cluster
             cluster_manager.manage_cluster()
+            metrics.stop_iteration()
+            _report_iteration_metrics(config, iteration_metrics)
             sleep_remaining_loop_time(config.loop_time, start_time)
     finally:
         cluster_manager.shutdown()
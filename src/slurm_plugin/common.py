@@ -35,6 +35,17 @@ ComputeInstanceDescriptor = TypedDict(
 )
 
 
+class CreateFleetInstancesInfo(Enum):
+    """How the network info of the instances launched with CreateFleet, not returned by the API, is retrieved."""
+
+    # Describe the instances of every fleet
+    DESCRIBE = "describe"
+    # Describe the instances of the fleets launched in parallel with shared calls
+    BATCHED_DESCRIBE = "batched-describe"
+    # Do not retrieve the network info, only valid when node addresses are not updated
+    SKIP = "skip"
+
+
 class ScalingStrategy(Enum):
     ALL_OR_NOTHING = "all-or-nothing"
     BEST_EFFORT = "best-effort"
@@ -14,9 +14,10 @@ import logging
 import re
 from typing import Any, Callable, Iterable
 
-import boto3
 from slurm_plugin.common import ComputeInstanceDescriptor, TaskController
 
+from aws.common import Boto3ClientRegistry
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +28,7 @@ class ConsoleLogger:
         self._region = region
         self._console_logging_enabled = enabled
         self._console_output_consumer = console_output_consumer
-        self._boto3_client_factory = lambda service_name: boto3.session.Session().client(
+        self._boto3_client_factory = lambda service_name: Boto3ClientRegistry.get_client(
             service_name, region_name=region
         )
 
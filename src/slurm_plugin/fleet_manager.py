@@ -12,18 +12,32 @@ import contextlib
 import copy
 import logging
 import secrets
+import threading
 import time
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
 
-import boto3
 from botocore.exceptions import ClientError
 from common.ec2_utils import get_private_ip_address_and_dns_name
-from common.utils import setup_logging_filter
+from common.utils import grouper, setup_logging_filter
 from retrying import retry
-from slurm_plugin.common import print_with_count
+from slurm_plugin.common import CreateFleetInstancesInfo, print_with_count
+
+from aws.common import Boto3ClientRegistry
 
 logger = logging.getLogger(__name__)
 
+# Attempts to describe the instances launched with CreateFleet until their network info is available
+INSTANCES_INFO_RETRIES = 5
+# Wait for the instances launched with CreateFleet to be available in EC2 before describing them
+INSTANCES_INFO_INITIAL_WAIT = 0.1
+# Requests of the instances info resolver due within this number of seconds are described together
+INSTANCES_INFO_COALESCE_WINDOW = 0.1
+# Max number of instance ids of a describe_instances call of the instances info resolver
+INSTANCES_INFO_MAX_BATCH_SIZE = 1000
+
 
 class EC2Instance:
     def __init__(self, id, private_ip, hostname, all_private_ips, launch_time):
@@ -82,6 +96,21 @@ class LaunchInstancesError(Exception):
         super().__init__(message)
 
 
+def _is_throttling_error(exception):
+    return "Request limit exceeded" in str(exception)
+
+
+@dataclass
+class LaunchRecord:
+    """Outcome of an attempt to launch instances, recorded by the fleet manager."""
+
+    requested_count: int
+    launched_count: int
+    duration: float
+    throttled: bool = False
+    error_code: str = None
+
+
 class FleetManagerFactory:
     @staticmethod
     def get_manager(
@@ -94,6 +123,7 @@ class FleetManagerFactory:
         all_or_nothing,
         run_instances_overrides,
         create_fleet_overrides,
+        create_fleet_instances_info: CreateFleetInstancesInfo = CreateFleetInstancesInfo.DESCRIBE,
     ):
         try:
             queue_config = fleet_config[queue]
@@ -120,6 +150,7 @@ class FleetManagerFactory:
                 compute_resource_config,
                 all_or_nothing,
                 create_fleet_overrides.get(queue, {}).get(compute_resource, {}),
+                instances_info=create_fleet_instances_info,
             )
         elif api == "run-instances":
             return Ec2RunInstancesManager(
@@ -161,6 +192,8 @@ class FleetManager(ABC):
         self._compute_resource_config = compute_resource_config
         self._all_or_nothing = all_or_nothing
         self._launch_overrides = launch_overrides
+        # Every attempt to launch instances, including the ones retried on throttling
+        self.launch_records = []
 
     @abstractmethod
     def _evaluate_launch_params(self, count):
@@ -176,7 +209,7 @@ class FleetManager(ABC):
         wait_exponential_max=300000,
         wait_jitter_max=500,
         stop_max_attempt_number=10,
-        retry_on_exception=lambda exception: "Request limit exceeded" in str(exception),
+        retry_on_exception=_is_throttling_error,
     )
     def launch_ec2_instances(self, count, job_id=None):
         """
@@ -191,7 +224,31 @@ class FleetManager(ABC):
                 job_id_logging_filter.set_custom_value(job_id)
 
             launch_params = self._evaluate_launch_params(count)
-            assigned_nodes = self._launch_instances(launch_params)
+            start_time = time.monotonic()
+            try:
+                assigned_nodes = self._launch_instances(launch_params)
+            except Exception as e:
+                self.launch_records.append(
+                    LaunchRecord(
+                        requested_count=count,
+                        launched_count=0,
+                        duration=time.monotonic() - start_time,
+                        throttled=_is_throttling_error(e),
+                        error_code=(
+                            e.response.get("Error", {}).get("Code")
+                            if isinstance(e, ClientError)
+                            else getattr(e, "code", type(e).__name__)
+                        ),
+                    )
+                )
+                raise
+            self.launch_records.append(
+                LaunchRecord(
+                    requested_count=count,
+                    launched_count=len(assigned_nodes.get("Instances")),
+                    duration=time.monotonic() - start_time,
+                )
+            )
             if len(assigned_nodes.get("Instances")) > 0:
                 logger.info(
                     "Launched the following instances %s",
@@ -199,7 +256,10 @@ class FleetManager(ABC):
                 )
                 logger.debug("Launched instances information: %s", assigned_nodes.get("Instances"))
 
-        return [EC2Instance.from_describe_instance_data(instance_info) for instance_info in assigned_nodes["Instances"]]
+        return [self._to_ec2_instance(instance_info) for instance_info in assigned_nodes["Instances"]]
+
+    def _to_ec2_instance(self, instance_info) -> EC2Instance:
+        return EC2Instance.from_describe_instance_data(instance_info)
 
 
 class Ec2RunInstancesManager(FleetManager):
@@ -272,6 +332,7 @@ class Ec2CreateFleetManager(FleetManager):
         compute_resource_config,
         all_or_nothing,
         launch_overrides,
+        instances_info: CreateFleetInstancesInfo = CreateFleetInstancesInfo.DESCRIBE,
     ):
         super().__init__(
             cluster_name,
@@ -283,6 +344,7 @@ class Ec2CreateFleetManager(FleetManager):
             all_or_nothing,
             launch_overrides,
         )
+        self._instances_info = instances_info
 
     def _evaluate_template_overrides(self) -> list:
         """Build and return the list of Launch Template Overrides to be applied in the CreateFleet request.
@@ -400,7 +462,17 @@ class Ec2CreateFleetManager(FleetManager):
                 )
 
             instance_ids = [inst_id for instance in instances for inst_id in instance["InstanceIds"]]
-            instances, partial_instance_ids = self._get_instances_info(instance_ids)
+            if self._instances_info == CreateFleetInstancesInfo.SKIP:
+                launch_time = datetime.now(tz=timezone.utc)
+                instances = [{"InstanceId": instance_id, "LaunchTime": launch_time} for instance_id in instance_ids]
+                partial_instance_ids = []
+            elif self._instances_info == CreateFleetInstancesInfo.BATCHED_DESCRIBE:
+                ec2_client = Boto3ClientRegistry.get_client("ec2", region_name=self._region, config=self._boto3_config)
+                instances, partial_instance_ids = InstancesInfoResolver.instance().get_instances_info(
+                    ec2_client, instance_ids
+                )
+            else:
+                instances, partial_instance_ids = self._get_instances_info(instance_ids)
             if partial_instance_ids:
                 logger.error("Unable to retrieve instance info for instances: %s", partial_instance_ids)
 
@@ -426,16 +498,16 @@ class Ec2CreateFleetManager(FleetManager):
         instances = []
         partial_instance_ids = instance_ids
 
-        retries = 5
+        retries = INSTANCES_INFO_RETRIES
         attempt_count = 0
         # Wait for instances to be available in EC2
-        time.sleep(0.1)
+        time.sleep(INSTANCES_INFO_INITIAL_WAIT)
         while attempt_count < retries and partial_instance_ids:
             complete_instances, partial_instance_ids = self._retrieve_instances_info_from_ec2(partial_instance_ids)
             instances.extend(complete_instances)
             attempt_count += 1
             if attempt_count < retries:
-                time.sleep(0.3 * 2**attempt_count + (secrets.randbelow(500) / 1000))
+                time.sleep(_get_instances_info_backoff(attempt_count))
 
         return instances, partial_instance_ids
 
@@ -445,29 +517,157 @@ class Ec2CreateFleetManager(FleetManager):
 
         :return list of instances with complete information and list of IDs for instances with incomplete information
         """
-        complete_instances = []
-        partial_instance_ids = []
+        if not instance_ids:
+            return [], []
+        ec2_client = Boto3ClientRegistry.get_client("ec2", region_name=self._region, config=self._boto3_config)
+        return _describe_instances_info(ec2_client, instance_ids)
+
+    def _to_ec2_instance(self, instance_info) -> EC2Instance:
+        if self._instances_info == CreateFleetInstancesInfo.SKIP:
+            return EC2Instance(instance_info["InstanceId"], None, None, set(), instance_info["LaunchTime"])
+        return super()._to_ec2_instance(instance_info)
+
+
+def _get_instances_info_backoff(attempt_count):
+    return 0.3 * 2**attempt_count + (secrets.randbelow(500) / 1000)
+
+
+def _describe_instances_info(ec2_client, instance_ids: list):
+    """
+    Describe the given instances and verify to have required info.
 
-        if instance_ids:
+    :return list of instances with complete information and list of IDs for instances with incomplete information
+    """
+    complete_instances = []
+    partial_instance_ids = []
+    try:
+        paginator = ec2_client.get_paginator("describe_instances")
+        response_iterator = paginator.paginate(InstanceIds=instance_ids)
+        filtered_iterator = response_iterator.search("Reservations[].Instances[]")
+
+        for instance_info in filtered_iterator:
             try:
-                ec2_client = boto3.client("ec2", region_name=self._region, config=self._boto3_config)
-                paginator = ec2_client.get_paginator("describe_instances")
-                response_iterator = paginator.paginate(InstanceIds=instance_ids)
-                filtered_iterator = response_iterator.search("Reservations[].Instances[]")
-
-                for instance_info in filtered_iterator:
-                    try:
-                        # Try to build EC2Instance objects using all the required fields
-                        EC2Instance.from_describe_instance_data(instance_info)
-                        complete_instances.append(instance_info)
-                    except KeyError as e:
-                        logger.debug("Unable to retrieve instance info: %s", e)
-                        partial_instance_ids.append(instance_info["InstanceId"])
-            except ClientError as e:
+                # Try to build EC2Instance objects using all the required fields
+                EC2Instance.from_describe_instance_data(instance_info)
+                complete_instances.append(instance_info)
+            except KeyError as e:
                 logger.debug("Unable to retrieve instance info: %s", e)
-                partial_instance_ids.extend(instance_ids)
+                partial_instance_ids.append(instance_info["InstanceId"])
+    except ClientError as e:
+        logger.debug("Unable to retrieve instance info: %s", e)
+        partial_instance_ids.extend(instance_ids)
+
+    return complete_instances, partial_instance_ids
+
+
+class _InstancesInfoRequest:
+    """Instances of a fleet to describe, completed once their info is available or the attempts are exhausted."""
+
+    def __init__(self, ec2_client, instance_ids: list):
+        self.ec2_client = ec2_client
+        self.instances = []
+        self.partial_instance_ids = list(instance_ids)
+        self.attempt_count = 0
+        self.next_attempt_time = time.monotonic() + INSTANCES_INFO_INITIAL_WAIT
+        self.done = threading.Event()
+
+    def update(self, complete_instances: dict):
+        """Keep the described instances of the request and schedule the next attempt for the incomplete ones."""
+        self.instances.extend(
+            complete_instances[instance_id]
+            for instance_id in self.partial_instance_ids
+            if instance_id in complete_instances
+        )
+        self.partial_instance_ids = [
+            instance_id for instance_id in self.partial_instance_ids if instance_id not in complete_instances
+        ]
+        self.attempt_count += 1
+        if not self.partial_instance_ids or self.attempt_count >= INSTANCES_INFO_RETRIES:
+            self.done.set()
+        else:
+            self.next_attempt_time = time.monotonic() + _get_instances_info_backoff(self.attempt_count)
+
 
-        return complete_instances, partial_instance_ids
+class InstancesInfoResolver:
+    """
+    Retrieve the info of the instances launched by concurrent fleets with shared describe_instances calls.
+
+    The fleets launched in parallel submit their instances and wait for their info. A resolver thread describes
+    together the instances of all the requests due within INSTANCES_INFO_COALESCE_WINDOW seconds, and describes again
+    the instances with incomplete info with the same backoff as a single fleet. The thread stops once all the
+    requests are completed.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._pending_requests = []
+        self._condition = threading.Condition()
+        self._thread = None
+
+    @staticmethod
+    def instance():
+        """Return the singleton InstancesInfoResolver instance."""
+        with InstancesInfoResolver._instance_lock:
+            if not InstancesInfoResolver._instance:
+                InstancesInfoResolver._instance = InstancesInfoResolver()
+            return InstancesInfoResolver._instance
+
+    def get_instances_info(self, ec2_client, instance_ids: list):
+        """
+        Wait for the info of the given instances.
+
+        :return list of instances with complete information and list of IDs for instances with incomplete information
+        """
+        if not instance_ids:
+            return [], []
+        request = _InstancesInfoRequest(ec2_client, instance_ids)
+        with self._condition:
+            self._pending_requests.append(request)
+            if not self._thread:
+                self._thread = threading.Thread(target=self._resolve_requests, name="instances-info", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        request.done.wait()
+        return request.instances, request.partial_instance_ids
+
+    def _resolve_requests(self):
+        requests = []
+        while True:
+            with self._condition:
+                requests.extend(self._pending_requests)
+                self._pending_requests.clear()
+                if not requests:
+                    self._thread = None
+                    return
+                wait_time = min(request.next_attempt_time for request in requests) - time.monotonic()
+                if wait_time > 0:
+                    # New requests wake up the thread, so that they are scheduled as well
+                    self._condition.wait(wait_time)
+                    continue
+            due_time = time.monotonic() + INSTANCES_INFO_COALESCE_WINDOW
+            self._describe([request for request in requests if request.next_attempt_time <= due_time])
+            requests = [request for request in requests if not request.done.is_set()]
+
+    def _describe(self, requests):
+        requests_by_client = defaultdict(list)
+        for request in requests:
+            requests_by_client[request.ec2_client].append(request)
+        for ec2_client, client_requests in requests_by_client.items():
+            instance_ids = [instance_id for request in client_requests for instance_id in request.partial_instance_ids]
+            logger.info("Describing %s instances of %s fleets", len(instance_ids), len(client_requests))
+            complete_instances = {}
+            try:
+                for batch_instance_ids in grouper(instance_ids, INSTANCES_INFO_MAX_BATCH_SIZE):
+                    described_instances, _ = _describe_instances_info(ec2_client, list(batch_instance_ids))
+                    complete_instances.update(
+                        (instance_info["InstanceId"], instance_info) for instance_info in described_instances
+                    )
+            except Exception as e:
+                logger.error("Unable to retrieve instance info: %s", e)
+            for request in client_requests:
+                request.update(complete_instances)
 
 
 def run_instances(region, boto3_config, run_instances_kwargs):
@@ -483,7 +683,7 @@ def run_instances(region, boto3_config, run_instances_kwargs):
         return run_instances(region=region, boto3_config=boto3_config, **run_instances_kwargs)
     except ImportError:
         logger.info("Launching instances with run_instances API. Parameters: %s", run_instances_kwargs)
-        ec2_client = boto3.client("ec2", region_name=region, config=boto3_config)
+        ec2_client = Boto3ClientRegistry.get_client("ec2", region_name=region, config=boto3_config)
         return ec2_client.run_instances(**run_instances_kwargs)
 
 
@@ -500,5 +700,5 @@ def create_fleet(region, boto3_config, create_fleet_kwargs):
         return create_fleet(region=region, boto3_config=boto3_config, **create_fleet_kwargs)
     except ImportError:
         logger.info("Launching instances with create_fleet API. Parameters: %s", create_fleet_kwargs)
-        ec2_client = boto3.client("ec2", region_name=region, config=boto3_config)
+        ec2_client = Boto3ClientRegistry.get_client("ec2", region_name=region, config=boto3_config)
         return ec2_client.create_fleet(**create_fleet_kwargs)
@@ -0,0 +1,193 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import logging
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+from common.utils import grouper
+from slurm_plugin.common import ComputeInstanceDescriptor
+from slurm_plugin.fleet_manager import EC2Instance
+
+logger = logging.getLogger(__name__)
+
+# Max number of items of a BatchWriteItem call
+BATCH_WRITE_MAX_ITEMS = 25
+# Max number of keys of a BatchGetItem call
+BATCH_GET_MAX_KEYS = 100
+# Attempts of a BatchGetItem call until all its keys are processed
+BATCH_GET_MAX_ATTEMPTS = 5
+# Seconds spent retrying a BatchWriteItem call until all its items are processed, the nodes whose items are still not
+# written after that are failed
+BATCH_WRITE_MAX_RETRY_TIME = 300
+
+
+class HostnameTableStoreError(Exception):
+    """Raised when error occurs while writing into hostname table."""
+
+
+class UnprocessedItemsError(HostnameTableStoreError):
+    """Raised when items are left unprocessed by DynamoDB after all the attempts."""
+
+    def __init__(self, node_names):
+        super().__init__(f"Unprocessed items for nodes {node_names}")
+        self.node_names = node_names
+
+
+def _get_backoff(attempt_count):
+    return min(0.05 * 2**attempt_count, 2) + secrets.randbelow(100) / 1000
+
+
+class HostnameTable:
+    """
+    Hostname table in DynamoDB, mapping the compute nodes to their instances.
+
+    Items are written and read with batch calls run by up to max_concurrency threads. The items left unprocessed by
+    DynamoDB, e.g. when the table is throttled, are retried with backoff, for up to write_retry_time seconds when
+    written. Mappings already written by this object are not written again.
+    """
+
+    def __init__(
+        self,
+        ddb_resource,
+        table_name: str,
+        max_concurrency: int = 1,
+        get_batch_size: int = BATCH_GET_MAX_KEYS,
+        write_retry_time: float = BATCH_WRITE_MAX_RETRY_TIME,
+    ):
+        self._ddb_resource = ddb_resource
+        self._table_name = table_name
+        self._max_concurrency = max(max_concurrency, 1)
+        self._get_batch_size = get_batch_size
+        self._write_retry_time = write_retry_time
+        self._stored_items = {}
+        self._stored_items_lock = threading.Lock()
+
+    @property
+    def table_name(self):
+        return self._table_name
+
+    def _map(self, function: Callable, batches: List) -> Iterable:
+        if self._max_concurrency == 1 or len(batches) <= 1:
+            return map(function, batches)
+        with ThreadPoolExecutor(max_workers=min(self._max_concurrency, len(batches))) as executor:
+            return list(executor.map(function, batches))
+
+    def store_instances(self, nodes: Dict[str, EC2Instance], head_node_private_ip: str, head_node_hostname: str):
+        """
+        Store the instances assigned to the given nodes.
+
+        :raises UnprocessedItemsError if some items cannot be written
+        """
+        # Note: These items will never be removed, but the put requests
+        # will replace old items if the hostnames are already associated with an old instance_id.
+        items = [
+            {
+                "Id": nodename,
+                "InstanceId": instance.id,
+                "HeadNodePrivateIp": head_node_private_ip,
+                "HeadNodeHostname": head_node_hostname,
+            }
+            for nodename, instance in nodes.items()
+        ]
+        with self._stored_items_lock:
+            items_to_write = [item for item in items if self._stored_items.get(item["Id"]) != item]
+        if len(items_to_write) < len(items):
+            logger.info("Skipping %s unchanged items of the hostname table", len(items) - len(items_to_write))
+
+        batches = [list(batch) for batch in grouper(items_to_write, BATCH_WRITE_MAX_ITEMS)]
+        unprocessed_node_names = [
+            node_name for batch_node_names in self._map(self._write_batch, batches) for node_name in batch_node_names
+        ]
+        if unprocessed_node_names:
+            raise UnprocessedItemsError(unprocessed_node_names)
+
+    def _write_batch(self, items: List[dict]) -> List[str]:
+        """Write a batch of items, returning the names of the nodes whose items are left unprocessed."""
+        request_items = {self._table_name: [{"PutRequest": {"Item": item}} for item in items]}
+        deadline = time.monotonic() + self._write_retry_time
+        attempt_count = 0
+        while True:
+            response = self._ddb_resource.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems") or {}
+            attempt_count += 1
+            if not request_items:
+                break
+            logger.warning(
+                "%s items of the hostname table not processed, attempt %s",
+                len(request_items.get(self._table_name, [])),
+                attempt_count,
+            )
+            remaining_time = deadline - time.monotonic()
+            if remaining_time <= 0:
+                break
+            time.sleep(min(_get_backoff(attempt_count), remaining_time))
+
+        unprocessed_node_names = [
+            request["PutRequest"]["Item"]["Id"] for request in request_items.get(self._table_name, [])
+        ]
+        with self._stored_items_lock:
+            self._stored_items.update((item["Id"], item) for item in items if item["Id"] not in unprocessed_node_names)
+        return unprocessed_node_names
+
+    def get_instance_ids(self, node_names: Iterable[str], max_count: int) -> Iterable[ComputeInstanceDescriptor]:
+        """
+        Return the instance ids of up to max_count of the given nodes.
+
+        Nodes are requested max_concurrency batches at a time, so that no more than max_count nodes are requested.
+        """
+        node_names = iter(node_names)
+        unprocessed_node_names = []
+        while max_count > 0:
+            requested_node_names = list(
+                itertools.islice(node_names, min(max_count, self._max_concurrency * self._get_batch_size))
+            )
+            if not requested_node_names:
+                break
+            batches = [list(batch) for batch in grouper(requested_node_names, self._get_batch_size)]
+            for items, batch_unprocessed_node_names in self._map(self._get_batch, batches):
+                unprocessed_node_names.extend(batch_unprocessed_node_names)
+                # Because we can't assume that a node name exists in the DynamoDB table, we only decrement the
+                # remaining number of nodes when we actually return an instance ID.
+                for item in items:
+                    yield {"Name": item.get("Id"), "InstanceId": item.get("InstanceId")}
+                    max_count -= 1
+        if unprocessed_node_names:
+            logger.error("Unable to retrieve the instance ids of nodes %s from DynamoDB", unprocessed_node_names)
+
+    def _get_batch(self, node_names: List[str]):
+        """Get a batch of items, returning the items and the names of the nodes whose keys are left unprocessed."""
+        request_items = {
+            self._table_name: {
+                "Keys": [{"Id": str(node_name)} for node_name in node_names],
+                "ProjectionExpression": "Id, InstanceId",
+            }
+        }
+        items = []
+        for attempt_count in range(BATCH_GET_MAX_ATTEMPTS):
+            if attempt_count:
+                time.sleep(_get_backoff(attempt_count))
+            response = self._ddb_resource.batch_get_item(RequestItems=request_items)
+            items.extend(response.get("Responses", {}).get(self._table_name, []))
+            request_items = response.get("UnprocessedKeys") or {}
+            if not request_items:
+                break
+            logger.warning(
+                "%s keys of the hostname table not processed, attempt %s",
+                len(request_items.get(self._table_name, {}).get("Keys", [])),
+                attempt_count + 1,
+            )
+
+        return items, [key["Id"] for key in request_items.get(self._table_name, {}).get("Keys", [])]
@@ -9,14 +9,17 @@
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
 
-import itertools
+import copy
 import logging
 
 # A nosec comment is appended to the following line in order to disable the B404 check.
 # In this file the input of the module subprocess is trusted.
 import subprocess  # nosec B404
+import threading
 from collections import defaultdict
-from typing import Dict, Iterable, List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Set
 
 import boto3
 from botocore.config import Config
@@ -24,11 +27,20 @@ from botocore.exceptions import ClientError
 from common.ec2_utils import get_private_ip_address_and_dns_name
 from common.schedulers.slurm_commands import get_nodes_info, update_nodes
 from common.utils import grouper, setup_logging_filter
-from slurm_plugin.common import ComputeInstanceDescriptor, ScalingStrategy, log_exception, print_with_count
+from slurm_plugin.common import (
+    ComputeInstanceDescriptor,
+    CreateFleetInstancesInfo,
+    ScalingStrategy,
+    log_exception,
+    print_with_count,
+)
 from slurm_plugin.fleet_manager import EC2Instance, FleetManagerFactory
+from slurm_plugin.hostname_table import HostnameTable, HostnameTableStoreError, UnprocessedItemsError
+from slurm_plugin.launch_batch_sizer import AdaptiveLaunchBatchSizer
 from slurm_plugin.slurm_resources import (
     EC2_HEALTH_STATUS_UNHEALTHY_STATES,
     EC2_INSTANCE_ALIVE_STATES,
+    EC2_INSTANCE_TERMINATED_STATES,
     EC2_SCHEDULED_EVENT_CODES,
     EC2InstanceHealthState,
     InvalidNodenameError,
@@ -37,6 +49,9 @@ from slurm_plugin.slurm_resources import (
     SlurmResumeJob,
     parse_nodename,
 )
+from slurm_plugin.warm_pool import WarmPool
+
+from aws.common import Boto3ClientRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -44,10 +59,10 @@ logger = logging.getLogger(__name__)
 # Corresponds to MaxResults in describe_instances and describe_instance_status API
 BOTO3_PAGINATION_PAGE_SIZE = 1000
 BOTO3_MAX_BATCH_SIZE = 50
-
-
-class HostnameTableStoreError(Exception):
-    """Raised when error occurs while writing into hostname table."""
+# Max number of values of a describe_instances filter
+BOTO3_MAX_FILTER_VALUES = 200
+# Launch time look back of the EC2 instance inventory delta sync, covering EC2 eventual consistency
+INVENTORY_LAUNCH_TIME_LOOKBACK = timedelta(minutes=5)
 
 
 class HostnameDnsStoreError(Exception):
@@ -85,14 +100,29 @@ class InstanceManager:
         run_instances_overrides: dict = None,
         create_fleet_overrides: dict = None,
         job_level_scaling: bool = False,
+        launch_max_concurrency: int = 1,
+        pipelined_node_assignment: bool = False,
+        warm_pool: WarmPool = None,
+        launch_batch_sizer: AdaptiveLaunchBatchSizer = None,
+        create_fleet_instances_info: CreateFleetInstancesInfo = CreateFleetInstancesInfo.DESCRIBE,
+        hostname_table_max_concurrency: int = 1,
+        get_cancelled_nodes: Callable[[], Set[str]] = None,
     ):
         """Initialize InstanceLauncher with required attributes."""
         self._region = region
         self._cluster_name = cluster_name
         self._boto3_config = boto3_config
         self.failed_nodes = {}
+        self._failed_nodes_lock = threading.Lock()
         self._ddb_resource = boto3.resource("dynamodb", region_name=region, config=boto3_config)
         self._table = self._ddb_resource.Table(table_name) if table_name else None
+        # Max number of batch calls to the hostname table run in parallel
+        self._hostname_table_max_concurrency = hostname_table_max_concurrency
+        self._hostname_table = (
+            HostnameTable(self._ddb_resource, table_name, max_concurrency=hostname_table_max_concurrency)
+            if table_name
+            else None
+        )
         self._hosted_zone = hosted_zone
         self._dns_domain = dns_domain
         self._use_private_hostname = use_private_hostname
@@ -107,6 +137,23 @@ class InstanceManager:
         self.nodes_assigned_to_instances = {}
         self.unused_launched_instances = {}
         self.job_level_scaling = job_level_scaling
+        # Max number of compute resources for which instances are launched in parallel
+        self._launch_max_concurrency = launch_max_concurrency
+        # Assign the instances launched with best-effort strategy to nodes as soon as every batch is launched
+        self._pipelined_node_assignment = pipelined_node_assignment
+        # Instances launched ahead of time by clustermgtd, used before launching new instances
+        self._warm_pool = warm_pool
+        # Batch size of the best-effort launches adapted to the outcome of the previous launches
+        self._launch_batch_sizer = launch_batch_sizer
+        self._create_fleet_instances_info = create_fleet_instances_info
+        # Nodes whose resume was cancelled while launching, whose instances are terminated rather than assigned
+        self._get_cancelled_nodes = get_cancelled_nodes
+        self._cancelled_nodes_instances = []
+        self._cancelled_nodes_instances_lock = threading.Lock()
+        self._instance_inventory = {}
+        self._inventory_sync_time = None
+        self._inventory_full_sync_time = None
+        self._scheduled_events_cache = None
 
     def _clear_failed_nodes(self):
         """Clear and reset failed nodes list."""
@@ -117,22 +164,11 @@ class InstanceManager:
     )
     def _store_assigned_hostnames(self, nodes):
         logger.info("Saving assigned hostnames in DynamoDB")
-        if not self._table:
+        if not self._hostname_table:
             raise HostnameTableStoreError("Empty table name configuration parameter.")
 
         if nodes:
-            with self._table.batch_writer() as batch_writer:
-                for nodename, instance in nodes.items():
-                    # Note: These items will never be removed, but the put_item method
-                    # will replace old items if the hostnames are already associated with an old instance_id.
-                    batch_writer.put_item(
-                        Item={
-                            "Id": nodename,
-                            "InstanceId": instance.id,
-                            "HeadNodePrivateIp": self._head_node_private_ip,
-                            "HeadNodeHostname": self._head_node_hostname,
-                        }
-                    )
+            self._hostname_table.store_instances(nodes, self._head_node_private_ip, self._head_node_hostname)
 
     @log_exception(logger, "updating DNS records", raise_on_error=True, exception_to_raise=HostnameDnsStoreError)
     def _update_dns_hostnames(self, nodes, update_dns_batch_size=500):
@@ -171,7 +207,7 @@ class InstanceManager:
             boto3_config = self._boto3_config.merge(
                 Config(retries={"max_attempts": max([configured_retry, 4]), "mode": "standard"})
             )
-            route53_client = boto3.client("route53", region_name=self._region, config=boto3_config)
+            route53_client = Boto3ClientRegistry.get_client("route53", region_name=self._region, config=boto3_config)
             changes_batch_size = min(update_dns_batch_size, 500)
             for changes_batch in grouper(changes, changes_batch_size):
                 route53_client.change_resource_record_sets(
@@ -204,7 +240,7 @@ class InstanceManager:
 
     def delete_instances(self, instance_ids_to_terminate, terminate_batch_size):
         """Terminate corresponding EC2 instances."""
-        ec2_client = boto3.client("ec2", region_name=self._region, config=self._boto3_config)
+        ec2_client = Boto3ClientRegistry.get_client("ec2", region_name=self._region, config=self._boto3_config)
         logger.info("Terminating instances %s", print_with_count(instance_ids_to_terminate))
         for instances in grouper(instance_ids_to_terminate, terminate_batch_size):
             try:
@@ -217,7 +253,9 @@ class InstanceManager:
                 logger.error("Failed when terminating instances %s with error %s", print_with_count(instances), e)
 
     @log_exception(logger, "getting health status for unhealthy EC2 instances", raise_on_error=True)
-    def get_unhealthy_cluster_instance_status(self, cluster_instance_ids):
+    def get_unhealthy_cluster_instance_status(
+        self, cluster_instance_ids, concurrent_retrieval=False, scheduled_events_cache_ttl=0
+    ):
         """
         Get health status for unhealthy EC2 instances.
 
@@ -226,8 +264,10 @@ class InstanceManager:
         Reason being number of unhealthy instances is in general lower than number of instances in cluster
         In addition, while specifying instance ids, the max result returned by 1 API call is 100
         As opposed to 1000 when not specifying instance ids and using filters
+        The 3 calls are run in parallel when concurrent_retrieval is set.
+        Scheduled events change rarely, so they are retrieved at most once every scheduled_events_cache_ttl seconds.
         """
-        instance_health_states = {}
+        cluster_instance_ids = set(cluster_instance_ids)
         health_check_filters = {
             "instance_status": {
                 "Filters": [{"Name": "instance-status.status", "Values": list(EC2_HEALTH_STATUS_UNHEALTHY_STATES)}]
@@ -237,14 +277,24 @@ class InstanceManager:
             },
             "scheduled_events": {"Filters": [{"Name": "event.code", "Values": EC2_SCHEDULED_EVENT_CODES}]},
         }
-        for health_check_type in health_check_filters:
-            ec2_client = boto3.client("ec2", region_name=self._region, config=self._boto3_config)
-            paginator = ec2_client.get_paginator("describe_instance_status")
-            response_iterator = paginator.paginate(
-                PaginationConfig={"PageSize": BOTO3_PAGINATION_PAGE_SIZE}, **health_check_filters[health_check_type]
-            )
-            filtered_iterator = response_iterator.search("InstanceStatuses")
-            for instance_status in filtered_iterator:
+        if concurrent_retrieval:
+            with ThreadPoolExecutor(max_workers=len(health_check_filters)) as executor:
+                futures = [
+                    executor.submit(
+                        self._describe_instance_status, health_check_type, filters, scheduled_events_cache_ttl
+                    )
+                    for health_check_type, filters in health_check_filters.items()
+                ]
+                instance_statuses_by_health_check_type = [future.result() for future in futures]
+        else:
+            instance_statuses_by_health_check_type = [
+                self._describe_instance_status(health_check_type, filters, scheduled_events_cache_ttl)
+                for health_check_type, filters in health_check_filters.items()
+            ]
+
+        instance_health_states = {}
+        for instance_statuses in instance_statuses_by_health_check_type:
+            for instance_status in instance_statuses:
                 instance_id = instance_status.get("InstanceId")
                 if instance_id in cluster_instance_ids and instance_id not in instance_health_states:
                     instance_health_states[instance_id] = EC2InstanceHealthState(
@@ -257,6 +307,39 @@ class InstanceManager:
 
         return list(instance_health_states.values())
 
+    def _describe_instance_status(self, health_check_type, filters, scheduled_events_cache_ttl):
+        """
+        Describe the status of the instances matching the filters of the given health check type.
+
+        When scheduled events are cached, only the events of every instance are kept, so that the state and the health
+        of the instances, not retrieved with them, are taken from the other health checks.
+        """
+        use_cache = health_check_type == "scheduled_events" and scheduled_events_cache_ttl > 0
+        current_time = datetime.now(tz=timezone.utc)
+        if use_cache and self._scheduled_events_cache:
+            cache_time, scheduled_events = self._scheduled_events_cache
+            if (current_time - cache_time).total_seconds() < scheduled_events_cache_ttl:
+                logger.debug("Using scheduled events retrieved at %s", cache_time)
+                return self._get_scheduled_events_statuses(scheduled_events)
+
+        ec2_client = Boto3ClientRegistry.get_client("ec2", region_name=self._region, config=self._boto3_config)
+        paginator = ec2_client.get_paginator("describe_instance_status")
+        response_iterator = paginator.paginate(PaginationConfig={"PageSize": BOTO3_PAGINATION_PAGE_SIZE}, **filters)
+        instance_statuses = list(response_iterator.search("InstanceStatuses"))
+        if use_cache:
+            scheduled_events = {status.get("InstanceId"): status.get("Events") for status in instance_statuses}
+            self._scheduled_events_cache = (current_time, scheduled_events)
+            return self._get_scheduled_events_statuses(scheduled_events)
+        return instance_statuses
+
+    @staticmethod
+    def _get_scheduled_events_statuses(scheduled_events):
+        """Return instance statuses with the given scheduled events only, with unknown state and health."""
+        return [
+            {"InstanceId": instance_id, "InstanceState": {}, "InstanceStatus": {}, "SystemStatus": {}, "Events": events}
+            for instance_id, events in scheduled_events.items()
+        ]
+
     @log_exception(logger, "getting cluster instances from EC2", raise_on_error=True)
     def get_cluster_instances(self, include_head_node=False, alive_states_only=True):
         """
@@ -264,16 +347,100 @@ class InstanceManager:
 
         Instances without all the info set are ignored and not returned
         """
-        ec2_client = boto3.client("ec2", region_name=self._region, config=self._boto3_config)
-        paginator = ec2_client.get_paginator("describe_instances")
-        args = {
-            "Filters": [{"Name": "tag:parallelcluster:cluster-name", "Values": [self._cluster_name]}],
-        }
+        filters = [{"Name": "tag:parallelcluster:cluster-name", "Values": [self._cluster_name]}]
         if alive_states_only:
-            args["Filters"].append({"Name": "instance-state-name", "Values": list(EC2_INSTANCE_ALIVE_STATES)})
+            filters.append({"Name": "instance-state-name", "Values": list(EC2_INSTANCE_ALIVE_STATES)})
         if not include_head_node:
-            args["Filters"].append({"Name": "tag:parallelcluster:node-type", "Values": ["Compute"]})
-        response_iterator = paginator.paginate(PaginationConfig={"PageSize": BOTO3_PAGINATION_PAGE_SIZE}, **args)
+            filters.append({"Name": "tag:parallelcluster:node-type", "Values": ["Compute"]})
+        return self._describe_instances(filters)
+
+    @log_exception(logger, "getting cluster instances from EC2 inventory", raise_on_error=True)
+    def get_cluster_instances_from_inventory(self, full_sync_interval):
+        """
+        Get alive compute instances that are associated with the cluster, keeping them in an inventory across calls.
+
+        The inventory is fully synced with EC2 every full_sync_interval seconds. In between, only the instances
+        launched since the previous sync are described and the instances no longer alive are removed.
+        """
+        current_time = datetime.now(tz=timezone.utc)
+        launch_time_patterns = self._get_inventory_launch_time_patterns(current_time, full_sync_interval)
+        if launch_time_patterns is None:
+            logger.info("Performing full sync of EC2 instance inventory")
+            instances = self.get_cluster_instances(include_head_node=False, alive_states_only=True)
+            self._instance_inventory = {instance.id: instance for instance in instances}
+            self._inventory_full_sync_time = current_time
+        else:
+            filters = [
+                {"Name": "tag:parallelcluster:cluster-name", "Values": [self._cluster_name]},
+                {"Name": "tag:parallelcluster:node-type", "Values": ["Compute"]},
+            ]
+            launched_instances = self._describe_instances(
+                filters
+                + [
+                    {"Name": "instance-state-name", "Values": list(EC2_INSTANCE_ALIVE_STATES)},
+                    {"Name": "launch-time", "Values": launch_time_patterns},
+                ]
+            )
+            terminated_instance_ids = self._describe_instance_ids(
+                filters + [{"Name": "instance-state-name", "Values": list(EC2_INSTANCE_TERMINATED_STATES)}]
+            )
+            self._instance_inventory.update((instance.id, instance) for instance in launched_instances)
+            for instance_id in terminated_instance_ids:
+                self._instance_inventory.pop(instance_id, None)
+            logger.info(
+                "Synced EC2 instance inventory with %s launched and %s terminated instances",
+                len(launched_instances),
+                len(terminated_instance_ids),
+            )
+        self._inventory_sync_time = current_time
+        # Return copies, since the instances are associated with their Slurm nodes at every iteration
+        return [copy.copy(instance) for instance in self._instance_inventory.values()]
+
+    @log_exception(logger, "getting cluster instances by private IPs from EC2", raise_on_error=True)
+    def get_cluster_instances_by_private_ips(self, private_ips):
+        """Get alive compute instances that are associated with the cluster and have one of the given private IPs."""
+        filters = [
+            {"Name": "tag:parallelcluster:cluster-name", "Values": [self._cluster_name]},
+            {"Name": "instance-state-name", "Values": list(EC2_INSTANCE_ALIVE_STATES)},
+            {"Name": "tag:parallelcluster:node-type", "Values": ["Compute"]},
+        ]
+        instances = []
+        for private_ips_batch in grouper(private_ips, BOTO3_MAX_FILTER_VALUES):
+            instances.extend(
+                self._describe_instances(
+                    filters
+                    + [{"Name": "network-interface.addresses.private-ip-address", "Values": list(private_ips_batch)}]
+                )
+            )
+        return instances
+
+    def _get_inventory_launch_time_patterns(self, current_time, full_sync_interval):
+        """
+        Return the launch-time filter values matching the instances launched since the previous inventory sync.
+
+        Return None when a full sync is required.
+        """
+        if (
+            self._inventory_full_sync_time is None
+            or (current_time - self._inventory_full_sync_time).total_seconds() >= full_sync_interval
+        ):
+            return None
+        # Look back to also get the instances that were launched before the previous sync but were not yet visible
+        launch_time = (self._inventory_sync_time - INVENTORY_LAUNCH_TIME_LOOKBACK).replace(second=0, microsecond=0)
+        launch_time_patterns = []
+        while launch_time <= current_time:
+            # launch-time is in ISO 8601 format, e.g. 2021-09-29T11:04:43.305Z, match every instance of a minute
+            launch_time_patterns.append(launch_time.strftime("%Y-%m-%dT%H:%M*"))
+            launch_time += timedelta(minutes=1)
+        return launch_time_patterns if len(launch_time_patterns) <= BOTO3_MAX_FILTER_VALUES else None
+
+    def _describe_instances(self, filters) -> List[EC2Instance]:
+        """Describe the instances matching the filters, ignoring the instances without all the info set."""
+        ec2_client = Boto3ClientRegistry.get_client("ec2", region_name=self._region, config=self._boto3_config)
+        paginator = ec2_client.get_paginator("describe_instances")
+        response_iterator = paginator.paginate(
+            PaginationConfig={"PageSize": BOTO3_PAGINATION_PAGE_SIZE}, Filters=filters
+        )
         filtered_iterator = response_iterator.search("Reservations[].Instances[]")
 
         instances = []
@@ -299,6 +466,15 @@ class InstanceManager:
 
         return instances
 
+    def _describe_instance_ids(self, filters) -> List[str]:
+        """Describe the ids of the instances matching the filters."""
+        ec2_client = Boto3ClientRegistry.get_client("ec2", region_name=self._region, config=self._boto3_config)
+        paginator = ec2_client.get_paginator("describe_instances")
+        response_iterator = paginator.paginate(
+            PaginationConfig={"PageSize": BOTO3_PAGINATION_PAGE_SIZE}, Filters=filters
+        )
+        return list(response_iterator.search("Reservations[].Instances[].InstanceId"))
+
     def terminate_all_compute_nodes(self, terminate_batch_size):
         try:
             compute_nodes = self.get_cluster_instances()
@@ -313,13 +489,14 @@ class InstanceManager:
 
     def _update_failed_nodes(self, nodeset, error_code="Exception", override=True):
         """Update failed nodes dict with error code as key and nodeset value."""
-        if not override:
-            # Remove nodes already present in any failed_nodes key so to not override the error_code if already set
-            for nodes in self.failed_nodes.values():
-                if nodes:
-                    nodeset = nodeset.difference(nodes)
-        if nodeset:
-            self.failed_nodes[error_code] = self.failed_nodes.get(error_code, set()).union(nodeset)
+        with self._failed_nodes_lock:
+            if not override:
+                # Remove nodes already present in any failed_nodes key so to not override the error_code if already set
+                for nodes in self.failed_nodes.values():
+                    if nodes:
+                        nodeset = nodeset.difference(nodes)
+            if nodeset:
+                self.failed_nodes[error_code] = self.failed_nodes.get(error_code, set()).union(nodeset)
 
     def get_compute_node_instances(
         self, compute_nodes: Iterable[SlurmNode], max_retrieval_count: int
@@ -330,11 +507,12 @@ class InstanceManager:
             table_name=self._table.table_name,
             resource_factory=self._boto3_resource_factory,
             max_retrieval_count=max_retrieval_count if max_retrieval_count > 0 else None,
+            max_concurrency=self._hostname_table_max_concurrency,
         )
 
     @staticmethod
     def _get_instances_for_nodes(
-        compute_nodes, table_name, resource_factory, max_retrieval_count
+        compute_nodes, table_name, resource_factory, max_retrieval_count, max_concurrency=1
     ) -> Iterable[ComputeInstanceDescriptor]:
         # Partition compute_nodes into a list of nodes with an instance ID and a list of nodes without an instance ID.
         nodes_with_instance_id = []
@@ -370,48 +548,19 @@ class InstanceManager:
                 table_name=table_name,
                 compute_nodes=nodes_without_instance_id,
                 max_retrieval_count=remaining,
+                max_concurrency=max_concurrency,
             )
 
     @staticmethod
     def _retrieve_instance_ids_from_dynamo(
-        ddb_resource, table_name, compute_nodes, max_retrieval_count
+        ddb_resource, table_name, compute_nodes, max_retrieval_count, max_concurrency=1
     ) -> Iterable[ComputeInstanceDescriptor]:
-        node_name_partitions = InstanceManager._partition_nodes(node.get("Name") for node in compute_nodes)
-
-        for node_name_partition in node_name_partitions:
-            node_name_partition = itertools.islice(node_name_partition, max_retrieval_count)
-            query = InstanceManager._create_request_for_nodes(table_name=table_name, node_names=node_name_partition)
-            response = ddb_resource.batch_get_item(RequestItems=query)
-
-            # Because we can't assume that len(partition) equals len(Responses.table_name), e.g. when a node name does
-            # not exist in the DynamoDB table, we only decrement the remaining number of nodes we need when we actually
-            # return an instance ID.
-            for item in response.get("Responses").get(table_name):
-                yield {
-                    "Name": item.get("Id"),
-                    "InstanceId": item.get("InstanceId"),
-                }
-                max_retrieval_count -= 1
-            if max_retrieval_count < 1:
-                break
-
-    @staticmethod
-    def _partition_nodes(node_names, size=BOTO3_MAX_BATCH_SIZE):
-        yield from grouper(node_names, size)
-
-    @staticmethod
-    def _create_request_for_nodes(table_name, node_names):
-        return {
-            str(table_name): {
-                "Keys": [
-                    {
-                        "Id": str(node_name),
-                    }
-                    for node_name in node_names
-                ],
-                "ProjectionExpression": "Id, InstanceId",
-            }
-        }
+        hostname_table = HostnameTable(
+            ddb_resource, table_name, max_concurrency=max_concurrency, get_batch_size=BOTO3_MAX_BATCH_SIZE
+        )
+        yield from hostname_table.get_instance_ids(
+            (node.get("Name") for node in compute_nodes), max_count=max_retrieval_count
+        )
 
     def _clear_unused_launched_instances(self):
         """Clear and reset unused launched instances list."""
@@ -486,6 +635,7 @@ class InstanceManager:
                 )
 
         self._terminate_unassigned_launched_instances(terminate_batch_size)
+        self._terminate_cancelled_nodes_instances(terminate_batch_size)
         self._clear_nodes_assigned_to_instances()
 
     def _scaling_for_jobs(
@@ -532,6 +682,14 @@ class InstanceManager:
             )
             self._clear_unused_launched_instances()
 
+    def _terminate_cancelled_nodes_instances(self, terminate_batch_size):
+        with self._cancelled_nodes_instances_lock:
+            instance_ids = [instance.id for instance in self._cancelled_nodes_instances]
+            self._cancelled_nodes_instances = []
+        if instance_ids:
+            logger.info("Terminating instances launched for cancelled nodes: %s", print_with_count(instance_ids))
+            self.delete_instances(instance_ids, terminate_batch_size)
+
     def _scaling_for_jobs_single_node(
         self,
         job_list: List[SlurmResumeJob],
@@ -755,13 +913,27 @@ class InstanceManager:
         # nodes in the resume flattened list, e.g.
         # [nodes_1, nodes_2, nodes_3, nodes_4, nodes_5]
 
-        instances_launched = self._launch_instances(
-            job=job if job else None,
-            nodes_to_launch=nodes_resume_mapping,
-            launch_batch_size=launch_batch_size,
-            scaling_strategy=scaling_strategy,
-            skip_launch=skip_launch,
+        pipelined_node_assignment = (
+            self._pipelined_node_assignment
+            and scaling_strategy == ScalingStrategy.BEST_EFFORT
+            and update_node_address
+            and not skip_launch
         )
+        if pipelined_node_assignment:
+            instances_launched = self._launch_and_assign_instances(
+                job=job,
+                nodes_to_launch=nodes_resume_mapping,
+                launch_batch_size=launch_batch_size,
+                assign_node_batch_size=assign_node_batch_size,
+            )
+        else:
+            instances_launched = self._launch_instances(
+                job=job if job else None,
+                nodes_to_launch=nodes_resume_mapping,
+                launch_batch_size=launch_batch_size,
+                scaling_strategy=scaling_strategy,
+                skip_launch=skip_launch,
+            )
         # instances launched, e.g.
         # {
         #   queue_1: {cr_1: list[EC2Instance], cr_2: list[EC2Instance],
@@ -796,8 +968,61 @@ class InstanceManager:
                 nodes_resume_mapping=nodes_resume_mapping,
                 successful_launched_nodes=successful_launched_nodes,
                 update_node_address=update_node_address,
+                instances_assigned=pipelined_node_assignment,
+            )
+
+    def _launch_and_assign_instances(
+        self,
+        job: SlurmResumeJob,
+        nodes_to_launch: Dict[str, any],
+        launch_batch_size: int,
+        assign_node_batch_size: int,
+    ):
+        """
+        Launch instances with best-effort strategy and assign every batch of instances to nodes as soon as launched.
+
+        Assignment runs in a separate thread, so the next batches are launched while the previous ones are assigned.
+        The n-th instance launched for a compute resource is assigned to its n-th node, as when assigning all the
+        instances once launched.
+        """
+        assigned_instances = defaultdict(lambda: defaultdict(list))
+        assign_futures = []
+        lock = threading.Lock()
+
+        with ThreadPoolExecutor(max_workers=1) as assign_executor:
+
+            def _assign_instances(queue, compute_resource, launched_ec2_instances):
+                with lock:
+                    instances = assigned_instances[queue][compute_resource]
+                    first_node_index = len(instances)
+                    instances.extend(launched_ec2_instances)
+                    # fmt: off
+                    slurm_node_list = nodes_to_launch[queue][compute_resource][first_node_index:len(instances)]
+                    # fmt: on
+                    logger.info("Assigning launched instances to nodes %s", print_with_count(slurm_node_list))
+                    assign_futures.append(
+                        assign_executor.submit(
+                            self._assign_instances_to_nodes,
+                            update_node_address=True,
+                            nodes_to_launch={queue: {compute_resource: slurm_node_list}},
+                            instances_launched={queue: {compute_resource: list(launched_ec2_instances)}},
+                            assign_node_batch_size=assign_node_batch_size,
+                            raise_on_error=False,
+                        )
+                    )
+
+            instances_launched = self._launch_instances(
+                job=job,
+                nodes_to_launch=nodes_to_launch,
+                launch_batch_size=launch_batch_size,
+                scaling_strategy=ScalingStrategy.BEST_EFFORT,
+                on_instances_launched=_assign_instances,
             )
 
+        for future in assign_futures:
+            future.result()
+        return instances_launched
+
     def _reset_failed_nodes(self, nodeset):
         """Remove nodeset from failed nodes dict."""
         if nodeset:
@@ -813,18 +1038,20 @@ class InstanceManager:
         nodes_resume_mapping,
         successful_launched_nodes,
         update_node_address,
+        instances_assigned=False,
     ):
         # best-effort job level scaling
         if 0 < len(successful_launched_nodes) <= len(nodes_resume_list):
             # All or partial requested EC2 capacity for the Job has been launched
-            # Assign launched EC2 instances to the requested Slurm nodes
-            self._assign_instances_to_nodes(
-                update_node_address=update_node_address,
-                nodes_to_launch=nodes_resume_mapping,
-                instances_launched=instances_launched,
-                assign_node_batch_size=assign_node_batch_size,
-                raise_on_error=False,
-            )
+            # Assign launched EC2 instances to the requested Slurm nodes, unless already assigned while launching
+            if not instances_assigned:
+                self._assign_instances_to_nodes(
+                    update_node_address=update_node_address,
+                    nodes_to_launch=nodes_resume_mapping,
+                    instances_launched=instances_launched,
+                    assign_node_batch_size=assign_node_batch_size,
+                    raise_on_error=False,
+                )
             logger.info(
                 "Successful launched and assigned %s instances for nodes %s",
                 "all" if len(successful_launched_nodes) == len(nodes_resume_list) else "partial",
@@ -905,16 +1132,27 @@ class InstanceManager:
             logger.info("No launched instances found for nodes %s", print_with_count(nodes_resume_list))
             self._update_failed_nodes(set(nodes_resume_list), "InsufficientInstanceCapacity", override=False)
 
-    def _launch_instances(  # noqa: C901
+    def _launch_instances(
         self,
         nodes_to_launch: Dict[str, any],
         launch_batch_size: int,
         scaling_strategy: ScalingStrategy,
         job: SlurmResumeJob = None,
         skip_launch: bool = False,
+        on_instances_launched: Callable[[str, str, List[EC2Instance]], None] = None,
     ):
+        """
+        Launch instances for the given nodes and return the launched instances by queue and compute resource.
+
+        on_instances_launched, if given, is called with queue, compute resource and instances every time instances
+        are booked or launched for a compute resource, possibly from a different thread.
+        """
         instances_launched = defaultdict(lambda: defaultdict(list))
+        # At instance launch level, the various scaling strategies can be grouped based on the actual
+        # launch behaviour i.e. all-or-nothing or best-effort
+        all_or_nothing_batch = scaling_strategy in [ScalingStrategy.ALL_OR_NOTHING]
 
+        launches = []
         for queue, compute_resources in nodes_to_launch.items():
             for compute_resource, slurm_node_list in compute_resources.items():
                 slurm_node_list = self._resize_slurm_node_list(
@@ -923,55 +1161,160 @@ class InstanceManager:
                     instances_launched=instances_launched,
                     slurm_node_list=slurm_node_list,
                 )
-
+                if on_instances_launched and instances_launched[queue][compute_resource]:
+                    on_instances_launched(queue, compute_resource, instances_launched[queue][compute_resource])
                 if slurm_node_list and not skip_launch:
-                    logger.info(
-                        "Launching %s instances for nodes %s",
-                        "all-or-nothing" if scaling_strategy == ScalingStrategy.ALL_OR_NOTHING else "best-effort",
-                        print_with_count(slurm_node_list),
-                    )
-                    # At instance launch level, the various scaling strategies can be grouped based on the actual
-                    # launch behaviour i.e. all-or-nothing or best-effort
-                    all_or_nothing_batch = scaling_strategy in [ScalingStrategy.ALL_OR_NOTHING]
+                    if self._launch_max_concurrency > 1:
+                        launches.append((queue, compute_resource, slurm_node_list))
+                    elif not self._launch_compute_resource_instances(
+                        queue=queue,
+                        compute_resource=compute_resource,
+                        slurm_node_list=slurm_node_list,
+                        launch_batch_size=launch_batch_size,
+                        all_or_nothing_batch=all_or_nothing_batch,
+                        job=job,
+                        instances_launched=instances_launched,
+                        on_instances_launched=on_instances_launched,
+                    ):
+                        return instances_launched
+
+        if launches:
+            self._launch_compute_resources_concurrently(
+                launches, launch_batch_size, all_or_nothing_batch, job, instances_launched, on_instances_launched
+            )
+        return instances_launched
 
-                    fleet_manager = self._get_fleet_manager(all_or_nothing_batch, compute_resource, queue)
+    def _launch_compute_resources_concurrently(
+        self, launches, launch_batch_size, all_or_nothing_batch, job, instances_launched, on_instances_launched=None
+    ):
+        """
+        Launch instances for the nodes of several compute resources in parallel.
 
-                    for batch_nodes in grouper(slurm_node_list, launch_batch_size):
-                        try:
-                            launched_ec2_instances = self._launch_ec2_instances(
-                                batch_nodes, compute_resource, fleet_manager, instances_launched, job, queue
-                            )
+        Every compute resource is launched in its own thread, up to launch_max_concurrency threads, and the instances it
+        launches are merged into instances_launched once done. When a launch must stop, the launches not started yet are
+        skipped, while the instances of the launches in progress are still returned, as in the sequential launch.
+        """
+        stop_launch = threading.Event()
+
+        def _launch(queue, compute_resource, slurm_node_list):
+            compute_resource_instances = defaultdict(lambda: defaultdict(list))
+            if not self._launch_compute_resource_instances(
+                queue=queue,
+                compute_resource=compute_resource,
+                slurm_node_list=slurm_node_list,
+                launch_batch_size=launch_batch_size,
+                all_or_nothing_batch=all_or_nothing_batch,
+                job=job,
+                instances_launched=compute_resource_instances,
+                stop_launch=stop_launch,
+                on_instances_launched=on_instances_launched,
+            ):
+                stop_launch.set()
+            return compute_resource_instances
+
+        with ThreadPoolExecutor(max_workers=min(self._launch_max_concurrency, len(launches))) as executor:
+            futures = [executor.submit(_launch, *launch) for launch in launches]
+            for future in futures:
+                for queue, compute_resources in future.result().items():
+                    for compute_resource, launched_ec2_instances in compute_resources.items():
+                        instances_launched[queue][compute_resource].extend(launched_ec2_instances)
+
+    def _launch_compute_resource_instances(
+        self,
+        queue: str,
+        compute_resource: str,
+        slurm_node_list: List[str],
+        launch_batch_size: int,
+        all_or_nothing_batch: bool,
+        job: SlurmResumeJob,
+        instances_launched: Dict[str, any],
+        stop_launch: threading.Event = None,
+        on_instances_launched: Callable[[str, str, List[EC2Instance]], None] = None,
+    ) -> bool:
+        """
+        Launch instances for the nodes of a compute resource, in batches.
 
-                            if job and all_or_nothing_batch and len(launched_ec2_instances) < len(batch_nodes):
-                                # When launching instances for a specific Job,
-                                # exit fast if not all the requested capacity can be launched,
-                                # returning the EC2 instances launched so far,
-                                # so that they can be eventually allocated to other Slurm nodes
-                                # This path handle the CreateFleet case, which doesn't fail when no capacity is returned
-                                return instances_launched
-                        except (ClientError, Exception) as e:
-                            logger.error(
-                                "Encountered exception when launching instances for nodes %s: %s",
-                                print_with_count(batch_nodes),
-                                e,
-                            )
-                            update_failed_nodes_parameters = {"nodeset": set(batch_nodes)}
-                            if isinstance(e, ClientError):
-                                update_failed_nodes_parameters["error_code"] = e.response.get("Error", {}).get("Code")
-                            elif isinstance(e, Exception) and hasattr(e, "code"):
-                                update_failed_nodes_parameters["error_code"] = e.code
-                            self._update_failed_nodes(**update_failed_nodes_parameters)
-
-                            if job and all_or_nothing_batch:
-                                # When launching instances for a specific Job,
-                                # exit fast if not all the requested capacity can be launched,
-                                # returning the EC2 instances launched so far,
-                                # so that they can be eventually allocated to other Slurm nodes
-                                # This path handle the RunInstances case, which throw an exc when
-                                # no capacity is returned, and handle the CreateFleet case when exc is thrown
-                                return instances_launched
+        Return False if the launch must stop, i.e. when not all the capacity requested for a job can be launched with
+        the all-or-nothing strategy.
+        """
+        logger.info(
+            "Launching %s instances for nodes %s",
+            "all-or-nothing" if all_or_nothing_batch else "best-effort",
+            print_with_count(slurm_node_list),
+        )
+        fleet_manager = self._get_fleet_manager(all_or_nothing_batch, compute_resource, queue)
 
-        return instances_launched
+        for batch_nodes in self._get_launch_batches(
+            queue, compute_resource, slurm_node_list, launch_batch_size, all_or_nothing_batch, fleet_manager
+        ):
+            if stop_launch and stop_launch.is_set():
+                return False
+            try:
+                launched_ec2_instances = self._launch_ec2_instances(
+                    batch_nodes, compute_resource, fleet_manager, instances_launched, job, queue
+                )
+                if on_instances_launched and launched_ec2_instances:
+                    on_instances_launched(queue, compute_resource, launched_ec2_instances)
+
+                if job and all_or_nothing_batch and len(launched_ec2_instances) < len(batch_nodes):
+                    # When launching instances for a specific Job,
+                    # exit fast if not all the requested capacity can be launched,
+                    # returning the EC2 instances launched so far,
+                    # so that they can be eventually allocated to other Slurm nodes
+                    # This path handle the CreateFleet case, which doesn't fail when no capacity is returned
+                    return False
+            except (ClientError, Exception) as e:
+                logger.error(
+                    "Encountered exception when launching instances for nodes %s: %s",
+                    print_with_count(batch_nodes),
+                    e,
+                )
+                update_failed_nodes_parameters = {"nodeset": set(batch_nodes)}
+                if isinstance(e, ClientError):
+                    update_failed_nodes_parameters["error_code"] = e.response.get("Error", {}).get("Code")
+                elif isinstance(e, Exception) and hasattr(e, "code"):
+                    update_failed_nodes_parameters["error_code"] = e.code
+                self._update_failed_nodes(**update_failed_nodes_parameters)
+
+                if job and all_or_nothing_batch:
+                    # When launching instances for a specific Job,
+                    # exit fast if not all the requested capacity can be launched,
+                    # returning the EC2 instances launched so far,
+                    # so that they can be eventually allocated to other Slurm nodes
+                    # This path handle the RunInstances case, which throw an exc when
+                    # no capacity is returned, and handle the CreateFleet case when exc is thrown
+                    return False
+        return True
+
+    def _get_launch_batches(
+        self, queue, compute_resource, slurm_node_list, launch_batch_size, all_or_nothing_batch, fleet_manager
+    ):
+        """
+        Yield the nodes to launch in batches of launch_batch_size.
+
+        With the adaptive launch batch sizer, the size of the best-effort batches is adapted after every batch to the
+        launch attempts recorded by the fleet manager. All-or-nothing batches keep the configured size, so that the
+        nodes launched together by a single call do not change.
+        """
+        if not self._launch_batch_sizer or all_or_nothing_batch:
+            yield from grouper(slurm_node_list, launch_batch_size)
+            return
+        remaining_nodes = slurm_node_list
+        while remaining_nodes:
+            batch_size = self._launch_batch_sizer.get_batch_size(queue, compute_resource)
+            batch_nodes, remaining_nodes = remaining_nodes[:batch_size], remaining_nodes[batch_size:]
+            launch_records_count = len(fleet_manager.launch_records)
+            logger.info(
+                "Launching batch of %s nodes for %s/%s, with adaptive batch size %s",
+                len(batch_nodes),
+                queue,
+                compute_resource,
+                batch_size,
+            )
+            yield batch_nodes
+            self._launch_batch_sizer.record(
+                queue, compute_resource, fleet_manager.launch_records[launch_records_count:]
+            )
 
     def _launch_ec2_instances(self, batch_nodes, compute_resource, fleet_manager, instances_launched, job, queue):
         launched_ec2_instances = fleet_manager.launch_ec2_instances(
@@ -1008,6 +1351,7 @@ class InstanceManager:
             all_or_nothing=all_or_nothing_batch,
             run_instances_overrides=self._run_instances_overrides,
             create_fleet_overrides=self._create_fleet_overrides,
+            create_fleet_instances_info=self._create_fleet_instances_info,
         )
         return fleet_manager
 
@@ -1028,8 +1372,36 @@ class InstanceManager:
             # Reduce slurm_node_list
             slurm_node_list = slurm_node_list[len(reusable_instances):]
             # fmt: on
+        if slurm_node_list and self._warm_pool:
+            slurm_node_list = self._take_warm_pool_instances(
+                queue, compute_resource, slurm_node_list, instances_launched
+            )
+        return slurm_node_list
+
+    def _take_warm_pool_instances(
+        self, queue: str, compute_resource: str, slurm_node_list: List[str], instances_launched: Dict[str, any]
+    ):
+        try:
+            pool_instances = self._warm_pool.take(
+                queue, compute_resource, len(slurm_node_list), datetime.now(tz=timezone.utc)
+            )
+        except Exception as e:
+            logger.error("Unable to take instances from the warm pool, launching new instances: %s", e)
+            return slurm_node_list
+        if pool_instances:
+            # fmt: off
+            logger.info(
+                "Booking warm pool instances for nodes %s", print_with_count(slurm_node_list[:len(pool_instances)])
+            )
+            instances_launched[queue][compute_resource].extend(pool_instances)
+            slurm_node_list = slurm_node_list[len(pool_instances):]
+            # fmt: on
         return slurm_node_list
 
+    def launch_warm_pool_instances(self, queue: str, compute_resource: str, count: int) -> List[EC2Instance]:
+        """Launch instances for the warm pool of the given compute resource, with the best-effort strategy."""
+        return self._get_fleet_manager(False, compute_resource, queue).launch_ec2_instances(count)
+
     def _assign_instances_to_nodes(
         self,
         update_node_address: bool,
@@ -1038,6 +1410,7 @@ class InstanceManager:
         assign_node_batch_size: int,
         raise_on_error: bool,
     ):
+        nodes_to_launch, instances_launched = self._release_cancelled_nodes(nodes_to_launch, instances_launched)
         if update_node_address:
             for queue, compute_resources in nodes_to_launch.items():
                 for compute_resource, slurm_node_list in compute_resources.items():
@@ -1049,7 +1422,10 @@ class InstanceManager:
                             batch_nodes, batch_launched_ec2_instances = zip(*batch)
                             assigned_nodes = dict(batch)
 
-                            self._store_assigned_hostnames(nodes=assigned_nodes)
+                            assigned_nodes = self._store_batch_hostnames(assigned_nodes, raise_on_error)
+                            if not assigned_nodes:
+                                continue
+                            batch_nodes, batch_launched_ec2_instances = zip(*assigned_nodes.items())
                             self._update_dns_hostnames(
                                 nodes=assigned_nodes, update_dns_batch_size=assign_node_batch_size
                             )
@@ -1063,6 +1439,51 @@ class InstanceManager:
                             # Update the batch of failed node and continue
                             self._update_failed_nodes(set(batch_nodes))
 
+    def _release_cancelled_nodes(self, nodes_to_launch: Dict[str, any], instances_launched: Dict[str, any]):
+        """
+        Remove the nodes whose resume was cancelled, and their instances, from the nodes to assign.
+
+        The instances of the cancelled nodes are terminated at the end of add_instances.
+        """
+        cancelled_nodes = self._get_cancelled_nodes() if self._get_cancelled_nodes else set()
+        if not cancelled_nodes:
+            return nodes_to_launch, instances_launched
+
+        remaining_nodes = defaultdict(dict)
+        remaining_instances = defaultdict(dict)
+        released_instances = {}
+        for queue, compute_resources in nodes_to_launch.items():
+            for compute_resource, slurm_node_list in compute_resources.items():
+                launched_ec2_instances = instances_launched.get(queue, {}).get(compute_resource, [])
+                assigned_nodes = list(zip(slurm_node_list, launched_ec2_instances))
+                released_instances.update(
+                    (node, instance) for node, instance in assigned_nodes if node in cancelled_nodes
+                )
+                assigned_nodes = [(node, instance) for node, instance in assigned_nodes if node not in cancelled_nodes]
+                remaining_nodes[queue][compute_resource] = [node for node, _ in assigned_nodes]
+                remaining_instances[queue][compute_resource] = [instance for _, instance in assigned_nodes]
+
+        if released_instances:
+            logger.warning(
+                "Resume of nodes %s cancelled, not assigning their instances",
+                print_with_count(released_instances.keys()),
+            )
+            with self._cancelled_nodes_instances_lock:
+                self._cancelled_nodes_instances.extend(released_instances.values())
+        return remaining_nodes, remaining_instances
+
+    def _store_batch_hostnames(self, assigned_nodes: Dict[str, EC2Instance], raise_on_error: bool):
+        """Store the hostnames of a batch of nodes, returning the nodes whose hostnames are stored."""
+        try:
+            self._store_assigned_hostnames(nodes=assigned_nodes)
+        except UnprocessedItemsError as e:
+            if raise_on_error:
+                raise InstanceToNodeAssignmentError
+            # Fail only the nodes whose hostnames are not stored, and assign the others
+            self._update_failed_nodes(set(e.node_names))
+            return {node: instance for node, instance in assigned_nodes.items() if node not in e.node_names}
+        return assigned_nodes
+
     def _update_slurm_node_addrs(self, slurm_nodes: List[str], launched_instances: List[EC2Instance]):
         """Update node information in slurm with info from launched EC2 instance."""
         try:
@@ -0,0 +1,101 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import threading
+from typing import List
+
+from slurm_plugin.fleet_manager import LaunchRecord
+
+logger = logging.getLogger(__name__)
+
+# Launches fulfilled within this number of seconds grow the batch size
+FAST_LAUNCH_DURATION = 20
+
+
+class AdaptiveLaunchBatchSizer:
+    """
+    Launch batch size of every compute resource, adapted to the outcome of the previous launches.
+
+    The batch size of a compute resource starts at max_batch_size. It is halved when a launch is throttled or not
+    fulfilled, e.g. for insufficient capacity, and grown by half when a full batch is launched within
+    FAST_LAUNCH_DURATION seconds, between min_batch_size and max_batch_size.
+    Sizes are kept in a JSON file updated under an exclusive lock, so that they carry over from a resume to the next.
+    """
+
+    def __init__(self, state_file_path: str, min_batch_size: int, max_batch_size: int):
+        self._state_file_path = state_file_path
+        self._min_batch_size = min(min_batch_size, max_batch_size)
+        self._max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self._state_file_path, encoding="utf-8") as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning("Resetting invalid launch batch sizes in %s", self._state_file_path)
+            return {}
+
+    @contextlib.contextmanager
+    def _update(self):
+        """Yield the batch sizes under an exclusive lock and write them back once modified."""
+        with self._lock, open(f"{self._state_file_path}.lock", "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            batch_sizes = self._read()
+            yield batch_sizes
+            temporary_file_path = f"{self._state_file_path}.{os.getpid()}.tmp"
+            with open(temporary_file_path, "w", encoding="utf-8") as state_file:
+                json.dump(batch_sizes, state_file, indent=2, sort_keys=True)
+            os.replace(temporary_file_path, self._state_file_path)
+
+    def _clamp(self, batch_size: int) -> int:
+        return max(self._min_batch_size, min(self._max_batch_size, batch_size))
+
+    def get_batch_size(self, queue: str, compute_resource: str) -> int:
+        return self._clamp(self._read().get(f"{queue}/{compute_resource}", self._max_batch_size))
+
+    def record(self, queue: str, compute_resource: str, launch_records: List[LaunchRecord]) -> int:
+        """Adapt the batch size of the compute resource to the attempts of a batch launch and return the new size."""
+        if not launch_records:
+            return self.get_batch_size(queue, compute_resource)
+        key = f"{queue}/{compute_resource}"
+        launch_record = launch_records[-1]
+        duration = sum(record.duration for record in launch_records)
+        throttled_attempts = sum(record.throttled for record in launch_records)
+        with self._update() as batch_sizes:
+            batch_size = self._clamp(batch_sizes.get(key, self._max_batch_size))
+            if throttled_attempts or launch_record.launched_count < launch_record.requested_count:
+                new_batch_size = self._clamp(batch_size // 2)
+            elif duration <= FAST_LAUNCH_DURATION and launch_record.requested_count >= batch_size:
+                new_batch_size = self._clamp(batch_size + max(batch_size // 2, 1))
+            else:
+                new_batch_size = batch_size
+            batch_sizes[key] = new_batch_size
+        if new_batch_size != batch_size:
+            logger.info(
+                "Launch batch size of %s changed from %s to %s, after launching %s of %s instances in %.3fs with %s "
+                "throttled attempts",
+                key,
+                batch_size,
+                new_batch_size,
+                launch_record.launched_count,
+                launch_record.requested_count,
+                duration,
+                throttled_attempts,
+            )
+        return new_batch_size
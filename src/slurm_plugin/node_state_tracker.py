@@ -0,0 +1,140 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
+
+from common.utils import time_is_up
+from slurm_plugin.slurm_resources import SlurmNode
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NodeStateDelta:
+    """Names of the nodes changed since the previous iteration."""
+
+    added: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    state_changed: Set[str] = field(default_factory=set)
+    addr_changed: Set[str] = field(default_factory=set)
+
+    @property
+    def changed(self) -> Set[str]:
+        """Return the names of the nodes that are new or whose state, address or backing instance changed."""
+        return self.added | self.state_changed | self.addr_changed
+
+    def __str__(self):
+        return (
+            f"added: {len(self.added)}, removed: {len(self.removed)}, state changed: {len(self.state_changed)}, "
+            f"address or instance changed: {len(self.addr_changed)}"
+        )
+
+
+class NodeStateTracker:
+    """
+    Track the state of Slurm nodes and their backing instances across clustermgtd iterations.
+
+    The tracker keeps a fingerprint of every node seen in the previous iteration and the set of stable nodes, i.e.
+    nodes that were evaluated as healthy and that have no pending time-based transition.
+    A stable node whose fingerprint did not change since it was evaluated does not need to be evaluated again.
+    All the nodes are evaluated again at every full resync, which happens every full_resync_interval seconds.
+    """
+
+    def __init__(self, full_resync_interval: int):
+        self._full_resync_interval = full_resync_interval
+        self._last_full_resync_time = None
+        self._state_fingerprints: Dict[str, tuple] = {}
+        self._addr_fingerprints: Dict[str, tuple] = {}
+        self._stable_nodes: Set[str] = set()
+
+    @staticmethod
+    def _get_state_fingerprint(node: SlurmNode) -> tuple:
+        return (
+            type(node),
+            node.state_string,
+            node.reason,
+            tuple(node.partitions or ()),
+            node.slurmdstarttime,
+            node.reservation_name,
+        )
+
+    @staticmethod
+    def _get_addr_fingerprint(node: SlurmNode) -> tuple:
+        return node.nodeaddr, node.nodehostname, node.instance.id if node.instance else None
+
+    def reset(self):
+        """Forget all the tracked nodes, so that the next iteration performs a full resync."""
+        self._last_full_resync_time = None
+        self._state_fingerprints = {}
+        self._addr_fingerprints = {}
+        self._stable_nodes = set()
+
+    def get_nodes_to_evaluate(self, nodes: List[SlurmNode], current_time: datetime) -> List[SlurmNode]:
+        """
+        Compute the delta with the previous iteration and return the nodes that need to be evaluated.
+
+        Changed nodes, nodes that are not stable and nodes failing health checks are evaluated.
+        All the nodes are evaluated when the full resync interval expired.
+        Evaluated nodes are no longer considered stable until they are set as stable with update_stable_nodes.
+        """
+        delta = self._update_fingerprints(nodes)
+        if time_is_up(self._last_full_resync_time, current_time, self._full_resync_interval):
+            logger.info("Performing full resync of node states, node state delta: %s", delta)
+            self._last_full_resync_time = current_time
+            self._stable_nodes = set()
+            return nodes
+
+        changed_nodes = delta.changed
+        nodes_to_evaluate = []
+        skipped_nodes = set()
+        for node in nodes:
+            if node.name in self._stable_nodes and node.name not in changed_nodes and not node.is_failing_health_check:
+                skipped_nodes.add(node.name)
+            else:
+                nodes_to_evaluate.append(node)
+        self._stable_nodes = skipped_nodes
+        logger.info(
+            "Node state delta: %s. Evaluating %s nodes, skipping %s stable nodes. Next full resync in %s seconds",
+            delta,
+            len(nodes_to_evaluate),
+            len(skipped_nodes),
+            int(self._full_resync_interval - (current_time - self._last_full_resync_time).total_seconds()),
+        )
+        return nodes_to_evaluate
+
+    def update_stable_nodes(self, stable_nodes: Iterable[str]):
+        """Set as stable the given nodes, evaluated in this iteration."""
+        self._stable_nodes.update(stable_nodes)
+
+    def _update_fingerprints(self, nodes: List[SlurmNode]) -> NodeStateDelta:
+        delta = NodeStateDelta()
+        state_fingerprints = {}
+        addr_fingerprints = {}
+        for node in nodes:
+            state_fingerprint = self._get_state_fingerprint(node)
+            addr_fingerprint = self._get_addr_fingerprint(node)
+            previous_state_fingerprint = self._state_fingerprints.get(node.name)
+            if previous_state_fingerprint is None:
+                delta.added.add(node.name)
+            else:
+                if previous_state_fingerprint != state_fingerprint:
+                    delta.state_changed.add(node.name)
+                if self._addr_fingerprints.get(node.name) != addr_fingerprint:
+                    delta.addr_changed.add(node.name)
+            state_fingerprints[node.name] = state_fingerprint
+            addr_fingerprints[node.name] = addr_fingerprint
+        delta.removed = self._state_fingerprints.keys() - state_fingerprints.keys()
+        self._state_fingerprints = state_fingerprints
+        self._addr_fingerprints = addr_fingerprints
+        return delta
@@ -11,20 +11,33 @@
 
 
 import argparse
+import functools
+import json
 import logging
 import os
+import socket
 from configparser import ConfigParser
 from datetime import datetime, timezone
 from logging.config import fileConfig
 
-from botocore.config import Config
-from common.schedulers.slurm_commands import get_nodes_info, set_nodes_down
-from common.utils import read_json
-from slurm_plugin.cluster_event_publisher import ClusterEventPublisher
-from slurm_plugin.common import ScalingStrategy, is_clustermgtd_heartbeat_valid, print_with_count
-from slurm_plugin.instance_manager import InstanceManager
+from common import rate_limiter
+from common.hostlist import expand_hostlist
+from common.rate_limiter import TokenBucketRateLimiter, parse_rate_limits
+from common.utils import read_cached_json, read_json
+from slurm_plugin.common import (
+    CreateFleetInstancesInfo,
+    ScalingStrategy,
+    is_clustermgtd_heartbeat_valid,
+    print_with_count,
+)
 from slurm_plugin.slurm_resources import CONFIG_FILE_DIR
 
+# boto3, botocore and the modules depending on them are imported by the functions using them, so that they are not
+# imported when the nodes are resumed by the resume server
+
+# Additional time the resume client waits for the response of the resume server after resume_server_timeout
+RESUME_SERVER_RESPONSE_MARGIN = 60
+
 log = logging.getLogger(__name__)
 event_logger = log.getChild("events")
 
@@ -33,9 +46,15 @@ class SlurmResumeConfig:
     DEFAULTS = {
         "max_retry": 1,
         "launch_max_batch_size": 500,
+        "launch_max_concurrency": 1,
+        "hostname_table_max_concurrency": 1,
+        "launch_min_batch_size": 10,
+        "adaptive_launch_batch_size_file": None,
+        "pipelined_node_assignment": False,
         "assign_node_max_batch_size": 500,
         "terminate_max_batch_size": 1000,
         "update_node_address": True,
+        "create_fleet_instances_info": "describe",
         "clustermgtd_timeout": 300,
         "proxy": "NONE",
         "logging_config": os.path.join(os.path.dirname(__file__), "logging", "parallelcluster_resume_logging.conf"),
@@ -45,8 +64,15 @@ class SlurmResumeConfig:
         "run_instances_overrides": "/opt/slurm/etc/pcluster/run_instances_overrides.json",
         "create_fleet_overrides": "/opt/slurm/etc/pcluster/create_fleet_overrides.json",
         "fleet_config_file": "/etc/parallelcluster/slurm_plugin/fleet-config.json",
+        "fleet_config_cache_file": None,
         "job_level_scaling": True,
         "scaling_strategy": "all-or-nothing",
+        "resume_server_socket": None,
+        "resume_server_timeout": 900,
+        "resume_server_coalesce_window": 0.5,
+        "warm_pool_file": None,
+        "ec2_api_rate_limiter_file": None,
+        "ec2_api_rate_limits": "",
     }
 
     def __init__(self, config_file_path):
@@ -56,9 +82,16 @@ class SlurmResumeConfig:
         attrs = ", ".join(["{key}={value}".format(key=key, value=repr(value)) for key, value in self.__dict__.items()])
         return "{class_name}({attrs})".format(class_name=self.__class__.__name__, attrs=attrs)
 
+    @functools.cached_property
+    def boto3_config(self):
+        from botocore.config import Config
+
+        return Config(**self._boto3_config)
+
     def _get_config(self, config_file_path):
         """Get resume program configuration."""
         log.info("Reading %s", config_file_path)
+        self.config_files = [config_file_path]
 
         config = ConfigParser()
         try:
@@ -71,6 +104,11 @@ class SlurmResumeConfig:
         self.region = config.get("slurm_resume", "region")
         self.cluster_name = config.get("slurm_resume", "cluster_name")
         self.dynamodb_table = config.get("slurm_resume", "dynamodb_table")
+        self.hostname_table_max_concurrency = config.getint(
+            "slurm_resume",
+            "hostname_table_max_concurrency",
+            fallback=self.DEFAULTS.get("hostname_table_max_concurrency"),
+        )
         self.hosted_zone = config.get("slurm_resume", "hosted_zone", fallback=self.DEFAULTS.get("hosted_zone"))
         self.dns_domain = config.get("slurm_resume", "dns_domain", fallback=self.DEFAULTS.get("dns_domain"))
         self.use_private_hostname = config.getboolean(
@@ -81,6 +119,22 @@ class SlurmResumeConfig:
         self.launch_max_batch_size = config.getint(
             "slurm_resume", "launch_max_batch_size", fallback=self.DEFAULTS.get("launch_max_batch_size")
         )
+        self.launch_min_batch_size = config.getint(
+            "slurm_resume", "launch_min_batch_size", fallback=self.DEFAULTS.get("launch_min_batch_size")
+        )
+        # Batch sizes adapted to the outcome of the previous launches, between launch_min_batch_size and
+        # launch_max_batch_size, when not set launch_max_batch_size is used
+        self.adaptive_launch_batch_size_file = config.get(
+            "slurm_resume",
+            "adaptive_launch_batch_size_file",
+            fallback=self.DEFAULTS.get("adaptive_launch_batch_size_file"),
+        )
+        self.launch_max_concurrency = config.getint(
+            "slurm_resume", "launch_max_concurrency", fallback=self.DEFAULTS.get("launch_max_concurrency")
+        )
+        self.pipelined_node_assignment = config.getboolean(
+            "slurm_resume", "pipelined_node_assignment", fallback=self.DEFAULTS.get("pipelined_node_assignment")
+        )
         self.assign_node_max_batch_size = config.getint(
             "slurm_resume", "assign_node_max_batch_size", fallback=self.DEFAULTS.get("assign_node_max_batch_size")
         )
@@ -90,6 +144,19 @@ class SlurmResumeConfig:
         self.update_node_address = config.getboolean(
             "slurm_resume", "update_node_address", fallback=self.DEFAULTS.get("update_node_address")
         )
+        self.create_fleet_instances_info = CreateFleetInstancesInfo(
+            config.get(
+                "slurm_resume",
+                "create_fleet_instances_info",
+                fallback=self.DEFAULTS.get("create_fleet_instances_info"),
+            )
+        )
+        if self.create_fleet_instances_info == CreateFleetInstancesInfo.SKIP and self.update_node_address:
+            log.warning(
+                "The network info of the instances launched with CreateFleet is required to update the node "
+                "addresses, describing the instances"
+            )
+            self.create_fleet_instances_info = CreateFleetInstancesInfo.DESCRIBE
         self.scaling_strategy = config.get(
             "slurm_resume", "scaling_strategy", fallback=self.DEFAULTS.get("scaling_strategy")
         )  # TODO: Check if it's a valid scaling strategy before calling expensive downstream APIs
@@ -99,7 +166,15 @@ class SlurmResumeConfig:
         fleet_config_file = config.get(
             "slurm_resume", "fleet_config_file", fallback=self.DEFAULTS.get("fleet_config_file")
         )
-        self.fleet_config = read_json(fleet_config_file)
+        # Marshal cache of the fleet config, faster to load than the json file
+        fleet_config_cache_file = config.get(
+            "slurm_resume", "fleet_config_cache_file", fallback=self.DEFAULTS.get("fleet_config_cache_file")
+        )
+        if fleet_config_cache_file:
+            self.fleet_config = read_cached_json(fleet_config_file, fleet_config_cache_file)
+        else:
+            self.fleet_config = read_json(fleet_config_file)
+        self.config_files.append(fleet_config_file)
 
         # run_instances_overrides_file and create_fleet_overrides_file contain a json with the following format:
         # {
@@ -115,10 +190,12 @@ class SlurmResumeConfig:
             "slurm_resume", "run_instances_overrides", fallback=self.DEFAULTS.get("run_instances_overrides")
         )
         self.run_instances_overrides = read_json(run_instances_overrides_file, default={})
+        self.config_files.append(run_instances_overrides_file)
         create_fleet_overrides_file = config.get(
             "slurm_resume", "create_fleet_overrides", fallback=self.DEFAULTS.get("create_fleet_overrides")
         )
         self.create_fleet_overrides = read_json(create_fleet_overrides_file, default={})
+        self.config_files.append(create_fleet_overrides_file)
 
         self.clustermgtd_timeout = config.getint(
             "slurm_resume",
@@ -133,10 +210,31 @@ class SlurmResumeConfig:
         proxy = config.get("slurm_resume", "proxy", fallback=self.DEFAULTS.get("proxy"))
         if proxy != "NONE":
             self._boto3_config["proxies"] = {"https": proxy}
-        self.boto3_config = Config(**self._boto3_config)
+        # State of the rate limiter of the EC2 API calls shared with clustermgtd, disabled when not set
+        self.ec2_api_rate_limiter_file = config.get(
+            "slurm_resume", "ec2_api_rate_limiter_file", fallback=self.DEFAULTS.get("ec2_api_rate_limiter_file")
+        )
+        self.ec2_api_rate_limits = parse_rate_limits(
+            config.get("slurm_resume", "ec2_api_rate_limits", fallback=self.DEFAULTS.get("ec2_api_rate_limits"))
+        )
         self.logging_config = config.get("slurm_resume", "logging_config", fallback=self.DEFAULTS.get("logging_config"))
         self.head_node_instance_id = config.get("slurm_resume", "instance_id", fallback="unknown")
 
+        # Unix socket of the resume server, when set resume requests are submitted to the server
+        self.resume_server_socket = config.get(
+            "slurm_resume", "resume_server_socket", fallback=self.DEFAULTS.get("resume_server_socket")
+        )
+        self.resume_server_timeout = config.getint(
+            "slurm_resume", "resume_server_timeout", fallback=self.DEFAULTS.get("resume_server_timeout")
+        )
+        self.resume_server_coalesce_window = config.getfloat(
+            "slurm_resume",
+            "resume_server_coalesce_window",
+            fallback=self.DEFAULTS.get("resume_server_coalesce_window"),
+        )
+        # Pool of instances launched ahead of time by clustermgtd, when set used before launching new instances
+        self.warm_pool_file = config.get("slurm_resume", "warm_pool_file", fallback=self.DEFAULTS.get("warm_pool_file"))
+
         log.debug(self.__repr__())
 
 
@@ -155,6 +253,8 @@ def _handle_failed_nodes(node_list, reason="Failure when resuming nodes"):
     Clustermgtd will be responsible for running full DOWN -> POWER_DOWN process.
     """
     if node_list:
+        from common.schedulers.slurm_commands import set_nodes_down
+
         try:
             log.info(
                 "Setting following failed nodes into DOWN state %s with reason: %s", print_with_count(node_list), reason
@@ -169,8 +269,18 @@ def _handle_failed_nodes(node_list, reason="Failure when resuming nodes"):
             )
 
 
-def _resume(arg_nodes, resume_config, slurm_resume):
-    """Launch new EC2 nodes according to nodes requested by slurm."""
+def _resume(arg_nodes, resume_config, slurm_resume, get_cancelled_nodes=None):
+    """
+    Launch new EC2 nodes according to nodes requested by slurm and return the failed nodes by error code.
+
+    get_cancelled_nodes returns the nodes whose resume was cancelled meanwhile, whose instances are not assigned.
+    """
+    from common.schedulers.slurm_commands import get_nodes_info
+    from slurm_plugin.cluster_event_publisher import ClusterEventPublisher
+    from slurm_plugin.instance_manager import InstanceManager
+    from slurm_plugin.launch_batch_sizer import AdaptiveLaunchBatchSizer
+    from slurm_plugin.warm_pool import WarmPool
+
     # Check heartbeat
     current_time = datetime.now(tz=timezone.utc)
     if not is_clustermgtd_heartbeat_valid(
@@ -183,7 +293,7 @@ def _resume(arg_nodes, resume_config, slurm_resume):
             arg_nodes,
         )
         _handle_failed_nodes(arg_nodes)
-        return
+        return {"InvalidClustermgtdHeartbeat": set(expand_hostlist(arg_nodes))}
     log.info("Launching EC2 instances for the following Slurm nodes: %s", arg_nodes)
     node_list = []
     node_list_with_status = []
@@ -192,6 +302,12 @@ def _resume(arg_nodes, resume_config, slurm_resume):
         node_list_with_status.append((node.name, node.state_string))
     log.info("Current state of Slurm nodes to resume: %s", node_list_with_status)
 
+    rate_limiter.set_rate_limiter(
+        TokenBucketRateLimiter(resume_config.ec2_api_rate_limiter_file, resume_config.ec2_api_rate_limits)
+        if resume_config.ec2_api_rate_limiter_file
+        else None
+    )
+
     instance_manager = InstanceManager(
         region=resume_config.region,
         cluster_name=resume_config.cluster_name,
@@ -206,6 +322,21 @@ def _resume(arg_nodes, resume_config, slurm_resume):
         run_instances_overrides=resume_config.run_instances_overrides,
         create_fleet_overrides=resume_config.create_fleet_overrides,
         job_level_scaling=resume_config.job_level_scaling,
+        launch_max_concurrency=resume_config.launch_max_concurrency,
+        pipelined_node_assignment=resume_config.pipelined_node_assignment,
+        warm_pool=WarmPool(resume_config.warm_pool_file) if resume_config.warm_pool_file else None,
+        launch_batch_sizer=(
+            AdaptiveLaunchBatchSizer(
+                resume_config.adaptive_launch_batch_size_file,
+                min_batch_size=resume_config.launch_min_batch_size,
+                max_batch_size=resume_config.launch_max_batch_size,
+            )
+            if resume_config.adaptive_launch_batch_size_file
+            else None
+        ),
+        create_fleet_instances_info=resume_config.create_fleet_instances_info,
+        hostname_table_max_concurrency=resume_config.hostname_table_max_concurrency,
+        get_cancelled_nodes=get_cancelled_nodes,
     )
     instance_manager.add_instances(
         slurm_resume=slurm_resume,
@@ -237,6 +368,55 @@ def _resume(arg_nodes, resume_config, slurm_resume):
             resume_config.head_node_instance_id,
         )
         event_publisher.publish_node_launch_events(instance_manager.failed_nodes)
+    return instance_manager.failed_nodes
+
+
+def _submit_to_resume_server(arg_nodes, resume_config, slurm_resume):
+    """Submit the nodes to resume to the resume server and return its response, once the nodes are launched."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        # The server answers within resume_server_timeout, failing the nodes itself when the request times out
+        client.settimeout(resume_config.resume_server_timeout + RESUME_SERVER_RESPONSE_MARGIN)
+        client.connect(resume_config.resume_server_socket)
+        client.sendall(json.dumps({"nodes": arg_nodes, "slurm_resume": slurm_resume}).encode("utf-8") + b"\n")
+        with client.makefile("r", encoding="utf-8") as response_file:
+            response = response_file.readline()
+    if not response:
+        raise ConnectionError("Resume server closed the connection without response")
+    return json.loads(response)
+
+
+def _resume_with_server(arg_nodes, resume_config, slurm_resume):
+    """
+    Resume the nodes through the resume server, which coalesces the requests of concurrent ResumeProgram invocations.
+
+    Failed nodes are set to DOWN by the server. Return False if the server is not running, in which case the nodes
+    must be resumed by this process.
+    """
+    try:
+        response = _submit_to_resume_server(arg_nodes, resume_config, slurm_resume)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        log.warning(
+            "Resume server not available on %s, resuming nodes in this process: %s",
+            resume_config.resume_server_socket,
+            e,
+        )
+        return False
+    except socket.timeout:
+        # Only the server sets the nodes to DOWN, since their instances could still be being assigned
+        log.error(
+            "No response from resume server within %s seconds for nodes %s",
+            resume_config.resume_server_timeout + RESUME_SERVER_RESPONSE_MARGIN,
+            arg_nodes,
+        )
+        return True
+
+    if response.get("error"):
+        log.error("Resume server failed to resume nodes %s: %s", arg_nodes, response["error"])
+    for error_code, node_list in response.get("failed_nodes", {}).items():
+        log.error(
+            "Resume server failed to launch nodes with error code %s: %s", error_code, print_with_count(node_list)
+        )
+    return True
 
 
 def main():
@@ -265,7 +445,9 @@ def main():
             )
         log.info("ResumeProgram config: %s", resume_config)
 
-        _resume(args.nodes, resume_config, _get_slurm_resume())
+        slurm_resume = _get_slurm_resume()
+        if not (resume_config.resume_server_socket and _resume_with_server(args.nodes, resume_config, slurm_resume)):
+            _resume(args.nodes, resume_config, slurm_resume)
         log.info("ResumeProgram finished.")
     except Exception as e:
         log.exception("Encountered exception when requesting instances for %s: %s", args.nodes, e)
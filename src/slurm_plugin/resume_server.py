@@ -0,0 +1,297 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import queue
+import socketserver
+import stat
+import threading
+import time
+from functools import partial
+from logging.config import fileConfig
+from typing import Dict, List, Set
+
+from common.hostlist import expand_hostlist
+from common.utils import get_files_signature
+from slurm_plugin.resume import SlurmResumeConfig, _handle_failed_nodes, _resume
+from slurm_plugin.slurm_resources import CONFIG_FILE_DIR
+
+log = logging.getLogger(__name__)
+
+
+class ResumeRequest:
+    """
+    Nodes to resume submitted by a ResumeProgram invocation, completed with its failed nodes once processed.
+
+    A request not completed in time is cancelled: its nodes are not resumed, and the instances already launched for
+    them are terminated rather than assigned.
+    """
+
+    def __init__(self, nodes: str, slurm_resume: Dict[str, any]):
+        self.nodes = nodes
+        self.slurm_resume = slurm_resume or {}
+        self.failed_nodes = {}
+        self.error = None
+        self.cancelled = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def complete(self, failed_nodes: Dict[str, set] = None, error: str = None):
+        """Keep the failed nodes belonging to this request and wake up the waiting client."""
+        with self._lock:
+            self.error = error
+            try:
+                node_names = set(expand_hostlist(self.nodes))
+                for error_code, node_list in (failed_nodes or {}).items():
+                    request_failed_nodes = sorted(node_names.intersection(node_list))
+                    if request_failed_nodes:
+                        self.failed_nodes[error_code] = request_failed_nodes
+            finally:
+                self._done.set()
+
+    def cancel(self) -> bool:
+        """Cancel the request unless already completed, returning whether it was cancelled."""
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self.cancelled = True
+            return True
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def is_done(self) -> bool:
+        return self._done.is_set()
+
+    def to_response(self):
+        return {"failed_nodes": self.failed_nodes, "error": self.error}
+
+
+def merge_requests(requests: List[ResumeRequest]):
+    """
+    Merge resume requests into the node list and the Slurm resume file content of a single resume.
+
+    Jobs keep their own entry in the merged resume file, so that the scaling strategy is still applied per job.
+    """
+    nodes = ",".join(request.nodes for request in requests)
+    slurm_resume = {}
+    if any(request.slurm_resume for request in requests):
+        slurm_resume = {
+            "all_nodes_resume": ",".join(
+                request.slurm_resume["all_nodes_resume"]
+                for request in requests
+                if request.slurm_resume.get("all_nodes_resume")
+            ),
+            "jobs": [job for request in requests for job in request.slurm_resume.get("jobs", [])],
+        }
+    return nodes, slurm_resume
+
+
+def _fail_requests(requests: List[ResumeRequest], error: str):
+    """Set the nodes of the given requests to DOWN and complete the requests with the error."""
+    for request in requests:
+        try:
+            # The nodes of cancelled requests are already set to DOWN
+            if not request.cancelled:
+                _handle_failed_nodes(request.nodes)
+        finally:
+            request.complete(error=error)
+
+
+def _drop_cancelled_requests(requests: List[ResumeRequest]) -> List[ResumeRequest]:
+    """Return the requests not cancelled, e.g. because they waited in the queue for too long."""
+    cancelled_requests = [request for request in requests if request.cancelled]
+    if cancelled_requests:
+        log.warning(
+            "Dropping cancelled resume requests for nodes %s", ",".join(request.nodes for request in cancelled_requests)
+        )
+    return [request for request in requests if not request.cancelled]
+
+
+def _get_cancelled_nodes(requests: List[ResumeRequest]) -> Set[str]:
+    """Return the nodes of the cancelled requests, whose instances must not be assigned."""
+    return {node for request in requests if request.cancelled for node in expand_hostlist(request.nodes)}
+
+
+class _ResumeRequestHandler(socketserver.StreamRequestHandler):
+    """Read a resume request as a JSON line and answer with the failed nodes of the request once processed."""
+
+    def handle(self):
+        try:
+            message = json.loads(self.rfile.readline())
+            request = ResumeRequest(message["nodes"], message.get("slurm_resume"))
+        except (ValueError, KeyError, TypeError) as e:
+            log.error("Discarding invalid resume request: %s", e)
+            self._reply({"failed_nodes": {}, "error": "Invalid resume request"})
+            return
+        resume_server = self.server.resume_server
+        resume_server.submit(request)
+        timeout = resume_server.config.resume_server_timeout
+        # A request completed right before being cancelled is answered with its outcome
+        if not request.wait(timeout) and request.cancel():
+            log.error("Resume request for nodes %s not processed within %s seconds", request.nodes, timeout)
+            _handle_failed_nodes(request.nodes)
+            self._reply({"failed_nodes": {}, "error": f"Resume request not processed within {timeout} seconds"})
+            return
+        self._reply(request.to_response())
+
+    def _reply(self, response):
+        try:
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        except OSError as e:
+            log.warning("Unable to reply to resume client: %s", e)
+
+
+class ResumeServer:
+    """
+    Resident resume process coalescing the requests of concurrent ResumeProgram invocations.
+
+    Requests received within the coalesce window are merged and resumed together, so that the nodes of a job burst
+    are launched with combined per compute resource launch batches. While a batch is being resumed, new requests are
+    queued and coalesced into the next batch.
+    """
+
+    def __init__(self, config_file: str):
+        self._config_file = config_file
+        self._config = SlurmResumeConfig(config_file)
+        self._config_signature = get_files_signature(self._config.config_files)
+        self._requests = queue.Queue()
+        self._server = None
+
+    @property
+    def config(self) -> SlurmResumeConfig:
+        return self._config
+
+    def submit(self, request: ResumeRequest):
+        self._requests.put(request)
+
+    def _next_batch(self) -> List[ResumeRequest]:
+        """Wait for a request and return it with the requests received within the coalesce window."""
+        requests = [self._requests.get()]
+        deadline = time.monotonic() + self._config.resume_server_coalesce_window
+        while True:
+            try:
+                requests.append(self._requests.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                return _drop_cancelled_requests(requests)
+
+    def _reload_config(self):
+        """Read again the resume config if its files changed, e.g. after a cluster update."""
+        signature = get_files_signature(self._config.config_files)
+        if signature == self._config_signature:
+            return
+        try:
+            self._config = SlurmResumeConfig(self._config_file)
+            self._config_signature = signature
+        except Exception as e:
+            log.warning(
+                "Unable to reload resume config from %s, using previous one.\nException: %s", self._config_file, e
+            )
+
+    def process_batch(self, requests: List[ResumeRequest]):
+        """
+        Resume the nodes of the given requests together and complete each request with its failed nodes.
+
+        Requests cancelled while waiting are dropped, the ones cancelled while resumed get no instance assigned.
+        """
+        requests = _drop_cancelled_requests(requests)
+        if not requests:
+            return
+        nodes, slurm_resume = merge_requests(requests)
+        log.info("Resuming nodes of %s coalesced requests: %s", len(requests), nodes)
+        try:
+            failed_nodes = _resume(
+                nodes, self._config, slurm_resume, get_cancelled_nodes=partial(_get_cancelled_nodes, requests)
+            )
+        except Exception as e:
+            log.exception("Encountered exception when requesting instances for %s: %s", nodes, e)
+            _fail_requests(requests, str(e))
+            return
+        for request in requests:
+            request.complete(failed_nodes=failed_nodes)
+
+    def _process_requests(self):
+        while True:
+            requests = self._next_batch()
+            if not requests:
+                continue
+            # An unexpected error must not stop the thread, otherwise no further request would be processed
+            try:
+                self._reload_config()
+                self.process_batch(requests)
+            except Exception as e:
+                log.exception("Unexpected error when processing %s resume requests: %s", len(requests), e)
+                _fail_requests([request for request in requests if not request.is_done()], str(e))
+
+    def serve(self):
+        """Listen for resume requests on the configured Unix socket and process them until interrupted."""
+        socket_path = self._config.resume_server_socket
+        if not socket_path:
+            raise ValueError("resume_server_socket is not set in the resume config")
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.unlink(socket_path)
+        # Only the user running the server, i.e. the Slurm user running ResumeProgram, can submit requests. The socket
+        # is created with these permissions, so that no other user can connect before they are set. The umask is
+        # process-wide, so the thread processing the requests, which writes files shared with clustermgtd, is started
+        # once the umask is restored.
+        previous_umask = os.umask(0o077)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(socket_path, _ResumeRequestHandler)
+        finally:
+            os.umask(previous_umask)
+        threading.Thread(target=self._process_requests, name="resume-batches", daemon=True).start()
+        with server:
+            server.daemon_threads = True
+            server.resume_server = self
+            self._server = server
+            log.info("Resume server listening on %s", socket_path)
+            try:
+                server.serve_forever()
+            finally:
+                os.unlink(socket_path)
+
+    def shutdown(self):
+        """Stop listening for resume requests."""
+        if self._server:
+            self._server.shutdown()
+
+
+def main():
+    default_log_file = "/var/log/parallelcluster/slurm_resume.log"
+    logging.basicConfig(
+        filename=default_log_file,
+        level=logging.INFO,
+        format="%(asctime)s - %(process)d - [%(name)s:%(funcName)s] - %(levelname)s - %(message)s",
+    )
+    log.info("Resume server startup.")
+    config_file = os.environ.get("CONFIG_FILE", os.path.join(CONFIG_FILE_DIR, "parallelcluster_slurm_resume.conf"))
+    try:
+        resume_server = ResumeServer(config_file)
+        try:
+            # Configure root logger
+            fileConfig(resume_server.config.logging_config, disable_existing_loggers=False)
+        except Exception as e:
+            log.warning(
+                "Unable to configure logging from %s, using default settings and writing to %s.\nException: %s",
+                resume_server.config.logging_config,
+                default_log_file,
+                e,
+            )
+        resume_server.serve()
+    except Exception as e:
+        log.exception("An unexpected error occurred: %s", e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
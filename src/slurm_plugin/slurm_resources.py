@@ -11,13 +11,16 @@
 
 import logging
 import re
+import sys
+import threading
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from typing import List
 
-from common.utils import convert_range_to_list, time_is_up
+from common.hostlist import iter_hostlist
+from common.utils import time_is_up
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,7 @@ EC2_HEALTH_STATUS_UNHEALTHY_STATES = {"impaired"}
 EC2_INSTANCE_HEALTHY_STATES = {"pending", "running"}
 EC2_INSTANCE_STOP_STATES = {"stopping", "stopped"}
 EC2_INSTANCE_ALIVE_STATES = EC2_INSTANCE_HEALTHY_STATES | EC2_INSTANCE_STOP_STATES
+EC2_INSTANCE_TERMINATED_STATES = {"shutting-down", "terminated"}
 EC2_SCHEDULED_EVENT_CODES = [
     "instance-reboot",
     "system-reboot",
@@ -38,6 +42,29 @@ EC2_SCHEDULED_EVENT_CODES = [
 
 CONFIG_FILE_DIR = "/etc/parallelcluster/slurm_plugin"
 
+# Bit assigned to every Slurm node state, new states are assigned the next free bit the first time they are seen
+_NODE_STATE_FLAGS = {}
+# Flag masks of the node state strings seen so far, e.g. IDLE+CLOUD+POWERED_DOWN, there are only a few distinct ones
+_NODE_STATE_MASKS = {}
+_NODE_STATE_FLAGS_LOCK = threading.Lock()
+
+
+def get_node_state_mask(states) -> int:
+    """Return the flag mask of a node state string, e.g. IDLE+CLOUD, or of an iterable of states."""
+    if isinstance(states, str):
+        mask = _NODE_STATE_MASKS.get(states)
+        if mask is None:
+            mask = _NODE_STATE_MASKS.setdefault(states, get_node_state_mask(states.split("+")))
+        return mask
+    mask = 0
+    for state in states:
+        flag = _NODE_STATE_FLAGS.get(state)
+        if flag is None:
+            with _NODE_STATE_FLAGS_LOCK:
+                flag = _NODE_STATE_FLAGS.setdefault(state, 1 << len(_NODE_STATE_FLAGS))
+        mask |= flag
+    return mask
+
 
 class PartitionStatus(Enum):
     UP = "UP"
@@ -225,6 +252,50 @@ class SlurmNode(metaclass=ABCMeta):
         "SpotMaxPriceTooLow",
     }
 
+    # Flag masks of the states above, used to evaluate state predicates with bit tests
+    _BUSY_MASK = get_node_state_mask(SLURM_SCONTROL_BUSY_STATES)
+    _COMPLETING_MASK = get_node_state_mask([SLURM_SCONTROL_COMPLETING_STATE])
+    _IDLE_MASK = get_node_state_mask([SLURM_SCONTROL_IDLE_STATE])
+    _DOWN_MASK = get_node_state_mask([SLURM_SCONTROL_DOWN_STATE])
+    _DRAIN_MASK = get_node_state_mask([SLURM_SCONTROL_DRAIN_STATE])
+    _POWERING_DOWN_MASK = get_node_state_mask([SLURM_SCONTROL_POWERING_DOWN_STATE])
+    _POWER_DOWN_MASK = get_node_state_mask([SLURM_SCONTROL_POWER_DOWN_STATE])
+    _POWERED_DOWN_MASK = get_node_state_mask([SLURM_SCONTROL_POWERED_DOWN_STATE])
+    _POWER_UP_MASK = get_node_state_mask([SLURM_SCONTROL_POWER_UP_STATE])
+    _POWER_WITH_JOB_MASK = get_node_state_mask(SLURM_SCONTROL_POWER_WITH_JOB_STATE)
+    _RESUME_FAILED_MASK = get_node_state_mask(SLURM_SCONTROL_RESUME_FAILED_STATE)
+    _DOWN_NOT_RESPONDING_MASK = get_node_state_mask(SLURM_SCONTROL_NODE_DOWN_NOT_RESPONDING_STATE)
+    _POWER_MASKS = tuple(get_node_state_mask(states) for states in SLURM_SCONTROL_POWER_STATES)
+    _REBOOT_REQUESTED_MASK = get_node_state_mask([SLURM_SCONTROL_REBOOT_REQUESTED_STATE])
+    _REBOOT_ISSUED_MASK = get_node_state_mask([SLURM_SCONTROL_REBOOT_ISSUED_STATE])
+    _INVALID_REGISTRATION_MASK = get_node_state_mask([SLURM_SCONTROL_INVALID_REGISTRATION_STATE])
+    _RESERVED_MASK = get_node_state_mask([SLURM_SCONTROL_RESERVED_STATE])
+    _MAINTENANCE_MASK = get_node_state_mask([SLURM_SCONTROL_MAINTENANCE_STATE])
+
+    # Nodes are kept in memory for every node of the cluster, slots avoid the per-instance __dict__
+    __slots__ = (
+        "name",
+        "nodeaddr",
+        "nodehostname",
+        "state_string",
+        "state_mask",
+        "partitions",
+        "reason",
+        "instance",
+        "slurmdstarttime",
+        "lastbusytime",
+        "reservation_name",
+        "is_static_nodes_in_replacement",
+        "is_being_replaced",
+        "_is_replacement_timeout",
+        "is_failing_health_check",
+        "error_code",
+        "queue_name",
+        "_node_type",
+        "compute_resource_name",
+        "ec2_backing_instance_valid",
+    )
+
     def __init__(
         self,
         name,
@@ -242,9 +313,10 @@ class SlurmNode(metaclass=ABCMeta):
         self.name = name
         self.nodeaddr = nodeaddr
         self.nodehostname = nodehostname
-        self.state_string = state
-        self.states = set(state.split("+"))
-        self.partitions = partitions.strip().split(",") if partitions else None
+        # State strings and partition, queue and compute resource names are shared by many nodes, intern them
+        self.state_string = sys.intern(state)
+        self.state_mask = get_node_state_mask(state)
+        self.partitions = [sys.intern(partition) for partition in partitions.strip().split(",")] if partitions else None
         self.reason = reason
         self.instance = instance
         self.slurmdstarttime = slurmdstarttime
@@ -255,20 +327,27 @@ class SlurmNode(metaclass=ABCMeta):
         self._is_replacement_timeout = False
         self.is_failing_health_check = False
         self.error_code = self._parse_error_code()
-        self.queue_name, self._node_type, self.compute_resource_name = parse_nodename(name)
+        queue_name, self._node_type, compute_resource_name = parse_nodename(name)
+        self.queue_name = sys.intern(queue_name)
+        self.compute_resource_name = sys.intern(compute_resource_name)
         self.ec2_backing_instance_valid = None
 
+    @property
+    def states(self):
+        """Return the set of states of the node, e.g. {"IDLE", "CLOUD"}."""
+        return set(self.state_string.split("+"))
+
     def is_nodeaddr_set(self):
         """Check if nodeaddr(private ip) for the node is set."""
         return self.nodeaddr != self.name
 
     def has_job(self):
         """Check if slurm node is in a working state."""
-        return any(working_state in self.states for working_state in self.SLURM_SCONTROL_BUSY_STATES)
+        return bool(self.state_mask & self._BUSY_MASK)
 
     def _is_drain(self):
         """Check if slurm node is in any drain(draining, drained) states."""
-        return self.SLURM_SCONTROL_DRAIN_STATE in self.states
+        return bool(self.state_mask & self._DRAIN_MASK)
 
     def is_drained(self):
         """
@@ -278,25 +357,25 @@ class SlurmNode(metaclass=ABCMeta):
         """
         return (
             self._is_drain()
-            and (self.SLURM_SCONTROL_IDLE_STATE in self.states or self.is_down())
+            and (bool(self.state_mask & self._IDLE_MASK) or self.is_down())
             and not self.is_completing()
         )
 
     def is_completing(self):
         """Check if slurm node is in COMPLETING state."""
-        return self.SLURM_SCONTROL_COMPLETING_STATE in self.states
+        return bool(self.state_mask & self._COMPLETING_MASK)
 
     def is_power_down(self):
         """Check if slurm node is in power down state."""
-        return self.SLURM_SCONTROL_POWER_DOWN_STATE in self.states
+        return bool(self.state_mask & self._POWER_DOWN_MASK)
 
     def is_powering_down(self):
         """Check if slurm node is in powering down state."""
-        return self.SLURM_SCONTROL_POWERING_DOWN_STATE in self.states
+        return bool(self.state_mask & self._POWERING_DOWN_MASK)
 
     def is_powered_down(self):
         """Check if slurm node is in powered down state."""
-        return self.SLURM_SCONTROL_POWERED_DOWN_STATE in self.states
+        return bool(self.state_mask & self._POWERED_DOWN_MASK)
 
     def is_idle(self):
         """
@@ -304,16 +383,16 @@ class SlurmNode(metaclass=ABCMeta):
 
         A node is idle if it has a backing instance, LastBusyTime has a value from scontrol, and is in IDLE state.
         """
-        return self.instance and self.lastbusytime and self.SLURM_SCONTROL_IDLE_STATE in self.states
+        return self.instance and self.lastbusytime and bool(self.state_mask & self._IDLE_MASK)
 
     def is_power(self):
         """Check if slurm node is in power state."""
-        return self.states in self.SLURM_SCONTROL_POWER_STATES
+        return self.state_mask in self._POWER_MASKS
 
     def is_down(self):
         """Check if slurm node is in a down state."""
         return (
-            self.SLURM_SCONTROL_DOWN_STATE in self.states
+            bool(self.state_mask & self._DOWN_MASK)
             and not self.is_powering_down()
             and (not self.is_power_down() or self.is_powered_down())
         )
@@ -324,15 +403,15 @@ class SlurmNode(metaclass=ABCMeta):
 
     def _is_reserved(self):
         """Check if slurm node is reserved."""
-        return self.SLURM_SCONTROL_RESERVED_STATE in self.states
+        return bool(self.state_mask & self._RESERVED_MASK)
 
     def is_in_maintenance(self):
         """Check if slurm node is reserved and in maintenance."""
-        return self.SLURM_SCONTROL_MAINTENANCE_STATE in self.states and self._is_reserved()
+        return bool(self.state_mask & self._MAINTENANCE_MASK) and self._is_reserved()
 
     def is_powering_up(self):
         """Check if slurm node is in powering up state."""
-        return self.SLURM_SCONTROL_POWER_UP_STATE in self.states
+        return bool(self.state_mask & self._POWER_UP_MASK)
 
     def is_online(self):
         """Check if slurm node is online with backing instance."""
@@ -344,7 +423,7 @@ class SlurmNode(metaclass=ABCMeta):
 
     def is_power_with_job(self):
         """Dynamic nodes allocated a job but power up process has not started yet."""
-        return self.states == self.SLURM_SCONTROL_POWER_WITH_JOB_STATE
+        return self.state_mask == self._POWER_WITH_JOB_MASK
 
     def is_running_job(self):
         """Check if slurm node is running a job but not in configuring job state."""
@@ -352,12 +431,12 @@ class SlurmNode(metaclass=ABCMeta):
 
     def is_resume_failed(self):
         """Check if node resume timeout expires."""
-        return self.states == self.SLURM_SCONTROL_RESUME_FAILED_STATE
+        return self.state_mask == self._RESUME_FAILED_MASK
 
     def is_down_not_responding(self):
         """Check if node was set to down by Slurm because it was not responding."""
         return (
-            self.states == self.SLURM_SCONTROL_NODE_DOWN_NOT_RESPONDING_STATE
+            self.state_mask == self._DOWN_NOT_RESPONDING_MASK
             and self.SLURM_SCONTROL_NODE_DOWN_NOT_RESPONDING_REASON.match(self.reason)
             if self.reason
             else False
@@ -365,16 +444,16 @@ class SlurmNode(metaclass=ABCMeta):
 
     def is_powering_up_idle(self):
         """Check if node is in IDLE# state."""
-        return self.SLURM_SCONTROL_IDLE_STATE in self.states and self.is_powering_up()
+        return bool(self.state_mask & self._IDLE_MASK) and self.is_powering_up()
 
     def is_ice(self):
         return self.error_code in self.EC2_ICE_ERROR_CODES
 
     def is_reboot_requested(self):
-        return self.SLURM_SCONTROL_REBOOT_REQUESTED_STATE in self.states
+        return bool(self.state_mask & self._REBOOT_REQUESTED_MASK)
 
     def is_reboot_issued(self):
-        return self.SLURM_SCONTROL_REBOOT_ISSUED_STATE in self.states
+        return bool(self.state_mask & self._REBOOT_ISSUED_MASK)
 
     def is_rebooting(self):
         """
@@ -394,7 +473,7 @@ class SlurmNode(metaclass=ABCMeta):
 
     def is_invalid_slurm_registration(self):
         """Check if a slurm node has failed registration with the Slurm management daemon."""
-        return self.SLURM_SCONTROL_INVALID_REGISTRATION_STATE in self.states
+        return bool(self.state_mask & self._INVALID_REGISTRATION_MASK)
 
     @abstractmethod
     def is_state_healthy(self, consider_drain_as_unhealthy, consider_down_as_unhealthy, log_warn_if_unhealthy=True):
@@ -497,14 +576,19 @@ class SlurmNode(metaclass=ABCMeta):
             return error_code
         return None
 
+    def _attributes(self):
+        return {attr: getattr(self, attr) for attr in SlurmNode.__slots__}
+
     def __eq__(self, other):
         """Compare 2 SlurmNode objects."""
         if isinstance(other, SlurmNode):
-            return self.__dict__ == other.__dict__
+            return self._attributes() == other._attributes()
         return False
 
     def __repr__(self):
-        attrs = ", ".join(["{key}={value}".format(key=key, value=repr(value)) for key, value in self.__dict__.items()])
+        attrs = ", ".join(
+            ["{key}={value}".format(key=key, value=repr(value)) for key, value in self._attributes().items()]
+        )
         return "{class_name}({attrs})".format(class_name=self.__class__.__name__, attrs=attrs)
 
     def __str__(self):
@@ -515,6 +599,8 @@ class SlurmNode(metaclass=ABCMeta):
 
 
 class StaticNode(SlurmNode):
+    __slots__ = ()
+
     def __init__(
         self,
         name,
@@ -649,6 +735,8 @@ class StaticNode(SlurmNode):
 
 
 class DynamicNode(SlurmNode):
+    __slots__ = ()
+
     def __init__(
         self,
         name,
@@ -860,8 +948,7 @@ def get_node_list(nodenames):
         else:
             # Multiple nodenames
             try:
-                node_range = convert_range_to_list(nodes.strip("[]"))
+                node_list.extend(iter_hostlist(prefix + nodes))
             except ValueError:
                 raise InvalidNodenameError
-            node_list += [prefix + str(n) for n in node_range]
     return node_list
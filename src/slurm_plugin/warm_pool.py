@@ -0,0 +1,147 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import fcntl
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+from common.utils import time_is_up
+from slurm_plugin.fleet_manager import EC2Instance
+
+logger = logging.getLogger(__name__)
+
+
+def _to_entry(queue: str, compute_resource: str, instance: EC2Instance, pooled_time: datetime):
+    launch_time = instance.launch_time
+    return {
+        "queue": queue,
+        "compute_resource": compute_resource,
+        "id": instance.id,
+        "private_ip": instance.private_ip,
+        "hostname": instance.hostname,
+        "all_private_ips": sorted(instance.all_private_ips),
+        "launch_time": launch_time.isoformat() if isinstance(launch_time, datetime) else launch_time,
+        "pooled_time": pooled_time.isoformat(),
+    }
+
+
+def _to_instance(entry) -> EC2Instance:
+    return EC2Instance(
+        entry["id"],
+        entry["private_ip"],
+        entry["hostname"],
+        set(entry["all_private_ips"]),
+        datetime.fromisoformat(entry["launch_time"]),
+    )
+
+
+class WarmPool:
+    """
+    Instances launched ahead of time for the compute resources, so that nodes can be resumed without waiting for EC2.
+
+    The pool is shared by clustermgtd, which refills it and terminates the instances idle for too long, and by the
+    resume program, which takes instances from it before launching new ones. It is stored in a JSON file updated under
+    an exclusive lock, so both files must be writable by both processes.
+    Instances taken from the pool are kept as claimed for a while, so that clustermgtd does not consider them orphaned
+    before they are assigned to their nodes.
+    """
+
+    def __init__(self, file_path: str):
+        self._file_path = file_path
+
+    def _read(self):
+        try:
+            with open(self._file_path, encoding="utf-8") as pool_file:
+                return json.load(pool_file)
+        except FileNotFoundError:
+            return {"instances": [], "claimed": {}}
+
+    @contextlib.contextmanager
+    def _update(self):
+        """Yield the pool content under an exclusive lock and write it back once modified."""
+        with open(f"{self._file_path}.lock", "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            pool = self._read()
+            yield pool
+            temporary_file_path = f"{self._file_path}.{os.getpid()}.tmp"
+            with open(temporary_file_path, "w", encoding="utf-8") as pool_file:
+                json.dump(pool, pool_file)
+            os.replace(temporary_file_path, self._file_path)
+
+    def take(self, queue: str, compute_resource: str, count: int, current_time: datetime) -> List[EC2Instance]:
+        """Take up to count instances of the given compute resource from the pool, marking them as claimed."""
+        with self._update() as pool:
+            taken, remaining = [], []
+            for entry in pool["instances"]:
+                if len(taken) < count and (entry["queue"], entry["compute_resource"]) == (queue, compute_resource):
+                    taken.append(entry)
+                    pool["claimed"][entry["id"]] = current_time.isoformat()
+                else:
+                    remaining.append(entry)
+            pool["instances"] = remaining
+        return [_to_instance(entry) for entry in taken]
+
+    def add(self, queue: str, compute_resource: str, instances: Iterable[EC2Instance], current_time: datetime):
+        with self._update() as pool:
+            pool["instances"].extend(
+                _to_entry(queue, compute_resource, instance, current_time) for instance in instances
+            )
+
+    def get_instance_ids(self) -> Set[str]:
+        """Return the ids of the instances in the pool or recently claimed."""
+        pool = self._read()
+        return {entry["id"] for entry in pool["instances"]} | set(pool["claimed"])
+
+    def maintain(
+        self,
+        target_sizes: Dict[Tuple[str, str], int],
+        alive_instance_ids: Set[str],
+        idle_timeout: int,
+        claim_timeout: int,
+        current_time: datetime,
+    ) -> Tuple[List[str], Dict[Tuple[str, str], int]]:
+        """
+        Remove dead, expired and exceeding instances and old claims from the pool.
+
+        Return the ids of the instances to terminate, i.e. the ones idle for more than idle_timeout or exceeding the
+        target size of their compute resource, and the number of instances to launch for every compute resource.
+        """
+        instance_ids_to_terminate = []
+        sizes = defaultdict(int)
+        # Oldest instances are the first ones to expire, so the newest ones are kept when the pool exceeds its size
+        with self._update() as pool:
+            kept = []
+            for entry in reversed(pool["instances"]):
+                key = (entry["queue"], entry["compute_resource"])
+                if entry["id"] not in alive_instance_ids:
+                    continue
+                if sizes[key] >= target_sizes.get(key, 0) or time_is_up(
+                    datetime.fromisoformat(entry["pooled_time"]), current_time, idle_timeout
+                ):
+                    instance_ids_to_terminate.append(entry["id"])
+                else:
+                    sizes[key] += 1
+                    kept.append(entry)
+            pool["instances"] = kept[::-1]
+            pool["claimed"] = {
+                instance_id: claim_time
+                for instance_id, claim_time in pool["claimed"].items()
+                if instance_id in alive_instance_ids
+                and not time_is_up(datetime.fromisoformat(claim_time), current_time, claim_timeout)
+            }
+        if instance_ids_to_terminate:
+            logger.info("Removing expired or exceeding instances from the warm pool: %s", instance_ids_to_terminate)
+        return instance_ids_to_terminate, {key: size - sizes[key] for key, size in target_sizes.items()}
@@ -0,0 +1,90 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+from concurrent.futures import ThreadPoolExecutor
+
+from assertpy import assert_that
+from botocore.config import Config
+from botocore.stub import Stubber
+from common import metrics, rate_limiter
+
+from aws.common import Boto3ClientRegistry
+
+
+def test_boto3_client_registry():
+    def _config(max_attempts):
+        return Config(retries={"max_attempts": max_attempts, "mode": "standard"})
+
+    config = _config(1)
+    client = Boto3ClientRegistry.get_client("ec2", region_name="us-east-1", config=config)
+
+    # The same config is used for many calls
+    assert_that(Boto3ClientRegistry.get_client("ec2", region_name="us-east-1", config=config)).is_same_as(client)
+
+    # Configs with the same options share the client
+    assert_that(Boto3ClientRegistry.get_client("ec2", region_name="us-east-1", config=_config(1))).is_same_as(client)
+    for other_client in [
+        Boto3ClientRegistry.get_client("ec2", region_name="us-east-2", config=_config(1)),
+        Boto3ClientRegistry.get_client("ec2", region_name="us-east-1", config=_config(3)),
+        Boto3ClientRegistry.get_client("route53", region_name="us-east-1", config=_config(1)),
+    ]:
+        assert_that(other_client).is_not_same_as(client)
+
+    Boto3ClientRegistry.clear()
+    assert_that(Boto3ClientRegistry.get_client("ec2", region_name="us-east-1", config=_config(1))).is_not_same_as(
+        client
+    )
+
+
+def test_boto3_client_registry_concurrent_access(mocker):
+    boto3_mock = mocker.patch("aws.common.boto3", autospec=True)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(
+            executor.map(
+                lambda _: Boto3ClientRegistry.get_client("ec2", region_name="us-east-1", config=Config()), range(100)
+            )
+        )
+
+    boto3_mock.client.assert_called_once()
+    assert_that(set(map(id, clients))).is_length(1)
+
+
+def test_boto3_client_registry_counts_api_calls():
+    client = Boto3ClientRegistry.get_client("ec2", region_name="us-east-1", config=Config())
+    with Stubber(client) as stubber:
+        for _ in range(3):
+            stubber.add_response("describe_instances", {"Reservations": []})
+        stubber.add_response("terminate_instances", {"TerminatingInstances": []})
+
+        # Calls outside of an iteration are not counted
+        client.describe_instances()
+        iteration_metrics = metrics.start_iteration()
+        client.describe_instances()
+        client.describe_instances()
+        client.terminate_instances(InstanceIds=["i-12345"])
+        metrics.stop_iteration()
+
+    assert_that(iteration_metrics.counters).is_equal_to(
+        {"aws_api_calls": {"ec2.DescribeInstances": 2, "ec2.TerminateInstances": 1}}
+    )
+
+
+def test_boto3_client_registry_rate_limits_api_calls(mocker):
+    rate_limiter_mock = mocker.MagicMock()
+    rate_limiter.set_rate_limiter(rate_limiter_mock)
+    client = Boto3ClientRegistry.get_client("ec2", region_name="us-east-1", config=Config())
+    try:
+        # Every attempt of a call is sent after the rate limiter, Stubber responses are returned before sending
+        client.meta.events.emit("before-send.ec2.RunInstances", request=mocker.MagicMock())
+    finally:
+        rate_limiter.set_rate_limiter(None)
+
+    rate_limiter_mock.acquire.assert_called_once_with("ec2.RunInstances")
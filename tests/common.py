@@ -8,8 +8,10 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
-from collections import namedtuple
+import threading
+from collections import defaultdict, namedtuple
 
+from assertpy import assert_that
 from botocore.exceptions import ClientError
 
 MockedBoto3Request = namedtuple(
@@ -31,6 +33,62 @@ def client_error(error_code):
     return ClientError({"Error": {"Code": error_code}}, "failed_operation")
 
 
+class LocalDynamoDBResource:
+    """
+    In-memory stand-in of the DynamoDB resource batch calls, for tables with the "Id" partition key.
+
+    Calls process at most max_processed_items items, the remaining ones are returned as unprocessed like DynamoDB
+    does when a table is throttled.
+    """
+
+    def __init__(self, items=None, max_processed_items=None):
+        self.tables = defaultdict(dict)
+        for table_name, table_items in (items or {}).items():
+            self.tables[table_name].update((item["Id"], dict(item)) for item in table_items)
+        self.max_processed_items = max_processed_items
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _split(self, requests):
+        if self.max_processed_items is None:
+            return requests, []
+        count = self.max_processed_items
+        return requests[:count], requests[count:]
+
+    def batch_write_item(self, **kwargs):
+        with self._lock:
+            self.calls.append(("batch_write_item", kwargs["RequestItems"]))
+            unprocessed_items = {}
+            for table_name, requests in kwargs["RequestItems"].items():
+                assert_that(requests).is_not_empty()
+                assert_that(len(requests)).is_less_than_or_equal_to(25)
+                processed, unprocessed = self._split(requests)
+                for request in processed:
+                    item = request["PutRequest"]["Item"]
+                    self.tables[table_name][item["Id"]] = dict(item)
+                if unprocessed:
+                    unprocessed_items[table_name] = unprocessed
+            return {"UnprocessedItems": unprocessed_items}
+
+    def batch_get_item(self, **kwargs):
+        with self._lock:
+            self.calls.append(("batch_get_item", kwargs["RequestItems"]))
+            responses, unprocessed_keys = {}, {}
+            for table_name, request in kwargs["RequestItems"].items():
+                assert_that(request["Keys"]).is_not_empty()
+                assert_that(len(request["Keys"])).is_less_than_or_equal_to(100)
+                processed, unprocessed = self._split(request["Keys"])
+                attributes = [attribute.strip() for attribute in request["ProjectionExpression"].split(",")]
+                responses[table_name] = [
+                    {attribute: item[attribute] for attribute in attributes if attribute in item}
+                    for item in (self.tables[table_name].get(key["Id"]) for key in processed)
+                    if item
+                ]
+                if unprocessed:
+                    unprocessed_keys[table_name] = {**request, "Keys": unprocessed}
+            return {"Responses": responses, "UnprocessedKeys": unprocessed_keys}
+
+
 SINGLE_SUBNET = {"SubnetIds": ["1234567"]}
 MULTIPLE_SUBNETS = {"SubnetIds": ["1234567", "7654321"]}
 
@@ -11,6 +11,7 @@
 import os.path
 import platform
 from datetime import datetime, timezone
+from subprocess import CalledProcessError
 from typing import Dict, List
 from unittest.mock import call, patch
 
@@ -20,13 +21,18 @@ from common.schedulers.slurm_commands import (
     SCONTROL,
     SCONTROL_OUTPUT_AWK_PARSER,
     SINFO,
+    NodesInfoBackend,
     PartitionNodelistMapping,
     _batch_node_info,
     _get_all_partition_nodes,
     _get_partition_grep_filter,
     _get_slurm_nodes,
+    _is_node_info_compressible,
     _parse_nodes_info,
+    _parse_nodes_info_json,
+    _split_nodelist,
     get_nodes_info,
+    get_partitions_info,
     is_static_node,
     parse_nodename,
     resume_powering_down_nodes,
@@ -254,6 +260,115 @@ def test_parse_nodes_info(node_info, expected_parsed_nodes_output, invalid_name,
         assert_that(caplog.text).contains("Ignoring node test-no-partition because it has an invalid name")
 
 
+@pytest.mark.parametrize(
+    "node_info, expected_parsed_nodes_output, invalid_name",
+    [
+        (
+            """{
+                "nodes": [
+                    {
+                        "name": "multiple-st-c5xlarge-1",
+                        "address": "172.31.10.155",
+                        "hostname": "172-31-10-155",
+                        "state": ["MIXED", "CLOUD"],
+                        "partitions": ["multiple"],
+                        "reason": "",
+                        "slurmd_start_time": {"set": true, "infinite": false, "number": 1674496627},
+                        "last_busy": {"set": true, "infinite": false, "number": 1697192000},
+                        "reservation": ""
+                    },
+                    {
+                        "name": "queuep4d-dy-crp4d-1",
+                        "address": "queuep4d-dy-crp4d-1",
+                        "hostname": "queuep4d-dy-crp4d-1",
+                        "state": ["DOWN", "CLOUD", "MAINTENANCE", "POWERED_DOWN", "RESERVED"],
+                        "partitions": ["queuep4d", "queuep4d2"],
+                        "reason": "(Code:InsufficientInstanceCapacity)Failure when resuming nodes",
+                        "reason_set_by_user": "slurm",
+                        "reason_changed_at": {"set": true, "infinite": false, "number": 1697786315},
+                        "slurmd_start_time": {"set": false, "infinite": false, "number": 0},
+                        "last_busy": {"set": false, "infinite": false, "number": 0},
+                        "reservation": "root_6"
+                    }
+                ]
+            }""",
+            [
+                StaticNode(
+                    "multiple-st-c5xlarge-1",
+                    "172.31.10.155",
+                    "172-31-10-155",
+                    "MIXED+CLOUD",
+                    "multiple",
+                    slurmdstarttime=datetime(2023, 1, 23, 17, 57, 7, tzinfo=timezone.utc),
+                    lastbusytime=datetime(2023, 10, 13, 10, 13, 20, tzinfo=timezone.utc),
+                ),
+                DynamicNode(
+                    "queuep4d-dy-crp4d-1",
+                    "queuep4d-dy-crp4d-1",
+                    "queuep4d-dy-crp4d-1",
+                    "DOWN+CLOUD+MAINTENANCE+POWERED_DOWN+RESERVED",
+                    "queuep4d,queuep4d2",
+                    reservation_name="root_6",
+                    reason="(Code:InsufficientInstanceCapacity)Failure when resuming nodes [slurm@"
+                    + datetime(2023, 10, 20, 7, 18, 35, tzinfo=timezone.utc).astimezone().strftime("%Y-%m-%dT%H:%M:%S")
+                    + "]",
+                ),
+            ],
+            False,
+        ),
+        (
+            # Older data parser versions: integer timestamps and lowercase state with separate state flags
+            """{
+                "nodes": [
+                    {
+                        "name": "multiple-dy-c5xlarge-2",
+                        "address": "172.31.7.218",
+                        "hostname": "172-31-7-218",
+                        "state": "idle",
+                        "state_flags": ["CLOUD", "POWERED_DOWN"],
+                        "partitions": ["multiple"],
+                        "reason": "some reason",
+                        "slurmd_start_time": 1674496627,
+                        "last_busy": 0
+                    },
+                    {
+                        "name": "test-no-partition",
+                        "address": "test-no-partition",
+                        "hostname": "test-no-partition",
+                        "state": ["IDLE", "CLOUD", "POWERED_DOWN"],
+                        "partitions": []
+                    }
+                ]
+            }""",
+            [
+                DynamicNode(
+                    "multiple-dy-c5xlarge-2",
+                    "172.31.7.218",
+                    "172-31-7-218",
+                    "IDLE+CLOUD+POWERED_DOWN",
+                    "multiple",
+                    "some reason",
+                    slurmdstarttime=datetime(2023, 1, 23, 17, 57, 7, tzinfo=timezone.utc),
+                ),
+            ],
+            True,
+        ),
+        (
+            'scontrol: warning: some warning\n{"nodes": [{"name": "queue1-st-c5xlarge-1", "state": ["IDLE"]}]}',
+            [StaticNode("queue1-st-c5xlarge-1", None, None, "IDLE", None)],
+            False,
+        ),
+        ("", [], False),
+    ],
+    ids=["current_format", "legacy_format", "warning_before_json", "empty_output"],
+)
+def test_parse_nodes_info_json(node_info, expected_parsed_nodes_output, invalid_name, caplog):
+    parsed_node_info = _parse_nodes_info_json(node_info)
+    assert_that(parsed_node_info).is_equal_to(expected_parsed_nodes_output)
+    if invalid_name:
+        assert_that(caplog.text).contains("Ignoring node test-no-partition because it has an invalid name")
+
+
 @pytest.mark.parametrize(
     "nodenames, nodeaddrs, hostnames, batch_size, expected_result",
     [
@@ -354,6 +469,32 @@ def test_batch_node_info(nodenames, nodeaddrs, hostnames, batch_size, expected_r
             pytest.fail("Expected _batch_node_info to raise ValueError.")
 
 
+@pytest.mark.parametrize(
+    "nodelist, expected_result",
+    [
+        ("node-1", ["node-1"]),
+        ("node-1,node-2", ["node-1", "node-2"]),
+        ("node-[1-3,5],node-7,other-[2,4]", ["node-[1-3,5]", "node-7", "other-[2,4]"]),
+        (["node-1", "node-[2-3]"], ["node-1", "node-[2-3]"]),
+    ],
+)
+def test_split_nodelist(nodelist, expected_result):
+    assert_that(_split_nodelist(nodelist)).is_equal_to(expected_result)
+
+
+@pytest.mark.parametrize(
+    "nodenames, nodeaddrs, nodehostnames, expected_result",
+    [
+        ("node-1,node-[2-3]", None, None, True),
+        ("node-1,node-[2-3]", "node-1,node-[2-3]", ["node-1", "node-[2-3]"], True),
+        ("node-1,node-2", "ip-1,ip-2", None, False),
+        ("node-1,node-2", None, "node-1", False),
+    ],
+)
+def test_is_node_info_compressible(nodenames, nodeaddrs, nodehostnames, expected_result):
+    assert_that(_is_node_info_compressible(nodenames, nodeaddrs, nodehostnames)).is_equal_to(expected_result)
+
+
 @pytest.mark.parametrize(
     "nodes, reason, reset_addrs, update_call_kwargs",
     [
@@ -374,6 +515,7 @@ def test_batch_node_info(nodenames, nodeaddrs, hostnames, batch_size, expected_r
                 "state": "resume",
                 "reason": "debugging",
                 "raise_on_error": False,
+                "max_concurrency": 1,
             },
         ),
         (
@@ -387,6 +529,7 @@ def test_batch_node_info(nodenames, nodeaddrs, hostnames, batch_size, expected_r
                 "state": "resume",
                 "reason": "debugging",
                 "raise_on_error": False,
+                "max_concurrency": 1,
             },
         ),
     ],
@@ -417,7 +560,7 @@ def test_set_nodes_idle(nodes, reason, reset_addrs, update_call_kwargs, mocker):
 def test_set_nodes_down(nodes, reason, reset_addrs, update_call_kwargs, mocker):
     update_mock = mocker.patch("common.schedulers.slurm_commands.update_nodes", autospec=True)
     set_nodes_down(nodes, reason)
-    update_mock.assert_called_with(**update_call_kwargs)
+    update_mock.assert_called_with(**update_call_kwargs, max_concurrency=1)
 
 
 @pytest.mark.parametrize(
@@ -451,7 +594,7 @@ def test_set_nodes_down(nodes, reason, reset_addrs, update_call_kwargs, mocker):
 def test_set_nodes_power_down(nodes, reason, reset_addrs, update_call_kwargs, mocker):
     update_mock = mocker.patch("common.schedulers.slurm_commands.reset_nodes", autospec=True)
     set_nodes_power_down(nodes, reason)
-    update_mock.assert_called_with(**update_call_kwargs)
+    update_mock.assert_called_with(**update_call_kwargs, max_concurrency=1)
 
 
 @pytest.mark.parametrize(
@@ -474,7 +617,7 @@ def test_set_nodes_power_down(nodes, reason, reset_addrs, update_call_kwargs, mo
 def test_set_nodes_drain(nodes, reason, reset_addrs, update_call_kwargs, mocker):
     update_mock = mocker.patch("common.schedulers.slurm_commands.update_nodes", autospec=True)
     set_nodes_drain(nodes, reason)
-    update_mock.assert_called_with(**update_call_kwargs)
+    update_mock.assert_called_with(**update_call_kwargs, max_concurrency=1)
 
 
 @pytest.mark.parametrize(
@@ -620,6 +763,97 @@ def test_update_nodes(batch_node_info, state, reason, raise_on_error, run_comman
         cmd_mock.assert_has_calls(run_command_calls)
 
 
+@pytest.mark.parametrize(
+    "nodes, nodeaddrs, nodehostnames, expected_node_info",
+    [
+        pytest.param(
+            [f"queue1-dy-c5xlarge-{i}" for i in range(1, 20001)],
+            None,
+            None,
+            ["nodename=queue1-dy-c5xlarge-[1-10000]", "nodename=queue1-dy-c5xlarge-[10001-20000]"],
+            id="power down",
+        ),
+        pytest.param(
+            "queue1-st-c5xlarge-2,queue1-st-c5xlarge-1,queue1-dy-c5xlarge-[1-5,7],queue2-dy-c5xlarge-1",
+            "queue1-st-c5xlarge-2,queue1-st-c5xlarge-1,queue1-dy-c5xlarge-[1-5,7],queue2-dy-c5xlarge-1",
+            "queue1-st-c5xlarge-2,queue1-st-c5xlarge-1,queue1-dy-c5xlarge-[1-5,7],queue2-dy-c5xlarge-1",
+            [
+                "nodename={0} nodeaddr={0} nodehostname={0}".format(
+                    "queue1-st-c5xlarge-[1-2],queue2-dy-c5xlarge-1,queue1-dy-c5xlarge-[1-5,7]"
+                )
+            ],
+            id="reset nodes",
+        ),
+        pytest.param(
+            ["queue1-st-c5xlarge-1", "queue1-st-c5xlarge-2"],
+            ["ip-1", "ip-2"],
+            None,
+            ["nodename=queue1-st-c5xlarge-1,queue1-st-c5xlarge-2 nodeaddr=ip-1,ip-2"],
+            id="addresses not compressed",
+        ),
+    ],
+)
+def test_update_nodes_compressed(nodes, nodeaddrs, nodehostnames, expected_node_info, mocker):
+    cmd_mock = mocker.patch("common.schedulers.slurm_commands.run_command", autospec=True)
+    update_nodes(nodes, nodeaddrs, nodehostnames, state="power_down_force")
+    cmd_mock.assert_has_calls(
+        [
+            call(f"{SCONTROL} update state=power_down_force {node_info}", raise_on_error=True, timeout=60, shell=True)
+            for node_info in expected_node_info
+        ]
+    )
+    assert_that(cmd_mock.call_count).is_equal_to(len(expected_node_info))
+
+
+@pytest.mark.parametrize(
+    "max_concurrency, run_command_side_effects, expected_exception",
+    [
+        pytest.param(1, [None, None, None], None, id="sequential"),
+        pytest.param(2, [None, None, None], None, id="concurrent"),
+        pytest.param(
+            2, [None, CalledProcessError(1, "update"), None], CalledProcessError, id="concurrent with failure"
+        ),
+        pytest.param(
+            1, [CalledProcessError(1, "update"), None, None], CalledProcessError, id="sequential with failure"
+        ),
+    ],
+)
+def test_update_nodes_concurrency(max_concurrency, run_command_side_effects, expected_exception, mocker):
+    node_info = [f"nodename=queue{i}-dy-c5xlarge-1 nodeaddr=ip-{i}" for i in range(1, 4)]
+    side_effects = dict(zip(node_info, run_command_side_effects))
+
+    def _run_command(command, **kwargs):
+        side_effect = side_effects[command.split(" update ")[1]]
+        if side_effect:
+            raise side_effect
+
+    cmd_mock = mocker.patch("common.schedulers.slurm_commands.run_command", side_effect=_run_command, autospec=True)
+    nodes = [f"queue{i}-dy-c5xlarge-1" for i in range(1, 4)]
+    nodeaddrs = [f"ip-{i}" for i in range(1, 4)]
+    mocker.patch(
+        "common.schedulers.slurm_commands._batch_node_info",
+        return_value=[(node, nodeaddr, None) for node, nodeaddr in zip(nodes, nodeaddrs)],
+        autospec=True,
+    )
+
+    if expected_exception:
+        with pytest.raises(expected_exception):
+            update_nodes(nodes, nodeaddrs, max_concurrency=max_concurrency)
+    else:
+        update_nodes(nodes, nodeaddrs, max_concurrency=max_concurrency)
+
+    if max_concurrency > 1:
+        # All the batches are executed even if one of them fails
+        cmd_mock.assert_has_calls(
+            [call(f"{SCONTROL} update {info}", raise_on_error=True, timeout=60, shell=True) for info in node_info],
+            any_order=True,
+        )
+        assert_that(cmd_mock.call_count).is_equal_to(3)
+    else:
+        # Sequential execution stops at the first failure
+        assert_that(cmd_mock.call_count).is_equal_to(1 if expected_exception else 3)
+
+
 @pytest.mark.parametrize(
     "partitions, state, run_command_calls, run_command_side_effects, expected_succeeded_partitions",
     [
@@ -717,7 +951,7 @@ def test_update_partitions(
             ],
             PartitionStatus.INACTIVE,
             True,
-            [call("node-3,node-4", reason="stopping cluster")],
+            [call("node-3,node-4", reason="stopping cluster", max_concurrency=1)],
             ["part-2"],
             ["part-2"],
             True,
@@ -730,8 +964,8 @@ def test_update_partitions(
             PartitionStatus.INACTIVE,
             True,
             [
-                call("node-1,node-2", reason="stopping cluster"),
-                call("node-3,node-4", reason="stopping cluster"),
+                call("node-1,node-2", reason="stopping cluster", max_concurrency=1),
+                call("node-3,node-4", reason="stopping cluster", max_concurrency=1),
             ],
             ["part-1", "part-2"],
             ["part-1", "part-2"],
@@ -801,6 +1035,21 @@ def test_update_all_partitions(
     update_partitions_spy.assert_called_with(partitions_to_update, state)
 
 
+def test_update_all_partitions_with_max_concurrency(mocker):
+    set_nodes_power_down_spy = mocker.patch("common.schedulers.slurm_commands.set_nodes_power_down", autospec=True)
+    mocker.patch("common.schedulers.slurm_commands.update_partitions", return_value=["part-1"], autospec=True)
+    mocker.patch(
+        "common.schedulers.slurm_commands.get_partitions_info",
+        return_value=[SlurmPartition("part-1", "node-1,node-2", "UP")],
+        autospec=True,
+    )
+
+    assert_that(
+        update_all_partitions(PartitionStatus.INACTIVE, reset_node_addrs_hostname=True, max_concurrency=4)
+    ).is_true()
+    set_nodes_power_down_spy.assert_called_once_with("node-1,node-2", reason="stopping cluster", max_concurrency=4)
+
+
 def test_resume_powering_down_nodes(mocker):
     get_slurm_nodes_mocked = mocker.patch("common.schedulers.slurm_commands._get_slurm_nodes", autospec=True)
     update_nodes_mocked = mocker.patch("common.schedulers.slurm_commands.update_nodes", autospec=True)
@@ -1007,6 +1256,84 @@ def test_get_nodes_info(nodes, cmd_timeout, partition_nodelist_mapping: Dict, ex
     check_command_output_mocked.assert_called_with(expected_command, timeout=cmd_timeout, shell=True)
 
 
+def test_get_nodes_info_json_backend(mocker):
+    check_command_output_mocked = mocker.patch(
+        "common.schedulers.slurm_commands.check_command_output",
+        return_value='{"nodes": [{"name": "queue1-st-c5xlarge-1", "address": "1.2.3.4", '
+        '"hostname": "queue1-st-c5xlarge-1", "state": ["IDLE", "CLOUD"], "partitions": ["queue1"]}]}',
+        autospec=True,
+    )
+    nodes = get_nodes_info("queue1-st-c5xlarge-1", 30, backend=NodesInfoBackend.JSON)
+    check_command_output_mocked.assert_called_with(f"{SCONTROL} --json show nodes queue1-st-c5xlarge-1", timeout=30)
+    assert_that(nodes).is_equal_to(
+        [StaticNode("queue1-st-c5xlarge-1", "1.2.3.4", "queue1-st-c5xlarge-1", "IDLE+CLOUD", "queue1")]
+    )
+
+
+@pytest.mark.parametrize(
+    "sinfo_output, expected_partitions",
+    [
+        pytest.param(
+            "queue1 up queue1-st-c5xlarge-[1-2],queue1-dy-c5xlarge-[1-10]\n"
+            "queue2 inact queue2-dy-t2micro-[1-5]\n"
+            "queue3 drain queue3-dy-t2micro-1\n",
+            [
+                SlurmPartition("queue1", "queue1-st-c5xlarge-[1-2],queue1-dy-c5xlarge-[1-10]", "UP"),
+                SlurmPartition("queue2", "queue2-dy-t2micro-[1-5]", "INACTIVE"),
+                SlurmPartition("queue3", "queue3-dy-t2micro-1", "DRAIN"),
+            ],
+            id="one line per partition",
+        ),
+        pytest.param(
+            "sinfo: warning: some warning\nqueue1 down \nqueue2 up queue2-dy-t2micro-1\nqueue2 up queue2-dy-t2micro-2",
+            [
+                SlurmPartition("queue1", "", "DOWN"),
+                SlurmPartition("queue2", "queue2-dy-t2micro-1,queue2-dy-t2micro-2", "UP"),
+            ],
+            id="warnings, empty partition and split records",
+        ),
+    ],
+)
+@pytest.mark.parametrize(
+    "partition_nodelist_mapping, expected_command",
+    [
+        pytest.param(
+            {"queue1": "", "queue2": "", "queue3": ""},
+            f'{SINFO} -h -p queue1,queue2,queue3 -o "%R %a %N"',
+            id="partition mapping",
+        ),
+        pytest.param({}, f'{SINFO} -h -o "%R %a %N"', id="empty partition mapping"),
+    ],
+)
+def test_get_partitions_info_single_call(
+    sinfo_output, expected_partitions, partition_nodelist_mapping, expected_command, mocker
+):
+    mocker.patch.object(
+        PartitionNodelistMapping.instance(),
+        "get_partition_nodelist_mapping",
+        return_value=partition_nodelist_mapping,
+    )
+    check_command_output_mocked = mocker.patch(
+        "common.schedulers.slurm_commands.check_command_output", return_value=sinfo_output, autospec=True
+    )
+
+    assert_that(get_partitions_info(command_timeout=10, single_call=True)).is_equal_to(expected_partitions)
+    check_command_output_mocked.assert_called_once_with(expected_command, timeout=10)
+
+
+@pytest.mark.parametrize(
+    "backend, expected_backend",
+    [("json", NodesInfoBackend.JSON), ("text", NodesInfoBackend.TEXT), ("JSON", NodesInfoBackend.JSON)],
+)
+def test_nodes_info_backend(backend, expected_backend):
+    assert_that(NodesInfoBackend(backend)).is_equal_to(expected_backend)
+
+
+def test_nodes_info_backend_unknown():
+    with pytest.raises(ValueError, match="'unknown' is not a valid NodesInfoBackend"):
+        NodesInfoBackend("unknown")
+
+
 @pytest.mark.parametrize(
     "nodes, cmd_timeout, run_command_call, run_command_side_effect, expected_exception",
     [
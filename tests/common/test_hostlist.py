@@ -0,0 +1,130 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+from assertpy import assert_that
+from common.hostlist import batch_hostlist, compress_hostlist, count_hostlist, expand_hostlist, iter_hostlist
+
+
+@pytest.mark.parametrize(
+    "hostnames, expected_expressions",
+    [
+        pytest.param([], [], id="empty"),
+        pytest.param(["queue1-st-cr1-1"], ["queue1-st-cr1-1"], id="single host"),
+        pytest.param(
+            ["queue1-dy-cr1-3", "queue1-dy-cr1-1", "queue1-dy-cr1-2", "queue1-dy-cr1-5", "queue1-dy-cr1-2"],
+            ["queue1-dy-cr1-[1-3,5]"],
+            id="unsorted with duplicates",
+        ),
+        pytest.param(
+            ["queue1-dy-cr1-1", "queue1-st-cr1-1", "queue1-dy-cr1-2", "queue1-st-cr1-3"],
+            ["queue1-dy-cr1-[1-2]", "queue1-st-cr1-[1,3]"],
+            id="multiple prefixes",
+        ),
+        pytest.param(
+            ["node-009", "node-010", "node-011", "node-9", "node-10"],
+            ["node-[009-011]", "node-[9-10]"],
+            id="zero-padded",
+        ),
+        pytest.param(
+            ["head-node", "queue1-dy-cr1-[1-3]", "queue1-dy-cr1-4"],
+            ["queue1-dy-cr1-4", "head-node", "queue1-dy-cr1-[1-3]"],
+            id="no numeric suffix and expressions",
+        ),
+    ],
+)
+def test_compress_hostlist(hostnames, expected_expressions):
+    assert_that(compress_hostlist(hostnames)).is_equal_to(expected_expressions)
+
+
+@pytest.mark.parametrize(
+    "hostnames, max_length, max_hosts, expected_batches",
+    [
+        pytest.param(
+            [f"queue1-dy-cr1-{i}" for i in range(1, 5001)],
+            8192,
+            10000,
+            ["queue1-dy-cr1-[1-5000]"],
+            id="single range",
+        ),
+        pytest.param(
+            [f"queue1-dy-cr1-{i}" for i in range(1, 11)],
+            8192,
+            4,
+            ["queue1-dy-cr1-[1-4]", "queue1-dy-cr1-[5-8]", "queue1-dy-cr1-[9-10]"],
+            id="split by number of hosts",
+        ),
+        pytest.param(
+            [f"queue1-dy-cr1-{i}" for i in range(1, 12, 2)] + ["queue2-dy-cr1-1"],
+            25,
+            100,
+            ["queue1-dy-cr1-[1,3,5,7,9]", "queue1-dy-cr1-11", "queue2-dy-cr1-1"],
+            id="split by length",
+        ),
+        pytest.param(
+            ["queue1-dy-cr1-1", "queue1-dy-cr1-2", "queue2-dy-cr1-1", "other", "queue3-dy-cr1-[1-10]"],
+            100,
+            100,
+            ["queue1-dy-cr1-[1-2],queue2-dy-cr1-1,other,queue3-dy-cr1-[1-10]"],
+            id="multiple expressions in a batch",
+        ),
+        pytest.param(
+            ["queue1-dy-cr1-1", "queue1-dy-cr1-2", "queue3-dy-cr1-[1-10]", "queue4-dy-cr1-[1-5]"],
+            100,
+            12,
+            ["queue1-dy-cr1-[1-2],queue3-dy-cr1-[1-10]", "queue4-dy-cr1-[1-5]"],
+            id="hosts of input expressions are counted",
+        ),
+    ],
+)
+def test_batch_hostlist(hostnames, max_length, max_hosts, expected_batches):
+    batches = batch_hostlist(hostnames, max_length=max_length, max_hosts=max_hosts)
+    assert_that(batches).is_equal_to(expected_batches)
+    assert_that(max(len(batch) for batch in batches)).is_less_than_or_equal_to(max_length)
+
+
+@pytest.mark.parametrize(
+    "hostlist, expected_hostnames",
+    [
+        pytest.param("", [], id="empty"),
+        pytest.param("queue1-st-cr1-1", ["queue1-st-cr1-1"], id="single host"),
+        pytest.param(
+            "queue1-st-cr1-[1,3-4],queue1-dy-cr1-2,head-node",
+            ["queue1-st-cr1-1", "queue1-st-cr1-3", "queue1-st-cr1-4", "queue1-dy-cr1-2", "head-node"],
+            id="multiple expressions",
+        ),
+        pytest.param(
+            "node-[08-10],node-[9-10]", ["node-08", "node-09", "node-10", "node-9", "node-10"], id="zero-padded"
+        ),
+        pytest.param(
+            "rack[1-2]-node[1,3]", ["rack1-node1", "rack1-node3", "rack2-node1", "rack2-node3"], id="multiple ranges"
+        ),
+        pytest.param("node-[1, 3]", ["node-1", "node-3"], id="spaces in ranges"),
+    ],
+)
+def test_expand_hostlist(hostlist, expected_hostnames):
+    assert_that(expand_hostlist(hostlist)).is_equal_to(expected_hostnames)
+    assert_that(count_hostlist(hostlist)).is_equal_to(len(expected_hostnames))
+
+
+@pytest.mark.parametrize(
+    "hostlist",
+    ["node-[1-3", "node-1-3]", "node-[]", "node-[-]", "node-[,]", "node-[1-2-3]", "node-[a-b]", "node-[[1]]"],
+)
+def test_expand_hostlist_invalid(hostlist):
+    with pytest.raises(ValueError):
+        expand_hostlist(hostlist)
+    with pytest.raises(ValueError):
+        count_hostlist(hostlist)
+
+
+def test_iter_hostlist_is_lazy():
+    hostnames = iter_hostlist("queue1-dy-cr1-[1-100000000]")
+    assert_that([next(hostnames), next(hostnames)]).is_equal_to(["queue1-dy-cr1-1", "queue1-dy-cr1-2"])
@@ -0,0 +1,107 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+from assertpy import assert_that
+from common import metrics
+from common.metrics import IterationMetrics
+from common.utils import run_command
+
+
+def _build_metrics():
+    iteration_metrics = IterationMetrics()
+    iteration_metrics.timestamp = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    iteration_metrics.phases = {"get_scheduler_state": 1.5, "maintain_nodes": 2.25}
+    iteration_metrics.increment("command_calls", "scontrol", 3)
+    iteration_metrics.increment("aws_api_calls", "ec2.DescribeInstances")
+    iteration_metrics.duration = 4
+    return iteration_metrics
+
+
+def test_iteration_metrics_span():
+    iteration_metrics = metrics.start_iteration()
+    with metrics.span("phase1"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.span("phase2"):
+            raise RuntimeError()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: metrics.increment_counter("command_calls", "scontrol"), range(100)))
+    assert_that(metrics.stop_iteration()).is_same_as(iteration_metrics)
+
+    assert_that(iteration_metrics.phases).contains_only("phase1", "phase2")
+    assert_that(iteration_metrics.counters).is_equal_to({"command_calls": {"scontrol": 100}})
+    assert_that(iteration_metrics.duration).is_greater_than_or_equal_to(sum(iteration_metrics.phases.values()))
+
+    # Spans and counters outside of an iteration are ignored
+    with metrics.span("phase3"):
+        metrics.increment_counter("command_calls", "scontrol")
+    assert_that(iteration_metrics.phases).does_not_contain("phase3")
+    assert_that(iteration_metrics.counters["command_calls"]["scontrol"]).is_equal_to(100)
+    assert_that(metrics.stop_iteration()).is_none()
+
+
+def test_iteration_metrics_count_commands():
+    iteration_metrics = metrics.start_iteration()
+    run_command("true")
+    run_command("sudo true", raise_on_error=False, log_error=False, shell=True)
+    run_command(["/bin/echo", "scontrol"])
+    metrics.stop_iteration()
+
+    assert_that(iteration_metrics.counters).is_equal_to({"command_calls": {"true": 2, "echo": 1}})
+
+
+def test_iteration_metrics_phases_breakdown():
+    assert_that(_build_metrics().get_phases_breakdown()).is_equal_to(
+        "maintain_nodes: 2.250s, get_scheduler_state: 1.500s"
+    )
+
+
+@pytest.mark.parametrize(
+    "file_name, expected_content",
+    [
+        (
+            "metrics.json",
+            {
+                "timestamp": "2025-01-01T00:00:00+00:00",
+                "duration": 4,
+                "phases": {"get_scheduler_state": 1.5, "maintain_nodes": 2.25},
+                "counters": {"command_calls": {"scontrol": 3}, "aws_api_calls": {"ec2.DescribeInstances": 1}},
+            },
+        ),
+        (
+            "metrics.prom",
+            "# TYPE clustermgtd_iteration_timestamp_seconds gauge\n"
+            "clustermgtd_iteration_timestamp_seconds 1735689600.000\n"
+            "# TYPE clustermgtd_iteration_duration_seconds gauge\n"
+            "clustermgtd_iteration_duration_seconds 4.000000\n"
+            "# TYPE clustermgtd_phase_duration_seconds gauge\n"
+            'clustermgtd_phase_duration_seconds{phase="get_scheduler_state"} 1.500000\n'
+            'clustermgtd_phase_duration_seconds{phase="maintain_nodes"} 2.250000\n'
+            "# TYPE clustermgtd_aws_api_calls gauge\n"
+            'clustermgtd_aws_api_calls{name="ec2.DescribeInstances"} 1\n'
+            "# TYPE clustermgtd_command_calls gauge\n"
+            'clustermgtd_command_calls{name="scontrol"} 3\n',
+        ),
+    ],
+)
+def test_iteration_metrics_write(tmp_path, file_name, expected_content):
+    file_path = str(tmp_path / file_name)
+    _build_metrics().write(file_path, prefix="clustermgtd")
+
+    with open(file_path, encoding="utf-8") as metrics_file:
+        content = metrics_file.read()
+    assert_that(json.loads(content) if file_name.endswith(".json") else content).is_equal_to(expected_content)
+    assert_that(os.listdir(tmp_path)).is_equal_to([file_name])
@@ -0,0 +1,81 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from assertpy import assert_that
+from common import metrics
+from common.rate_limiter import DEFAULT_EC2_API_RATE_LIMITS, TokenBucketRateLimiter, parse_rate_limits
+
+
+@pytest.mark.parametrize(
+    "value, expected_rate_limits",
+    [
+        ("", DEFAULT_EC2_API_RATE_LIMITS),
+        (
+            "ec2.RunInstances:20:1, ec2.CreateTags:10:0.5,",
+            {**DEFAULT_EC2_API_RATE_LIMITS, "ec2.RunInstances": (20, 1), "ec2.CreateTags": (10, 0.5)},
+        ),
+    ],
+)
+def test_parse_rate_limits(value, expected_rate_limits):
+    assert_that(parse_rate_limits(value)).is_equal_to(expected_rate_limits)
+
+
+@pytest.mark.parametrize("value", ["ec2.RunInstances:20", "ec2.RunInstances:20:fast", "ec2.RunInstances:20:0"])
+def test_parse_invalid_rate_limits(value):
+    with pytest.raises(ValueError, match="Invalid rate limit"):
+        parse_rate_limits(value)
+
+
+def test_token_bucket_rate_limiter(tmp_path, mocker):
+    current_time = [1000.0]
+    mocker.patch("common.rate_limiter.time.time", side_effect=lambda: current_time[0])
+    sleep_mock = mocker.patch("common.rate_limiter.time.sleep")
+    state_file_path = str(tmp_path / "rate_limiter.json")
+    rate_limits = {"ec2.RunInstances": (2, 0.5), "ec2.DescribeInstances": (1, 1)}
+    # Processes sharing the state file share the buckets
+    rate_limiters = [TokenBucketRateLimiter(state_file_path, rate_limits) for _ in range(2)]
+
+    iteration_metrics = metrics.start_iteration()
+    waits = [rate_limiters[index % 2].acquire("ec2.RunInstances") for index in range(4)]
+    metrics.stop_iteration()
+    # The bucket is emptied by the first calls, then every call waits for its token in turn
+    assert_that(waits).is_equal_to([0, 0, 2, 4])
+    sleep_mock.assert_has_calls([mocker.call(2), mocker.call(4)])
+    assert_that(iteration_metrics.phases).contains("api_rate_limiter_wait")
+
+    # Buckets of different actions are independent, actions without a rate limit are not limited
+    assert_that(rate_limiters[0].acquire("ec2.DescribeInstances")).is_equal_to(0)
+    assert_that(rate_limiters[0].acquire("ec2.CreateTags")).is_equal_to(0)
+
+    # The bucket is refilled over time, up to its capacity
+    current_time[0] += 100
+    assert_that([rate_limiters[0].acquire("ec2.RunInstances") for _ in range(3)]).is_equal_to([0, 0, 2])
+
+
+def test_token_bucket_rate_limiter_concurrent_access(tmp_path, mocker):
+    mocker.patch("common.rate_limiter.time.time", return_value=1000.0)
+    mocker.patch("common.rate_limiter.time.sleep")
+    rate_limiter = TokenBucketRateLimiter(str(tmp_path / "rate_limiter.json"), {"ec2.RunInstances": (10, 1)})
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        waits = list(executor.map(lambda _: rate_limiter.acquire("ec2.RunInstances"), range(50)))
+
+    assert_that(sorted(waits)).is_equal_to([0] * 10 + list(range(1, 41)))
+
+
+def test_token_bucket_rate_limiter_invalid_state(tmp_path):
+    state_file_path = tmp_path / "rate_limiter.json"
+    state_file_path.write_text("{invalid")
+    rate_limiter = TokenBucketRateLimiter(str(state_file_path), {"ec2.RunInstances": (10, 1)})
+
+    assert_that(rate_limiter.acquire("ec2.RunInstances")).is_equal_to(0)
@@ -174,6 +174,57 @@ def test_read_json(mocker, raw_input, default, expected_output, expected_excepti
         assert_that(caplog.text).contains("Unable to read file")
 
 
+def test_get_files_signature(tmp_path):
+    file_path, missing_file_path = tmp_path / "file.json", tmp_path / "missing.json"
+    file_path.write_text("{}")
+    signature = utils.get_files_signature([file_path, missing_file_path])
+
+    assert_that(signature[1]).is_equal_to((missing_file_path, None, None, None))
+    assert_that(utils.get_files_signature([file_path, missing_file_path])).is_equal_to(signature)
+
+    # Files are usually replaced when they are updated, which changes the inode
+    replaced_file_path = tmp_path / "replaced.json"
+    replaced_file_path.write_text("{}")
+    os.replace(replaced_file_path, file_path)
+    assert_that(utils.get_files_signature([file_path, missing_file_path])).is_not_equal_to(signature)
+    signature = utils.get_files_signature([file_path, missing_file_path])
+
+    file_path.write_text('{"key": "value"}')
+    assert_that(utils.get_files_signature([file_path, missing_file_path])).is_not_equal_to(signature)
+    signature = utils.get_files_signature([file_path, missing_file_path])
+
+    missing_file_path.write_text("{}")
+    assert_that(utils.get_files_signature([file_path, missing_file_path])).is_not_equal_to(signature)
+
+
+def test_read_cached_json(tmp_path, mocker):
+    file_path, cache_file_path = tmp_path / "fleet-config.json", tmp_path / "fleet-config.cache"
+    file_path.write_text('{"queue1": {"compute-resource1": {"Api": "run-instances"}}}')
+    read_json_spy = mocker.spy(utils, "read_json")
+
+    content = utils.read_cached_json(file_path, cache_file_path)
+    assert_that(content).is_equal_to({"queue1": {"compute-resource1": {"Api": "run-instances"}}})
+    assert_that(read_json_spy.call_count).is_equal_to(1)
+    assert_that(cache_file_path.exists()).is_true()
+
+    # The cache is used until the json file changes
+    assert_that(utils.read_cached_json(file_path, cache_file_path)).is_equal_to(content)
+    assert_that(read_json_spy.call_count).is_equal_to(1)
+    replaced_file_path = tmp_path / "replaced.json"
+    replaced_file_path.write_text('{"queue2": {}}')
+    os.replace(replaced_file_path, file_path)
+    assert_that(utils.read_cached_json(file_path, cache_file_path)).is_equal_to({"queue2": {}})
+    assert_that(utils.read_cached_json(file_path, cache_file_path)).is_equal_to({"queue2": {}})
+    assert_that(read_json_spy.call_count).is_equal_to(2)
+
+    # A corrupted cache is ignored and a missing json file is not cached
+    cache_file_path.write_bytes(b"corrupted")
+    assert_that(utils.read_cached_json(file_path, cache_file_path)).is_equal_to({"queue2": {}})
+    assert_that(utils.read_cached_json(tmp_path / "missing.json", tmp_path / "missing.cache", default={})).is_empty()
+    assert_that((tmp_path / "missing.cache").exists()).is_false()
+    assert_that(sorted(os.listdir(tmp_path))).is_equal_to(["fleet-config.cache", "fleet-config.json"])
+
+
 def test_custom_filter(caplog):
     logger = logging.getLogger(__name__)
     caplog.set_level(logging.INFO)
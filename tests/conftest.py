@@ -12,6 +12,8 @@ import boto3
 import pytest
 from botocore.stub import Stubber
 
+from aws.common import Boto3ClientRegistry
+
 
 @pytest.fixture()
 def test_datadir(request, datadir):
@@ -29,6 +31,14 @@ def test_datadir(request, datadir):
     return datadir / "{0}/{1}".format(class_name, function_name)
 
 
+@pytest.fixture(autouse=True)
+def clear_boto3_client_registry():
+    """Do not share boto3 clients, possibly stubbed, across tests."""
+    Boto3ClientRegistry.clear()
+    yield
+    Boto3ClientRegistry.clear()
+
+
 @pytest.fixture()
 def boto3_stubber(mocker, boto3_stubber_path):
     """
@@ -48,6 +58,9 @@ def boto3_stubber(mocker, boto3_stubber_path):
     mocked_clients = {}
 
     mocked_client_factory = mocker.patch(boto3_stubber_path, autospec=True)
+    # Clients returned by the boto3 client registry are mocked as well
+    if boto3_stubber_path != "aws.common.boto3":
+        mocker.patch("aws.common.boto3", mocked_client_factory)
     # use **kwargs to skip parameters passed to the boto3.client other than the "service"
     # e.g. boto3.client("ec2", region_name=region, ...) --> x = ec2
     mocked_client_factory.client.side_effect = lambda x, **kwargs: mocked_clients[x]
@@ -23,9 +23,37 @@ from slurm_plugin.slurm_resources import (
     SlurmResumeJob,
     StaticNode,
     get_node_list,
+    get_node_state_mask,
 )
 
 
+def test_get_node_state_mask():
+    mask = get_node_state_mask("IDLE+CLOUD+POWERED_DOWN")
+    assert_that(get_node_state_mask(["POWERED_DOWN", "CLOUD", "IDLE"])).is_equal_to(mask)
+    assert_that(get_node_state_mask("IDLE+CLOUD") & mask).is_equal_to(get_node_state_mask("IDLE+CLOUD"))
+    assert_that(get_node_state_mask("IDLE+CLOUD+DRAIN") & mask).is_not_equal_to(get_node_state_mask("IDLE+CLOUD+DRAIN"))
+    # States never seen before are assigned a new flag
+    new_state_mask = get_node_state_mask("SOME_NEW_STATE")
+    assert_that(new_state_mask & mask).is_zero()
+    assert_that(get_node_state_mask("IDLE+CLOUD+POWERED_DOWN+SOME_NEW_STATE")).is_equal_to(mask | new_state_mask)
+
+
+def test_slurm_node_compact_representation():
+    node = StaticNode("queue1-st-c5xlarge-1", "ip-1", "hostname", "IDLE+CLOUD+DRAIN", "queue1,custom")
+    assert_that(hasattr(node, "__dict__")).is_false()
+    assert_that(node.states).is_equal_to({"IDLE", "CLOUD", "DRAIN"})
+    assert_that(node.state_mask).is_equal_to(get_node_state_mask("IDLE+CLOUD+DRAIN"))
+    assert_that(node.partitions).is_equal_to(["queue1", "custom"])
+    other_node = StaticNode("queue1-st-c5xlarge-2", "ip-2", "hostname", "IDLE+CLOUD+DRAIN", "queue1,custom")
+    assert_that(other_node.queue_name).is_same_as(node.queue_name)
+    assert_that(other_node.compute_resource_name).is_same_as(node.compute_resource_name)
+    assert_that(other_node.partitions[1]).is_same_as(node.partitions[1])
+    assert_that(node).is_equal_to(
+        StaticNode("queue1-st-c5xlarge-1", "ip-1", "hostname", "IDLE+CLOUD+DRAIN", "queue1,custom")
+    )
+    assert_that(node).is_not_equal_to(other_node)
+
+
 @pytest.mark.parametrize(
     "node, expected_output",
     [
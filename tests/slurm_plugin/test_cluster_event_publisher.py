@@ -1416,15 +1416,16 @@ def test_publish_unhealthy_node_events(failed_nodes, expected_details, level_fil
     ],
     ids=["With protected mode errors", "No protected mode errors", "No Errors", "No Errors debug output"],
 )
-def test_publish_bootstrap_failure_events(failed_nodes, replacement_timeouts, expected_details, level_filter):
+def test_publish_bootstrap_failure_events(failed_nodes, replacement_timeouts, expected_details, level_filter, mocker):
     received_events = []
     event_publisher = ClusterEventPublisher(event_handler(received_events, level_filter=level_filter))
 
-    def define_bootstrap_timeout(is_failure):
-        return lambda *args: is_failure
-
-    for node, is_timeout in zip(failed_nodes, replacement_timeouts):
-        node.is_bootstrap_timeout = define_bootstrap_timeout(is_timeout)
+    # Nodes have no instance __dict__, patch the method on the node classes
+    bootstrap_timeouts = {node.name: is_timeout for node, is_timeout in zip(failed_nodes, replacement_timeouts)}
+    for node_class in (StaticNode, DynamicNode):
+        mocker.patch.object(
+            node_class, "is_bootstrap_timeout", autospec=True, side_effect=lambda node: bootstrap_timeouts[node.name]
+        )
 
     # Run test
     event_publisher.publish_bootstrap_failure_events(failed_nodes)
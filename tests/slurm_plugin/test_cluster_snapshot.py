@@ -0,0 +1,108 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import itertools
+
+import pytest
+from assertpy import assert_that
+from slurm_plugin.cluster_snapshot import ClusterSnapshot
+from slurm_plugin.fleet_manager import EC2Instance
+from slurm_plugin.slurm_resources import DynamicNode, StaticNode
+
+STATES = [
+    "IDLE",
+    "IDLE+CLOUD",
+    "MIXED+CLOUD",
+    "ALLOCATED+CLOUD",
+    "COMPLETING+CLOUD",
+    "IDLE+CLOUD+DRAIN",
+    "MIXED+CLOUD+DRAIN",
+    "IDLE+CLOUD+DRAIN+POWERED_DOWN",
+    "DOWN+CLOUD",
+    "DOWN+CLOUD+NOT_RESPONDING",
+    "DOWN+CLOUD+POWERED_DOWN+NOT_RESPONDING",
+    "DOWN+CLOUD+POWERING_DOWN",
+    "IDLE+CLOUD+POWERED_DOWN",
+    "IDLE+CLOUD+POWERING_DOWN",
+    "IDLE+CLOUD+POWERING_UP",
+    "MIXED+CLOUD+POWERING_UP",
+    "MIXED#+CLOUD",
+    "IDLE#+CLOUD",
+    "DOWN+CLOUD+REBOOT_ISSUED",
+    "IDLE+CLOUD+DRAIN+REBOOT_REQUESTED",
+    "IDLE+CLOUD+INVALID_REG",
+    "DOWN+CLOUD+INVALID_REG+POWERED_DOWN",
+    "IDLE+CLOUD+MAINTENANCE+RESERVED",
+]
+
+
+def _build_nodes():
+    """Build a node for every combination of node type, state, nodeaddr, backing instance and replacement status."""
+    nodes = []
+    combinations = itertools.product([StaticNode, DynamicNode], STATES, [True, False], [True, False], [True, False])
+    for index, (node_class, state, nodeaddr_set, has_instance, in_replacement) in enumerate(combinations):
+        name = f"queue1-{'st' if node_class is StaticNode else 'dy'}-c5xlarge-{index}"
+        nodeaddr = f"ip-{index}" if nodeaddr_set else name
+        instance = (
+            EC2Instance(f"id-{index}", nodeaddr, "hostname", {nodeaddr}, "some_launch_time") if has_instance else None
+        )
+        node = node_class(name, nodeaddr, "hostname", state, "queue1", instance=instance)
+        node.is_static_nodes_in_replacement = in_replacement
+        node.is_being_replaced = in_replacement
+        nodes.append(node)
+    return nodes
+
+
+@pytest.mark.parametrize(
+    "consider_drain_as_unhealthy, consider_down_as_unhealthy", list(itertools.product([True, False], [True, False]))
+)
+def test_find_nodes_to_check_health(consider_drain_as_unhealthy, consider_down_as_unhealthy):
+    def _unhealthy_nodes(nodes):
+        return [
+            node.name
+            for node in nodes
+            if not node.is_healthy(consider_drain_as_unhealthy, consider_down_as_unhealthy, 0, {})
+        ]
+
+    expected_unhealthy_nodes = _unhealthy_nodes(_build_nodes())
+
+    nodes = _build_nodes()
+    nodes_to_check, healthy_nodes = ClusterSnapshot(nodes).find_nodes_to_check_health(
+        consider_drain_as_unhealthy, consider_down_as_unhealthy
+    )
+
+    assert_that(expected_unhealthy_nodes).is_not_empty()
+    assert_that(_unhealthy_nodes(nodes_to_check)).is_equal_to(expected_unhealthy_nodes)
+    assert_that(_unhealthy_nodes(healthy_nodes)).is_empty()
+    assert_that(len(nodes_to_check) + len(healthy_nodes)).is_equal_to(len(nodes))
+
+
+def test_find_bootstrap_failure_candidates():
+    def _bootstrap_failure_nodes(nodes):
+        return [node.name for node in nodes if node.is_bootstrap_failure(0, {})]
+
+    expected_bootstrap_failure_nodes = _bootstrap_failure_nodes(_build_nodes())
+
+    candidates = ClusterSnapshot(_build_nodes()).find_bootstrap_failure_candidates()
+
+    assert_that(expected_bootstrap_failure_nodes).is_not_empty()
+    assert_that(_bootstrap_failure_nodes(candidates)).is_equal_to(expected_bootstrap_failure_nodes)
+
+
+def test_cluster_snapshot_groups_nodes_by_signature():
+    nodes = [
+        DynamicNode(f"queue1-dy-c5xlarge-{index}", f"queue1-dy-c5xlarge-{index}", "hostname", "IDLE+CLOUD+POWERED_DOWN")
+        for index in range(1000)
+    ] + [StaticNode("queue1-st-c5xlarge-1", "ip-1", "hostname", "DOWN+CLOUD", "queue1")]
+
+    snapshot = ClusterSnapshot(nodes)
+
+    assert_that(snapshot._representatives).is_length(2)
+    assert_that(snapshot.find_nodes_to_check_health(True, True)).is_equal_to(([nodes[-1]], nodes[:-1]))
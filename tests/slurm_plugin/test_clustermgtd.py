@@ -12,6 +12,7 @@
 
 import logging
 import os
+import threading
 from datetime import datetime, timezone
 from types import SimpleNamespace
 from unittest.mock import ANY, call
@@ -20,7 +21,18 @@ import botocore
 import pytest
 import slurm_plugin
 from assertpy import assert_that
-from slurm_plugin.clustermgtd import ClusterManager, ClustermgtdConfig, ComputeFleetStatus, ComputeFleetStatusManager
+from common.metrics import IterationMetrics
+from common.rate_limiter import DEFAULT_EC2_API_RATE_LIMITS
+from common.schedulers.slurm_commands import NodesInfoBackend
+from slurm_plugin.clustermgtd import (
+    ClusterManager,
+    ClustermgtdConfig,
+    ComputeFleetStatus,
+    ComputeFleetStatusManager,
+    _configure_logging,
+    _reload_config,
+    _report_iteration_metrics,
+)
 from slurm_plugin.common import ScalingStrategy
 from slurm_plugin.console_logger import ConsoleLogger
 from slurm_plugin.fleet_manager import EC2Instance
@@ -63,21 +75,42 @@ class TestClustermgtdConfig:
                     "logging_config": os.path.join(
                         os.path.dirname(slurm_plugin.__file__), "logging", "parallelcluster_clustermgtd_logging.conf"
                     ),
+                    "nodes_info_backend": NodesInfoBackend.TEXT,
+                    "partitions_info_single_call": False,
+                    "update_nodes_max_concurrency": 1,
+                    "concurrent_cluster_state_retrieval": False,
+                    "ec2_instance_inventory": False,
+                    "ec2_instance_inventory_full_sync_interval": 600,
+                    "metrics_file_path": None,
+                    "slow_iteration_warning_threshold": 0,
+                    "reload_config_on_change": False,
+                    "ec2_api_rate_limiter_file": None,
+                    "hostname_table_max_concurrency": 1,
+                    "ec2_api_rate_limits": DEFAULT_EC2_API_RATE_LIMITS,
                     "dynamodb_table": "table-name",
                     # launch configs
                     "update_node_address": True,
                     "launch_max_batch_size": 500,
+                    "warm_pool_file": None,
+                    "warm_pool_size": 0,
+                    "warm_pool_refill_max_count": 10,
+                    "warm_pool_idle_timeout": 300,
                     # terminate configs
                     "terminate_max_batch_size": 1000,
                     "node_replacement_timeout": 1800,
                     "terminate_drain_nodes": True,
                     "terminate_down_nodes": True,
                     "orphaned_instance_timeout": 300,
+                    "incremental_node_maintenance": False,
+                    "node_state_full_resync_interval": 600,
+                    "cluster_snapshot_classification": False,
                     # health check configs
                     "disable_ec2_health_check": False,
                     "disable_scheduled_event_health_check": False,
                     "disable_all_health_checks": False,
                     "health_check_timeout": 180,
+                    "concurrent_instance_status_retrieval": False,
+                    "scheduled_events_cache_ttl": 0,
                     "protected_failure_count": 10,
                     "insufficient_capacity_timeout": 600,
                     # Compute console logging configs
@@ -103,21 +136,42 @@ class TestClustermgtdConfig:
                     "disable_all_cluster_management": True,
                     "heartbeat_file_path": "/home/ubuntu/clustermgtd_heartbeat",
                     "logging_config": "/my/logging/config",
+                    "nodes_info_backend": NodesInfoBackend.JSON,
+                    "partitions_info_single_call": True,
+                    "update_nodes_max_concurrency": 4,
+                    "concurrent_cluster_state_retrieval": True,
+                    "ec2_instance_inventory": True,
+                    "ec2_instance_inventory_full_sync_interval": 900,
+                    "metrics_file_path": "/var/log/parallelcluster/clustermgtd.prom",
+                    "slow_iteration_warning_threshold": 0.8,
+                    "reload_config_on_change": True,
+                    "ec2_api_rate_limiter_file": "/run/parallelcluster/ec2_api_rate_limiter.json",
+                    "hostname_table_max_concurrency": 4,
+                    "ec2_api_rate_limits": {**DEFAULT_EC2_API_RATE_LIMITS, "ec2.DescribeInstances": (40, 8)},
                     "dynamodb_table": "table-name",
                     # launch configs
                     "update_node_address": False,
                     "launch_max_batch_size": 1,
+                    "warm_pool_file": "/opt/slurm/etc/pcluster/.slurm_plugin/warm_pool.json",
+                    "warm_pool_size": 4,
+                    "warm_pool_refill_max_count": 2,
+                    "warm_pool_idle_timeout": 120,
                     # terminate configs
                     "terminate_max_batch_size": 500,
                     "node_replacement_timeout": 10,
                     "terminate_drain_nodes": False,
                     "terminate_down_nodes": False,
                     "orphaned_instance_timeout": 60,
+                    "incremental_node_maintenance": True,
+                    "node_state_full_resync_interval": 300,
+                    "cluster_snapshot_classification": True,
                     # health check configs
                     "disable_ec2_health_check": True,
                     "disable_scheduled_event_health_check": True,
                     "disable_all_health_checks": False,
                     "health_check_timeout": 10,
+                    "concurrent_instance_status_retrieval": True,
+                    "scheduled_events_cache_ttl": 3600,
                     "protected_failure_count": 5,
                     "insufficient_capacity_timeout": 50.5,
                     # Compute console logging configs
@@ -207,6 +261,9 @@ def test_set_config(initialize_instance_manager_mock):
         region="region",
         boto3_config=None,
         fleet_config={},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     updated_config_1 = SimpleNamespace(
         some_key_1="some_value_1",
@@ -219,6 +276,9 @@ def test_set_config(initialize_instance_manager_mock):
         region="region",
         boto3_config=None,
         fleet_config={"queue1": {"cr1": {"test": "test"}}},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     updated_config_2 = SimpleNamespace(
         some_key_1="some_value_1",
@@ -231,6 +291,9 @@ def test_set_config(initialize_instance_manager_mock):
         region="region",
         boto3_config=None,
         fleet_config={"queue1": {"cr1": {"test": "test"}}},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
 
     cluster_manager = ClusterManager(initial_config)
@@ -262,6 +325,10 @@ def test_exception_from_report_console_output_from_nodes(mocker):
         region="region",
         boto3_config=None,
         fleet_config={},
+        update_nodes_max_concurrency=1,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     unhealthy_nodes = [
         StaticNode("queue1-st-c5xlarge-3", "ip-3", "hostname", "some_state", "queue1"),
@@ -280,7 +347,7 @@ def test_exception_from_report_console_output_from_nodes(mocker):
 
     # Make sure the code after _report_console_from_output_nodes is called.
     reset_nodes_mock.assert_called_once_with(
-        ANY, state="down", reason="Static node maintenance: unhealthy node is being replaced"
+        ANY, state="down", reason="Static node maintenance: unhealthy node is being replaced", max_concurrency=1
     )
 
 
@@ -371,6 +438,9 @@ def test_clean_up_inactive_partition(
         region="region",
         boto3_config=None,
         fleet_config={},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     part = SlurmPartition("partition4", "placeholder_nodes", "INACTIVE")
@@ -398,7 +468,8 @@ def test_clean_up_inactive_partition(
 
 
 @pytest.mark.usefixtures("initialize_executor_mock", "initialize_console_logger_mock")
-def test_get_ec2_instances(mocker):
+@pytest.mark.parametrize("ec2_instance_inventory", [False, True])
+def test_get_ec2_instances(mocker, ec2_instance_inventory):
     # Test setup
     mock_sync_config = SimpleNamespace(
         region="us-east-2",
@@ -415,15 +486,105 @@ def test_get_ec2_instances(mocker):
         insufficient_capacity_timeout=600,
         fleet_config=FLEET_CONFIG,
         head_node_instance_id="i-instance-id",
+        ec2_instance_inventory=ec2_instance_inventory,
+        ec2_instance_inventory_full_sync_interval=600,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        hostname_table_max_concurrency=1,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     cluster_manager._instance_manager.get_cluster_instances = mocker.MagicMock()
+    cluster_manager._instance_manager.get_cluster_instances_from_inventory = mocker.MagicMock()
     mocker.patch("time.sleep")
     # Run test
     cluster_manager._get_ec2_instances()
     # Assert calls
-    cluster_manager._instance_manager.get_cluster_instances.assert_called_with(
-        include_head_node=False, alive_states_only=True
+    if ec2_instance_inventory:
+        cluster_manager._instance_manager.get_cluster_instances_from_inventory.assert_called_with(
+            full_sync_interval=600
+        )
+        cluster_manager._instance_manager.get_cluster_instances.assert_not_called()
+    else:
+        cluster_manager._instance_manager.get_cluster_instances.assert_called_with(
+            include_head_node=False, alive_states_only=True
+        )
+        cluster_manager._instance_manager.get_cluster_instances_from_inventory.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "nodes, rechecked_instances, expected_rechecked_nodeaddrs, expected_node_instances",
+    [
+        pytest.param(
+            [
+                StaticNode("queue1-st-c5xlarge-1", "ip-1", "hostname", "IDLE+CLOUD", "queue1"),
+                DynamicNode("queue1-dy-c5xlarge-2", "queue1-dy-c5xlarge-2", "hostname", "IDLE+CLOUD+POWER", "queue1"),
+            ],
+            [],
+            None,
+            ["i-1", None],
+            id="all nodes with nodeaddr have an instance",
+        ),
+        pytest.param(
+            [
+                StaticNode("queue1-st-c5xlarge-1", "ip-1", "hostname", "IDLE+CLOUD", "queue1"),
+                StaticNode("queue1-st-c5xlarge-2", "ip-2", "hostname", "IDLE+CLOUD", "queue1"),
+                DynamicNode("queue1-dy-c5xlarge-3", "ip-3", "hostname", "MIXED+CLOUD", "queue1"),
+            ],
+            [
+                EC2Instance("i-1", "ip-1", "hostname", {"ip-1"}, "some_launch_time"),
+                EC2Instance("i-3", "ip-3", "hostname", {"ip-3"}, "some_launch_time"),
+            ],
+            ["ip-2", "ip-3"],
+            ["i-1", None, "i-3"],
+            id="instance of a node visible after the first describe",
+        ),
+    ],
+)
+@pytest.mark.usefixtures("initialize_executor_mock", "initialize_console_logger_mock")
+def test_recheck_nodes_without_instance(
+    nodes, rechecked_instances, expected_rechecked_nodeaddrs, expected_node_instances, mocker
+):
+    mock_sync_config = SimpleNamespace(
+        region="us-east-2",
+        cluster_name="hit-test",
+        boto3_config=botocore.config.Config(),
+        dynamodb_table="table_name",
+        head_node_private_ip="head.node.ip",
+        head_node_hostname="head-node-hostname",
+        hosted_zone="hosted_zone",
+        dns_domain="dns.domain",
+        use_private_hostname=False,
+        run_instances_overrides={},
+        create_fleet_overrides={},
+        insufficient_capacity_timeout=600,
+        fleet_config=FLEET_CONFIG,
+        head_node_instance_id="i-instance-id",
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        hostname_table_max_concurrency=1,
+        warm_pool_file=None,
+    )
+    cluster_manager = ClusterManager(mock_sync_config)
+    get_cluster_instances_by_private_ips_mock = mocker.patch.object(
+        cluster_manager._instance_manager, "get_cluster_instances_by_private_ips", return_value=rechecked_instances
+    )
+    sleep_mock = mocker.patch("time.sleep")
+    cluster_instances = [EC2Instance("i-1", "ip-1", "hostname", {"ip-1"}, "some_launch_time")]
+    cluster_manager._update_slurm_nodes_with_ec2_info(nodes, cluster_instances)
+
+    cluster_manager._recheck_nodes_without_instance(nodes, cluster_instances, datetime.now(tz=timezone.utc))
+
+    if expected_rechecked_nodeaddrs:
+        get_cluster_instances_by_private_ips_mock.assert_called_once_with(expected_rechecked_nodeaddrs)
+        # Wait for EC2 eventual consistency only when some nodes have no backing instance
+        sleep_mock.assert_called_once()
+    else:
+        get_cluster_instances_by_private_ips_mock.assert_not_called()
+        sleep_mock.assert_not_called()
+    assert_that([node.instance.id if node.instance else None for node in nodes]).is_equal_to(expected_node_instances)
+    assert_that([instance.id for instance in cluster_instances]).is_equal_to(
+        sorted({instance_id for instance_id in expected_node_instances if instance_id})
     )
 
 
@@ -639,6 +800,12 @@ def test_perform_health_check_actions(
         fleet_config=FLEET_CONFIG,
         insufficient_capacity_timeout=600,
         head_node_instance_id="i-instance-id",
+        concurrent_instance_status_retrieval=True,
+        scheduled_events_cache_ttl=3600,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        hostname_table_max_concurrency=1,
+        warm_pool_file=None,
     )
     # Mock functions
     cluster_manager = ClusterManager(mock_sync_config)
@@ -650,6 +817,9 @@ def test_perform_health_check_actions(
     # Run test
     cluster_manager._perform_health_check_actions([part])
     # Check function calls
+    cluster_manager._instance_manager.get_unhealthy_cluster_instance_status.assert_called_once_with(
+        ANY, concurrent_retrieval=True, scheduled_events_cache_ttl=3600
+    )
     if expected_handle_health_check_calls:
         cluster_manager._handle_health_check.assert_has_calls(expected_handle_health_check_calls)
     else:
@@ -768,6 +938,10 @@ def test_handle_health_check(
         boto3_config=None,
         fleet_config={},
         ec2_instance_missing_max_count=0,
+        update_nodes_max_concurrency=1,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
 
     cluster_manager = ClusterManager(mock_sync_config)
@@ -782,7 +956,9 @@ def test_handle_health_check(
     else:
         mock_ec2_health_check.assert_has_calls([call(mocker_current_time, 10), call(mocker_current_time, 10)])
     if expected_failed_nodes:
-        drain_node_mock.assert_called_with(expected_failed_nodes, reason=f"Node failing {health_check_type}")
+        drain_node_mock.assert_called_with(
+            expected_failed_nodes, reason=f"Node failing {health_check_type}", max_concurrency=1
+        )
     else:
         drain_node_mock.assert_not_called()
 
@@ -833,6 +1009,9 @@ def test_update_static_nodes_in_replacement(current_replacing_nodes, slurm_nodes
         boto3_config=None,
         fleet_config={},
         ec2_instance_missing_max_count=0,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     cluster_manager._static_nodes_in_replacement = current_replacing_nodes
@@ -945,13 +1124,19 @@ def test_handle_unhealthy_dynamic_nodes(
         region="region",
         boto3_config=None,
         fleet_config={},
+        update_nodes_max_concurrency=1,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     mock_instance_manager = cluster_manager._instance_manager
     power_save_mock = mocker.patch("slurm_plugin.clustermgtd.set_nodes_power_down", autospec=True)
     cluster_manager._handle_unhealthy_dynamic_nodes(unhealthy_dynamic_nodes)
     mock_instance_manager.delete_instances.assert_called_with(instances_to_terminate, terminate_batch_size=4)
-    power_save_mock.assert_called_with(expected_power_save_node_list, reason="Scheduler health check failed")
+    power_save_mock.assert_called_with(
+        expected_power_save_node_list, reason="Scheduler health check failed", max_concurrency=1
+    )
 
 
 @pytest.mark.parametrize(
@@ -1004,13 +1189,17 @@ def test_handle_powering_down_nodes(
         region="region",
         boto3_config=None,
         fleet_config={},
+        update_nodes_max_concurrency=1,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     mock_instance_manager = cluster_manager._instance_manager
     reset_nodes_mock = mocker.patch("slurm_plugin.clustermgtd.reset_nodes", autospec=True)
     cluster_manager._handle_powering_down_nodes(slurm_nodes)
     mock_instance_manager.delete_instances.assert_called_with(instances_to_terminate, terminate_batch_size=4)
-    reset_nodes_mock.assert_called_with(nodes=expected_powering_down_nodes)
+    reset_nodes_mock.assert_called_with(nodes=expected_powering_down_nodes, max_concurrency=1)
 
 
 @pytest.mark.parametrize(
@@ -1175,6 +1364,11 @@ def test_handle_unhealthy_static_nodes(
         worker_pool_size=5,
         worker_pool_max_backlog=10,
         head_node_instance_id="i-instance-id",
+        update_nodes_max_concurrency=1,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        hostname_table_max_concurrency=1,
+        warm_pool_file=None,
     )
     for node, instance in zip(unhealthy_static_nodes, instances):
         node.instance = instance
@@ -1224,7 +1418,10 @@ def test_handle_unhealthy_static_nodes(
         return
     # Assert calls
     reset_mock.assert_called_with(
-        add_node_list, reason="Static node maintenance: unhealthy node is being replaced", state="down"
+        add_node_list,
+        reason="Static node maintenance: unhealthy node is being replaced",
+        state="down",
+        max_concurrency=1,
     )
     if delete_instance_list:
         cluster_manager._instance_manager.delete_instances.assert_called_with(
@@ -1387,6 +1584,10 @@ def test_maintain_nodes(
         boto3_config=None,
         fleet_config={},
         ec2_instance_missing_max_count=0,
+        cluster_snapshot_classification=False,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     cluster_manager._static_nodes_in_replacement = static_nodes_in_replacement
@@ -1432,6 +1633,123 @@ def test_maintain_nodes(
         mock_handle_ice_nodes.assert_not_called()
 
 
+@pytest.mark.usefixtures(
+    "initialize_instance_manager_mock", "initialize_executor_mock", "initialize_console_logger_mock"
+)
+@pytest.mark.parametrize("cluster_snapshot_classification", [False, True])
+def test_maintain_nodes_incremental(mocker, cluster_snapshot_classification):
+    mock_sync_config = SimpleNamespace(
+        terminate_drain_nodes=True,
+        terminate_down_nodes=True,
+        insufficient_capacity_timeout=0,
+        disable_nodes_on_insufficient_capacity=False,
+        disable_capacity_blocks_management=True,
+        cluster_name="cluster",
+        head_node_instance_id="i-instance-id",
+        region="region",
+        boto3_config=None,
+        fleet_config={},
+        ec2_instance_missing_max_count=0,
+        protected_failure_count=10,
+        incremental_node_maintenance=True,
+        node_state_full_resync_interval=600,
+        cluster_snapshot_classification=cluster_snapshot_classification,
+        partitions_info_single_call=False,
+        update_nodes_max_concurrency=1,
+        terminate_max_batch_size=1000,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
+    )
+    cluster_manager = ClusterManager(mock_sync_config)
+    mock_handle_dynamic = mocker.patch.object(cluster_manager, "_handle_unhealthy_dynamic_nodes", autospec=True)
+    mock_handle_powering_down_nodes = mocker.patch.object(cluster_manager, "_handle_powering_down_nodes", autospec=True)
+    mocker.patch.object(cluster_manager, "_handle_protected_mode_process", autospec=True)
+
+    def _run_iteration(current_time, down_node_state="DOWN+CLOUD"):
+        # Nodes are built again at every iteration, as in manage_cluster
+        nodes = [
+            DynamicNode("queue1-dy-c5xlarge-1", "queue1-dy-c5xlarge-1", "hostname", "IDLE+CLOUD+POWERED_DOWN"),
+            DynamicNode("queue1-dy-c5xlarge-2", "ip-2", "hostname", "MIXED+CLOUD", "queue1"),
+            DynamicNode("queue1-dy-c5xlarge-3", "ip-3", "hostname", down_node_state, "queue1"),
+            DynamicNode("queue1-dy-c5xlarge-4", "ip-4", "hostname", "IDLE+CLOUD+POWERING_UP", "queue1"),
+        ]
+        for index, node in enumerate(nodes[1:], start=2):
+            node.instance = EC2Instance(f"id-{index}", f"ip-{index}", "hostname", {f"ip-{index}"}, current_time)
+        partition = SlurmPartition("queue1", "placeholder_nodes", "UP")
+        partition.slurm_nodes = nodes
+        cluster_manager._current_time = current_time
+        cluster_manager._maintain_nodes({"queue1": partition}, {})
+        return nodes
+
+    def _evaluated_nodes():
+        return [node.name for node in mock_handle_powering_down_nodes.call_args[0][0]]
+
+    # First iteration evaluates all the nodes
+    nodes = _run_iteration(datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc))
+    assert_that(_evaluated_nodes()).is_equal_to([node.name for node in nodes])
+    mock_handle_dynamic.assert_called_with([nodes[2]])
+
+    # Unchanged stable nodes are skipped, unhealthy and powering up nodes are evaluated again
+    nodes = _run_iteration(datetime(2020, 1, 1, 0, 1, 0, tzinfo=timezone.utc))
+    assert_that(_evaluated_nodes()).is_equal_to(["queue1-dy-c5xlarge-3", "queue1-dy-c5xlarge-4"])
+    mock_handle_dynamic.assert_called_with([nodes[2]])
+
+    # Node 3 changed state and becomes healthy
+    _run_iteration(datetime(2020, 1, 1, 0, 2, 0, tzinfo=timezone.utc), down_node_state="IDLE+CLOUD")
+    assert_that(_evaluated_nodes()).is_equal_to(["queue1-dy-c5xlarge-3", "queue1-dy-c5xlarge-4"])
+    _run_iteration(datetime(2020, 1, 1, 0, 3, 0, tzinfo=timezone.utc), down_node_state="IDLE+CLOUD")
+    assert_that(_evaluated_nodes()).is_equal_to(["queue1-dy-c5xlarge-4"])
+
+    # Full resync evaluates all the nodes
+    nodes = _run_iteration(datetime(2020, 1, 1, 0, 10, 0, tzinfo=timezone.utc), down_node_state="IDLE+CLOUD")
+    assert_that(_evaluated_nodes()).is_equal_to([node.name for node in nodes])
+    assert_that(mock_handle_dynamic.call_count).is_equal_to(2)
+    _run_iteration(datetime(2020, 1, 1, 0, 11, 0, tzinfo=timezone.utc), down_node_state="IDLE+CLOUD")
+    assert_that(_evaluated_nodes()).is_equal_to(["queue1-dy-c5xlarge-4"])
+
+    # All the nodes are evaluated again after the fleet is stopped
+    mocker.patch("slurm_plugin.clustermgtd.update_all_partitions", autospec=True)
+    cluster_manager._maintain_nodes_down()
+    nodes = _run_iteration(datetime(2020, 1, 1, 0, 12, 0, tzinfo=timezone.utc), down_node_state="IDLE+CLOUD")
+    assert_that(_evaluated_nodes()).is_equal_to([node.name for node in nodes])
+
+
+@pytest.mark.usefixtures(
+    "initialize_instance_manager_mock", "initialize_executor_mock", "initialize_console_logger_mock"
+)
+def test_find_unhealthy_slurm_nodes_with_snapshot_classification_sets_stable_nodes():
+    mock_sync_config = SimpleNamespace(
+        terminate_drain_nodes=True,
+        terminate_down_nodes=True,
+        insufficient_capacity_timeout=0,
+        disable_nodes_on_insufficient_capacity=False,
+        disable_capacity_blocks_management=True,
+        cluster_name="cluster",
+        head_node_instance_id="i-instance-id",
+        region="region",
+        boto3_config=None,
+        fleet_config={},
+        ec2_instance_missing_max_count=0,
+        incremental_node_maintenance=True,
+        node_state_full_resync_interval=600,
+        cluster_snapshot_classification=True,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
+    )
+    cluster_manager = ClusterManager(mock_sync_config)
+    healthy_node = DynamicNode("queue1-dy-c5xlarge-1", "ip-1", "hostname", "MIXED+CLOUD", "queue1")
+    healthy_node.instance = EC2Instance("id-1", "ip-1", "hostname", {"ip-1"}, datetime(2020, 1, 1))
+    unhealthy_node = DynamicNode("queue1-dy-c5xlarge-2", "ip-2", "hostname", "DOWN+CLOUD", "queue1")
+    unhealthy_node.instance = EC2Instance("id-2", "ip-2", "hostname", {"ip-2"}, datetime(2020, 1, 1))
+
+    unhealthy_dynamic_nodes, _, _ = cluster_manager._find_unhealthy_slurm_nodes([healthy_node, unhealthy_node])
+
+    # The healthy node skipped by is_healthy has a valid backing instance, so it can become stable
+    assert_that(unhealthy_dynamic_nodes).is_equal_to([unhealthy_node])
+    assert_that(healthy_node.ec2_backing_instance_valid).is_true()
+    assert_that(cluster_manager._is_node_stable(healthy_node)).is_true()
+
+
 @pytest.mark.parametrize(
     "cluster_instances, slurm_nodes, current_time, expected_instance_to_terminate",
     [
@@ -1494,6 +1812,9 @@ def test_terminate_orphaned_instances(
         create_fleet_overrides={},
         fleet_config=FLEET_CONFIG,
         head_node_instance_id="i-instance-id",
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     for instance, node in zip(cluster_instances, slurm_nodes):
         instance.slurm_node = node
@@ -1509,6 +1830,160 @@ def test_terminate_orphaned_instances(
         )
 
 
+@pytest.mark.usefixtures("initialize_executor_mock", "initialize_console_logger_mock")
+def test_terminate_orphaned_instances_from_inventory(mocker):
+    mock_sync_config = SimpleNamespace(
+        orphaned_instance_timeout=30,
+        terminate_max_batch_size=4,
+        region="us-east-2",
+        cluster_name="hit-test",
+        boto3_config=botocore.config.Config(),
+        dynamodb_table="table_name",
+        head_node_private_ip="head.node.ip",
+        head_node_hostname="head-node-hostname",
+        hosted_zone="hosted_zone",
+        dns_domain="dns.domain",
+        use_private_hostname=False,
+        insufficient_capacity_timeout=600,
+        run_instances_overrides={},
+        create_fleet_overrides={},
+        fleet_config=FLEET_CONFIG,
+        head_node_instance_id="i-instance-id",
+        hostname_table_max_concurrency=1,
+        warm_pool_file=None,
+        ec2_api_rate_limiter_file=None,
+        incremental_node_maintenance=False,
+    )
+    launch_time = datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    cluster_manager = ClusterManager(mock_sync_config)
+    cluster_manager._current_time = datetime(2020, 1, 1, 0, 1, 0, tzinfo=timezone.utc)
+    instance_manager = cluster_manager._instance_manager
+    instance_manager._describe_instances = mocker.MagicMock(
+        side_effect=[[EC2Instance("id-1", "ip-1", "hostname", {"ip-1"}, launch_time)], []]
+    )
+    instance_manager._describe_instance_ids = mocker.MagicMock(return_value=[])
+    instance_manager.delete_instances = mocker.MagicMock()
+
+    # The instance is backing its node in the first iteration
+    cluster_instances = instance_manager.get_cluster_instances_from_inventory(full_sync_interval=600)
+    ClusterManager._update_slurm_nodes_with_ec2_info(
+        [DynamicNode("queue1-dy-c5xlarge-1", "ip-1", "hostname", "IDLE+CLOUD", "queue1")], cluster_instances
+    )
+    cluster_manager._terminate_orphaned_instances(cluster_instances)
+    instance_manager.delete_instances.assert_not_called()
+
+    # The node lost its instance in the second iteration, the instance kept in the inventory is orphaned
+    cluster_instances = instance_manager.get_cluster_instances_from_inventory(full_sync_interval=600)
+    ClusterManager._update_slurm_nodes_with_ec2_info(
+        [DynamicNode("queue1-dy-c5xlarge-1", "queue1-dy-c5xlarge-1", "hostname", "IDLE+CLOUD", "queue1")],
+        cluster_instances,
+    )
+    cluster_manager._terminate_orphaned_instances(cluster_instances)
+    instance_manager.delete_instances.assert_called_once_with(["id-1"], terminate_batch_size=4)
+
+
+@pytest.mark.usefixtures(
+    "initialize_instance_manager_mock", "initialize_executor_mock", "initialize_console_logger_mock"
+)
+def test_terminate_orphaned_instances_in_warm_pool(mocker, tmp_path):
+    mock_sync_config = SimpleNamespace(
+        orphaned_instance_timeout=30,
+        terminate_max_batch_size=4,
+        insufficient_capacity_timeout=600,
+        region="us-east-2",
+        boto3_config=botocore.config.Config(),
+        fleet_config=FLEET_CONFIG,
+        cluster_name="hit-test",
+        head_node_instance_id="i-instance-id",
+        warm_pool_file=str(tmp_path / "warm_pool.json"),
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+    )
+    launch_time = datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    cluster_instances = [
+        EC2Instance(f"id-{index}", f"ip-{index}", "hostname", {f"ip-{index}"}, launch_time) for index in range(3)
+    ]
+    cluster_manager = ClusterManager(mock_sync_config)
+    cluster_manager._current_time = datetime(2020, 1, 1, 0, 1, 0, tzinfo=timezone.utc)
+    cluster_manager._warm_pool.add("queue1", "c5xlarge", cluster_instances[:2], launch_time)
+    cluster_manager._warm_pool.take("queue1", "c5xlarge", 1, launch_time)
+    cluster_manager._instance_manager.delete_instances = mocker.MagicMock()
+
+    cluster_manager._terminate_orphaned_instances(cluster_instances)
+
+    cluster_manager._instance_manager.delete_instances.assert_called_once_with(["id-2"], terminate_batch_size=4)
+
+
+@pytest.mark.usefixtures(
+    "initialize_instance_manager_mock", "initialize_executor_mock", "initialize_console_logger_mock"
+)
+def test_maintain_warm_pool(mocker, tmp_path):
+    mock_sync_config = SimpleNamespace(
+        orphaned_instance_timeout=300,
+        terminate_max_batch_size=4,
+        insufficient_capacity_timeout=600,
+        region="us-east-2",
+        boto3_config=botocore.config.Config(),
+        fleet_config={"queue1": {"cr1": {}, "cr2": {}, "cr3": {}, "cr4": {}, "cr5": {}}, "queue2": {"cr1": {}}},
+        cluster_name="hit-test",
+        head_node_instance_id="i-instance-id",
+        warm_pool_file=str(tmp_path / "warm_pool.json"),
+        warm_pool_size=2,
+        warm_pool_refill_max_count=1,
+        warm_pool_idle_timeout=300,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+    )
+    current_time = datetime(2020, 1, 1, 1, 0, 0, tzinfo=timezone.utc)
+    cluster_instances = [
+        EC2Instance(f"i-{index}", f"ip-{index}", "hostname", {f"ip-{index}"}, current_time) for index in range(7)
+    ]
+    cluster_manager = ClusterManager(mock_sync_config)
+    cluster_manager._current_time = current_time
+    warm_pool = cluster_manager._warm_pool
+    # i-0 is idle for too long, i-2 belongs to an inactive partition, i-4 to a static-only compute resource
+    warm_pool.add("queue1", "cr1", cluster_instances[:1], datetime(2020, 1, 1, 0, 50, 0, tzinfo=timezone.utc))
+    warm_pool.add("queue1", "cr1", cluster_instances[1:2], current_time)
+    warm_pool.add("queue2", "cr1", cluster_instances[2:3], current_time)
+    warm_pool.add("queue1", "cr3", cluster_instances[4:5], current_time)
+    # i-5 exceeds the powered down dynamic nodes of queue1/cr4
+    warm_pool.add("queue1", "cr4", cluster_instances[5:7], current_time)
+    # Instances are not launched for the compute resources with insufficient capacity
+    cluster_manager._insufficient_capacity_compute_resources = {
+        "queue1": {"cr2": ComputeResourceFailureEvent(current_time, "InsufficientInstanceCapacity")}
+    }
+    cluster_manager._instance_manager.delete_instances = mocker.MagicMock()
+    cluster_manager._instance_manager.launch_warm_pool_instances = mocker.MagicMock(return_value=cluster_instances[3:4])
+
+    queue1 = SlurmPartition("queue1", "placeholder_nodes", "UP")
+    queue1.slurm_nodes = [
+        DynamicNode("queue1-dy-cr1-1", "queue1-dy-cr1-1", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue1"),
+        DynamicNode("queue1-dy-cr1-2", "queue1-dy-cr1-2", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue1"),
+        DynamicNode("queue1-dy-cr1-3", "queue1-dy-cr1-3", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue1"),
+        DynamicNode("queue1-dy-cr2-1", "queue1-dy-cr2-1", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue1"),
+        StaticNode("queue1-st-cr3-1", "ip-1", "hostname", "IDLE+CLOUD", "queue1"),
+        DynamicNode("queue1-dy-cr4-1", "queue1-dy-cr4-1", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue1"),
+        DynamicNode("queue1-dy-cr4-2", "ip-2", "hostname", "MIXED+CLOUD", "queue1"),
+        DynamicNode("queue1-dy-cr5-1", "queue1-dy-cr5-1", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue1"),
+    ]
+    queue2 = SlurmPartition("queue2", "placeholder_nodes", "INACTIVE")
+    queue2.slurm_nodes = [
+        DynamicNode("queue2-dy-cr1-1", "queue2-dy-cr1-1", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue2"),
+    ]
+
+    cluster_manager._maintain_warm_pool(cluster_instances, [queue1, queue2])
+
+    cluster_manager._instance_manager.delete_instances.assert_called_once_with(
+        ["i-5", "i-4", "i-2", "i-0"], terminate_batch_size=4
+    )
+    # At most warm_pool_refill_max_count instances are launched per iteration, so queue1/cr5 is not refilled yet
+    cluster_manager._instance_manager.launch_warm_pool_instances.assert_called_once_with("queue1", "cr1", 1)
+    assert_that(warm_pool.take("queue1", "cr1", 5, current_time)).is_equal_to(
+        cluster_instances[1:2] + cluster_instances[3:4]
+    )
+    assert_that(warm_pool.get_instance_ids()).is_equal_to({"i-1", "i-3", "i-6"})
+
+
 @pytest.mark.parametrize(
     "disable_cluster_management, disable_health_check, mock_cluster_instances, nodes, partitions, status, "
     "queue_compute_resource_nodes_map",
@@ -1609,8 +2084,10 @@ def test_terminate_orphaned_instances(
         "stopped_disabled",
     ],
 )
+@pytest.mark.parametrize("concurrent_cluster_state_retrieval", [False, True])
 @pytest.mark.usefixtures("initialize_executor_mock", "initialize_console_logger_mock")
 def test_manage_cluster(
+    concurrent_cluster_state_retrieval,
     disable_cluster_management,
     disable_health_check,
     mock_cluster_instances,
@@ -1641,6 +2118,13 @@ def test_manage_cluster(
         terminate_max_batch_size=1,
         head_node_instance_id="i-instance-id",
         fleet_config={},
+        nodes_info_backend=NodesInfoBackend.TEXT,
+        partitions_info_single_call=False,
+        update_nodes_max_concurrency=1,
+        concurrent_cluster_state_retrieval=concurrent_cluster_state_retrieval,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     mocker.patch("time.sleep")
     cluster_manager = ClusterManager(mock_sync_config)
@@ -1711,7 +2195,9 @@ def test_manage_cluster(
         update_all_partitions_mock.assert_not_called()
         initialize_instance_manager_mock().terminate_all_compute_nodes.assert_not_called()
     elif status == ComputeFleetStatus.STOPPED:
-        update_all_partitions_mock.assert_called_with(PartitionStatus.INACTIVE, reset_node_addrs_hostname=True)
+        update_all_partitions_mock.assert_called_with(
+            PartitionStatus.INACTIVE, reset_node_addrs_hostname=True, single_call=False, max_concurrency=1
+        )
         initialize_instance_manager_mock().terminate_all_compute_nodes.assert_called_with(
             mock_sync_config.terminate_max_batch_size
         )
@@ -1721,6 +2207,105 @@ def test_manage_cluster(
         get_partitions_info_with_retry_mock.assert_not_called()
 
 
+@pytest.mark.usefixtures(
+    "initialize_instance_manager_mock", "initialize_executor_mock", "initialize_console_logger_mock"
+)
+def test_get_cluster_state_concurrently(mocker, caplog):
+    caplog.set_level(logging.INFO)
+    cluster_manager = ClusterManager(mocker.MagicMock(concurrent_cluster_state_retrieval=True))
+    # Both retrievals must be in progress at the same time to go through the barrier
+    barrier = threading.Barrier(2, timeout=10)
+
+    def _get_scheduler_state(*args):
+        barrier.wait()
+        return "scheduler_state"
+
+    def _get_ec2_state(*args):
+        barrier.wait()
+        return []
+
+    mocker.patch.object(ClusterManager, "_get_scheduler_state", side_effect=_get_scheduler_state, autospec=True)
+    mocker.patch.object(ClusterManager, "_get_ec2_state", side_effect=_get_ec2_state, autospec=True)
+
+    assert_that(cluster_manager._get_cluster_state_concurrently()).is_equal_to(("scheduler_state", []))
+    assert_that(caplog.text).contains("Retrieved cluster state from the scheduler and EC2 in")
+
+
+@pytest.mark.parametrize(
+    "metrics_file_name, slow_iteration_warning_threshold, duration, expected_warning",
+    [
+        (None, 0, 100, False),
+        ("metrics.json", 0.5, 20, False),
+        ("metrics.prom", 0.5, 40, True),
+    ],
+)
+def test_report_iteration_metrics(
+    tmp_path, caplog, metrics_file_name, slow_iteration_warning_threshold, duration, expected_warning
+):
+    iteration_metrics = IterationMetrics()
+    iteration_metrics.phases = {"get_ec2_state": 10.0, "maintain_nodes": 25.0}
+    iteration_metrics.increment("command_calls", "scontrol", 2)
+    iteration_metrics.duration = duration
+    metrics_file_path = str(tmp_path / metrics_file_name) if metrics_file_name else None
+    config = SimpleNamespace(
+        metrics_file_path=metrics_file_path,
+        slow_iteration_warning_threshold=slow_iteration_warning_threshold,
+        loop_time=60,
+    )
+
+    _report_iteration_metrics(config, iteration_metrics)
+
+    assert_that(os.listdir(tmp_path)).is_equal_to([metrics_file_name] if metrics_file_name else [])
+    if expected_warning:
+        assert_that(caplog.text).contains(
+            "Iteration took 40.000 seconds, more than 50% of the loop time of 60 seconds. "
+            "Phases: maintain_nodes: 25.000s, get_ec2_state: 10.000s. Counters: {'command_calls': {'scontrol': 2}}"
+        )
+    else:
+        assert_that(caplog.text).does_not_contain("Iteration took")
+
+
+@pytest.mark.parametrize("reload_config_on_change", [True, False])
+def test_reload_config(mocker, tmp_path, reload_config_on_change):
+    config_file = tmp_path / "clustermgtd.conf"
+    config_file.write_text("[clustermgtd]")
+    config = SimpleNamespace(config_files=[config_file], reload_config_on_change=reload_config_on_change)
+    new_config = SimpleNamespace(config_files=[config_file], reload_config_on_change=reload_config_on_change)
+    config_mock = mocker.patch("slurm_plugin.clustermgtd.ClustermgtdConfig", side_effect=[new_config, new_config])
+    cluster_manager = mocker.MagicMock()
+
+    config, signature = _reload_config(config_file, config, cluster_manager, None)
+    assert_that(config).is_same_as(new_config)
+    cluster_manager.set_config.assert_called_once_with(new_config)
+
+    # The config is read again only if the config files changed
+    config, signature = _reload_config(config_file, config, cluster_manager, signature)
+    assert_that(config_mock.call_count).is_equal_to(1 if reload_config_on_change else 2)
+
+    if reload_config_on_change:
+        config_file.write_text("[clustermgtd]\nloop_time = 30")
+        config_mock.side_effect = [Exception("error")]
+        assert_that(_reload_config(config_file, config, cluster_manager, signature)).is_equal_to((config, signature))
+        assert_that(config_mock.call_count).is_equal_to(2)
+
+
+@pytest.mark.parametrize("reload_config_on_change", [True, False])
+def test_configure_logging(mocker, tmp_path, reload_config_on_change):
+    logging_config = tmp_path / "logging.conf"
+    logging_config.write_text("[loggers]")
+    config = SimpleNamespace(logging_config=logging_config, reload_config_on_change=reload_config_on_change)
+    file_config_mock = mocker.patch("slurm_plugin.clustermgtd.fileConfig")
+
+    signature = _configure_logging(config, None)
+    signature = _configure_logging(config, signature)
+    assert_that(file_config_mock.call_count).is_equal_to(1 if reload_config_on_change else 2)
+
+    # Logging is configured again when the logging config file changes
+    logging_config.write_text("[loggers]\nkeys=root")
+    _configure_logging(config, signature)
+    assert_that(file_config_mock.call_count).is_equal_to(2 if reload_config_on_change else 3)
+
+
 @pytest.mark.parametrize(
     (
         "config_file, mocked_active_nodes, mocked_inactive_nodes, mocked_boto3_request, "
@@ -1844,6 +2429,24 @@ def test_manage_cluster(
                     },
                     generate_error=False,
                 ),
+                # _recheck_nodes_without_instance: get instances of nodes without backing instance
+                MockedBoto3Request(
+                    method="describe_instances",
+                    response={"Reservations": []},
+                    expected_params={
+                        "Filters": [
+                            {"Name": "tag:parallelcluster:cluster-name", "Values": ["hit"]},
+                            {"Name": "instance-state-name", "Values": list(EC2_INSTANCE_ALIVE_STATES)},
+                            {"Name": "tag:parallelcluster:node-type", "Values": ["Compute"]},
+                            {
+                                "Name": "network-interface.addresses.private-ip-address",
+                                "Values": ["ip-6", "ip-8", "ip-5"],
+                            },
+                        ],
+                        "MaxResults": 1000,
+                    },
+                    generate_error=False,
+                ),
                 # _clean_up_inactive_partition/terminate_associated_instances: delete inactive instances
                 MockedBoto3Request(
                     method="terminate_instances",
@@ -2079,6 +2682,22 @@ def test_manage_cluster(
                     },
                     generate_error=False,
                 ),
+                # _recheck_nodes_without_instance: get instances of nodes without backing instance
+                # Produce an error, cluster should be able to handle exception and move on
+                MockedBoto3Request(
+                    method="describe_instances",
+                    response={},
+                    expected_params={
+                        "Filters": [
+                            {"Name": "tag:parallelcluster:cluster-name", "Values": ["hit"]},
+                            {"Name": "instance-state-name", "Values": list(EC2_INSTANCE_ALIVE_STATES)},
+                            {"Name": "tag:parallelcluster:node-type", "Values": ["Compute"]},
+                            {"Name": "network-interface.addresses.private-ip-address", "Values": ["ip-5"]},
+                        ],
+                        "MaxResults": 1000,
+                    },
+                    generate_error=True,
+                ),
                 # _clean_up_inactive_partition/terminate_associated_instances: delete inactive instances
                 # Produce an error, cluster should be able to handle exception and move on
                 MockedBoto3Request(
@@ -2168,6 +2787,8 @@ def test_manage_cluster(
             ],
             [client_error("some run_instances error")],
             [
+                r"Failed when getting cluster instances by private IPs from EC2 with exception",
+                r"Failed when checking again nodes without backing instance with exception",
                 r"Failed TerminateInstances request:",
                 r"Failed when terminating instances \(x1\) \['i-4'\].*{'error for i-4'}",
                 r"Failed when getting health status for unhealthy EC2 instances",
@@ -2388,6 +3009,10 @@ def test_handle_successfully_launched_nodes(
         fleet_config=FLEET_CONFIG,
         head_node_instance_id="i-instance-id",
         ec2_instance_missing_max_count=0,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        hostname_table_max_concurrency=1,
+        warm_pool_file=None,
     )
     # Mock associated function
     cluster_manager = ClusterManager(mock_sync_config)
@@ -2453,6 +3078,9 @@ def test_increase_partitions_protected_failure_count(nodes, initial_map, expecte
         region="region",
         boto3_config=None,
         fleet_config={},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     cluster_manager._partitions_protected_failure_count_map = initial_map
@@ -2481,6 +3109,9 @@ def test_reset_partition_failure_count(mocker, partition, expected_map):
         region="region",
         boto3_config=None,
         fleet_config={},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     cluster_manager._partitions_protected_failure_count_map = {"queue1": 2, "queue2": 1}
@@ -2555,6 +3186,9 @@ def test_handle_protected_mode_process(
         region="region",
         boto3_config=None,
         fleet_config={},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     caplog.set_level(logging.INFO)
     cluster_manager = ClusterManager(mock_sync_config)
@@ -2612,6 +3246,9 @@ def test_enter_protected_mode(
         region="region",
         boto3_config=None,
         fleet_config={},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     mock_update_compute_fleet_status = mocker.patch.object(cluster_manager, "_update_compute_fleet_status")
@@ -2712,6 +3349,9 @@ def test_is_node_being_replaced(current_replacing_nodes, node, instance, current
         boto3_config=None,
         fleet_config={},
         ec2_instance_missing_max_count=max_count,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     cluster_manager._current_time = current_time
@@ -2787,6 +3427,9 @@ def test_is_node_replacement_timeout(node, current_node_in_replacement, max_coun
         boto3_config=None,
         fleet_config={},
         ec2_instance_missing_max_count=0,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     cluster_manager._current_time = datetime(2020, 1, 2, 0, 0, 0)
@@ -2859,6 +3502,9 @@ def test_handle_failed_health_check_nodes_in_replacement(
         region="region",
         boto3_config=None,
         fleet_config={},
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     cluster_manager._static_nodes_in_replacement = current_nodes_in_replacement
@@ -2924,6 +3570,10 @@ def test_handle_bootstrap_failure_nodes(
         boto3_config=None,
         fleet_config={},
         ec2_instance_missing_max_count=0,
+        cluster_snapshot_classification=False,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     for node, instance in zip(active_nodes, instances):
@@ -2992,6 +3642,10 @@ def test_find_bootstrap_failure_nodes(active_nodes, instances):
         boto3_config=None,
         fleet_config={},
         ec2_instance_missing_max_count=0,
+        cluster_snapshot_classification=False,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     for node, instance in zip(active_nodes, instances):
@@ -3144,6 +3798,7 @@ def test_find_bootstrap_failure_nodes(active_nodes, instances):
                     ["queue1-dy-c5xlarge-1"],
                     reason="(Code:InsufficientReservedInstanceCapacity)Temporarily disabling node due to insufficient "
                     "capacity",
+                    max_concurrency=1,
                 ),
             ],
         ),
@@ -3170,6 +3825,10 @@ def test_handle_ice_nodes(
         region="region",
         boto3_config=None,
         fleet_config={},
+        update_nodes_max_concurrency=1,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     caplog.set_level(logging.INFO)
     cluster_manager = ClusterManager(mock_sync_config)
@@ -3185,7 +3844,9 @@ def test_handle_ice_nodes(
     )
     if expected_power_save_node_list:
         power_save_mock.assert_called_with(
-            expected_power_save_node_list, reason="Enabling node since insufficient capacity timeout expired"
+            expected_power_save_node_list,
+            reason="Enabling node since insufficient capacity timeout expired",
+            max_concurrency=1,
         )
     else:
         power_save_mock.assert_not_called()
@@ -3521,6 +4182,10 @@ def test_reset_timeout_expired_compute_resources(
         region="region",
         boto3_config=None,
         fleet_config={},
+        update_nodes_max_concurrency=1,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(config)
     cluster_manager._current_time = datetime(2021, 1, 2, 0, 0, 0)
@@ -3535,7 +4200,9 @@ def test_reset_timeout_expired_compute_resources(
     )
     if expected_power_save_node_list:
         power_save_mock.assert_called_with(
-            expected_power_save_node_list, reason="Enabling node since insufficient capacity timeout expired"
+            expected_power_save_node_list,
+            reason="Enabling node since insufficient capacity timeout expired",
+            max_concurrency=1,
         )
     else:
         power_save_mock.assert_not_called()
@@ -3605,10 +4272,12 @@ def test_reset_timeout_expired_compute_resources(
                     ["queue1-dy-c5xlarge-1"],
                     reason="(Code:InsufficientReservedInstanceCapacity)Temporarily disabling node due to insufficient "
                     "capacity",
+                    max_concurrency=1,
                 ),
                 call(
                     ["queue2-dy-c5large-1", "queue2-dy-c5large-2"],
                     reason="(Code:InsufficientHostCapacity)Temporarily disabling node due to insufficient capacity",
+                    max_concurrency=1,
                 ),
             ],
         ),
@@ -3625,7 +4294,7 @@ def test_set_ice_compute_resources_to_down(
     caplog,
 ):
     caplog.set_level(logging.INFO)
-    cluster_manager = ClusterManager(mocker.MagicMock())
+    cluster_manager = ClusterManager(mocker.MagicMock(update_nodes_max_concurrency=1))
     power_down_mock = mocker.patch("slurm_plugin.clustermgtd.set_nodes_down", autospec=True)
     cluster_manager._insufficient_capacity_compute_resources = insufficient_capacity_compute_resources
 
@@ -3953,6 +4622,10 @@ def test_find_unhealthy_slurm_nodes(
         fleet_config={},
         disable_capacity_blocks_management=disable_capacity_blocks_management,
         ec2_instance_missing_max_count=0,
+        cluster_snapshot_classification=False,
+        incremental_node_maintenance=False,
+        ec2_api_rate_limiter_file=None,
+        warm_pool_file=None,
     )
     cluster_manager = ClusterManager(mock_sync_config)
     get_reserved_mock = mocker.patch.object(
@@ -11,17 +11,22 @@
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from unittest.mock import ANY, call
 
 import pytest
 from assertpy import assert_that
 from botocore.exceptions import ClientError
+from slurm_plugin.common import CreateFleetInstancesInfo
 from slurm_plugin.fleet_manager import (
     Ec2CreateFleetManager,
     EC2Instance,
     Ec2RunInstancesManager,
     FleetManagerFactory,
+    InstancesInfoResolver,
     LaunchInstancesError,
+    LaunchRecord,
 )
 
 from tests.common import FLEET_CONFIG, MockedBoto3Request
@@ -31,7 +36,7 @@ from tests.common import FLEET_CONFIG, MockedBoto3Request
 def boto3_stubber_path():
     # we need to set the region in the environment because the Boto3ClientFactory requires it.
     os.environ["AWS_DEFAULT_REGION"] = "us-east-2"
-    return "slurm_plugin.fleet_manager.boto3"
+    return "aws.common.boto3"
 
 
 class TestFleetManagerFactory:
@@ -1223,3 +1228,106 @@ class TestFleetManager:
 
         fleet_manager._evaluate_launch_params.assert_called_once_with(count)
         fleet_manager._launch_instances.assert_called_once()
+
+    def test_launch_ec2_instances_records_launch_attempts(self, mocker):
+        mocker.patch("time.sleep")
+        fleet_manager = FleetManagerFactory.get_manager(
+            "hit", "region", "boto3_config", FLEET_CONFIG, "queue2", "fleet-ondemand", False, {}, {}
+        )
+        fleet_manager._evaluate_launch_params = mocker.MagicMock()
+        fleet_manager._launch_instances = mocker.MagicMock(
+            side_effect=[
+                ClientError({"Error": {"Code": "RequestLimitExceeded", "Message": "Request limit exceeded."}}, "run"),
+                {"Instances": []},
+                LaunchInstancesError("InsufficientInstanceCapacity", "Insufficient capacity."),
+            ]
+        )
+
+        # Throttled attempts are retried
+        assert_that(fleet_manager.launch_ec2_instances(5)).is_empty()
+        with pytest.raises(LaunchInstancesError):
+            fleet_manager.launch_ec2_instances(5)
+
+        assert_that(fleet_manager.launch_records).is_equal_to(
+            [
+                LaunchRecord(5, 0, duration=ANY, throttled=True, error_code="RequestLimitExceeded"),
+                LaunchRecord(5, 0, duration=ANY),
+                LaunchRecord(5, 0, duration=ANY, error_code="InsufficientInstanceCapacity"),
+            ]
+        )
+
+    def test_launch_ec2_instances_skipping_instances_info(self, mocker):
+        mocker.patch(
+            "slurm_plugin.fleet_manager.create_fleet",
+            return_value={"Instances": [{"InstanceIds": ["i-12345", "i-23456"]}]},
+        )
+        describe_instances_info_mock = mocker.patch("slurm_plugin.fleet_manager._describe_instances_info")
+        fleet_manager = FleetManagerFactory.get_manager(
+            "hit",
+            "region",
+            "boto3_config",
+            FLEET_CONFIG,
+            "queue2",
+            "fleet-ondemand",
+            False,
+            {},
+            {},
+            create_fleet_instances_info=CreateFleetInstancesInfo.SKIP,
+        )
+
+        instances = fleet_manager.launch_ec2_instances(2)
+
+        describe_instances_info_mock.assert_not_called()
+        assert_that(instances).is_equal_to(
+            [EC2Instance("i-12345", None, None, set(), ANY), EC2Instance("i-23456", None, None, set(), ANY)]
+        )
+
+
+def _instance_info(instance_id):
+    return {"InstanceId": instance_id, "PrivateIpAddress": "ip-1", "PrivateDnsName": "hostname"}
+
+
+class TestInstancesInfoResolver:
+    def test_get_instances_info_coalesces_requests(self, mocker):
+        mocker.patch("slurm_plugin.fleet_manager.INSTANCES_INFO_INITIAL_WAIT", 0.5)
+        describe_instances_info_mock = mocker.patch(
+            "slurm_plugin.fleet_manager._describe_instances_info",
+            side_effect=lambda _, instance_ids: ([_instance_info(instance_id) for instance_id in instance_ids], []),
+        )
+        ec2_client = mocker.MagicMock()
+        resolver = InstancesInfoResolver()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(
+                executor.map(
+                    lambda instance_ids: resolver.get_instances_info(ec2_client, instance_ids),
+                    [["i-1", "i-2"], ["i-3"]],
+                )
+            )
+
+        describe_instances_info_mock.assert_called_once_with(ec2_client, ["i-1", "i-2", "i-3"])
+        assert_that(results).is_equal_to(
+            [([_instance_info("i-1"), _instance_info("i-2")], []), ([_instance_info("i-3")], [])]
+        )
+
+    def test_get_instances_info_retries_incomplete_instances(self, mocker):
+        mocker.patch("slurm_plugin.fleet_manager.INSTANCES_INFO_INITIAL_WAIT", 0)
+        mocker.patch("slurm_plugin.fleet_manager.INSTANCES_INFO_RETRIES", 3)
+        mocker.patch("slurm_plugin.fleet_manager._get_instances_info_backoff", return_value=0)
+        describe_instances_info_mock = mocker.patch(
+            "slurm_plugin.fleet_manager._describe_instances_info",
+            side_effect=[
+                ([_instance_info("i-1")], ["i-2", "i-3"]),
+                ([_instance_info("i-2")], ["i-3"]),
+                ([], ["i-3"]),
+            ],
+        )
+        ec2_client = mocker.MagicMock()
+
+        instances, partial_instance_ids = InstancesInfoResolver().get_instances_info(ec2_client, ["i-1", "i-2", "i-3"])
+
+        assert_that(describe_instances_info_mock.call_args_list).is_equal_to(
+            [call(ec2_client, ["i-1", "i-2", "i-3"]), call(ec2_client, ["i-2", "i-3"]), call(ec2_client, ["i-3"])]
+        )
+        assert_that(instances).is_equal_to([_instance_info("i-1"), _instance_info("i-2")])
+        assert_that(partial_instance_ids).is_equal_to(["i-3"])
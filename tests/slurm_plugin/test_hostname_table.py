@@ -0,0 +1,154 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+from assertpy import assert_that
+from slurm_plugin.fleet_manager import EC2Instance
+from slurm_plugin.hostname_table import HostnameTable, UnprocessedItemsError
+
+from tests.common import LocalDynamoDBResource
+
+
+@pytest.fixture(autouse=True)
+def sleep_mock(mocker):
+    # Sleeping advances the monotonic clock, without waiting
+    clock = [0.0]
+    mocker.patch("slurm_plugin.hostname_table.time.monotonic", side_effect=lambda: clock[0])
+
+    def _sleep(seconds):
+        clock[0] += seconds
+
+    sleep_mock = mocker.patch("slurm_plugin.hostname_table.time.sleep", side_effect=_sleep)
+    sleep_mock.clock = clock
+    return sleep_mock
+
+
+def _nodes(*indexes, instance_prefix="i"):
+    return {
+        f"queue1-st-c5xlarge-{index}": EC2Instance(
+            f"{instance_prefix}-{index}", f"ip-{index}", f"hostname-{index}", {f"ip-{index}"}, "launch_time"
+        )
+        for index in indexes
+    }
+
+
+def _item(index, instance_prefix="i"):
+    return {
+        "Id": f"queue1-st-c5xlarge-{index}",
+        "InstanceId": f"{instance_prefix}-{index}",
+        "HeadNodePrivateIp": "head.node.ip",
+        "HeadNodeHostname": "head-node-hostname",
+    }
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_store_instances(max_concurrency):
+    ddb_resource = LocalDynamoDBResource(max_processed_items=20)
+    hostname_table = HostnameTable(ddb_resource, "table_name", max_concurrency=max_concurrency)
+
+    hostname_table.store_instances(_nodes(*range(60)), "head.node.ip", "head-node-hostname")
+
+    assert_that(ddb_resource.tables["table_name"]).is_equal_to(
+        {f"queue1-st-c5xlarge-{index}": _item(index) for index in range(60)}
+    )
+    # Batches of 25, 25 and 10 items, the first two with 5 unprocessed items retried
+    assert_that([len(request["table_name"]) for _, request in ddb_resource.calls]).contains_only(25, 10, 5)
+    assert_that(ddb_resource.calls).is_length(5)
+
+
+def test_store_instances_skips_unchanged_items():
+    ddb_resource = LocalDynamoDBResource()
+    hostname_table = HostnameTable(ddb_resource, "table_name")
+
+    hostname_table.store_instances(_nodes(1, 2), "head.node.ip", "head-node-hostname")
+    hostname_table.store_instances(_nodes(1, 2), "head.node.ip", "head-node-hostname")
+    assert_that(ddb_resource.calls).is_length(1)
+
+    hostname_table.store_instances(
+        {**_nodes(1), **_nodes(2, instance_prefix="j")}, "head.node.ip", "head-node-hostname"
+    )
+    assert_that(ddb_resource.calls).is_length(2)
+    assert_that(ddb_resource.calls[1][1]).is_equal_to(
+        {"table_name": [{"PutRequest": {"Item": _item(2, instance_prefix="j")}}]}
+    )
+
+
+def test_store_instances_with_unprocessed_items(sleep_mock):
+    ddb_resource = LocalDynamoDBResource(max_processed_items=0)
+    hostname_table = HostnameTable(ddb_resource, "table_name", write_retry_time=60)
+
+    with pytest.raises(UnprocessedItemsError) as error:
+        hostname_table.store_instances(_nodes(1, 2), "head.node.ip", "head-node-hostname")
+
+    assert_that(error.value.node_names).is_equal_to(["queue1-st-c5xlarge-1", "queue1-st-c5xlarge-2"])
+    # Items are retried with backoff of up to about 2 seconds, until the retry time expires
+    assert_that(sleep_mock.clock[0]).is_equal_to(60)
+    assert_that(len(ddb_resource.calls)).is_between(30, 40)
+    assert_that(ddb_resource.calls).is_length(sleep_mock.call_count + 1)
+
+    # Unprocessed items are written again
+    ddb_resource.max_processed_items = None
+    hostname_table.store_instances(_nodes(1, 2), "head.node.ip", "head-node-hostname")
+    assert_that(ddb_resource.tables["table_name"]).is_length(2)
+
+
+def test_store_instances_with_items_unprocessed_for_several_attempts(sleep_mock):
+    ddb_resource = LocalDynamoDBResource(max_processed_items=0)
+    hostname_table = HostnameTable(ddb_resource, "table_name")
+
+    def _sleep(seconds):
+        sleep_mock.clock[0] += seconds
+        # The table is throttled for 10 attempts
+        if sleep_mock.call_count == 9:
+            ddb_resource.max_processed_items = None
+
+    sleep_mock.side_effect = _sleep
+    hostname_table.store_instances(_nodes(1, 2), "head.node.ip", "head-node-hostname")
+
+    assert_that(ddb_resource.tables["table_name"]).is_length(2)
+    assert_that(ddb_resource.calls).is_length(10)
+
+
+@pytest.mark.parametrize(
+    "max_concurrency, max_count, expected_request_counts",
+    [
+        (1, 250, [100, 100, 50]),
+        (1, 120, [100, 20]),
+        (3, 250, [100, 100, 50]),
+        (3, 120, [100, 20]),
+    ],
+)
+def test_get_instance_ids(max_concurrency, max_count, expected_request_counts):
+    ddb_resource = LocalDynamoDBResource({"table_name": [_item(index) for index in range(250)]})
+    hostname_table = HostnameTable(ddb_resource, "table_name", max_concurrency=max_concurrency)
+
+    instances = list(
+        hostname_table.get_instance_ids((f"queue1-st-c5xlarge-{index}" for index in range(300)), max_count)
+    )
+
+    assert_that(instances).is_equal_to(
+        [{"Name": f"queue1-st-c5xlarge-{index}", "InstanceId": f"i-{index}"} for index in range(min(max_count, 250))]
+    )
+    assert_that(sorted(len(request["table_name"]["Keys"]) for _, request in ddb_resource.calls)).is_equal_to(
+        sorted(expected_request_counts)
+    )
+
+
+def test_get_instance_ids_with_unprocessed_keys(caplog):
+    ddb_resource = LocalDynamoDBResource({"table_name": [_item(index) for index in range(10)]}, max_processed_items=4)
+    hostname_table = HostnameTable(ddb_resource, "table_name")
+
+    instances = list(hostname_table.get_instance_ids([f"queue1-st-c5xlarge-{index}" for index in range(10)], 10))
+    assert_that(instances).is_length(10)
+    assert_that([len(request["table_name"]["Keys"]) for _, request in ddb_resource.calls]).is_equal_to([10, 6, 2])
+
+    ddb_resource.max_processed_items = 0
+    assert_that(list(hostname_table.get_instance_ids(["queue1-st-c5xlarge-1"], 1))).is_empty()
+    assert_that(caplog.text).contains("Unable to retrieve the instance ids of nodes ['queue1-st-c5xlarge-1']")
@@ -8,12 +8,15 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
+import functools
 import logging
 import os
 import re
 import subprocess
+import threading
 from collections import defaultdict
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from typing import Iterable
 from unittest.mock import call
 
@@ -22,7 +25,8 @@ import pytest
 import slurm_plugin
 from assertpy import assert_that
 from slurm_plugin.common import ScalingStrategy
-from slurm_plugin.fleet_manager import EC2Instance, LaunchInstancesError
+from slurm_plugin.fleet_manager import EC2Instance, LaunchInstancesError, LaunchRecord
+from slurm_plugin.hostname_table import HostnameTable, UnprocessedItemsError
 from slurm_plugin.instance_manager import (
     HostnameDnsStoreError,
     HostnameTableStoreError,
@@ -30,17 +34,20 @@ from slurm_plugin.instance_manager import (
     InstanceToNodeAssignmentError,
     NodeAddrUpdateError,
 )
+from slurm_plugin.launch_batch_sizer import AdaptiveLaunchBatchSizer
 from slurm_plugin.slurm_resources import (
     EC2_HEALTH_STATUS_UNHEALTHY_STATES,
     EC2_INSTANCE_ALIVE_STATES,
+    EC2_INSTANCE_TERMINATED_STATES,
     EC2_SCHEDULED_EVENT_CODES,
     EC2InstanceHealthState,
     SlurmNode,
     SlurmResumeJob,
     StaticNode,
 )
+from slurm_plugin.warm_pool import WarmPool
 
-from tests.common import FLEET_CONFIG, MockedBoto3Request, client_error
+from tests.common import FLEET_CONFIG, LocalDynamoDBResource, MockedBoto3Request, client_error
 
 
 @pytest.fixture()
@@ -51,15 +58,6 @@ def boto3_stubber_path():
 
 
 class TestInstanceManager:
-    class BatchWriterMock:
-        """Utility class to mock batch_writer."""
-
-        def __enter__(self, *args):
-            return self
-
-        def __exit__(self, *args):
-            pass
-
     @pytest.fixture
     def instance_manager(self, mocker):
         instance_manager = InstanceManager(
@@ -176,7 +174,7 @@ class TestInstanceManager:
         assert_that(instance_manager.failed_nodes).is_equal_to(expected_failed_nodes)
 
     @pytest.mark.parametrize(
-        "table_name, node_list, slurm_nodes, expected_put_item_calls, expected_message, job_level_scaling",
+        "table_name, node_list, slurm_nodes, expected_items, expected_message, job_level_scaling",
         [
             (
                 None,
@@ -199,14 +197,12 @@ class TestInstanceManager:
                 ["queue1-st-c5xlarge-1"],
                 [EC2Instance("id-1", "ip-1", "hostname-1", {"ip-1"}, "some_launch_time")],
                 [
-                    call(
-                        Item={
-                            "Id": "queue1-st-c5xlarge-1",
-                            "InstanceId": "id-1",
-                            "HeadNodePrivateIp": "head.node.ip",
-                            "HeadNodeHostname": "head-node-hostname",
-                        }
-                    )
+                    {
+                        "Id": "queue1-st-c5xlarge-1",
+                        "InstanceId": "id-1",
+                        "HeadNodePrivateIp": "head.node.ip",
+                        "HeadNodeHostname": "head-node-hostname",
+                    }
                 ],
                 None,
                 False,
@@ -219,22 +215,18 @@ class TestInstanceManager:
                     EC2Instance("id-2", "ip-2", "hostname-2", {"ip-2"}, "some_launch_time"),
                 ],
                 [
-                    call(
-                        Item={
-                            "Id": "queue1-st-c5xlarge-1",
-                            "InstanceId": "id-1",
-                            "HeadNodePrivateIp": "head.node.ip",
-                            "HeadNodeHostname": "head-node-hostname",
-                        }
-                    ),
-                    call(
-                        Item={
-                            "Id": "queue1-st-c5xlarge-2",
-                            "InstanceId": "id-2",
-                            "HeadNodePrivateIp": "head.node.ip",
-                            "HeadNodeHostname": "head-node-hostname",
-                        }
-                    ),
+                    {
+                        "Id": "queue1-st-c5xlarge-1",
+                        "InstanceId": "id-1",
+                        "HeadNodePrivateIp": "head.node.ip",
+                        "HeadNodeHostname": "head-node-hostname",
+                    },
+                    {
+                        "Id": "queue1-st-c5xlarge-2",
+                        "InstanceId": "id-2",
+                        "HeadNodePrivateIp": "head.node.ip",
+                        "HeadNodeHostname": "head-node-hostname",
+                    },
                 ],
                 None,
                 False,
@@ -247,7 +239,7 @@ class TestInstanceManager:
         table_name,
         node_list,
         slurm_nodes,
-        expected_put_item_calls,
+        expected_items,
         expected_message,
         mocker,
         instance_manager,
@@ -262,21 +254,17 @@ class TestInstanceManager:
         assigned_nodes = dict(zip(launched_nodes, slurm_nodes))
 
         if not table_name:
-            instance_manager._table = None
+            instance_manager._hostname_table = None
             with pytest.raises(Exception, match=expected_message):
                 instance_manager._store_assigned_hostnames(assigned_nodes)
         else:
-            # mock batch_writer
-            batch_writer_mock = self.BatchWriterMock()
-            batch_writer_mock.put_item = mocker.MagicMock()
-            mocker.patch.object(instance_manager._table, "batch_writer", return_value=batch_writer_mock)
+            ddb_resource = LocalDynamoDBResource()
+            instance_manager._hostname_table = HostnameTable(ddb_resource, table_name)
 
             # call function and verify execution
             instance_manager._store_assigned_hostnames(assigned_nodes)
-            if expected_put_item_calls:
-                batch_writer_mock.put_item.assert_has_calls(expected_put_item_calls)
-            else:
-                batch_writer_mock.put_item.assert_not_called()
+            assert_that(list(ddb_resource.tables[table_name].values())).is_equal_to(expected_items or [])
+            assert_that(ddb_resource.calls).is_length(1 if expected_items else 0)
 
     @pytest.mark.parametrize(
         "hosted_zone, dns_domain, node_list, slurm_nodes, mocked_boto3_request, expected_message, "
@@ -747,6 +735,69 @@ class TestInstanceManager:
         result = instance_manager.get_unhealthy_cluster_instance_status(instance_ids)
         assert_that(result).is_equal_to(expected_parsed_result)
 
+    @pytest.mark.parametrize("concurrent_retrieval", [False, True])
+    def test_get_unhealthy_cluster_instance_status_with_scheduled_events_cache(
+        self, instance_manager, mocker, concurrent_retrieval
+    ):
+        instance_statuses = {
+            "instance-status.status": [
+                {"InstanceId": "i-1", "InstanceState": {"Name": "running"}, "InstanceStatus": {"Status": "impaired"}},
+                {"InstanceId": "i-4", "InstanceState": {"Name": "running"}, "InstanceStatus": {"Status": "impaired"}},
+            ],
+            "system-status.status": [
+                {"InstanceId": "i-1", "InstanceState": {"Name": "running"}, "SystemStatus": {"Status": "impaired"}},
+                {"InstanceId": "i-2", "InstanceState": {"Name": "running"}, "SystemStatus": {"Status": "impaired"}},
+            ],
+            "event.code": [
+                {
+                    "InstanceId": "i-3",
+                    "InstanceState": {"Name": "running"},
+                    "InstanceStatus": {"Status": "impaired"},
+                    "Events": [{"Code": "system-reboot"}],
+                },
+            ],
+        }
+        describe_calls = []
+
+        def _paginate(PaginationConfig, Filters):
+            filter_name = Filters[0]["Name"]
+            describe_calls.append(filter_name)
+            return mocker.MagicMock(search=lambda expression: iter(instance_statuses[filter_name]))
+
+        ec2_client = mocker.MagicMock()
+        ec2_client.get_paginator.return_value.paginate.side_effect = _paginate
+        mocker.patch("slurm_plugin.instance_manager.Boto3ClientRegistry.get_client", return_value=ec2_client)
+        datetime_mock = mocker.patch("slurm_plugin.instance_manager.datetime")
+
+        def _get_instance_health_states(seconds):
+            describe_calls.clear()
+            datetime_mock.now.return_value = datetime(2020, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=seconds)
+            instance_health_states = instance_manager.get_unhealthy_cluster_instance_status(
+                ["i-1", "i-2", "i-3"], concurrent_retrieval=concurrent_retrieval, scheduled_events_cache_ttl=600
+            )
+            return {instance_health_state.id: instance_health_state for instance_health_state in instance_health_states}
+
+        def _get_instance_ids(seconds):
+            return list(_get_instance_health_states(seconds))
+
+        assert_that(_get_instance_ids(0)).is_equal_to(["i-1", "i-2", "i-3"])
+        assert_that(describe_calls).contains_only("instance-status.status", "system-status.status", "event.code")
+        # Scheduled events are cached
+        instance_statuses["event.code"] = []
+        assert_that(_get_instance_ids(300)).is_equal_to(["i-1", "i-2", "i-3"])
+        assert_that(describe_calls).contains_only("instance-status.status", "system-status.status")
+        # Only the events are cached, the health of the instances is not taken from the cache
+        instance_statuses["instance-status.status"] = []
+        instance_health_states = _get_instance_health_states(300)
+        assert_that(instance_health_states).contains_only("i-1", "i-2", "i-3")
+        assert_that(instance_health_states["i-3"].state).is_none()
+        assert_that(instance_health_states["i-3"].instance_status).is_empty()
+        assert_that(instance_health_states["i-3"].scheduled_events).is_equal_to([{"Code": "system-reboot"}])
+        assert_that(instance_health_states["i-3"].fail_ec2_health_check(datetime.now(tz=timezone.utc), 0)).is_false()
+        # Scheduled events are retrieved again when the cache expires
+        assert_that(_get_instance_ids(600)).is_equal_to(["i-1", "i-2"])
+        assert_that(describe_calls).is_length(3)
+
     @pytest.mark.parametrize(
         "mock_kwargs, mocked_boto3_request, expected_parsed_result, job_level_scaling",
         [
@@ -929,6 +980,144 @@ class TestInstanceManager:
         result = instance_manager.get_cluster_instances(**mock_kwargs)
         assert_that(result).is_equal_to(expected_parsed_result)
 
+    def test_get_cluster_instances_from_inventory(self, instance_manager, boto3_stubber, mocker):
+        def _instance_info(instance_id, ip):
+            return {
+                "InstanceId": instance_id,
+                "PrivateIpAddress": ip,
+                "PrivateDnsName": "hostname",
+                "LaunchTime": datetime(2020, 1, 1, tzinfo=timezone.utc),
+                "NetworkInterfaces": [
+                    {"Attachment": {"DeviceIndex": 0, "NetworkCardIndex": 0}, "PrivateIpAddress": ip}
+                ],
+            }
+
+        def _instance(instance_id, ip):
+            return EC2Instance(instance_id, ip, "hostname", {ip}, datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+        cluster_filters = [
+            {"Name": "tag:parallelcluster:cluster-name", "Values": ["hit"]},
+            {"Name": "tag:parallelcluster:node-type", "Values": ["Compute"]},
+        ]
+        alive_filter = {"Name": "instance-state-name", "Values": list(EC2_INSTANCE_ALIVE_STATES)}
+        full_sync_filters = [cluster_filters[0], alive_filter, cluster_filters[1]]
+        boto3_stubber(
+            "ec2",
+            [
+                MockedBoto3Request(
+                    method="describe_instances",
+                    response={
+                        "Reservations": [{"Instances": [_instance_info("i-1", "ip-1"), _instance_info("i-2", "ip-2")]}]
+                    },
+                    expected_params={"Filters": full_sync_filters, "MaxResults": 1000},
+                ),
+                MockedBoto3Request(
+                    method="describe_instances",
+                    response={"Reservations": [{"Instances": [_instance_info("i-3", "ip-3")]}]},
+                    expected_params={
+                        "Filters": cluster_filters
+                        + [
+                            alive_filter,
+                            {
+                                "Name": "launch-time",
+                                "Values": [
+                                    f"2020-01-01T{hour:02}:{minute:02}*"
+                                    for hour, minute in [(9, 55), (9, 56), (9, 57), (9, 58), (9, 59), (10, 0), (10, 1)]
+                                ],
+                            },
+                        ],
+                        "MaxResults": 1000,
+                    },
+                ),
+                MockedBoto3Request(
+                    method="describe_instances",
+                    response={"Reservations": [{"Instances": [{"InstanceId": "i-1"}, {"InstanceId": "i-5"}]}]},
+                    expected_params={
+                        "Filters": cluster_filters
+                        + [{"Name": "instance-state-name", "Values": list(EC2_INSTANCE_TERMINATED_STATES)}],
+                        "MaxResults": 1000,
+                    },
+                ),
+                MockedBoto3Request(
+                    method="describe_instances",
+                    response={"Reservations": [{"Instances": [_instance_info("i-4", "ip-4")]}]},
+                    expected_params={"Filters": full_sync_filters, "MaxResults": 1000},
+                ),
+            ],
+        )
+        mocker.patch("slurm_plugin.instance_manager.datetime").now.side_effect = [
+            datetime(2020, 1, 1, 10, 0, 30, tzinfo=timezone.utc),
+            datetime(2020, 1, 1, 10, 1, 30, tzinfo=timezone.utc),
+            datetime(2020, 1, 1, 10, 10, 30, tzinfo=timezone.utc),
+        ]
+
+        # First call performs a full sync
+        assert_that(instance_manager.get_cluster_instances_from_inventory(full_sync_interval=600)).is_equal_to(
+            [_instance("i-1", "ip-1"), _instance("i-2", "ip-2")]
+        )
+        # Following calls only describe launched and terminated instances
+        assert_that(instance_manager.get_cluster_instances_from_inventory(full_sync_interval=600)).is_equal_to(
+            [_instance("i-2", "ip-2"), _instance("i-3", "ip-3")]
+        )
+        # Full sync is performed again after the full sync interval
+        assert_that(instance_manager.get_cluster_instances_from_inventory(full_sync_interval=600)).is_equal_to(
+            [_instance("i-4", "ip-4")]
+        )
+
+    def test_get_cluster_instances_by_private_ips(self, instance_manager, boto3_stubber, mocker):
+        mocker.patch("slurm_plugin.instance_manager.BOTO3_MAX_FILTER_VALUES", 2)
+        filters = [
+            {"Name": "tag:parallelcluster:cluster-name", "Values": ["hit"]},
+            {"Name": "instance-state-name", "Values": list(EC2_INSTANCE_ALIVE_STATES)},
+            {"Name": "tag:parallelcluster:node-type", "Values": ["Compute"]},
+        ]
+        boto3_stubber(
+            "ec2",
+            [
+                MockedBoto3Request(
+                    method="describe_instances",
+                    response={
+                        "Reservations": [
+                            {
+                                "Instances": [
+                                    {
+                                        "InstanceId": "i-2",
+                                        "PrivateIpAddress": "ip-2",
+                                        "PrivateDnsName": "hostname",
+                                        "LaunchTime": datetime(2020, 1, 1, tzinfo=timezone.utc),
+                                        "NetworkInterfaces": [
+                                            {
+                                                "Attachment": {"DeviceIndex": 0, "NetworkCardIndex": 0},
+                                                "PrivateIpAddress": "ip-2",
+                                            }
+                                        ],
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    expected_params={
+                        "Filters": filters
+                        + [{"Name": "network-interface.addresses.private-ip-address", "Values": ["ip-1", "ip-2"]}],
+                        "MaxResults": 1000,
+                    },
+                ),
+                MockedBoto3Request(
+                    method="describe_instances",
+                    response={"Reservations": []},
+                    expected_params={
+                        "Filters": filters
+                        + [{"Name": "network-interface.addresses.private-ip-address", "Values": ["ip-3"]}],
+                        "MaxResults": 1000,
+                    },
+                ),
+            ],
+        )
+
+        assert_that(instance_manager.get_cluster_instances_by_private_ips(["ip-1", "ip-2", "ip-3"])).is_equal_to(
+            [EC2Instance("i-2", "ip-2", "hostname", {"ip-2"}, datetime(2020, 1, 1, tzinfo=timezone.utc))]
+        )
+
     class DdbResource:
         """Test class to mimic DynamoDb resource."""
 
@@ -3097,6 +3286,77 @@ class TestJobLevelScalingInstanceManager:
 
         assert_that(instance_manager.failed_nodes).is_equal_to(expected_failed_nodes)
 
+    @pytest.mark.parametrize("raise_on_error", [False, True])
+    def test_assign_instances_to_nodes_with_unprocessed_hostnames(self, mocker, instance_manager, raise_on_error):
+        instances = [
+            EC2Instance(f"i-{index}", f"ip.1.0.0.{index}", f"ip-1-0-0-{index}", {f"ip.1.0.0.{index}"}, "launch_time")
+            for index in range(1, 4)
+        ]
+        instance_manager._hostname_table = mocker.MagicMock(table_name="table_name")
+        instance_manager._hostname_table.store_instances.side_effect = UnprocessedItemsError(["q1-q1c1-st-large-2"])
+        instance_manager._update_dns_hostnames = mocker.MagicMock()
+        instance_manager._update_slurm_node_addrs = mocker.MagicMock()
+
+        assign_instances_to_nodes = functools.partial(
+            instance_manager._assign_instances_to_nodes,
+            update_node_address=True,
+            nodes_to_launch={"q1": {"q1c1": ["q1-q1c1-st-large-1", "q1-q1c1-st-large-2", "q1-q1c1-st-large-3"]}},
+            instances_launched={"q1": {"q1c1": instances}},
+            assign_node_batch_size=10,
+            raise_on_error=raise_on_error,
+        )
+        if raise_on_error:
+            with pytest.raises(InstanceToNodeAssignmentError):
+                assign_instances_to_nodes()
+            instance_manager._update_slurm_node_addrs.assert_not_called()
+            return
+
+        assign_instances_to_nodes()
+        # Only the nodes whose hostnames are not stored fail
+        assert_that(instance_manager.failed_nodes).is_equal_to({"Exception": {"q1-q1c1-st-large-2"}})
+        assigned_nodes = {"q1-q1c1-st-large-1": instances[0], "q1-q1c1-st-large-3": instances[2]}
+        instance_manager._update_dns_hostnames.assert_called_once_with(nodes=assigned_nodes, update_dns_batch_size=10)
+        instance_manager._update_slurm_node_addrs.assert_called_once_with(
+            slurm_nodes=["q1-q1c1-st-large-1", "q1-q1c1-st-large-3"], launched_instances=(instances[0], instances[2])
+        )
+
+    @pytest.mark.parametrize("update_node_address", [False, True])
+    def test_assign_instances_to_cancelled_nodes(self, mocker, instance_manager, update_node_address):
+        instances = [
+            EC2Instance(f"i-{index}", f"ip.1.0.0.{index}", f"ip-1-0-0-{index}", {f"ip.1.0.0.{index}"}, "launch_time")
+            for index in range(1, 4)
+        ]
+        instance_manager._get_cancelled_nodes = lambda: {"q1-q1c1-st-large-2", "q2-q2c1-st-large-1"}
+        instance_manager._store_assigned_hostnames = mocker.MagicMock()
+        instance_manager._update_dns_hostnames = mocker.MagicMock()
+        instance_manager._update_slurm_node_addrs = mocker.MagicMock()
+        instance_manager.delete_instances = mocker.MagicMock()
+
+        instance_manager._assign_instances_to_nodes(
+            update_node_address=update_node_address,
+            nodes_to_launch={
+                "q1": {"q1c1": ["q1-q1c1-st-large-1", "q1-q1c1-st-large-2"]},
+                "q2": {"q2c1": ["q2-q2c1-st-large-1"]},
+            },
+            instances_launched={"q1": {"q1c1": instances[:2]}, "q2": {"q2c1": instances[2:]}},
+            assign_node_batch_size=10,
+            raise_on_error=False,
+        )
+
+        # The instances of the cancelled nodes are not assigned, but terminated
+        if update_node_address:
+            instance_manager._store_assigned_hostnames.assert_called_once_with(
+                nodes={"q1-q1c1-st-large-1": instances[0]}
+            )
+            instance_manager._update_slurm_node_addrs.assert_called_once_with(
+                slurm_nodes=["q1-q1c1-st-large-1"], launched_instances=(instances[0],)
+            )
+        else:
+            instance_manager._store_assigned_hostnames.assert_not_called()
+        instance_manager._terminate_cancelled_nodes_instances(terminate_batch_size=10)
+        instance_manager.delete_instances.assert_called_once_with(["i-2", "i-3"], 10)
+        assert_that(instance_manager.failed_nodes).is_empty()
+
     @pytest.mark.parametrize(
         "node_list, launched_instances, use_private_hostname, expected_update_nodes, "
         "expected_update_nodes_call, expected_return",
@@ -4027,6 +4287,190 @@ class TestJobLevelScalingInstanceManager:
         assert_that(instances_launched).is_equal_to(expected_instances_launched)
         assert_that(instance_manager.failed_nodes).is_equal_to(expected_failed_nodes)
 
+    @pytest.mark.parametrize(
+        "job, failing_compute_resource, expected_launched_compute_resources",
+        [
+            (None, None, {("queue1", "c52xlarge"), ("queue2", "c5xlarge"), ("queue3", "p4d24xlarge")}),
+            (None, ("queue2", "c5xlarge"), {("queue1", "c52xlarge"), ("queue3", "p4d24xlarge")}),
+            # The launch of a job with all-or-nothing strategy stops at the first failure, but the instances of
+            # the launches already in progress are returned
+            (
+                SlurmResumeJob(140819, "queue1-st-c52xlarge-[1-2]", "queue1-st-c52xlarge-[1-2]", "NO"),
+                ("queue2", "c5xlarge"),
+                {("queue1", "c52xlarge"), ("queue3", "p4d24xlarge")},
+            ),
+        ],
+    )
+    def test_launch_instances_concurrently(
+        self, mocker, instance_manager, job, failing_compute_resource, expected_launched_compute_resources
+    ):
+        nodes_to_launch = {
+            "queue1": {"c52xlarge": ["queue1-st-c52xlarge-1", "queue1-st-c52xlarge-2"]},
+            "queue2": {"c5xlarge": ["queue2-st-c5xlarge-1"]},
+            "queue3": {"p4d24xlarge": ["queue3-st-p4d24xlarge-1"]},
+        }
+        # Launches wait for each other, so they succeed only if they run in parallel
+        barrier = threading.Barrier(3, timeout=5)
+
+        def _get_fleet_manager(all_or_nothing_batch, compute_resource, queue):
+            def _launch_ec2_instances(count, job_id=None):
+                barrier.wait()
+                if (queue, compute_resource) == failing_compute_resource:
+                    raise LaunchInstancesError("InsufficientInstanceCapacity", "no capacity")
+                return [
+                    EC2Instance(f"i-{queue}-{compute_resource}-{index}", "ip", "hostname", {"ip"}, "launch_time")
+                    for index in range(count)
+                ]
+
+            return SimpleNamespace(launch_ec2_instances=_launch_ec2_instances)
+
+        mocker.patch.object(instance_manager, "_get_fleet_manager", side_effect=_get_fleet_manager)
+        instance_manager._launch_max_concurrency = 4
+
+        instances_launched = instance_manager._launch_instances(
+            job=job,
+            nodes_to_launch=nodes_to_launch,
+            launch_batch_size=10,
+            scaling_strategy=ScalingStrategy.ALL_OR_NOTHING,
+        )
+
+        assert_that(
+            {
+                (queue, compute_resource): [instance.id for instance in instances]
+                for queue, compute_resources in instances_launched.items()
+                for compute_resource, instances in compute_resources.items()
+            }
+        ).is_equal_to(
+            {
+                (queue, compute_resource): [
+                    f"i-{queue}-{compute_resource}-{index}"
+                    for index in range(len(nodes_to_launch[queue][compute_resource]))
+                ]
+                for queue, compute_resource in expected_launched_compute_resources
+            }
+        )
+        assert_that(instance_manager.failed_nodes).is_equal_to(
+            {"InsufficientInstanceCapacity": {"queue2-st-c5xlarge-1"}} if failing_compute_resource else {}
+        )
+
+    @pytest.mark.parametrize("pipelined_node_assignment", [True, False])
+    def test_add_instances_for_nodes_pipelined_assignment(self, mocker, instance_manager, pipelined_node_assignment):
+        reused_instance = EC2Instance("i-reused", "ip.1.0.0.1", "ip-1-0-0-1", {"ip.1.0.0.1"}, "launch_time")
+        launched_instance = EC2Instance("i-launched", "ip.1.0.0.2", "ip-1-0-0-2", {"ip.1.0.0.2"}, "launch_time")
+        first_nodes_assigned = threading.Event()
+        launches = iter([[], [launched_instance]])
+
+        def _launch_ec2_instances(count, job_id=None):
+            if pipelined_node_assignment:
+                # The reused instance is assigned while the next batches are launched
+                assert_that(first_nodes_assigned.wait(timeout=5)).is_true()
+            return next(launches)
+
+        mocker.patch.object(
+            instance_manager,
+            "_get_fleet_manager",
+            return_value=SimpleNamespace(launch_ec2_instances=_launch_ec2_instances),
+        )
+        mocker.patch.object(instance_manager, "_store_assigned_hostnames")
+        mocker.patch.object(instance_manager, "_update_dns_hostnames")
+        update_slurm_node_addrs = mocker.patch.object(
+            instance_manager, "_update_slurm_node_addrs", side_effect=lambda **kwargs: first_nodes_assigned.set()
+        )
+        instance_manager._pipelined_node_assignment = pipelined_node_assignment
+        instance_manager.unused_launched_instances = {"queue1": {"c52xlarge": [reused_instance]}}
+
+        instance_manager._add_instances_for_nodes(
+            node_list=["queue1-st-c52xlarge-1", "queue1-st-c52xlarge-2", "queue1-st-c52xlarge-3"],
+            launch_batch_size=1,
+            assign_node_batch_size=10,
+            update_node_address=True,
+            scaling_strategy=ScalingStrategy.BEST_EFFORT,
+        )
+
+        # Nodes are assigned the same instances, by batch when pipelined
+        if pipelined_node_assignment:
+            expected_calls = [
+                call(slurm_nodes=["queue1-st-c52xlarge-1"], launched_instances=(reused_instance,)),
+                call(slurm_nodes=["queue1-st-c52xlarge-2"], launched_instances=(launched_instance,)),
+            ]
+        else:
+            expected_calls = [
+                call(
+                    slurm_nodes=["queue1-st-c52xlarge-1", "queue1-st-c52xlarge-2"],
+                    launched_instances=(reused_instance, launched_instance),
+                )
+            ]
+        assert_that(update_slurm_node_addrs.call_args_list).is_equal_to(expected_calls)
+        assert_that(instance_manager.nodes_assigned_to_instances).is_equal_to(
+            {"queue1": {"c52xlarge": ["queue1-st-c52xlarge-1", "queue1-st-c52xlarge-2"]}}
+        )
+        assert_that(instance_manager.failed_nodes).is_equal_to(
+            {"InsufficientInstanceCapacity": set(), "LimitedInstanceCapacity": {"queue1-st-c52xlarge-3"}}
+        )
+
+    def test_launch_compute_resource_instances_stopped(self, mocker, instance_manager):
+        fleet_manager = mocker.MagicMock()
+        mocker.patch.object(instance_manager, "_get_fleet_manager", return_value=fleet_manager)
+        stop_launch = threading.Event()
+        stop_launch.set()
+        instances_launched = defaultdict(lambda: defaultdict(list))
+
+        assert_that(
+            instance_manager._launch_compute_resource_instances(
+                queue="queue1",
+                compute_resource="c52xlarge",
+                slurm_node_list=["queue1-st-c52xlarge-1"],
+                launch_batch_size=10,
+                all_or_nothing_batch=True,
+                job=None,
+                instances_launched=instances_launched,
+                stop_launch=stop_launch,
+            )
+        ).is_false()
+        fleet_manager.launch_ec2_instances.assert_not_called()
+        assert_that(instances_launched).is_empty()
+
+    @pytest.mark.parametrize("all_or_nothing_batch", [False, True])
+    def test_launch_compute_resource_instances_adaptive_batch_size(
+        self, mocker, instance_manager, tmp_path, all_or_nothing_batch
+    ):
+        launched_counts = iter([5, 4, 4])
+        fleet_manager = SimpleNamespace(launch_records=[])
+
+        def _launch_ec2_instances(count, job_id=None):
+            launched_count = next(launched_counts) if not all_or_nothing_batch else count
+            fleet_manager.launch_records.append(LaunchRecord(count, launched_count, duration=1))
+            return [
+                EC2Instance(f"i-{index}", f"ip.{index}", f"ip-{index}", {f"ip.{index}"}, datetime(2020, 1, 1))
+                for index in range(launched_count)
+            ]
+
+        fleet_manager.launch_ec2_instances = mocker.MagicMock(side_effect=_launch_ec2_instances)
+        mocker.patch.object(instance_manager, "_get_fleet_manager", return_value=fleet_manager)
+        launch_batch_sizer = AdaptiveLaunchBatchSizer(str(tmp_path / "sizes.json"), min_batch_size=2, max_batch_size=8)
+        instance_manager._launch_batch_sizer = launch_batch_sizer
+
+        instance_manager._launch_compute_resource_instances(
+            queue="queue1",
+            compute_resource="c52xlarge",
+            slurm_node_list=[f"queue1-st-c52xlarge-{index}" for index in range(16)],
+            launch_batch_size=8,
+            all_or_nothing_batch=all_or_nothing_batch,
+            job=None,
+            instances_launched=defaultdict(lambda: defaultdict(list)),
+        )
+
+        if all_or_nothing_batch:
+            # All-or-nothing batches keep the configured size
+            fleet_manager.launch_ec2_instances.assert_has_calls([call(8, job_id=None)] * 2)
+            assert_that(launch_batch_sizer.get_batch_size("queue1", "c52xlarge")).is_equal_to(8)
+        else:
+            # The batch size is halved after the partial launch, then grown after the full batch
+            fleet_manager.launch_ec2_instances.assert_has_calls(
+                [call(8, job_id=None), call(4, job_id=None), call(4, job_id=None)]
+            )
+            assert_that(launch_batch_sizer.get_batch_size("queue1", "c52xlarge")).is_equal_to(6)
+
     @pytest.mark.parametrize(
         "job_list, launch_batch_size, assign_node_batch_size, update_node_address, "
         "expected_single_nodes_no_oversubscribe, scaling_strategy",
@@ -4452,6 +4896,38 @@ class TestJobLevelScalingInstanceManager:
         assert_that(new_slurm_node_list).is_equal_to(expected_slurm_node_list)
         assert_that(instances_launched).is_equal_to(expected_instances_launched)
 
+    def test_resize_slurm_node_list_with_warm_pool(self, instance_manager, tmp_path, mocker):
+        launch_time = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        instances = [
+            EC2Instance(f"i-{index}", f"ip.1.0.0.{index}", f"ip-1-0-0-{index}", {f"ip.1.0.0.{index}"}, launch_time)
+            for index in range(4)
+        ]
+        warm_pool = WarmPool(str(tmp_path / "warm_pool.json"))
+        warm_pool.add("q1", "c1", instances[1:3], launch_time)
+        warm_pool.add("q1", "c2", instances[3:], launch_time)
+        instance_manager._warm_pool = warm_pool
+        instance_manager.unused_launched_instances = {"q1": {"c1": instances[:1]}}
+        instances_launched = defaultdict(lambda: defaultdict(list))
+
+        # Already launched instances are used first, then the instances of the warm pool
+        new_slurm_node_list = instance_manager._resize_slurm_node_list(
+            queue="q1",
+            compute_resource="c1",
+            slurm_node_list=["q1-st-c1-1", "q1-st-c1-2", "q1-st-c1-3", "q1-st-c1-4"],
+            instances_launched=instances_launched,
+        )
+
+        assert_that(new_slurm_node_list).is_equal_to(["q1-st-c1-4"])
+        assert_that(instances_launched).is_equal_to({"q1": {"c1": instances[:3]}})
+        assert_that(warm_pool.get_instance_ids()).is_equal_to({"i-1", "i-2", "i-3"})
+
+        # Nodes are launched as usual when the warm pool cannot be read
+        mocker.patch.object(warm_pool, "take", side_effect=OSError("Permission denied"))
+        new_slurm_node_list = instance_manager._resize_slurm_node_list(
+            queue="q1", compute_resource="c2", slurm_node_list=["q1-st-c2-1"], instances_launched=instances_launched
+        )
+        assert_that(new_slurm_node_list).is_equal_to(["q1-st-c2-1"])
+
     @pytest.mark.parametrize(
         "target_dict, update, expected_dict",
         [
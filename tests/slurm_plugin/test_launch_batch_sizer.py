@@ -0,0 +1,78 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+from assertpy import assert_that
+from slurm_plugin.fleet_manager import LaunchRecord
+from slurm_plugin.launch_batch_sizer import AdaptiveLaunchBatchSizer
+
+
+@pytest.fixture
+def launch_batch_sizer(tmp_path):
+    return AdaptiveLaunchBatchSizer(str(tmp_path / "launch_batch_sizes.json"), min_batch_size=10, max_batch_size=100)
+
+
+@pytest.mark.parametrize(
+    "launch_records, expected_batch_size",
+    [
+        ([], 40),
+        # Full batch launched quickly
+        ([LaunchRecord(40, 40, duration=2)], 60),
+        # Last batch of the nodes to launch, smaller than the batch size
+        ([LaunchRecord(15, 15, duration=2)], 40),
+        # Full batch launched slowly
+        ([LaunchRecord(40, 40, duration=30)], 40),
+        # Partial launch, e.g. insufficient capacity
+        ([LaunchRecord(40, 25, duration=2)], 20),
+        ([LaunchRecord(40, 0, duration=2, error_code="InsufficientInstanceCapacity")], 20),
+        # Launch retried after throttling
+        (
+            [
+                LaunchRecord(40, 0, duration=1, throttled=True, error_code="RequestLimitExceeded"),
+                LaunchRecord(40, 40, duration=1),
+            ],
+            20,
+        ),
+    ],
+    ids=["no_launch", "fast", "last_batch", "slow", "partial", "insufficient_capacity", "throttled"],
+)
+def test_record(launch_batch_sizer, launch_records, expected_batch_size):
+    launch_batch_sizer.record("q1", "c1", [LaunchRecord(100, 0, duration=1)])
+    launch_batch_sizer.record("q1", "c1", [LaunchRecord(50, 10, duration=1)])
+    assert_that(launch_batch_sizer.get_batch_size("q1", "c1")).is_equal_to(25)
+    launch_batch_sizer.record("q1", "c1", [LaunchRecord(25, 10, duration=1)])
+    launch_batch_sizer.record("q1", "c1", [LaunchRecord(12, 12, duration=1)])
+    assert_that(launch_batch_sizer.get_batch_size("q1", "c1")).is_equal_to(18)
+    launch_batch_sizer.record("q1", "c1", [LaunchRecord(18, 18, duration=1)])
+    launch_batch_sizer.record("q1", "c1", [LaunchRecord(27, 27, duration=1)])
+    assert_that(launch_batch_sizer.get_batch_size("q1", "c1")).is_equal_to(40)
+
+    assert_that(launch_batch_sizer.record("q1", "c1", launch_records)).is_equal_to(expected_batch_size)
+    assert_that(launch_batch_sizer.get_batch_size("q1", "c1")).is_equal_to(expected_batch_size)
+    # Batch sizes of the compute resources are independent
+    assert_that(launch_batch_sizer.get_batch_size("q1", "c2")).is_equal_to(100)
+
+
+def test_batch_size_bounds(tmp_path):
+    state_file_path = str(tmp_path / "launch_batch_sizes.json")
+    launch_batch_sizer = AdaptiveLaunchBatchSizer(state_file_path, min_batch_size=10, max_batch_size=100)
+    for _ in range(5):
+        launch_batch_sizer.record("q1", "c1", [LaunchRecord(100, 0, duration=1)])
+    assert_that(launch_batch_sizer.get_batch_size("q1", "c1")).is_equal_to(10)
+    for _ in range(10):
+        launch_batch_sizer.record(
+            "q1", "c1", [LaunchRecord(launch_batch_sizer.get_batch_size("q1", "c1"), 100, duration=1)]
+        )
+    assert_that(launch_batch_sizer.get_batch_size("q1", "c1")).is_equal_to(100)
+
+    # Sizes are shared through the state file, and kept within the bounds when the configured ones change
+    assert_that(
+        AdaptiveLaunchBatchSizer(state_file_path, min_batch_size=10, max_batch_size=50).get_batch_size("q1", "c1")
+    ).is_equal_to(50)
@@ -0,0 +1,109 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from assertpy import assert_that
+from slurm_plugin.fleet_manager import EC2Instance
+from slurm_plugin.node_state_tracker import NodeStateDelta, NodeStateTracker
+from slurm_plugin.slurm_resources import DynamicNode, StaticNode
+
+START_TIME = datetime(2020, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+
+
+def _build_nodes(**overrides):
+    nodes = {
+        "queue1-st-c5xlarge-1": StaticNode("queue1-st-c5xlarge-1", "ip-1", "hostname", "IDLE+CLOUD", "queue1"),
+        "queue1-dy-c5xlarge-1": DynamicNode(
+            "queue1-dy-c5xlarge-1", "queue1-dy-c5xlarge-1", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue1"
+        ),
+        "queue1-dy-c5xlarge-2": DynamicNode("queue1-dy-c5xlarge-2", "ip-2", "hostname", "MIXED+CLOUD", "queue1"),
+    }
+    nodes.update(overrides)
+    nodes = [node for node in nodes.values() if node]
+    for node in nodes:
+        if node.nodeaddr != node.name:
+            node.instance = EC2Instance(f"id-{node.nodeaddr}", node.nodeaddr, "hostname", {node.nodeaddr}, START_TIME)
+    return nodes
+
+
+@pytest.mark.parametrize(
+    "current_nodes, expected_delta",
+    [
+        pytest.param(_build_nodes(), NodeStateDelta(), id="no changes"),
+        pytest.param(
+            _build_nodes(
+                **{
+                    "queue1-dy-c5xlarge-2": DynamicNode(
+                        "queue1-dy-c5xlarge-2", "ip-2", "hostname", "IDLE+CLOUD", "queue1"
+                    ),
+                    "queue1-dy-c5xlarge-1": DynamicNode(
+                        "queue1-dy-c5xlarge-1", "ip-3", "hostname", "IDLE+CLOUD+POWERED_DOWN", "queue1"
+                    ),
+                }
+            ),
+            NodeStateDelta(state_changed={"queue1-dy-c5xlarge-2"}, addr_changed={"queue1-dy-c5xlarge-1"}),
+            id="state and address changed",
+        ),
+        pytest.param(
+            _build_nodes(
+                **{
+                    "queue1-st-c5xlarge-1": None,
+                    "queue1-dy-c5xlarge-3": DynamicNode(
+                        "queue1-dy-c5xlarge-3", "queue1-dy-c5xlarge-3", "hostname", "IDLE+CLOUD+POWERED_DOWN"
+                    ),
+                }
+            ),
+            NodeStateDelta(added={"queue1-dy-c5xlarge-3"}, removed={"queue1-st-c5xlarge-1"}),
+            id="added and removed",
+        ),
+    ],
+)
+def test_update_fingerprints(current_nodes, expected_delta):
+    tracker = NodeStateTracker(full_resync_interval=600)
+    assert_that(tracker._update_fingerprints(_build_nodes())).is_equal_to(
+        NodeStateDelta(added={node.name for node in _build_nodes()})
+    )
+    assert_that(tracker._update_fingerprints(current_nodes)).is_equal_to(expected_delta)
+
+
+def test_get_nodes_to_evaluate():
+    tracker = NodeStateTracker(full_resync_interval=600)
+    nodes = _build_nodes()
+
+    # All nodes are evaluated at the first iteration, only the nodes set as stable are skipped afterwards
+    assert_that(tracker.get_nodes_to_evaluate(nodes, START_TIME)).is_equal_to(nodes)
+    tracker.update_stable_nodes(["queue1-st-c5xlarge-1", "queue1-dy-c5xlarge-1"])
+    nodes = _build_nodes()
+    assert_that(tracker.get_nodes_to_evaluate(nodes, START_TIME + timedelta(seconds=60))).is_equal_to([nodes[2]])
+    tracker.update_stable_nodes([])
+
+    # Changed nodes and nodes failing health checks are evaluated even if stable
+    nodes = _build_nodes(
+        **{"queue1-st-c5xlarge-1": StaticNode("queue1-st-c5xlarge-1", "ip-1", "hostname", "IDLE+CLOUD+DRAIN")}
+    )
+    nodes[1].is_failing_health_check = True
+    assert_that(tracker.get_nodes_to_evaluate(nodes, START_TIME + timedelta(seconds=120))).is_equal_to(nodes)
+
+    # Evaluated nodes are no longer stable until set as stable again
+    nodes = _build_nodes()
+    assert_that(tracker.get_nodes_to_evaluate(nodes, START_TIME + timedelta(seconds=180))).is_equal_to(nodes)
+    tracker.update_stable_nodes(node.name for node in nodes)
+
+    # Full resync evaluates all the nodes
+    nodes = _build_nodes()
+    assert_that(tracker.get_nodes_to_evaluate(nodes, START_TIME + timedelta(seconds=240))).is_empty()
+    assert_that(tracker.get_nodes_to_evaluate(nodes, START_TIME + timedelta(seconds=600))).is_equal_to(nodes)
+
+    # Reset forces a full resync
+    tracker.update_stable_nodes(node.name for node in nodes)
+    tracker.reset()
+    assert_that(tracker.get_nodes_to_evaluate(nodes, START_TIME + timedelta(seconds=660))).is_equal_to(nodes)
@@ -12,6 +12,8 @@
 
 import logging
 import os
+import subprocess
+import sys
 from datetime import datetime, timezone
 from types import SimpleNamespace
 from unittest.mock import ANY, call
@@ -20,6 +22,8 @@ import botocore
 import pytest
 import slurm_plugin
 from assertpy import assert_that
+from common.rate_limiter import DEFAULT_EC2_API_RATE_LIMITS
+from slurm_plugin.common import CreateFleetInstancesInfo
 from slurm_plugin.fleet_manager import EC2Instance
 from slurm_plugin.resume import SlurmResumeConfig, _get_slurm_resume, _handle_failed_nodes, _resume
 
@@ -46,7 +50,13 @@ def boto3_stubber_path():
                 "cluster_name": "hit",
                 "region": "us-east-2",
                 "launch_max_batch_size": 500,
+                "launch_max_concurrency": 1,
+                "hostname_table_max_concurrency": 1,
+                "launch_min_batch_size": 10,
+                "adaptive_launch_batch_size_file": None,
+                "pipelined_node_assignment": False,
                 "update_node_address": True,
+                "create_fleet_instances_info": CreateFleetInstancesInfo.DESCRIBE,
                 "_boto3_config": {"retries": {"max_attempts": 1, "mode": "standard"}},
                 "logging_config": os.path.join(
                     os.path.dirname(slurm_plugin.__file__), "logging", "parallelcluster_resume_logging.conf"
@@ -57,6 +67,12 @@ def boto3_stubber_path():
                 "job_level_scaling": True,
                 "assign_node_max_batch_size": 500,
                 "terminate_max_batch_size": 1000,
+                "resume_server_socket": None,
+                "resume_server_timeout": 900,
+                "resume_server_coalesce_window": 0.5,
+                "warm_pool_file": None,
+                "ec2_api_rate_limiter_file": None,
+                "ec2_api_rate_limits": DEFAULT_EC2_API_RATE_LIMITS,
             },
         ),
         (
@@ -65,7 +81,13 @@ def boto3_stubber_path():
                 "cluster_name": "hit",
                 "region": "us-east-2",
                 "launch_max_batch_size": 50,
+                "launch_max_concurrency": 8,
+                "hostname_table_max_concurrency": 4,
+                "launch_min_batch_size": 5,
+                "adaptive_launch_batch_size_file": "/opt/slurm/etc/pcluster/.slurm_plugin/launch_batch_sizes.json",
+                "pipelined_node_assignment": True,
                 "update_node_address": False,
+                "create_fleet_instances_info": CreateFleetInstancesInfo.SKIP,
                 "_boto3_config": {
                     "retries": {"max_attempts": 10, "mode": "standard"},
                     "proxies": {"https": "my.resume.proxy"},
@@ -77,15 +99,37 @@ def boto3_stubber_path():
                 "job_level_scaling": False,
                 "assign_node_max_batch_size": 400,
                 "terminate_max_batch_size": 600,
+                "resume_server_socket": "/run/parallelcluster/slurm_resume.sock",
+                "resume_server_timeout": 60,
+                "resume_server_coalesce_window": 1.5,
+                "warm_pool_file": "/opt/slurm/etc/pcluster/.slurm_plugin/warm_pool.json",
+                "ec2_api_rate_limiter_file": "/run/parallelcluster/ec2_api_rate_limiter.json",
+                "ec2_api_rate_limits": {
+                    **DEFAULT_EC2_API_RATE_LIMITS,
+                    "ec2.RunInstances": (20, 1),
+                    "ec2.CreateTags": (10, 0.5),
+                },
             },
         ),
     ],
 )
 def test_resume_config(config_file, expected_attributes, test_datadir, mocker):
-    mocker.patch("slurm_plugin.resume.read_json", side_effect=[FLEET_CONFIG, LAUNCH_OVERRIDES, LAUNCH_OVERRIDES])
+    fleet_config_from_cache = config_file == "all_options.conf"
+    mocker.patch(
+        "slurm_plugin.resume.read_json",
+        side_effect=([] if fleet_config_from_cache else [FLEET_CONFIG]) + [LAUNCH_OVERRIDES, LAUNCH_OVERRIDES],
+    )
+    read_cached_json_mock = mocker.patch("slurm_plugin.resume.read_cached_json", return_value=FLEET_CONFIG)
     resume_config = SlurmResumeConfig(test_datadir / config_file)
     for key in expected_attributes:
         assert_that(resume_config.__dict__.get(key)).is_equal_to(expected_attributes.get(key))
+    assert_that(resume_config.fleet_config).is_equal_to(FLEET_CONFIG)
+    if fleet_config_from_cache:
+        read_cached_json_mock.assert_called_once_with(
+            "/etc/parallelcluster/slurm_plugin/fleet-config.json", "/var/cache/parallelcluster/fleet-config.cache"
+        )
+    else:
+        read_cached_json_mock.assert_not_called()
 
 
 @pytest.mark.parametrize(
@@ -404,6 +448,13 @@ def test_resume_launch(
         use_private_hostname=False,
         head_node_instance_id="i-headnode",
         job_level_scaling=job_level_scaling,
+        launch_max_concurrency=1,
+        hostname_table_max_concurrency=1,
+        pipelined_node_assignment=False,
+        warm_pool_file=None,
+        adaptive_launch_batch_size_file=None,
+        create_fleet_instances_info=CreateFleetInstancesInfo.DESCRIBE,
+        ec2_api_rate_limiter_file=None,
         assign_node_max_batch_size=500,
         terminate_max_batch_size=1000,
     )
@@ -411,7 +462,9 @@ def test_resume_launch(
     mock_handle_failed_nodes = mocker.patch("slurm_plugin.resume._handle_failed_nodes", autospec=True)
     # patch slurm calls
     mock_update_nodes = mocker.patch("slurm_plugin.instance_manager.update_nodes", autospec=True)
-    mock_get_node_info = mocker.patch("slurm_plugin.resume.get_nodes_info", return_value=mock_node_lists, autospec=True)
+    mock_get_node_info = mocker.patch(
+        "common.schedulers.slurm_commands.get_nodes_info", return_value=mock_node_lists, autospec=True
+    )
     # patch Table and DNS related functions
     mock_store_hostname = mocker.patch.object(
         slurm_plugin.instance_manager.InstanceManager, "_store_assigned_hostnames", autospec=True
@@ -543,7 +596,7 @@ def test_get_slurm_resume(config_file, expected_slurm_resume, test_datadir, capl
 )
 def test_handle_failed_nodes(mocker, caplog, node_list, reason, expected_set_nodes_down_call, expected_exception):
     # patch internal functions
-    set_nodes_down = mocker.patch("slurm_plugin.resume.set_nodes_down", side_effect=expected_exception)
+    set_nodes_down = mocker.patch("common.schedulers.slurm_commands.set_nodes_down", side_effect=expected_exception)
     caplog.set_level(logging.INFO)
 
     _handle_failed_nodes(node_list, reason)
@@ -560,3 +613,29 @@ def test_handle_failed_nodes(mocker, caplog, node_list, reason, expected_set_nod
             assert_that(caplog.records).is_length(1)
         assert_that(caplog.records[0].levelname).is_equal_to("INFO")
         assert_that(caplog.records[0].message).contains("Setting following failed nodes into DOWN state")
+
+
+def test_resume_import_time():
+    # Modules only required to launch instances must not be imported by the resume program until needed, so that the
+    # resume program starts fast, in particular when nodes are resumed by the resume server
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", "import slurm_plugin.resume"],
+        env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(slurm_plugin.__file__))},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines have format "import time: <self us> | <cumulative us> | <indented module name>"
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_time, module = line.split("|")
+        if cumulative_time.strip().isdigit():
+            import_times[module.strip()] = int(cumulative_time)
+
+    assert_that(import_times).does_not_contain_key(
+        "boto3", "botocore", "retrying", "slurm_plugin.instance_manager", "slurm_plugin.cluster_event_publisher"
+    )
+    # Generous budget, the import takes about 70ms on a development machine rather than 300ms when importing boto3
+    assert_that(import_times["slurm_plugin.resume"]).is_less_than(200000)
@@ -0,0 +1,229 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import socket
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from assertpy import assert_that
+from slurm_plugin.resume import _resume_with_server, _submit_to_resume_server
+from slurm_plugin.resume_server import ResumeRequest, ResumeServer, merge_requests
+
+
+def _job(job_id, nodes):
+    return {"job_id": job_id, "nodes_alloc": nodes, "nodes_resume": nodes}
+
+
+def test_merge_requests():
+    requests = [
+        ResumeRequest(
+            "queue1-dy-c5xlarge-[1-2]",
+            {"all_nodes_resume": "queue1-dy-c5xlarge-[1-2]", "jobs": [_job(1, "queue1-dy-c5xlarge-[1-2]")]},
+        ),
+        ResumeRequest("queue2-dy-c5xlarge-1", None),
+        ResumeRequest(
+            "queue1-dy-c5xlarge-3",
+            {"all_nodes_resume": "queue1-dy-c5xlarge-3", "jobs": [_job(2, "queue1-dy-c5xlarge-3")]},
+        ),
+    ]
+
+    assert_that(merge_requests(requests)).is_equal_to(
+        (
+            "queue1-dy-c5xlarge-[1-2],queue2-dy-c5xlarge-1,queue1-dy-c5xlarge-3",
+            {
+                "all_nodes_resume": "queue1-dy-c5xlarge-[1-2],queue1-dy-c5xlarge-3",
+                "jobs": [_job(1, "queue1-dy-c5xlarge-[1-2]"), _job(2, "queue1-dy-c5xlarge-3")],
+            },
+        )
+    )
+    assert_that(merge_requests(requests[1:2])).is_equal_to(("queue2-dy-c5xlarge-1", {}))
+
+
+def test_resume_request_complete():
+    request = ResumeRequest("queue1-dy-c5xlarge-[1-3]", {})
+    request.complete(
+        failed_nodes={
+            "InsufficientInstanceCapacity": {"queue1-dy-c5xlarge-3", "queue1-dy-c5xlarge-1", "queue2-dy-c5xlarge-1"},
+            "LimitedInstanceCapacity": {"queue2-dy-c5xlarge-2"},
+        }
+    )
+
+    assert_that(request.wait(0)).is_true()
+    assert_that(request.to_response()).is_equal_to(
+        {
+            "failed_nodes": {"InsufficientInstanceCapacity": ["queue1-dy-c5xlarge-1", "queue1-dy-c5xlarge-3"]},
+            "error": None,
+        }
+    )
+
+
+def test_resume_request_cancel():
+    request = ResumeRequest("queue1-dy-c5xlarge-1", {})
+    assert_that(request.cancel()).is_true()
+    assert_that(request.cancelled).is_true()
+
+    # A completed request cannot be cancelled
+    request = ResumeRequest("queue1-dy-c5xlarge-1", {})
+    request.complete(failed_nodes={})
+    assert_that(request.cancel()).is_false()
+    assert_that(request.cancelled).is_false()
+
+
+@pytest.fixture()
+def resume_server(mocker, tmp_path):
+    config = SimpleNamespace(
+        config_files=[],
+        resume_server_socket=str(tmp_path / "resume.sock"),
+        resume_server_timeout=10,
+        resume_server_coalesce_window=0.5,
+    )
+    mocker.patch("slurm_plugin.resume_server.SlurmResumeConfig", return_value=config)
+    server = ResumeServer("config_file")
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    while not os.path.exists(config.resume_server_socket):
+        time.sleep(0.01)
+    yield server
+    server.shutdown()
+    thread.join()
+
+
+def test_resume_server_socket_permissions(resume_server):
+    # Neither the group nor the other users have any permission on the socket
+    assert_that(stat.S_IMODE(os.stat(resume_server.config.resume_server_socket).st_mode) & 0o077).is_zero()
+    # The umask of the process is restored
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert_that(umask).is_not_equal_to(0o077)
+
+
+def test_resume_server_coalesces_requests(resume_server, mocker):
+    mock_resume = mocker.patch(
+        "slurm_plugin.resume_server._resume",
+        return_value={"InsufficientInstanceCapacity": {"queue1-dy-c5xlarge-2", "queue2-dy-c5xlarge-1"}},
+    )
+    requests = [
+        ("queue1-dy-c5xlarge-1", {"jobs": [_job(1, "queue1-dy-c5xlarge-1")]}),
+        ("queue1-dy-c5xlarge-2", {"jobs": [_job(2, "queue1-dy-c5xlarge-2")]}),
+        ("queue2-dy-c5xlarge-1", {"jobs": [_job(3, "queue2-dy-c5xlarge-1")]}),
+    ]
+
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        responses = list(
+            executor.map(
+                lambda request: _submit_to_resume_server(request[0], resume_server.config, request[1]), requests
+            )
+        )
+
+    mock_resume.assert_called_once()
+    nodes, config, slurm_resume = mock_resume.call_args.args
+    assert_that(nodes.split(",")).contains_only(*[request[0] for request in requests])
+    assert_that(config).is_same_as(resume_server.config)
+    assert_that(slurm_resume["jobs"]).extracting("job_id").contains_only(1, 2, 3)
+    assert_that(responses).is_equal_to(
+        [
+            {"failed_nodes": {}, "error": None},
+            {"failed_nodes": {"InsufficientInstanceCapacity": ["queue1-dy-c5xlarge-2"]}, "error": None},
+            {"failed_nodes": {"InsufficientInstanceCapacity": ["queue2-dy-c5xlarge-1"]}, "error": None},
+        ]
+    )
+
+
+def test_resume_server_error(resume_server, mocker):
+    mocker.patch("slurm_plugin.resume_server._resume", side_effect=Exception("launch error"))
+    mock_handle_failed_nodes = mocker.patch("slurm_plugin.resume_server._handle_failed_nodes")
+
+    response = _submit_to_resume_server("queue1-dy-c5xlarge-1", resume_server.config, {})
+
+    assert_that(response).is_equal_to({"failed_nodes": {}, "error": "launch error"})
+    mock_handle_failed_nodes.assert_called_once_with("queue1-dy-c5xlarge-1")
+
+
+def test_resume_server_unexpected_error(resume_server, mocker):
+    mocker.patch.object(resume_server, "_reload_config", side_effect=[Exception("reload error"), None])
+    mocker.patch("slurm_plugin.resume_server._resume", return_value={})
+    mock_handle_failed_nodes = mocker.patch("slurm_plugin.resume_server._handle_failed_nodes")
+
+    response = _submit_to_resume_server("queue1-dy-c5xlarge-1", resume_server.config, {})
+
+    assert_that(response).is_equal_to({"failed_nodes": {}, "error": "reload error"})
+    mock_handle_failed_nodes.assert_called_once_with("queue1-dy-c5xlarge-1")
+    # Requests are still processed after the error
+    response = _submit_to_resume_server("queue1-dy-c5xlarge-2", resume_server.config, {})
+    assert_that(response).is_equal_to({"failed_nodes": {}, "error": None})
+
+
+def test_resume_server_request_timeout(resume_server, mocker):
+    resume_started = threading.Event()
+    resume_done = threading.Event()
+
+    def _resume(*args, **kwargs):
+        resume_started.set()
+        resume_done.wait(10)
+        return {}
+
+    mock_resume = mocker.patch("slurm_plugin.resume_server._resume", side_effect=_resume)
+    mock_handle_failed_nodes = mocker.patch("slurm_plugin.resume_server._handle_failed_nodes")
+    client_config = SimpleNamespace(
+        resume_server_socket=resume_server.config.resume_server_socket, resume_server_timeout=10
+    )
+    resume_server.config.resume_server_timeout = 1
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        try:
+            response = _submit_to_resume_server("queue1-dy-c5xlarge-1", client_config, {})
+            # A request queued behind the running batch times out as well
+            queued_response = executor.submit(_submit_to_resume_server, "queue1-dy-c5xlarge-2", client_config, {})
+            assert_that(queued_response.result()["error"]).is_equal_to("Resume request not processed within 1 seconds")
+        finally:
+            resume_done.set()
+
+    assert_that(response).is_equal_to({"failed_nodes": {}, "error": "Resume request not processed within 1 seconds"})
+    assert_that(resume_started.is_set()).is_true()
+    # The instances of the running batch are not assigned to the nodes of the cancelled request
+    assert_that(mock_resume.call_args.kwargs["get_cancelled_nodes"]()).is_equal_to({"queue1-dy-c5xlarge-1"})
+    # The cancelled request waiting in the queue is dropped
+    time.sleep(resume_server.config.resume_server_coalesce_window * 2)
+    mock_resume.assert_called_once()
+    assert_that(mock_handle_failed_nodes.call_args_list).is_length(2)
+    mock_handle_failed_nodes.assert_any_call("queue1-dy-c5xlarge-1")
+    mock_handle_failed_nodes.assert_any_call("queue1-dy-c5xlarge-2")
+
+
+def test_resume_with_server_timeout(mocker, caplog):
+    mocker.patch("slurm_plugin.resume._submit_to_resume_server", side_effect=socket.timeout())
+    mock_handle_failed_nodes = mocker.patch("slurm_plugin.resume._handle_failed_nodes")
+    config = SimpleNamespace(resume_server_socket="resume.sock", resume_server_timeout=10)
+
+    assert_that(_resume_with_server("queue1-dy-c5xlarge-1", config, {})).is_true()
+    # Nodes are set to DOWN by the server only
+    mock_handle_failed_nodes.assert_not_called()
+    assert_that(caplog.text).contains("No response from resume server within 70 seconds")
+
+
+def test_submit_to_resume_server_timeout(mocker):
+    client = mocker.patch("slurm_plugin.resume.socket.socket").return_value.__enter__.return_value
+    client.makefile.return_value.__enter__.return_value.readline.return_value = '{"failed_nodes": {}}'
+    config = SimpleNamespace(resume_server_socket="resume.sock", resume_server_timeout=10)
+
+    assert_that(_submit_to_resume_server("queue1-dy-c5xlarge-1", config, {})).is_equal_to({"failed_nodes": {}})
+    # The client waits longer than the server, which answers when the request times out
+    client.settimeout.assert_called_once_with(70)
+
+
+def test_resume_with_server_not_running(tmp_path):
+    config = SimpleNamespace(resume_server_socket=str(tmp_path / "resume.sock"), resume_server_timeout=10)
+
+    assert_that(_resume_with_server("queue1-dy-c5xlarge-1", config, {})).is_false()
@@ -0,0 +1,80 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from assertpy import assert_that
+from slurm_plugin.fleet_manager import EC2Instance
+from slurm_plugin.warm_pool import WarmPool
+
+CURRENT_TIME = datetime(2025, 1, 1, 1, 0, 0, tzinfo=timezone.utc)
+
+
+def _instances(*indexes):
+    return [
+        EC2Instance(f"i-{index}", f"ip.1.0.0.{index}", f"ip-1-0-0-{index}", {f"ip.1.0.0.{index}"}, CURRENT_TIME)
+        for index in indexes
+    ]
+
+
+@pytest.fixture
+def warm_pool(tmp_path):
+    return WarmPool(str(tmp_path / "warm_pool.json"))
+
+
+def test_take(warm_pool):
+    assert_that(warm_pool.take("q1", "c1", 2, CURRENT_TIME)).is_empty()
+
+    warm_pool.add("q1", "c1", _instances(1, 2, 3), CURRENT_TIME)
+    warm_pool.add("q1", "c2", _instances(4), CURRENT_TIME)
+
+    assert_that(warm_pool.take("q1", "c1", 2, CURRENT_TIME)).is_equal_to(_instances(1, 2))
+    assert_that(warm_pool.take("q1", "c1", 2, CURRENT_TIME)).is_equal_to(_instances(3))
+    assert_that(warm_pool.take("q1", "c1", 2, CURRENT_TIME)).is_empty()
+    # Taken instances are still reported until their claim expires
+    assert_that(warm_pool.get_instance_ids()).is_equal_to({"i-1", "i-2", "i-3", "i-4"})
+
+
+def test_take_concurrently(warm_pool):
+    warm_pool.add("q1", "c1", _instances(*range(100)), CURRENT_TIME)
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        taken = list(executor.map(lambda _: warm_pool.take("q1", "c1", 3, CURRENT_TIME), range(40)))
+
+    taken_ids = [instance.id for instances in taken for instance in instances]
+    assert_that(taken_ids).is_length(100).does_not_contain_duplicates()
+
+
+def test_maintain(warm_pool):
+    warm_pool.add("q1", "c1", _instances(1), CURRENT_TIME - timedelta(seconds=301))
+    warm_pool.add("q1", "c1", _instances(2, 3, 4), CURRENT_TIME - timedelta(seconds=10))
+    warm_pool.add("q1", "c2", _instances(5), CURRENT_TIME)
+    warm_pool.add("q2", "c1", _instances(6), CURRENT_TIME)
+    warm_pool.take("q1", "c2", 1, CURRENT_TIME - timedelta(seconds=100))
+    warm_pool.add("q1", "c2", _instances(7, 8), CURRENT_TIME)
+    warm_pool.take("q1", "c2", 1, CURRENT_TIME)
+
+    instances_to_terminate, missing_sizes = warm_pool.maintain(
+        {("q1", "c1"): 2, ("q1", "c2"): 2, ("q1", "c3"): 2},
+        # i-7 was terminated, e.g. by the user
+        alive_instance_ids={"i-1", "i-2", "i-3", "i-4", "i-5", "i-6", "i-8"},
+        idle_timeout=300,
+        claim_timeout=60,
+        current_time=CURRENT_TIME,
+    )
+
+    # i-1 is expired, i-2 exceeds the size of the pool and q2 is not part of the target sizes
+    assert_that(instances_to_terminate).is_equal_to(["i-6", "i-2", "i-1"])
+    assert_that(missing_sizes).is_equal_to({("q1", "c1"): 0, ("q1", "c2"): 1, ("q1", "c3"): 2})
+    # The claim of i-5 is expired, the claim of i-7 is removed since the instance is not alive
+    assert_that(warm_pool.get_instance_ids()).is_equal_to({"i-3", "i-4", "i-8"})
+    assert_that(warm_pool.take("q1", "c1", 5, CURRENT_TIME)).is_equal_to(_instances(3, 4))
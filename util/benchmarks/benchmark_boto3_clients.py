@@ -0,0 +1,53 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the CPU time spent creating boto3 clients at every clustermgtd iteration with and without Boto3ClientRegistry.
+
+An iteration creates the clients used by clustermgtd: describe_instances, 3 describe_instance_status calls and
+terminate_instances. Every client created has its own connection pool, so without the registry every client costs at
+least a new TLS handshake when it sends its first request. No request is sent by this benchmark.
+Usage: PYTHONPATH=src python util/benchmarks/benchmark_boto3_clients.py [--iterations 20]
+"""
+
+import argparse
+import time
+
+import boto3
+from botocore.config import Config
+
+from aws.common import Boto3ClientRegistry
+
+CLIENTS_PER_ITERATION = 5
+
+
+def _iteration(client_factory, config):
+    return {id(client_factory("ec2", region_name="us-east-1", config=config)) for _ in range(CLIENTS_PER_ITERATION)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'factory':>10} {'cpu/iteration':>14} {'connection pools':>17}")
+    for name, client_factory in [("boto3", boto3.client), ("registry", Boto3ClientRegistry.get_client)]:
+        clients = set()
+        start = time.process_time()
+        for _ in range(args.iterations):
+            # clustermgtd reads its config file, and creates a new Config object, at every iteration
+            clients |= _iteration(client_factory, Config(retries={"max_attempts": 1, "mode": "standard"}))
+        cpu_time = (time.process_time() - start) / args.iterations
+        print(f"{name:>10} {cpu_time * 1000:>12.1f}ms {len(clients):>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the per-node classification of unhealthy and bootstrap failure nodes with the ClusterSnapshot one.
+
+Nodes are built from synthetic scontrol show nodes JSON output, as done by get_nodes_info, and every node with
+nodeaddr set is backed by an instance.
+Usage: PYTHONPATH=src:util/benchmarks python util/benchmarks/benchmark_cluster_snapshot.py [--sizes 10000 100000]
+"""
+
+import argparse
+import logging
+import time
+
+from common.schedulers.slurm_commands import _parse_nodes_info_json
+from slurm_plugin.cluster_snapshot import ClusterSnapshot
+from slurm_plugin.fleet_manager import EC2Instance
+from synthetic_slurm import generate_nodes, scontrol_show_nodes_json
+
+
+def _per_node(nodes):
+    unhealthy_nodes = [node for node in nodes if not node.is_healthy(True, True, 0, {}, log_warn_if_unhealthy=False)]
+    bootstrap_failure_nodes = [node for node in nodes if node.is_bootstrap_failure(0, {})]
+    return unhealthy_nodes, bootstrap_failure_nodes
+
+
+def _snapshot(nodes):
+    snapshot = ClusterSnapshot(nodes)
+    nodes_to_check, _ = snapshot.find_nodes_to_check_health(True, True)
+    unhealthy_nodes = [
+        node for node in nodes_to_check if not node.is_healthy(True, True, 0, {}, log_warn_if_unhealthy=False)
+    ]
+    bootstrap_failure_nodes = [
+        node for node in snapshot.find_bootstrap_failure_candidates() if node.is_bootstrap_failure(0, {})
+    ]
+    return unhealthy_nodes, bootstrap_failure_nodes
+
+
+def _timed(function, scontrol_output, repeat):
+    elapsed, result = 0, None
+    for _ in range(repeat):
+        # Build fresh nodes every time since the backing instance check is cached on the node
+        nodes = _parse_nodes_info_json(scontrol_output)
+        for node in nodes:
+            if node.is_nodeaddr_set():
+                node.instance = EC2Instance(node.name, node.nodeaddr, node.nodehostname, {node.nodeaddr}, None)
+        start = time.perf_counter()
+        result = function(nodes)
+        elapsed += time.perf_counter() - start
+    return [[node.name for node in result_nodes] for result_nodes in result], elapsed / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    # Bootstrap failures are logged as warnings
+    logging.disable(logging.WARNING)
+
+    print(f"{'nodes':>8} {'per node':>9} {'snapshot':>9} {'speedup':>8}")
+    for size in args.sizes:
+        scontrol_output = scontrol_show_nodes_json(generate_nodes(size))
+        per_node_result, per_node_time = _timed(_per_node, scontrol_output, args.repeat)
+        snapshot_result, snapshot_time = _timed(_snapshot, scontrol_output, args.repeat)
+        if per_node_result != snapshot_result:
+            raise AssertionError(f"Classifications returned different nodes for {size} nodes")
+        print(f"{size:>8} {per_node_time:>8.3f}s {snapshot_time:>8.3f}s {per_node_time / snapshot_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the hostlist expansion of common.hostlist with the previous get_node_list/convert_range_to_list implementation.
+
+Every size is benchmarked with a contiguous range and with a fragmented range, i.e. one range every 2 nodes, which is
+the worst case for the previous implementation.
+Usage: PYTHONPATH=src python util/benchmarks/benchmark_hostlist.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import re
+import time
+
+from common.hostlist import compress_hostlist, count_hostlist, expand_hostlist
+
+
+def _legacy_convert_range_to_list(node_range):
+    return sum(
+        (
+            (list(range(*[int(j) + k for k, j in enumerate(i.split("-"))])) if "-" in i else [int(i)])
+            for i in node_range.split(",")
+        ),
+        [],
+    )
+
+
+def _legacy_get_node_list(nodenames):
+    matches = re.findall(r"((([a-z0-9\-]+)-(st|dy)-([a-z0-9\-]+)-)(\[[\d+,-]+\]|\d+))(,|$)", nodenames)
+    node_list = []
+    for match in matches:
+        nodename, prefix, _, _, _, nodes, _ = match
+        if "[" not in nodes:
+            node_list.append(nodename)
+        else:
+            node_list += [prefix + str(n) for n in _legacy_convert_range_to_list(nodes.strip("[]"))]
+    return node_list
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'layout':>10} {'legacy':>9} {'expand':>9} {'count':>9} {'compress':>9} {'speedup':>8}")
+    for size in args.sizes:
+        layouts = {
+            "contiguous": f"queue1-dy-cr1-[1-{size}]",
+            "fragmented": "queue1-dy-cr1-[{0}]".format(",".join(f"{i}-{i + 1}" for i in range(1, 2 * size, 4))),
+        }
+        for layout, hostlist in layouts.items():
+            legacy_nodes, legacy_time = _timed(_legacy_get_node_list, hostlist)
+            nodes, expand_time = _timed(expand_hostlist, hostlist)
+            count, count_time = _timed(count_hostlist, hostlist)
+            compressed, compress_time = _timed(compress_hostlist, nodes)
+            if nodes != legacy_nodes or count != len(nodes) or compressed != [hostlist]:
+                raise AssertionError(f"Implementations returned different nodes for {size} {layout} nodes")
+            print(
+                f"{size:>8} {layout:>10} {legacy_time:>8.4f}s {expand_time:>8.4f}s {count_time:>8.4f}s "
+                f"{compress_time:>8.4f}s {legacy_time / expand_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the text and JSON backends of get_nodes_info on synthetic scontrol show nodes dumps.
+
+The text backend cost includes the awk/grep pipeline, executed locally on the synthetic scontrol output.
+Usage: PYTHONPATH=src python util/benchmarks/benchmark_nodes_info.py [--sizes 10000 50000 100000]
+"""
+
+import argparse
+import subprocess  # nosec B404
+import time
+
+from common.schedulers.slurm_commands import SCONTROL_OUTPUT_AWK_PARSER, _parse_nodes_info, _parse_nodes_info_json
+from synthetic_slurm import generate_nodes, scontrol_show_nodes_json, scontrol_show_nodes_text
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _run_awk_parser(scontrol_output):
+    return subprocess.run(  # nosec B602
+        SCONTROL_OUTPUT_AWK_PARSER, input=scontrol_output, shell=True, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 50000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'awk+grep':>10} {'text parse':>11} {'text total':>11} {'json parse':>11} {'speedup':>8}")
+    for size in args.sizes:
+        nodes = generate_nodes(size)
+        filtered_output, awk_time = _timed(_run_awk_parser, scontrol_show_nodes_text(nodes))
+        text_nodes, text_time = _timed(_parse_nodes_info, filtered_output)
+        json_nodes, json_time = _timed(_parse_nodes_info_json, scontrol_show_nodes_json(nodes))
+        if text_nodes != json_nodes:
+            raise AssertionError(f"Backends returned different nodes for {size} nodes")
+        text_total = awk_time + text_time
+        print(
+            f"{size:>8} {awk_time:>9.3f}s {text_time:>10.3f}s {text_total:>10.3f}s {json_time:>10.3f}s "
+            f"{text_total / json_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measure memory footprint, construction time and state predicate throughput of SlurmNode objects.
+
+Nodes are built from synthetic scontrol show nodes JSON output, as done by get_nodes_info.
+Usage: PYTHONPATH=src python util/benchmarks/benchmark_slurm_nodes.py [--sizes 10000 100000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from common.schedulers.slurm_commands import _parse_nodes_info_json
+from synthetic_slurm import generate_nodes, scontrol_show_nodes_json
+
+
+def _classify(nodes):
+    """Evaluate the state predicates used by clustermgtd at every iteration."""
+    counters = [0] * 6
+    for node in nodes:
+        counters[0] += bool(node.is_state_healthy(True, True, log_warn_if_unhealthy=False))
+        counters[1] += bool(node.is_power())
+        counters[2] += bool(node.is_online())
+        counters[3] += bool(node.is_powering_down_with_nodeaddr())
+        counters[4] += bool(node.is_running_job())
+        counters[5] += bool(node.is_idle())
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'memory':>10} {'per node':>9} {'build':>8} {'gc':>8} {'classify':>9}")
+    for size in args.sizes:
+        scontrol_output = scontrol_show_nodes_json(generate_nodes(size))
+        gc.collect()
+        tracemalloc.start()
+        nodes = _parse_nodes_info_json(scontrol_output)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del nodes
+        gc.collect()
+
+        start = time.perf_counter()
+        nodes = _parse_nodes_info_json(scontrol_output)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        gc.collect()
+        gc_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            _classify(nodes)
+        classify_time = (time.perf_counter() - start) / args.repeat
+
+        print(
+            f"{size:>8} {memory / 2**20:>8.1f}MB {memory / size:>8.0f}B {build_time:>7.3f}s {gc_time:>7.3f}s "
+            f"{classify_time:>8.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,623 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Record and replay simulator of clustermgtd, used to benchmark ClusterManager.manage_cluster on large clusters.
+
+A snapshot holds the output of the Slurm commands, the EC2 instances, the EC2 instance statuses and the fleet config
+of a cluster. Snapshots are either recorded on the head node of a running cluster or generated for synthetic clusters
+of any size and failure mix.
+The replay runs manage_cluster on a snapshot, with Slurm commands and EC2 calls served by fake backends: Slurm updates
+are accepted and ignored, terminated instances are no longer returned as alive. Boto3 clients are real clients, so
+requests are validated and paginated as in production, but no request is sent.
+Every iteration reports wall time, AWS API calls, Slurm command calls and peak memory.
+
+Usage:
+  PYTHONPATH=src:util/benchmarks python util/benchmarks/clustermgtd_simulator.py generate --nodes 100000 \\
+      --output cluster.json
+  PYTHONPATH=src:util/benchmarks python util/benchmarks/clustermgtd_simulator.py replay cluster.json --iterations 3 \\
+      [--option nodes_info_backend=json --option cluster_snapshot_classification=true]
+  # On the head node of a cluster, as root
+  PYTHONPATH=src:util/benchmarks python util/benchmarks/clustermgtd_simulator.py record --output cluster.json
+"""
+
+import argparse
+import configparser
+import fnmatch
+import json
+import logging
+import os
+import random
+import re
+import resource
+import subprocess  # nosec B404
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from common import metrics
+from common.hostlist import compress_hostlist
+from common.schedulers.slurm_commands import (
+    SCONTROL,
+    SINFO,
+    SINFO_PARTITION_STATES,
+    PartitionNodelistMapping,
+    _parse_sinfo_partitions_info,
+)
+from common.utils import check_command_output
+from slurm_plugin.clustermgtd import EC2_CONSISTENCY_WAIT_TIME, ClusterManager, ClustermgtdConfig
+from synthetic_slurm import NODE_STATES, generate_nodes, scontrol_show_nodes_json, scontrol_show_nodes_text
+
+from aws.common import Boto3ClientRegistry
+
+DEFAULT_CONFIG_FILE = "/etc/parallelcluster/slurm_plugin/parallelcluster_clustermgtd.conf"
+# Keys of the EC2 responses holding timestamps, stored as ISO 8601 strings in snapshots
+TIMESTAMP_KEYS = {"LaunchTime", "ImpairedSince", "NotBefore", "NotAfter", "NotBeforeDeadline"}
+SINFO_AVAILABILITY = {state: availability for availability, state in SINFO_PARTITION_STATES.items()}
+_subprocess_run = subprocess.run
+
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _parse_timestamps(value):
+    """Convert the timestamps of EC2 responses loaded from JSON back to datetime objects, as returned by boto3."""
+    if isinstance(value, dict):
+        return {
+            key: datetime.fromisoformat(item) if key in TIMESTAMP_KEYS else _parse_timestamps(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_parse_timestamps(item) for item in value]
+    return value
+
+
+def load_snapshot(snapshot_file):
+    with open(snapshot_file, encoding="utf-8") as file:
+        snapshot = json.load(file)
+    snapshot["instances"] = _parse_timestamps(snapshot["instances"])
+    snapshot["instance_statuses"] = _parse_timestamps(snapshot["instance_statuses"])
+    return snapshot
+
+
+def save_snapshot(snapshot, snapshot_file):
+    with open(snapshot_file, "w", encoding="utf-8") as file:
+        json.dump(snapshot, file, default=_to_json)
+
+
+def record_snapshot(config_file):
+    """Record a snapshot of the cluster clustermgtd runs on, only read-only Slurm commands and EC2 calls are used."""
+    config = ClustermgtdConfig(config_file)
+    partition_nodelist_mapping = PartitionNodelistMapping.instance().get_partition_nodelist_mapping()
+    sinfo_output = check_command_output(f'{SINFO} -h -p {",".join(partition_nodelist_mapping)} -o "%R %a %N"')
+    partitions = [
+        {"name": partition.name, "state": partition.state, "nodes": partition.nodenames}
+        for partition in _parse_sinfo_partitions_info(sinfo_output)
+    ]
+    nodes = ",".join(partition["nodes"] for partition in partitions if partition["nodes"])
+    ec2_client = boto3.client("ec2", region_name=config.region)
+    instances = list(
+        ec2_client.get_paginator("describe_instances")
+        .paginate(Filters=[{"Name": "tag:parallelcluster:cluster-name", "Values": [config.cluster_name]}])
+        .search("Reservations[].Instances[]")
+    )
+    instance_ids = {instance["InstanceId"] for instance in instances}
+    instance_statuses = [
+        instance_status
+        for instance_status in ec2_client.get_paginator("describe_instance_status")
+        .paginate()
+        .search("InstanceStatuses")
+        if instance_status["InstanceId"] in instance_ids
+    ]
+    return {
+        "cluster_name": config.cluster_name,
+        "region": config.region,
+        "partition_nodelist_mapping": partition_nodelist_mapping,
+        "partitions": partitions,
+        "scontrol_show_nodes": check_command_output(f"{SCONTROL} show nodes {nodes}"),
+        "scontrol_show_nodes_json": check_command_output(f"{SCONTROL} --json show nodes {nodes}"),
+        "instances": instances,
+        "instance_statuses": instance_statuses,
+        "fleet_config": config.fleet_config,
+    }
+
+
+def _node_states(unhealthy_node_ratio):
+    """Return NODE_STATES with the DOWN and DRAIN states weighted to make up the given ratio of the nodes."""
+    healthy_states = [(state, weight) for state, weight in NODE_STATES if not {"DOWN", "DRAIN"} & set(state)]
+    unhealthy_states = [(state, weight) for state, weight in NODE_STATES if {"DOWN", "DRAIN"} & set(state)]
+    healthy_weight = sum(weight for _, weight in healthy_states)
+    unhealthy_weight = sum(weight for _, weight in unhealthy_states)
+    return [(state, weight * (1 - unhealthy_node_ratio) / healthy_weight) for state, weight in healthy_states] + [
+        (state, weight * unhealthy_node_ratio / unhealthy_weight) for state, weight in unhealthy_states
+    ]
+
+
+def _instance(cluster_name, index, private_ip, queue, compute_resource, launch_time):
+    private_dns_name = f"ip-{private_ip.replace('.', '-')}.ec2.internal"
+    return {
+        "InstanceId": f"i-{index:017x}",
+        "InstanceType": "c5.xlarge",
+        "State": {"Code": 16, "Name": "running"},
+        "PrivateIpAddress": private_ip,
+        "PrivateDnsName": private_dns_name,
+        "NetworkInterfaces": [
+            {
+                "Attachment": {"DeviceIndex": 0, "NetworkCardIndex": 0},
+                "PrivateIpAddress": private_ip,
+                "PrivateDnsName": private_dns_name,
+                "PrivateIpAddresses": [{"PrivateIpAddress": private_ip, "Primary": True}],
+            }
+        ],
+        "LaunchTime": launch_time,
+        "Tags": [
+            {"Key": "parallelcluster:cluster-name", "Value": cluster_name},
+            {"Key": "parallelcluster:node-type", "Value": "Compute"},
+            {"Key": "parallelcluster:queue-name", "Value": queue},
+            {"Key": "parallelcluster:compute-resource-name", "Value": compute_resource},
+        ],
+    }
+
+
+def _instance_status(instance, impaired, scheduled_event, current_time):
+    instance_status = {"Status": "ok", "Details": [{"Name": "reachability", "Status": "passed"}]}
+    if impaired:
+        instance_status = {
+            "Status": "impaired",
+            "Details": [
+                {"Name": "reachability", "Status": "failed", "ImpairedSince": current_time - timedelta(hours=1)}
+            ],
+        }
+    events = []
+    if scheduled_event:
+        events.append(
+            {
+                "Code": "system-reboot",
+                "Description": "scheduled reboot",
+                "NotBefore": current_time + timedelta(days=1),
+            }
+        )
+    return {
+        "InstanceId": instance["InstanceId"],
+        "InstanceState": instance["State"],
+        "InstanceStatus": instance_status,
+        "SystemStatus": {"Status": "ok", "Details": [{"Name": "reachability", "Status": "passed"}]},
+        "Events": events,
+    }
+
+
+def generate_snapshot(args):
+    """Generate the snapshot of a synthetic cluster with the size and failure mix given by the command line args."""
+    rng = random.Random(args.seed)
+    current_time = datetime.now(tz=timezone.utc)
+    launch_time = current_time - timedelta(days=1)
+    nodes = generate_nodes(
+        args.nodes, args.queues, args.compute_resources, args.seed, _node_states(args.unhealthy_node_ratio)
+    )
+    instances, instance_statuses = [], []
+    for node in nodes:
+        if node["address"] == node["name"] or rng.random() < args.missing_instance_ratio:
+            continue
+        queue, _, compute_resource, _ = node["name"].split("-", 3)
+        instance = _instance(args.cluster_name, len(instances), node["address"], queue, compute_resource, launch_time)
+        instances.append(instance)
+        instance_statuses.append(
+            _instance_status(
+                instance,
+                rng.random() < args.unhealthy_instance_ratio,
+                rng.random() < args.scheduled_event_ratio,
+                current_time,
+            )
+        )
+    for index in range(int(args.nodes * args.orphaned_instance_ratio)):
+        private_ip = f"10.255.{index // 250}.{index % 250}"
+        instances.append(_instance(args.cluster_name, len(instances), private_ip, "queue0", "cr0", launch_time))
+
+    queues = {}
+    for node in nodes:
+        queues.setdefault(node["partitions"][0], []).append(node["name"])
+    partition_nodelist_mapping = {queue: ",".join(compress_hostlist(names)) for queue, names in queues.items()}
+    return {
+        "cluster_name": args.cluster_name,
+        "region": "us-east-1",
+        "partition_nodelist_mapping": partition_nodelist_mapping,
+        "partitions": [
+            {"name": queue, "state": "UP", "nodes": nodelist} for queue, nodelist in partition_nodelist_mapping.items()
+        ],
+        "scontrol_show_nodes": scontrol_show_nodes_text(nodes),
+        "scontrol_show_nodes_json": scontrol_show_nodes_json(nodes),
+        "instances": instances,
+        "instance_statuses": instance_statuses,
+        "fleet_config": {
+            queue: {
+                f"cr{index}": {"Api": "run-instances", "Instances": [{"InstanceType": "c5.xlarge"}]}
+                for index in range(args.compute_resources)
+            }
+            for queue in queues
+        },
+    }
+
+
+class FakeSlurm:
+    """Serve the Slurm commands run by clustermgtd from a snapshot, replacing subprocess.run."""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self._partitions = {partition["name"]: partition for partition in snapshot["partitions"]}
+        self._commands = [
+            (re.compile(r"get-compute-fleet-status\.sh"), self._get_compute_fleet_status),
+            (re.compile(r"scontrol --json show nodes"), lambda _: self._snapshot["scontrol_show_nodes_json"]),
+            (re.compile(r"scontrol show nodes .*?\| (.*)"), self._show_nodes),
+            (re.compile(r"scontrol show partitions"), self._show_partitions),
+            (re.compile(r'sinfo -h -p (\S+) -o "?%R %a %N'), self._sinfo_partitions),
+            (re.compile(r"sinfo -h -p (\S+) -o %N"), self._sinfo_partition_nodes),
+            (re.compile(r"sinfo -h -N"), lambda _: ""),
+            (re.compile(r"scontrol update"), lambda _: ""),
+        ]
+
+    def run(self, command, *args, **kwargs):
+        command_line = command if isinstance(command, str) else " ".join(command)
+        for pattern, handler in self._commands:
+            match = pattern.search(command_line)
+            if match:
+                return subprocess.CompletedProcess(command, 0, stdout=handler(match))
+        raise NotImplementedError(f"Command not supported by the simulator: {command_line}")
+
+    @staticmethod
+    def _get_compute_fleet_status(_):
+        return json.dumps({"status": "RUNNING", "lastStatusUpdatedTime": datetime.now(tz=timezone.utc).isoformat()})
+
+    def _show_nodes(self, match):
+        # Run the awk/grep pipeline of the text backend on the recorded scontrol output
+        return _subprocess_run(  # nosec B602
+            match.group(1),
+            input=self._snapshot["scontrol_show_nodes"],
+            shell=True,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    def _show_partitions(self, _):
+        return "".join(f"{partition['name']}\n{partition['state']}\n" for partition in self._partitions.values())
+
+    def _sinfo_partitions(self, match):
+        partitions = [self._partitions[name] for name in match.group(1).split(",") if name in self._partitions]
+        return "".join(
+            f"{partition['name']} {SINFO_AVAILABILITY.get(partition['state'], 'up')} {partition['nodes']}\n"
+            for partition in partitions
+        )
+
+    def _sinfo_partition_nodes(self, match):
+        return ",".join(
+            self._partitions[name]["nodes"] for name in match.group(1).split(",") if name in self._partitions
+        )
+
+
+class FakeAWS:
+    """
+    Serve the EC2 and DynamoDB calls of clustermgtd from a snapshot, as a before-call handler of the boto3 clients.
+
+    Calls to any other operation fail, so that no request is ever sent to AWS.
+    """
+
+    PRIVATE_IP_FILTER = "network-interface.addresses.private-ip-address"
+    FILTER_VALUES = {
+        "instance-id": lambda resource: [resource["InstanceId"]],
+        "instance-state-name": lambda resource: [resource["State"]["Name"]],
+        "launch-time": lambda resource: [resource["LaunchTime"].strftime("%Y-%m-%dT%H:%M:%S.000Z")],
+        PRIVATE_IP_FILTER: lambda resource: [
+            address["PrivateIpAddress"]
+            for network_interface in resource["NetworkInterfaces"]
+            for address in network_interface.get("PrivateIpAddresses", [])
+        ],
+        "instance-status.status": lambda resource: [resource["InstanceStatus"]["Status"]],
+        "system-status.status": lambda resource: [resource["SystemStatus"]["Status"]],
+        "event.code": lambda resource: [event["Code"] for event in resource.get("Events", [])],
+    }
+
+    def __init__(self, snapshot):
+        self._cluster_name = snapshot["cluster_name"]
+        self._instances = {instance["InstanceId"]: instance for instance in snapshot["instances"]}
+        self._instance_statuses = {status["InstanceId"]: status for status in snapshot["instance_statuses"]}
+        self._private_ip_index = {}
+        for instance in self._instances.values():
+            self._add_to_private_ip_index(instance)
+        self._pages = {}
+        self.busy_time = 0
+        self._handlers = {
+            "DescribeInstances": self._describe_instances,
+            "DescribeInstanceStatus": self._describe_instance_status,
+            "TerminateInstances": self._terminate_instances,
+            "DescribeCapacityReservations": lambda _: {"CapacityReservations": []},
+            "GetConsoleOutput": lambda params: {"InstanceId": params["InstanceId"], "Output": ""},
+            "RunInstances": self._run_instances,
+            "CreateFleet": self._create_fleet,
+            "BatchWriteItem": lambda _: {"UnprocessedItems": {}},
+        }
+
+    def register(self, events):
+        """Register the handlers serving the AWS calls, they run after the handlers of the clients."""
+        events.register_last("before-parameter-build", self._save_params)
+        events.register_last("before-call", self._handle)
+
+    @staticmethod
+    def _save_params(params, context, **kwargs):
+        # before-call handlers receive the serialized request, keep the API call parameters in the request context
+        context["simulator_params"] = dict(params)
+
+    def _handle(self, model, context, **kwargs):
+        handler = self._handlers.get(model.name)
+        if handler is None:
+            raise NotImplementedError(f"AWS operation not supported by the simulator: {model.name}")
+        start_time = time.perf_counter()
+        response = handler(context["simulator_params"])
+        self.busy_time += time.perf_counter() - start_time
+        return AWSResponse(None, 200, {}, None), response
+
+    def _add_to_private_ip_index(self, instance):
+        for private_ip in self.FILTER_VALUES[self.PRIVATE_IP_FILTER](instance):
+            self._private_ip_index.setdefault(private_ip, []).append(instance)
+
+    @classmethod
+    def _filter_values(cls, name):
+        if name.startswith("tag:"):
+            key = name.split(":", 1)[1]
+            return lambda resource: [tag["Value"] for tag in resource.get("Tags", []) if tag["Key"] == key]
+        return cls.FILTER_VALUES[name]
+
+    @classmethod
+    def _filter(cls, resources, filters):
+        for resource_filter in filters:
+            get_values = cls._filter_values(resource_filter["Name"])
+            exact_values = {value for value in resource_filter["Values"] if not set("*?") & set(value)}
+            patterns = [value for value in resource_filter["Values"] if value not in exact_values]
+            resources = [
+                resource
+                for resource in resources
+                if any(
+                    value in exact_values or any(fnmatch.fnmatchcase(value, pattern) for pattern in patterns)
+                    for value in get_values(resource)
+                )
+            ]
+        return resources
+
+    def _paginate(self, params, result_key, get_resources):
+        """Return a page of resources, the resources of following pages are kept until their page is requested."""
+        token = params.get("NextToken")
+        resources = self._pages.pop(token) if token else get_resources()
+        page_size = params.get("MaxResults") or len(resources) or 1
+        response = {result_key: resources[:page_size]}
+        if len(resources) > page_size:
+            response["NextToken"] = f"token-{len(self._pages)}-{time.monotonic_ns()}"
+            self._pages[response["NextToken"]] = resources[page_size:]
+        return response
+
+    def _describe_instances(self, params):
+        def _get_instances():
+            filters = params.get("Filters", [])
+            private_ips = next((item["Values"] for item in filters if item["Name"] == self.PRIVATE_IP_FILTER), [])
+            if params.get("InstanceIds"):
+                instances = [self._instances[instance_id] for instance_id in params["InstanceIds"]]
+            elif private_ips and not any(set("*?") & set(private_ip) for private_ip in private_ips):
+                # Use the index rather than matching every instance, as done for the nodes without backing instance
+                instances = [instance for ip in private_ips for instance in self._private_ip_index.get(ip, [])]
+            else:
+                instances = list(self._instances.values())
+            return self._filter(instances, filters)
+
+        response = self._paginate(params, "Instances", _get_instances)
+        response["Reservations"] = [{"Instances": response.pop("Instances")}]
+        return response
+
+    def _describe_instance_status(self, params):
+        def _get_instance_statuses():
+            instance_statuses = [
+                instance_status
+                for instance_id, instance_status in self._instance_statuses.items()
+                if self._instances[instance_id]["State"]["Name"] == "running"
+            ]
+            return self._filter(instance_statuses, params.get("Filters", []))
+
+        return self._paginate(params, "InstanceStatuses", _get_instance_statuses)
+
+    def _terminate_instances(self, params):
+        terminating_instances = []
+        for instance_id in params["InstanceIds"]:
+            instance = self._instances.get(instance_id)
+            if instance:
+                terminating_instances.append(
+                    {
+                        "InstanceId": instance_id,
+                        "PreviousState": instance["State"],
+                        "CurrentState": {"Code": 32, "Name": "shutting-down"},
+                    }
+                )
+                instance["State"] = {"Code": 48, "Name": "terminated"}
+        return {"TerminatingInstances": terminating_instances}
+
+    def _launch(self, count):
+        """Launch the given number of instances, which are running and healthy right away."""
+        instances = []
+        for _ in range(count):
+            index = len(self._instances)
+            private_ip = f"10.254.{index // 250 % 250}.{index % 250}"
+            instance = _instance(self._cluster_name, index, private_ip, "", "", datetime.now(tz=timezone.utc))
+            self._instances[instance["InstanceId"]] = instance
+            self._add_to_private_ip_index(instance)
+            self._instance_statuses[instance["InstanceId"]] = _instance_status(instance, False, False, None)
+            instances.append(instance)
+        return instances
+
+    def _run_instances(self, params):
+        return {"Instances": self._launch(params["MaxCount"])}
+
+    def _create_fleet(self, params):
+        instances = self._launch(params["TargetCapacitySpecification"]["TotalTargetCapacity"])
+        return {"Instances": [{"InstanceIds": [instance["InstanceId"] for instance in instances]}], "Errors": []}
+
+
+def _write_clustermgtd_config(work_dir, snapshot, options):
+    fleet_config_file = os.path.join(work_dir, "fleet-config.json")
+    with open(fleet_config_file, "w", encoding="utf-8") as file:
+        json.dump(snapshot["fleet_config"], file)
+    config = configparser.ConfigParser()
+    config["clustermgtd"] = {
+        "region": snapshot["region"],
+        "cluster_name": snapshot["cluster_name"],
+        "dynamodb_table": f"parallelcluster-slurm-{snapshot['cluster_name']}",
+        "head_node_private_ip": "10.0.0.1",
+        "head_node_hostname": "ip-10-0-0-1",
+        "heartbeat_file_path": os.path.join(work_dir, "clustermgtd_heartbeat"),
+        "fleet_config_file": fleet_config_file,
+        "run_instances_overrides": os.path.join(work_dir, "run_instances_overrides.json"),
+        "create_fleet_overrides": os.path.join(work_dir, "create_fleet_overrides.json"),
+        "compute_console_logging_enabled": "false",
+        **dict(option.split("=", 1) for option in options),
+    }
+    config_file = os.path.join(work_dir, "parallelcluster_clustermgtd.conf")
+    with open(config_file, "w", encoding="utf-8") as file:
+        config.write(file)
+    return config_file
+
+
+def _run_iteration(cluster_manager, fake_aws, trace_memory):
+    if trace_memory:
+        tracemalloc.reset_peak()
+    fake_aws.busy_time = 0
+    iteration_metrics = metrics.start_iteration()
+    cluster_manager.manage_cluster()
+    metrics.stop_iteration()
+    report = iteration_metrics.to_dict()
+    # Time spent serving AWS calls from the snapshot, included in the duration of the iteration
+    report["simulator_time"] = fake_aws.busy_time
+    if trace_memory:
+        report["peak_memory"] = tracemalloc.get_traced_memory()[1]
+    else:
+        # Peak resident set size of the process, in kilobytes on Linux
+        report["peak_memory"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return report
+
+
+def replay_snapshot(snapshot, iterations, options, trace_memory=False, include_waits=False):
+    """
+    Run manage_cluster on the snapshot for the given number of iterations and return the metrics of each one.
+
+    Unless include_waits is set, clustermgtd does not wait for EC2 eventual consistency, which would only add idle
+    time to the iterations with nodes without a backing instance.
+    """
+    # No request is sent, dummy credentials avoid looking up credentials from the instance metadata
+    os.environ.update({"AWS_ACCESS_KEY_ID": "simulator", "AWS_SECRET_ACCESS_KEY": "simulator"})
+    os.environ.pop("AWS_PROFILE", None)
+    fake_slurm, fake_aws = FakeSlurm(snapshot), FakeAWS(snapshot)
+    boto3.setup_default_session(region_name=snapshot["region"])
+    fake_aws.register(boto3.DEFAULT_SESSION.events)
+    Boto3ClientRegistry.clear()
+    PartitionNodelistMapping.reset()
+    PartitionNodelistMapping.instance().partition_nodelist_mapping = snapshot["partition_nodelist_mapping"]
+
+    reports = []
+    with tempfile.TemporaryDirectory() as work_dir, mock.patch.object(subprocess, "run", fake_slurm.run), mock.patch(
+        "slurm_plugin.clustermgtd.EC2_CONSISTENCY_WAIT_TIME", EC2_CONSISTENCY_WAIT_TIME if include_waits else 0
+    ):
+        cluster_manager = ClusterManager(ClustermgtdConfig(_write_clustermgtd_config(work_dir, snapshot, options)))
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            for _ in range(iterations):
+                reports.append(_run_iteration(cluster_manager, fake_aws, trace_memory))
+        finally:
+            tracemalloc.stop()
+            cluster_manager.shutdown()
+    return reports
+
+
+def _print_reports(reports, show_phases):
+    print(
+        f"{'iteration':>9} {'wall time':>10} {'simulator':>10} {'aws calls':>10} {'commands':>9} {'scontrol':>9} "
+        f"{'peak memory':>12}"
+    )
+    for index, report in enumerate(reports, start=1):
+        counters = report["counters"]
+        print(
+            f"{index:>9} {report['duration']:>9.3f}s {report['simulator_time']:>9.3f}s "
+            f"{sum(counters.get('aws_api_calls', {}).values()):>10} "
+            f"{sum(counters.get('command_calls', {}).values()):>9} "
+            f"{counters.get('command_calls', {}).get('scontrol', 0):>9} {report['peak_memory'] / 2**20:>10.1f}MB"
+        )
+        if show_phases:
+            for phase, duration in sorted(report["phases"].items(), key=lambda item: item[1], reverse=True):
+                print(f"{'':>12}{phase:<40} {duration:>8.3f}s")
+            for counter, values in counters.items():
+                print(f"{'':>12}{counter}: {dict(values)}")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="record a snapshot of the cluster of this head node")
+    record_parser.add_argument("--config-file", default=os.environ.get("CONFIG_FILE", DEFAULT_CONFIG_FILE))
+    record_parser.add_argument("--output", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="generate the snapshot of a synthetic cluster")
+    generate_parser.add_argument("--output", required=True)
+    generate_parser.add_argument("--nodes", type=int, default=100000)
+    generate_parser.add_argument("--queues", type=int, default=10)
+    generate_parser.add_argument("--compute-resources", type=int, default=5, help="compute resources per queue")
+    generate_parser.add_argument("--cluster-name", default="simulated")
+    generate_parser.add_argument("--unhealthy-node-ratio", type=float, default=0.02, help="DOWN or DRAIN nodes")
+    generate_parser.add_argument("--missing-instance-ratio", type=float, default=0.001)
+    generate_parser.add_argument("--unhealthy-instance-ratio", type=float, default=0.001)
+    generate_parser.add_argument("--scheduled-event-ratio", type=float, default=0.001)
+    generate_parser.add_argument("--orphaned-instance-ratio", type=float, default=0.001)
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    replay_parser = subparsers.add_parser("replay", help="run clustermgtd iterations on a snapshot")
+    replay_parser.add_argument("snapshot")
+    replay_parser.add_argument("--iterations", type=int, default=3)
+    replay_parser.add_argument(
+        "--option", action="append", default=[], help="clustermgtd config option, e.g. nodes_info_backend=json"
+    )
+    replay_parser.add_argument("--include-waits", action="store_true", help="wait for EC2 eventual consistency")
+    replay_parser.add_argument("--trace-memory", action="store_true", help="report the peak of traced allocations")
+    replay_parser.add_argument("--phases", action="store_true", help="print phases and counters of every iteration")
+    replay_parser.add_argument("--report", help="write the metrics of every iteration to the given JSON file")
+    replay_parser.add_argument("--log-level", default="ERROR")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    if args.command == "record":
+        save_snapshot(record_snapshot(args.config_file), args.output)
+    elif args.command == "generate":
+        save_snapshot(generate_snapshot(args), args.output)
+    else:
+        logging.basicConfig(level=args.log_level)
+        reports = replay_snapshot(
+            load_snapshot(args.snapshot), args.iterations, args.option, args.trace_memory, args.include_waits
+        )
+        _print_reports(reports, args.phases)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as file:
+                json.dump(reports, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
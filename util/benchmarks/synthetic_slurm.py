@@ -0,0 +1,136 @@
+# Copyright 2025 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Generators of synthetic Slurm command outputs, used by the benchmarks in this folder."""
+
+import json
+import random
+from datetime import datetime, timezone
+
+# (state, weight) pairs used to pick the state of each synthetic node
+NODE_STATES = [
+    (["IDLE", "CLOUD", "POWERED_DOWN"], 60),
+    (["ALLOCATED", "CLOUD"], 20),
+    (["IDLE", "CLOUD"], 10),
+    (["MIXED", "CLOUD"], 5),
+    (["IDLE", "CLOUD", "POWERING_UP"], 2),
+    (["DOWN", "CLOUD", "POWERED_DOWN", "NOT_RESPONDING"], 1),
+    (["IDLE", "DRAIN", "CLOUD"], 1),
+    (["IDLE", "CLOUD", "POWERING_DOWN"], 1),
+]
+START_TIME = 1700000000
+
+
+def generate_nodes(node_count, queue_count=10, compute_resources_per_queue=5, seed=0, node_states=None):
+    """
+    Generate a list of synthetic node descriptions.
+
+    Nodes are evenly split across queues and compute resources, 10% of them are static.
+    The state of each node is picked from node_states, a list of (state, weight) pairs, NODE_STATES by default.
+    """
+    rng = random.Random(seed)
+    states, weights = zip(*(node_states or NODE_STATES))
+    nodes = []
+    per_compute_resource = max(1, node_count // (queue_count * compute_resources_per_queue))
+    index = 0
+    while len(nodes) < node_count:
+        queue = f"queue{index % queue_count}"
+        compute_resource = f"cr{(index // queue_count) % compute_resources_per_queue}"
+        for number in range(1, per_compute_resource + 1):
+            if len(nodes) >= node_count:
+                break
+            node_type = "st" if number <= per_compute_resource // 10 else "dy"
+            name = f"{queue}-{node_type}-{compute_resource}-{number + index * per_compute_resource}"
+            state = list(rng.choices(states, weights)[0])
+            has_instance = "POWERED_DOWN" not in state or node_type == "st"
+            address = f"10.{index % 250}.{number // 250}.{number % 250}" if has_instance else name
+            nodes.append(
+                {
+                    "name": name,
+                    "address": address,
+                    "hostname": name,
+                    "state": state,
+                    "partitions": [queue],
+                    "reason": "Scheduler health check failed" if "DOWN" in state or "DRAIN" in state else "",
+                    "reason_set_by_user": "root",
+                    "reason_changed_at": START_TIME,
+                    "slurmd_start_time": START_TIME + number if has_instance else 0,
+                    "last_busy": START_TIME + number,
+                    "reservation": "",
+                }
+            )
+        index += 1
+    return nodes
+
+
+def _format_timestamp(timestamp):
+    if not timestamp:
+        return "None"
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).astimezone().strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def scontrol_show_nodes_text(nodes):
+    """Return the raw output of scontrol show nodes for the given synthetic nodes."""
+    records = []
+    for node in nodes:
+        record = [
+            f"NodeName={node['name']} Arch=x86_64 CoresPerSocket=1",
+            "   CPUAlloc=0 CPUEfctv=2 CPUTot=2 CPULoad=0.03",
+            "   AvailableFeatures=dynamic,c5.xlarge,cr1",
+            "   ActiveFeatures=dynamic,c5.xlarge,cr1",
+            "   Gres=(null)",
+            f"   NodeAddr={node['address']} NodeHostName={node['hostname']} Version=23.02.7",
+            "   RealMemory=3891 AllocMem=0 FreeMem=3018 Sockets=2 Boards=1",
+            f"   State={'+'.join(node['state'])} ThreadsPerCore=1 TmpDisk=0 Weight=1 Owner=N/A MCS_label=N/A",
+            f"   Partitions={','.join(node['partitions'])}",
+            f"   BootTime=None SlurmdStartTime={_format_timestamp(node['slurmd_start_time'])}",
+            f"   LastBusyTime={_format_timestamp(node['last_busy'])} ResumeAfterTime=None",
+            "   CfgTRES=cpu=2,mem=3891M,billing=2",
+            "   AllocTRES=",
+            "   CapWatts=n/a",
+            "   CurrentWatts=0 AveWatts=0",
+            "   ExtSensorsJoules=n/s ExtSensorsWatts=0 ExtSensorsTemp=n/s",
+        ]
+        if node["reason"]:
+            record.append(
+                f"   Reason={node['reason']} "
+                f"[{node['reason_set_by_user']}@{_format_timestamp(node['reason_changed_at'])}]"
+            )
+        records.append("\n".join(record))
+    return "\n\n".join(records) + "\n\n"
+
+
+def scontrol_show_nodes_json(nodes):
+    """Return the output of scontrol --json show nodes for the given synthetic nodes."""
+
+    def _timestamp(value):
+        return {"set": bool(value), "infinite": False, "number": value}
+
+    return json.dumps(
+        {
+            "nodes": [
+                {
+                    **node,
+                    "architecture": "x86_64",
+                    "cores": 1,
+                    "cpus": 2,
+                    "features": ["dynamic", "c5.xlarge", "cr1"],
+                    "real_memory": 3891,
+                    "reason_changed_at": _timestamp(node["reason_changed_at"]),
+                    "slurmd_start_time": _timestamp(node["slurmd_start_time"]),
+                    "last_busy": _timestamp(node["last_busy"]),
+                    "tres": "cpu=2,mem=3891M,billing=2",
+                    "version": "23.02.7",
+                }
+                for node in nodes
+            ]
+        }
+    )